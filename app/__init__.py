@@ -1,3 +1,4 @@
+import atexit
 import os
 from app.main import create_app
 
@@ -20,8 +21,9 @@ from app.main.controller.api_controller import api_tickets as api_tickets_ns
 
 
 from app.main.utils.error_handlers import register_error_handlers
+from app.main.utils.commands import register_commands
 
-from app.main.core.lib.impl.file_logger import FileLogger
+from app.main.core import file_logger, quota_meter, request_log
 
 # import models to let the migrate tool know
 from app.main.model.user_model import User
@@ -35,12 +37,13 @@ from app.main.model.api_key_model import ApiKey  # noqa: F401
 from app.main.model.api_subscription_model import ApiSubscription  # noqa: F401
 from app.main.model.api_request_model import ApiRequest  # noqa: F401
 from app.main.model.api_ticket_model import ApiTicket  # noqa: F401
+from app.main.model.api_request_rollup_model import ApiRequestDayRollup  # noqa: F401
+from app.main.model.api_revenue_ledger_model import ApiRevenueLedger  # noqa: F401
 from logtail import LogtailHandler
 import logging
 
 blueprint = Blueprint("api", __name__)
 authorizations = {"apikey": {"type": "apiKey", "in": "header", "name": "Authorization"}}
-file_logger = FileLogger()
 
 api = Api(
     blueprint,
@@ -70,10 +73,21 @@ app.register_blueprint(blueprint)
 app.app_context().push()
 
 register_error_handlers(api)
+register_commands(app)
 
 with app.app_context():
     User.create_default_admin()
 
+request_log.start(app)
+
+
+@atexit.register
+def flush_gateway_buffers():
+    request_log.close()
+    with app.app_context():
+        quota_meter.flush()
+
+
 handler = LogtailHandler(
     source_token=os.getenv("SOURCE_TOKEN", "WhMxdjaNXfNUVQtHSvWbx9iq")
 )
@@ -83,6 +97,13 @@ logger.handlers = []
 logger.addHandler(handler)
 
 
+def response_body(response: Response):
+    # reading a streamed body here would buffer the whole upstream payload
+    if response.is_streamed:
+        return None
+    return response.get_json()
+
+
 @app.after_request
 def after_request(response: Response):
     if response.status_code >= 400:
@@ -92,7 +113,7 @@ def after_request(response: Response):
                 "path": request.path,
                 "method": request.method,
                 "status_code": response.status_code,
-                "response": response.get_json(),
+                "response": response_body(response),
             },
         )
         logger.error(
@@ -101,7 +122,7 @@ def after_request(response: Response):
                 "path": request.path,
                 "method": request.method,
                 "status_code": response.status_code,
-                "response": response.get_json(),
+                "response": response_body(response),
             },
         )
     else:
@@ -111,7 +132,7 @@ def after_request(response: Response):
                 "path": request.path,
                 "method": request.method,
                 "status_code": response.status_code,
-                "response": response.get_json(),
+                "response": response_body(response),
             },
         )
         logger.info(
@@ -120,7 +141,7 @@ def after_request(response: Response):
                 "path": request.path,
                 "method": request.method,
                 "status_code": response.status_code,
-                "response": response.get_json(),
+                "response": response_body(response),
             },
         )
 
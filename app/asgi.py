@@ -0,0 +1,16 @@
+"""
+ASGI entry point, answering /apis/call with the asyncio gateway and every
+other route with the Flask app:
+
+    GATEWAY_ASYNC=true uvicorn app.asgi:asgi_app --host 0.0.0.0 --port 5000
+
+uvicorn, asgiref and aiohttp are pinned in requirements.txt with the rest.
+"""
+
+from app import app
+from app.main.controller.async_gateway_controller import AsyncGatewayApp
+from app.main.core import ServicesInitializer, file_logger
+
+asgi_app = AsyncGatewayApp(
+    app, ServicesInitializer.an_async_api_call_service(app), file_logger
+)
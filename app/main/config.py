@@ -9,6 +9,115 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "my_precious_secret_key")
     DEBUG = False
+    # keep-alive pools of the shared upstream HTTP client
+    HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 100))
+    HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.05))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10))
+    # relay upstream bodies as raw chunks instead of decoding them as JSON
+    GATEWAY_STREAMING = os.getenv("GATEWAY_STREAMING", "false").lower() == "true"
+    GATEWAY_STREAM_CHUNK_SIZE = int(os.getenv("GATEWAY_STREAM_CHUNK_SIZE", 64 * 1024))
+    # bytes of a streamed response body kept in the api_request log
+    GATEWAY_LOG_BODY_LIMIT = int(os.getenv("GATEWAY_LOG_BODY_LIMIT", 4096))
+    # report the time spent in each gateway stage in a Server-Timing header
+    GATEWAY_SERVER_TIMING = (
+        os.getenv("GATEWAY_SERVER_TIMING", "false").lower() == "true"
+    )
+    # blocking upstream callers share the connection pool of the asyncio gateway
+    # served by app.asgi
+    GATEWAY_ASYNC = os.getenv("GATEWAY_ASYNC", "false").lower() == "true"
+    GATEWAY_ASYNC_CONNECTIONS = int(os.getenv("GATEWAY_ASYNC_CONNECTIONS", 1000))
+    # worker threads running the database work of the asyncio gateway
+    GATEWAY_ASYNC_DB_THREADS = int(os.getenv("GATEWAY_ASYNC_DB_THREADS", 16))
+    # seconds a compiled gateway route is trusted before being reloaded
+    ROUTE_TABLE_TTL = int(os.getenv("ROUTE_TABLE_TTL", 30))
+    # where per api key token buckets live: "memory" or "redis" (shared by workers,
+    # needs Redis 5 or newer)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+    # per api version circuit breaker over a rolling window of one-second buckets
+    CIRCUIT_BREAKER_WINDOW = int(os.getenv("CIRCUIT_BREAKER_WINDOW", 30))
+    CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", 20))
+    CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", 0.5))
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS = float(
+        os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", 5)
+    )
+    CIRCUIT_BREAKER_OPEN_SECONDS = int(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", 30))
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(
+        os.getenv("CIRCUIT_BREAKER_HALF_OPEN_PROBES", 3)
+    )
+    # gateway calls admitted at once, queued by plan tier when the gateway is full
+    GATEWAY_MAX_CONCURRENT_CALLS = int(os.getenv("GATEWAY_MAX_CONCURRENT_CALLS", 64))
+    GATEWAY_MAX_QUEUED_CALLS = int(os.getenv("GATEWAY_MAX_QUEUED_CALLS", 128))
+    GATEWAY_QUEUE_TIMEOUT = float(os.getenv("GATEWAY_QUEUE_TIMEOUT", 1.0))
+    # share of freed slots each plan tier gets while several of them wait
+    GATEWAY_TIER_WEIGHTS = os.getenv(
+        "GATEWAY_TIER_WEIGHTS", "free:1,standard:4,premium:16"
+    )
+    # bounds and starting point of the latency driven limit on gateway calls in flight
+    GATEWAY_LIMIT_INITIAL = int(os.getenv("GATEWAY_LIMIT_INITIAL", 200))
+    GATEWAY_LIMIT_MIN = int(os.getenv("GATEWAY_LIMIT_MIN", 8))
+    GATEWAY_LIMIT_MAX = int(os.getenv("GATEWAY_LIMIT_MAX", 1000))
+    # calls per latency sample window, and how far it may exceed the long average
+    GATEWAY_LIMIT_WINDOW = int(os.getenv("GATEWAY_LIMIT_WINDOW", 50))
+    GATEWAY_LIMIT_TOLERANCE = float(os.getenv("GATEWAY_LIMIT_TOLERANCE", 2.0))
+    # tokens a quiet api version gets per second for retries and hedges, and the
+    # most it may save up
+    GATEWAY_RETRY_RESERVE_PER_SECOND = float(
+        os.getenv("GATEWAY_RETRY_RESERVE_PER_SECOND", 1.0)
+    )
+    GATEWAY_RETRY_MAX_BALANCE = float(os.getenv("GATEWAY_RETRY_MAX_BALANCE", 10.0))
+    # base of the jittered exponential backoff between retries, in seconds
+    GATEWAY_RETRY_BACKOFF = float(os.getenv("GATEWAY_RETRY_BACKOFF", 0.05))
+    # upstream attempts recorded before a version's latency percentile is trusted
+    # for hedging, the seconds a recorded latency counts for before it starts
+    # aging out, and the threads running hedged attempts
+    GATEWAY_HEDGE_MIN_SAMPLES = int(os.getenv("GATEWAY_HEDGE_MIN_SAMPLES", 20))
+    GATEWAY_HEDGE_WINDOW = float(os.getenv("GATEWAY_HEDGE_WINDOW", 60))
+    GATEWAY_HEDGE_THREADS = int(os.getenv("GATEWAY_HEDGE_THREADS", 32))
+    # upstream targets failing this many calls in a row are left out for a while,
+    # never more than this share of a version's targets at once
+    UPSTREAM_EJECT_AFTER = int(os.getenv("UPSTREAM_EJECT_AFTER", 5))
+    UPSTREAM_EJECT_SECONDS = float(os.getenv("UPSTREAM_EJECT_SECONDS", 30))
+    UPSTREAM_MAX_EJECTED = float(os.getenv("UPSTREAM_MAX_EJECTED", 0.5))
+    # threads copying calls to mirror versions, and how many copies may wait
+    # before further ones are dropped
+    GATEWAY_MIRROR_THREADS = int(os.getenv("GATEWAY_MIRROR_THREADS", 4))
+    GATEWAY_MIRROR_MAX_PENDING = int(os.getenv("GATEWAY_MIRROR_MAX_PENDING", 1000))
+    # upstream calls in flight per api, and how many may wait how long for a slot
+    BULKHEAD_MAX_CONCURRENT_CALLS = int(os.getenv("BULKHEAD_MAX_CONCURRENT_CALLS", 20))
+    BULKHEAD_MAX_QUEUED_CALLS = int(os.getenv("BULKHEAD_MAX_QUEUED_CALLS", 10))
+    BULKHEAD_QUEUE_TIMEOUT = float(os.getenv("BULKHEAD_QUEUE_TIMEOUT", 0.5))
+    # bounds of the in-memory cache of upstream GET responses
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 10000))
+    RESPONSE_CACHE_MAX_BYTES = int(
+        os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+    )
+    # seconds an api key -> subscription snapshot is trusted before being reloaded
+    KEY_PRINCIPAL_TTL = int(os.getenv("KEY_PRINCIPAL_TTL", 5))
+    # in-memory quota counters, used when the database has no UPDATE ... RETURNING
+    QUOTA_METER_STRIPES = int(os.getenv("QUOTA_METER_STRIPES", 64))
+    QUOTA_METER_FLUSH_EVERY = int(os.getenv("QUOTA_METER_FLUSH_EVERY", 100))
+    QUOTA_METER_FLUSH_INTERVAL = float(os.getenv("QUOTA_METER_FLUSH_INTERVAL", 1.0))
+    # background writer for gateway request logs, full policy is block, drop or spill,
+    # the async gateway spills where it would block
+    REQUEST_LOG_QUEUE_SIZE = int(os.getenv("REQUEST_LOG_QUEUE_SIZE", 10000))
+    REQUEST_LOG_BATCH_SIZE = int(os.getenv("REQUEST_LOG_BATCH_SIZE", 500))
+    REQUEST_LOG_FLUSH_INTERVAL = float(os.getenv("REQUEST_LOG_FLUSH_INTERVAL", 1.0))
+    REQUEST_LOG_FULL_POLICY = os.getenv("REQUEST_LOG_FULL_POLICY", "block")
+    REQUEST_LOG_SPILL_PATH = os.getenv(
+        "REQUEST_LOG_SPILL_PATH", "logs/spill/api_requests.jsonl"
+    )
+    # api_request rows read per chunk when the traffic rollups are backfilled
+    REQUEST_ROLLUP_BACKFILL_CHUNK = int(
+        os.getenv("REQUEST_ROLLUP_BACKFILL_CHUNK", 5000)
+    )
+    # api_subscription rows read per chunk when the revenue ledger is rebuilt or checked
+    REVENUE_LEDGER_REBUILD_CHUNK = int(os.getenv("REVENUE_LEDGER_REBUILD_CHUNK", 5000))
+    # most buckets a single analytics query may answer
+    ANALYTICS_MAX_BUCKETS = int(os.getenv("ANALYTICS_MAX_BUCKETS", 10000))
+    # most rows counted for an estimated list total when the database has no estimate
+    PAGINATION_COUNT_CAP = int(os.getenv("PAGINATION_COUNT_CAP", 10000))
 
 
 class DevelopmentConfig(Config):
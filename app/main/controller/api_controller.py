@@ -1,4 +1,4 @@
-from flask import request, g as top_g, Response
+from flask import request, g as top_g, Response, stream_with_context
 from flask_restx import Resource
 
 from app.main.controller.dtos.api_dto import ApiDto
@@ -12,6 +12,7 @@ from app.main.utils.decorators.discussion import (
 from app.main.utils.roles import Role
 
 from app.main.core import ServicesInitializer
+from app.main.config import Config
 
 from http import HTTPStatus
 
@@ -97,6 +98,10 @@ class GetApis(Resource):
     @api.doc("get apis")
     @api.param("page", "The page number")
     @api.param("per_page", "The number of items per page")
+    @api.param(
+        "cursor", "Keyset pagination cursor, empty for the first page, replaces page"
+    )
+    @api.param("count", "How the total is counted: exact, estimate or none")
     @api.param("categoryIds", "The category ID", type="array")
     @api.param("status", "The status of the apis")
     @api.param("supplierId", "The supplier id")
@@ -115,6 +120,10 @@ class GetMyApis(Resource):
     @api.doc("get my apis")
     @api.param("page", "The page number")
     @api.param("per_page", "The number of items per page")
+    @api.param(
+        "cursor", "Keyset pagination cursor, empty for the first page, replaces page"
+    )
+    @api.param("count", "How the total is counted: exact, estimate or none")
     @api.param("category_ids", "The category ID", type="array")
     @api.param("status", "The status of the apis")
     @api.param("search", "The search query")
@@ -277,6 +286,34 @@ class GetMyApiServiceLevel(Resource):
         }, HTTPStatus.OK
 
 
+@api.route("/mine/<int:id>/circuit-breakers")
+class GetMyApiCircuitBreakers(Resource):
+    @api.doc("get my api circuit breakers")
+    @api.response(HTTPStatus.OK, "Success", ApiDto.api_circuit_breakers_response)
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id):
+        breakers = ServicesInitializer.an_api_service().get_api_circuit_breakers(
+            api_id=id, supplier_id=top_g.user.get("id")
+        )
+        return {
+            "data": breakers,
+        }, HTTPStatus.OK
+
+
+@api.route("/mine/<int:id>/bulkheads")
+class GetMyApiBulkheads(Resource):
+    @api.doc("get my api bulkheads")
+    @api.response(HTTPStatus.OK, "Success", ApiDto.api_bulkheads_response)
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id):
+        bulkheads = ServicesInitializer.an_api_service().get_api_bulkheads(
+            api_id=id, supplier_id=top_g.user.get("id")
+        )
+        return {
+            "data": bulkheads,
+        }, HTTPStatus.OK
+
+
 @api.route("/mine/<int:id>/popularity")
 class GetMyApiPopularity(Resource):
     @api.doc("get my api popularity")
@@ -391,6 +428,76 @@ class GetMyApiVersion(Resource):
         }, HTTPStatus.OK
 
 
+@api_version.route("/mine/<int:id>/versions/<string:version>/latency")
+class GetMyApiVersionLatency(Resource):
+    @api_version.doc("get my version latency percentiles")
+    @api_version.response(HTTPStatus.OK, "Success", ApiDto.api_version_latency_response)
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id, version):
+        latency = ServicesInitializer.an_api_version_service().get_latency_percentiles(
+            api_id=id,
+            version=version,
+            supplier_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+        )
+        return {
+            "data": latency,
+        }, HTTPStatus.OK
+
+
+@api_version.route("/mine/<int:id>/versions/<string:version>/targets")
+class GetMyApiVersionTargets(Resource):
+    @api_version.doc("get my version upstream targets")
+    @api_version.response(HTTPStatus.OK, "Success", ApiDto.api_version_targets_response)
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id, version):
+        targets = ServicesInitializer.an_api_version_service().get_upstream_targets(
+            api_id=id,
+            version=version,
+            supplier_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+        )
+        return {
+            "data": targets,
+        }, HTTPStatus.OK
+
+
+@api_version.route("/mine/<int:id>/versions/<string:version>/mirror")
+class GetMyApiVersionMirrorComparison(Resource):
+    @api_version.doc("get my version mirrored traffic comparison")
+    @api_version.response(HTTPStatus.OK, "Success", ApiDto.api_version_mirror_response)
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id, version):
+        comparison = ServicesInitializer.an_api_version_service().get_mirror_comparison(
+            api_id=id,
+            version=version,
+            supplier_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+        )
+        return {
+            "data": comparison,
+        }, HTTPStatus.OK
+
+
+@api_version.route("/mine/<int:id>/versions/<string:version>/cache")
+class GetMyApiVersionCacheStats(Resource):
+    @api_version.doc("get my version response cache stats")
+    @api_version.response(
+        HTTPStatus.OK, "Success", ApiDto.api_version_cache_stats_response
+    )
+    @role_token_required([Role.SUPPLIER])
+    def get(self, id, version):
+        stats = ServicesInitializer.an_api_version_service().get_response_cache_stats(
+            api_id=id,
+            version=version,
+            supplier_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+        )
+        return {
+            "data": stats,
+        }, HTTPStatus.OK
+
+
 @api_version.route("/<int:id>/versions/<string:version>/activate")
 class ActivateVersion(Resource):
     @api_version.doc("activate version")
@@ -421,6 +528,23 @@ class DeactivateVersion(Resource):
         return Response(status=HTTPStatus.OK)
 
 
+@api_version.route("/<int:id>/versions/<string:version>/routing")
+class UpdateVersionRouting(Resource):
+    @api_version.doc("update version canary and mirror routing")
+    @api_version.expect(ApiDto.update_api_version_routing_request, validate=True)
+    @api_version.response(HTTPStatus.OK, "Success")
+    @role_token_required([Role.SUPPLIER, Role.ADMIN])
+    def patch(self, id, version):
+        ServicesInitializer.an_api_version_service().update_routing(
+            api_id=id,
+            version=version,
+            supplier_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+            data=request.json,
+        )
+        return Response(status=HTTPStatus.OK)
+
+
 @api_subscription.route("/<int:id>/<string:plan_name>/chargily/checkout")
 class CreateCheckout(Resource):
     @api_subscription.doc("create checkout")
@@ -449,6 +573,12 @@ class GetSubscriptions(Resource):
     @role_token_required([Role.SUPPLIER, Role.ADMIN])
     @api_subscription.param("page", "The page number")
     @api_subscription.param("per_page", "The per page number")
+    @api_subscription.param(
+        "cursor", "Keyset pagination cursor, empty for the first page, replaces page"
+    )
+    @api_subscription.param(
+        "count", "How the total is counted: exact, estimate or none"
+    )
     @api_subscription.param("api_id", "The API ID")
     @api_subscription.param("user_id", "The user ID")
     @api_subscription.param("plan_name", "The plan name")
@@ -475,6 +605,12 @@ class GetMySubscriptions(Resource):
     @role_token_required([Role.USER])
     @api_subscription.param("page", "The page number")
     @api_subscription.param("per_page", "The per page number")
+    @api_subscription.param(
+        "cursor", "Keyset pagination cursor, empty for the first page, replaces page"
+    )
+    @api_subscription.param(
+        "count", "How the total is counted: exact, estimate or none"
+    )
     @api_subscription.param("api_id", "The API ID")
     @api_subscription.param("plan_name", "The plan name")
     @api_subscription.param("start_date", "The start date")
@@ -744,45 +880,74 @@ class TestEndpoint(Resource):
         )
 
 
+def gateway_call(method, id, version, params, body=None):
+    api_call_service = ServicesInitializer.an_api_call_service()
+    api_key = request.headers.get("X-itouch-key")
+    if Config.GATEWAY_STREAMING:
+        chunks, status, headers = api_call_service.call_stream(
+            method=method,
+            api_id=id,
+            version=version,
+            params=params,
+            api_key=api_key,
+            body=body,
+        )
+        response = Response(stream_with_context(chunks), status=status, headers=headers)
+        # werkzeug skips the body of HEAD, 204 and 304 answers, close still runs
+        response.call_on_close(chunks.close)
+        return response
+    return api_call_service.call(
+        method=method,
+        api_id=id,
+        version=version,
+        params=params,
+        api_key=api_key,
+        body=body,
+    )
+
+
+@api_calls.route("/call/concurrency-limit")
+class GetCallConcurrencyLimit(Resource):
+    @api_calls.doc("get the adaptive concurrency limit of gateway calls")
+    @api_calls.response(
+        HTTPStatus.OK, "Success", ApiDto.call_concurrency_limit_response
+    )
+    @role_token_required([Role.ADMIN])
+    def get(self):
+        return {
+            "data": ServicesInitializer.an_api_call_service().get_concurrency_limit(),
+        }, HTTPStatus.OK
+
+
 @api_calls.route("/call/<int:id>/<string:version>/<path:params>")
 class CallEndpoint(Resource):
     @api_calls.doc("Call GET Endpoint")
     def get(self, id, version, params=""):
-        api_key = request.headers.get("X-itouch-key")
-        return ServicesInitializer.an_api_call_service().call_get(
-            api_id=id, version=version, params=params, api_key=api_key
-        )
+        return gateway_call("GET", id, version, params)
+
+    @api_calls.doc("Call HEAD Endpoint")
+    def head(self, id, version, params=""):
+        return gateway_call("HEAD", id, version, params)
+
+    @api_calls.doc("Call OPTIONS Endpoint")
+    def options(self, id, version, params=""):
+        return gateway_call("OPTIONS", id, version, params)
 
     @api_calls.doc("Call POST Endpoint")
     def post(self, id, version, params=""):
-        api_key = request.headers.get("X-itouch-key")
-        return ServicesInitializer.an_api_call_service().call_post(
-            api_id=id,
-            version=version,
-            params=params,
-            data=api_calls.payload,
-            api_key=api_key,
-            body=api_calls.payload,
-        )
+        return gateway_call("POST", id, version, params, api_calls.payload)
+
+    @api_calls.doc("Call PUT Endpoint")
+    def put(self, id, version, params=""):
+        return gateway_call("PUT", id, version, params, api_calls.payload)
 
     @api_calls.doc("Call PATCH Endpoint")
     def patch(self, id, version, params=""):
-        api_key = request.headers.get("X-itouch-key")
-        return ServicesInitializer.an_api_call_service().call_patch(
-            api_id=id,
-            version=version,
-            params=params,
-            data=api_calls.payload,
-            api_key=api_key,
-            body=api_calls.payload,
-        )
+        return gateway_call("PATCH", id, version, params, api_calls.payload)
 
     @api_calls.doc("Call DELETE Endpoint")
     def delete(self, id, version, params=""):
-        api_key = request.headers.get("X-itouch-key")
-        return ServicesInitializer.an_api_call_service().call_delete(
-            api_id=id, version=version, params=params, api_key=api_key
-        )
+        return gateway_call("DELETE", id, version, params)
 
 
 @api_discussions.route("/<int:api_id>/discussions")
@@ -912,6 +1077,13 @@ class Votes(Resource):
         @role_token_required([Role.SUPPLIER])
         @api_resquests.param("page", "The page number")
         @api_resquests.param("per_page", "The per page number")
+        @api_resquests.param(
+            "cursor",
+            "Keyset pagination cursor, empty for the first page, replaces page",
+        )
+        @api_resquests.param(
+            "count", "How the total is counted: exact, estimate or none"
+        )
         @api_resquests.param("http_status", "The http status of the request")
         @api_resquests.param("version", "The api version")
         @api_resquests.param("start_date", "The start date")
@@ -965,6 +1137,31 @@ class Votes(Resource):
             return {"data": total_transaction}, HTTPStatus.OK
 
 
+@api_resquests.route("/analytics")
+class GetAnalytics(Resource):
+    @api_resquests.doc("get a metric over a time range in buckets of any width")
+    @api_resquests.param(
+        "metric",
+        "requests, successes, errors, latency, bytes, revenue or subscriptions",
+    )
+    @api_resquests.param("from", "Start of the range, ISO 8601, included")
+    @api_resquests.param("to", "End of the range, ISO 8601, excluded")
+    @api_resquests.param("bucket", "Bucket width such as 10s, 15m, 1h or 1d, or month")
+    @api_resquests.param("api_id", "The api id")
+    @api_resquests.param("version", "The api version")
+    @api_resquests.param("supplier_id", "The supplier id, admins only")
+    @api_resquests.param("status_class", "1xx, 2xx, 3xx, 4xx or 5xx")
+    @api_resquests.response(HTTPStatus.OK, "Success", ApiDto.analytics_response)
+    @role_token_required([Role.SUPPLIER, Role.ADMIN])
+    def get(self):
+        data = ServicesInitializer.an_analytics_service().get_analytics(
+            query_params=request.args,
+            user_id=top_g.user.get("id"),
+            role=top_g.user.get("role"),
+        )
+        return {"data": data}, HTTPStatus.OK
+
+
 @api_tickets.route("/<int:api_id>/tickets/create")
 class CreateTicket(Resource):
     @api_tickets.doc("create ticket")
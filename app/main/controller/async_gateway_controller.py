@@ -0,0 +1,126 @@
+import json
+import re
+from http import HTTPStatus
+
+from flask import Flask
+
+from app.main.core.lib.logger import Logger
+from app.main.core.services.async_api_call_service import AsyncApiCallService
+from app.main.utils.error_handlers import error_response
+from app.main.utils.exceptions import BadRequestError
+
+# same calls as the CallEndpoint route of the api_calls namespace
+CALL_PATH = re.compile(r"^/apis/call/(\d+)/([^/]+)/(.+)$")
+CALL_METHODS = ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE")
+
+
+class AsyncGatewayApp:
+    """
+    ASGI application answering /apis/call requests with the asyncio gateway
+    and handing every other request to the Flask app. `asgiref` is imported
+    when it is built, so only the ASGI entry point loads it.
+    """
+
+    def __init__(self, app: Flask, service: AsyncApiCallService, logger: Logger):
+        from asgiref.wsgi import WsgiToAsgi
+
+        self.wsgi_app = WsgiToAsgi(app)
+        self.service = service
+        self.logger = logger
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.__lifespan(receive, send)
+            return
+
+        match = CALL_PATH.match(scope["path"]) if scope["type"] == "http" else None
+
+        if match is None or scope["method"] not in CALL_METHODS:
+            await self.wsgi_app(scope, receive, send)
+            return
+
+        method = scope["method"]
+
+        try:
+            response, status, headers = await self.service.call(
+                method=method,
+                api_id=int(match[1]),
+                version=match[2],
+                params=match[3],
+                api_key=self.__header(scope, b"x-itouch-key"),
+                body=await self.__json_body(receive),
+            )
+        except Exception as error:
+            response, status, headers = error_response(error)
+
+        self.__log(scope, method, status, response)
+
+        payload = (json.dumps(response) + "\n").encode("utf-8")
+        await send(
+            {
+                "type": "http.response.start",
+                "status": int(status),
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode("latin-1")),
+                    *(
+                        (key.lower().encode("latin-1"), str(value).encode("latin-1"))
+                        for key, value in headers.items()
+                    ),
+                ],
+            }
+        )
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b"" if method == "HEAD" else payload,
+            }
+        )
+
+    async def __lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.service.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def __json_body(self, receive):
+        body = bytearray()
+
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+
+            if not message.get("more_body"):
+                break
+
+        if not body:
+            return None
+
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise BadRequestError("The request body is not valid JSON")
+
+    def __header(self, scope, name: bytes):
+        for key, value in scope["headers"]:
+            if key.lower() == name:
+                return value.decode("latin-1")
+        return None
+
+    def __log(self, scope, method: str, status: int, response):
+        payload = {
+            "path": scope["path"],
+            "method": method,
+            "status_code": int(status),
+            "response": response,
+        }
+
+        if status >= HTTPStatus.BAD_REQUEST:
+            self.logger.error("HTTP Request", payload)
+        else:
+            self.logger.info("HTTP Request", payload)
@@ -181,6 +181,19 @@ class ApiDto:
                             "duration": fields.Integer(
                                 required=True,
                             ),
+                            "rate_limit_per_second": fields.Integer(
+                                required=False,
+                            ),
+                            "rate_limit_per_minute": fields.Integer(
+                                required=False,
+                            ),
+                            "max_concurrent_calls": fields.Integer(
+                                required=False,
+                            ),
+                            "tier": fields.String(
+                                required=False,
+                                enum=["free", "standard", "premium"],
+                            ),
                         },
                     )
                 ),
@@ -237,6 +250,10 @@ class ApiDto:
                         "per_page": fields.Integer(),
                         "total": fields.Integer(),
                         "pages": fields.Integer(),
+                        "total_is_estimate": fields.Boolean(),
+                        "next_cursor": fields.String(
+                            description="Cursor of the next page, null on the last"
+                        ),
                     },
                 )
             ),
@@ -249,6 +266,8 @@ class ApiDto:
             "name": fields.String(),
             "description": fields.String(),
             "category_id": fields.Integer(),
+            "max_concurrent_calls": fields.Integer(),
+            "max_queued_calls": fields.Integer(),
         },
     )
 
@@ -262,7 +281,9 @@ class ApiDto:
                         "id": fields.Integer(),
                         "name": fields.String(),
                         "description": fields.String(),
-                        "average_response_time": fields.Float(),
+                        "average_response_time": fields.Float(
+                            description="Microseconds"
+                        ),
                         "category_id": fields.Integer(),
                         "category": fields.Nested(
                             api.model(
@@ -348,6 +369,92 @@ class ApiDto:
         },
     )
 
+    api_circuit_breakers_response = api.model(
+        "api_circuit_breakers_response",
+        {
+            "data": fields.List(
+                fields.Nested(
+                    api.model(
+                        "api_circuit_breaker_data",
+                        {
+                            "version": fields.String(),
+                            "status": fields.String(),
+                            "calls": fields.Integer(),
+                            "failures": fields.Integer(),
+                            "slow_calls": fields.Integer(),
+                            "retry_after": fields.Integer(),
+                            "transitions": fields.List(
+                                fields.Nested(
+                                    api.model(
+                                        "api_circuit_breaker_transition",
+                                        {
+                                            "from": fields.String(),
+                                            "to": fields.String(),
+                                            "at": fields.DateTime(),
+                                        },
+                                    )
+                                )
+                            ),
+                        },
+                    )
+                )
+            ),
+        },
+    )
+
+    call_concurrency_limit_response = api_calls.model(
+        "call_concurrency_limit_response",
+        {
+            "data": fields.Nested(
+                api_calls.model(
+                    "call_concurrency_limit_data",
+                    {
+                        "limit": fields.Integer(),
+                        "in_flight": fields.Integer(),
+                        "rejected": fields.Integer(),
+                        "short_latency": fields.Float(description="Microseconds"),
+                        "long_latency": fields.Float(description="Microseconds"),
+                        "changes": fields.List(
+                            fields.Nested(
+                                api_calls.model(
+                                    "call_concurrency_limit_change",
+                                    {
+                                        "from": fields.Integer(),
+                                        "to": fields.Integer(),
+                                        "at": fields.DateTime(),
+                                    },
+                                )
+                            )
+                        ),
+                    },
+                )
+            ),
+        },
+    )
+
+    api_bulkheads_response = api.model(
+        "api_bulkheads_response",
+        {
+            "data": fields.List(
+                fields.Nested(
+                    api.model(
+                        "api_bulkhead_data",
+                        {
+                            "scope": fields.String(),
+                            "plan_name": fields.String(),
+                            "in_flight": fields.Integer(),
+                            "queued": fields.Integer(),
+                            "max_concurrent": fields.Integer(),
+                            "max_queued": fields.Integer(),
+                            "rejected": fields.Integer(),
+                            "timed_out": fields.Integer(),
+                        },
+                    )
+                )
+            ),
+        },
+    )
+
     api_popularity_response = api.model(
         "api_popularity_response",
         {
@@ -365,7 +472,9 @@ class ApiDto:
     api_average_successfully_response_time_response = api.model(
         "api_average_successfully_response_time_response",
         {
-            "average_successfully_response_time": fields.Float(),
+            "average_successfully_response_time": fields.Float(
+                description="Microseconds"
+            ),
         },
     )
 
@@ -433,6 +542,34 @@ class ApiDto:
         },
     )
 
+    analytics_response = api.model(
+        "analytics_response",
+        {
+            "data": fields.Nested(
+                api.model(
+                    "analytics_data",
+                    {
+                        "metric": fields.String(),
+                        "granularity": fields.String(
+                            description="minute, hour, day or raw"
+                        ),
+                        "points": fields.List(
+                            fields.Nested(
+                                api.model(
+                                    "analytics_point",
+                                    {
+                                        "bucket": fields.DateTime(),
+                                        "value": fields.Float(),
+                                    },
+                                )
+                            )
+                        ),
+                    },
+                )
+            )
+        },
+    )
+
     apis_total_revenue_response = api.model(
         "apis_total_revenue_response",
         {
@@ -449,6 +586,40 @@ class ApiDto:
             "base_url": fields.String(
                 required=True,
             ),
+            "response_cache_ttl": fields.Integer(
+                required=False,
+                min=0,
+            ),
+            "hedge_percentile": fields.Float(
+                required=False,
+                min=0,
+                max=100,
+            ),
+            "max_retries": fields.Integer(
+                required=False,
+                min=0,
+            ),
+            "retry_budget_ratio": fields.Float(
+                required=False,
+                min=0,
+            ),
+            "upstream_targets": fields.List(
+                fields.Nested(
+                    api.model(
+                        "api_upstream_target",
+                        {
+                            "url": fields.String(
+                                required=True,
+                            ),
+                            "weight": fields.Integer(
+                                required=False,
+                                min=1,
+                            ),
+                        },
+                    )
+                ),
+                required=False,
+            ),
             "headers": fields.List(
                 fields.Nested(
                     api.model(
@@ -521,7 +692,9 @@ class ApiDto:
                     {
                         "version": fields.String(),
                         "status": fields.String(),
-                        "average_response_time": fields.Float(),
+                        "average_response_time": fields.Float(
+                            description="Microseconds"
+                        ),
                         "created_at": fields.DateTime(),
                         "updated_at": fields.DateTime(),
                         "api": fields.Nested(
@@ -562,7 +735,9 @@ class ApiDto:
                     {
                         "version": fields.String(),
                         "status": fields.String(),
-                        "average_response_time": fields.Float(),
+                        "average_response_time": fields.Float(
+                            description="Microseconds"
+                        ),
                         "base_url": fields.String(),
                         "created_at": fields.DateTime(),
                         "updated_at": fields.DateTime(),
@@ -610,6 +785,133 @@ class ApiDto:
         },
     )
 
+    api_version_latency_response = api.model(
+        "api_version_latency_response",
+        {
+            "data": fields.Nested(
+                api.model(
+                    "api_version_latency_data",
+                    {
+                        "count": fields.Integer(),
+                        "mean": fields.Float(description="Microseconds"),
+                        "max": fields.Integer(description="Microseconds"),
+                        "p50": fields.Integer(description="Microseconds"),
+                        "p90": fields.Integer(description="Microseconds"),
+                        "p99": fields.Integer(description="Microseconds"),
+                    },
+                )
+            ),
+        },
+    )
+
+    api_version_cache_stats_response = api.model(
+        "api_version_cache_stats_response",
+        {
+            "data": fields.Nested(
+                api.model(
+                    "api_version_cache_stats_data",
+                    {
+                        "response_cache_ttl": fields.Integer(),
+                        "hits": fields.Integer(),
+                        "misses": fields.Integer(),
+                        "revalidations": fields.Integer(),
+                        "stores": fields.Integer(),
+                        "evictions": fields.Integer(),
+                        "entries": fields.Integer(),
+                    },
+                )
+            ),
+        },
+    )
+
+    update_api_version_routing_request = api.model(
+        "update_api_version_routing_request",
+        {
+            "canary_version": fields.String(
+                required=False,
+            ),
+            "canary_percent": fields.Float(
+                required=False,
+                min=0,
+                max=100,
+            ),
+            "mirror_version": fields.String(
+                required=False,
+            ),
+            "mirror_percent": fields.Float(
+                required=False,
+                min=0,
+                max=100,
+            ),
+        },
+    )
+
+    api_version_mirror_response = api.model(
+        "api_version_mirror_response",
+        {
+            "data": fields.Nested(
+                api.model(
+                    "api_version_mirror_data",
+                    {
+                        "shadow_version": fields.String(),
+                        "mirrored": fields.Integer(),
+                        "dropped": fields.Integer(),
+                        "status_mismatches": fields.Integer(),
+                        "primary": fields.Nested(
+                            api.model(
+                                "api_version_mirror_primary_data",
+                                {
+                                    "count": fields.Integer(),
+                                    "mean": fields.Float(description="Microseconds"),
+                                    "max": fields.Integer(description="Microseconds"),
+                                    "p50": fields.Integer(description="Microseconds"),
+                                    "p90": fields.Integer(description="Microseconds"),
+                                    "p99": fields.Integer(description="Microseconds"),
+                                    "errors": fields.Integer(),
+                                },
+                            )
+                        ),
+                        "shadow": fields.Nested(
+                            api.model(
+                                "api_version_mirror_shadow_data",
+                                {
+                                    "count": fields.Integer(),
+                                    "mean": fields.Float(description="Microseconds"),
+                                    "max": fields.Integer(description="Microseconds"),
+                                    "p50": fields.Integer(description="Microseconds"),
+                                    "p90": fields.Integer(description="Microseconds"),
+                                    "p99": fields.Integer(description="Microseconds"),
+                                    "errors": fields.Integer(),
+                                },
+                            )
+                        ),
+                    },
+                )
+            ),
+        },
+    )
+
+    api_version_targets_response = api.model(
+        "api_version_targets_response",
+        {
+            "data": fields.List(
+                fields.Nested(
+                    api.model(
+                        "api_version_target_data",
+                        {
+                            "url": fields.String(),
+                            "weight": fields.Integer(),
+                            "outstanding": fields.Integer(),
+                            "requests": fields.Integer(),
+                            "failures": fields.Integer(),
+                            "ejected": fields.Boolean(),
+                        },
+                    )
+                )
+            ),
+        },
+    )
+
     create_charigly_checkout_response = api.model(
         "create_charigly_checkout_response",
         {
@@ -710,6 +1012,10 @@ class ApiDto:
                         "per_page": fields.Integer(),
                         "total": fields.Integer(),
                         "total_pages": fields.Integer(),
+                        "total_is_estimate": fields.Boolean(),
+                        "next_cursor": fields.String(
+                            description="Cursor of the next page, null on the last"
+                        ),
                     },
                 )
             ),
@@ -949,7 +1255,7 @@ class ApiDto:
                             "http_status": fields.Integer(),
                             "request_at": fields.DateTime(),
                             "response_at": fields.DateTime(),
-                            "response_time": fields.Integer(),
+                            "response_time": fields.Integer(description="Microseconds"),
                         },
                     )
                 )
@@ -962,6 +1268,10 @@ class ApiDto:
                         "per_page": fields.Integer(),
                         "total": fields.Integer(),
                         "pages": fields.Integer(),
+                        "total_is_estimate": fields.Boolean(),
+                        "next_cursor": fields.String(
+                            description="Cursor of the next page, null on the last"
+                        ),
                     },
                 )
             ),
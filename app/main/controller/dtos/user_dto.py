@@ -74,6 +74,10 @@ class UserDto:
                         "per_page": fields.Integer(),
                         "total": fields.Integer(),
                         "pages": fields.Integer(),
+                        "total_is_estimate": fields.Boolean(),
+                        "next_cursor": fields.String(
+                            description="Cursor of the next page, null on the last"
+                        ),
                     },
                 )
             ),
@@ -30,6 +30,10 @@ class UsersList(Resource):
     @api.doc("list of registered users")
     @api.param("page", "The page number")
     @api.param("per_page", "The number of items per page")
+    @api.param(
+        "cursor", "Keyset pagination cursor, empty for the first page, replaces page"
+    )
+    @api.param("count", "How the total is counted: exact, estimate or none")
     @api.param("roles", "The roles", type="array")
     @api.param("status", "The status of the apis")
     @api.response(HTTPStatus.OK, "Success", UserDto.users_list_response)
@@ -1,6 +1,163 @@
 from app.main.core.lib.impl.media_manager_impl import MediaManagerImpl
+from app.main.core.lib.impl.file_logger import FileLogger
 from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.impl.async_rest_client_impl import (
+    AiohttpRestClient,
+    LoopThreadRestClient,
+)
 from app.main.core.lib.impl.chargily_api_impl import ChargilyApiImpl
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.impl.quota_meter_impl import QuotaMeterImpl
+from app.main.core.lib.impl.request_log_impl import BatchedRequestLog
+from app.main.core.lib.impl.request_rollup_impl import SqlRequestRollup
+from app.main.core.lib.impl.revenue_ledger_impl import SqlRevenueLedger
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator
+from app.main.core.lib.impl.response_cache_impl import InMemoryResponseCache
+from app.main.core.lib.impl.single_flight_impl import InMemorySingleFlight
+from app.main.core.lib.impl.circuit_breaker_impl import RollingWindowCircuitBreaker
+from app.main.core.lib.impl.latency_histograms_impl import (
+    InMemoryLatencyHistograms,
+    WindowedLatencyHistograms,
+)
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.core.lib.impl.gateway_resolver_impl import JoinedQueryGatewayResolver
+from app.main.core.lib.impl.retry_budget_impl import InMemoryRetryBudget
+from app.main.core.lib.impl.load_balancer_impl import PowerOfTwoChoicesBalancer
+from app.main.core.lib.impl.traffic_mirror_impl import ThreadPoolTrafficMirror
+from app.main.core.lib.impl.rate_limiter_impl import (
+    InMemoryRateLimiter,
+    RedisRateLimiter,
+)
+from app.main.core.services.api_call_service import ApiCallService
+from app.main.config import Config
+
+file_logger = FileLogger()
+async_rest_client = AiohttpRestClient(
+    limit=Config.GATEWAY_ASYNC_CONNECTIONS,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=Config.HTTP_READ_TIMEOUT,
+    chunk_size=Config.GATEWAY_STREAM_CHUNK_SIZE,
+)
+rest_client = (
+    LoopThreadRestClient(async_rest_client)
+    if Config.GATEWAY_ASYNC
+    else RestClientImpl(
+        pool_connections=Config.HTTP_POOL_CONNECTIONS,
+        pool_maxsize=Config.HTTP_POOL_MAXSIZE,
+        connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=Config.HTTP_READ_TIMEOUT,
+        chunk_size=Config.GATEWAY_STREAM_CHUNK_SIZE,
+    )
+)
+route_table = InMemoryRouteTable(ttl=Config.ROUTE_TABLE_TTL)
+key_cache = InMemoryKeyPrincipalCache(ttl=Config.KEY_PRINCIPAL_TTL)
+quota_meter = QuotaMeterImpl(
+    stripes=Config.QUOTA_METER_STRIPES,
+    flush_every=Config.QUOTA_METER_FLUSH_EVERY,
+    flush_interval=Config.QUOTA_METER_FLUSH_INTERVAL,
+)
+response_cache = InMemoryResponseCache(
+    max_entries=Config.RESPONSE_CACHE_MAX_ENTRIES,
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+)
+single_flight = InMemorySingleFlight()
+circuit_breaker = RollingWindowCircuitBreaker(
+    window=Config.CIRCUIT_BREAKER_WINDOW,
+    min_calls=Config.CIRCUIT_BREAKER_MIN_CALLS,
+    failure_rate=Config.CIRCUIT_BREAKER_FAILURE_RATE,
+    slow_call_seconds=Config.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+    open_seconds=Config.CIRCUIT_BREAKER_OPEN_SECONDS,
+    half_open_probes=Config.CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    logger=file_logger,
+)
+latency_histograms = InMemoryLatencyHistograms()
+upstream_histograms = WindowedLatencyHistograms(window=Config.GATEWAY_HEDGE_WINDOW)
+admission_scheduler = WeightedFairScheduler(
+    capacity=Config.GATEWAY_MAX_CONCURRENT_CALLS,
+    max_queued=Config.GATEWAY_MAX_QUEUED_CALLS,
+    queue_timeout=Config.GATEWAY_QUEUE_TIMEOUT,
+    weights={
+        tier: float(weight)
+        for tier, weight in (
+            pair.split(":") for pair in Config.GATEWAY_TIER_WEIGHTS.split(",")
+        )
+    },
+)
+concurrency_limiter = GradientConcurrencyLimiter(
+    initial_limit=Config.GATEWAY_LIMIT_INITIAL,
+    min_limit=Config.GATEWAY_LIMIT_MIN,
+    max_limit=Config.GATEWAY_LIMIT_MAX,
+    window=Config.GATEWAY_LIMIT_WINDOW,
+    tolerance=Config.GATEWAY_LIMIT_TOLERANCE,
+    logger=file_logger,
+)
+retry_budget = InMemoryRetryBudget(
+    reserve_per_second=Config.GATEWAY_RETRY_RESERVE_PER_SECOND,
+    max_balance=Config.GATEWAY_RETRY_MAX_BALANCE,
+)
+load_balancer = PowerOfTwoChoicesBalancer(
+    eject_after=Config.UPSTREAM_EJECT_AFTER,
+    eject_seconds=Config.UPSTREAM_EJECT_SECONDS,
+    max_ejected=Config.UPSTREAM_MAX_EJECTED,
+    logger=file_logger,
+)
+traffic_mirror = ThreadPoolTrafficMirror(
+    rest_client,
+    threads=Config.GATEWAY_MIRROR_THREADS,
+    max_pending=Config.GATEWAY_MIRROR_MAX_PENDING,
+)
+bulkhead = SemaphoreBulkhead(
+    max_concurrent=Config.BULKHEAD_MAX_CONCURRENT_CALLS,
+    max_queued=Config.BULKHEAD_MAX_QUEUED_CALLS,
+    queue_timeout=Config.BULKHEAD_QUEUE_TIMEOUT,
+)
+rate_limiter = (
+    RedisRateLimiter(Config.RATE_LIMIT_REDIS_URL)
+    if Config.RATE_LIMIT_BACKEND == "redis"
+    else InMemoryRateLimiter()
+)
+request_rollup = SqlRequestRollup(backfill_chunk=Config.REQUEST_ROLLUP_BACKFILL_CHUNK)
+revenue_ledger = SqlRevenueLedger(rebuild_chunk=Config.REVENUE_LEDGER_REBUILD_CHUNK)
+analytics_engine = RollupAnalyticsEngine(request_rollup, revenue_ledger)
+paginator = KeysetPaginator(count_cap=Config.PAGINATION_COUNT_CAP)
+request_log = BatchedRequestLog(
+    max_queue=Config.REQUEST_LOG_QUEUE_SIZE,
+    batch_size=Config.REQUEST_LOG_BATCH_SIZE,
+    flush_interval=Config.REQUEST_LOG_FLUSH_INTERVAL,
+    full_policy=Config.REQUEST_LOG_FULL_POLICY,
+    spill_path=Config.REQUEST_LOG_SPILL_PATH,
+    rollup=request_rollup,
+    logger=file_logger,
+)
+api_call_service = ApiCallService(
+    rest_client=rest_client,
+    route_table=route_table,
+    key_cache=key_cache,
+    quota_meter=quota_meter,
+    request_log=request_log,
+    response_cache=response_cache,
+    single_flight=single_flight,
+    circuit_breaker=circuit_breaker,
+    latency_histograms=latency_histograms,
+    upstream_histograms=upstream_histograms,
+    rate_limiter=rate_limiter,
+    gateway_resolver=JoinedQueryGatewayResolver(),
+    bulkhead=bulkhead,
+    admission_scheduler=admission_scheduler,
+    concurrency_limiter=concurrency_limiter,
+    retry_budget=retry_budget,
+    load_balancer=load_balancer,
+    traffic_mirror=traffic_mirror,
+    retry_backoff=Config.GATEWAY_RETRY_BACKOFF,
+    hedge_min_samples=Config.GATEWAY_HEDGE_MIN_SAMPLES,
+    hedge_threads=Config.GATEWAY_HEDGE_THREADS,
+    log_body_limit=Config.GATEWAY_LOG_BODY_LIMIT,
+    server_timing=Config.GATEWAY_SERVER_TIMING,
+)
 
 
 class ServicesInitializer:
@@ -14,7 +171,7 @@ class ServicesInitializer:
     def a_user_service():
         from app.main.core.services.user_service import UserService
 
-        return UserService(media_manager=MediaManagerImpl())
+        return UserService(media_manager=MediaManagerImpl(), paginator=paginator)
 
     @staticmethod
     def an_api_service():
@@ -22,7 +179,13 @@ class ServicesInitializer:
 
         return ApiService(
             media_manager=MediaManagerImpl(),
-            chargily_api=ChargilyApiImpl(RestClientImpl()),
+            chargily_api=ChargilyApiImpl(rest_client),
+            route_table=route_table,
+            circuit_breaker=circuit_breaker,
+            bulkhead=bulkhead,
+            request_rollup=request_rollup,
+            revenue_ledger=revenue_ledger,
+            paginator=paginator,
         )
 
     @staticmethod
@@ -35,13 +198,19 @@ class ServicesInitializer:
     def an_api_version_service():
         from app.main.core.services.api_version_service import ApiVersionService
 
-        return ApiVersionService()
+        return ApiVersionService(
+            route_table=route_table,
+            response_cache=response_cache,
+            latency_histograms=latency_histograms,
+            load_balancer=load_balancer,
+            traffic_mirror=traffic_mirror,
+        )
 
     @staticmethod
     def an_api_tests_service():
         from app.main.core.services.api_tests_service import ApiTestsService
 
-        return ApiTestsService(rest_client=RestClientImpl())
+        return ApiTestsService(rest_client=rest_client, route_table=route_table)
 
     @staticmethod
     def a_discussion_service():
@@ -55,25 +224,69 @@ class ServicesInitializer:
             ApiSubscriptionService,
         )
 
-        return ApiSubscriptionService(chargily_api=ChargilyApiImpl(RestClientImpl()))
+        return ApiSubscriptionService(
+            chargily_api=ChargilyApiImpl(rest_client),
+            revenue_ledger=revenue_ledger,
+            analytics_engine=analytics_engine,
+            paginator=paginator,
+        )
 
     @staticmethod
     def an_api_key_service():
         from app.main.core.services.api_key_service import ApiKeyService
 
-        return ApiKeyService()
+        return ApiKeyService(key_cache=key_cache)
 
     @staticmethod
     def an_api_call_service():
-        from app.main.core.services.api_call_service import ApiCallService
+        # one per process: its pipeline, hedge threads and hedge delays are shared
+        return api_call_service
+
+    @staticmethod
+    def an_async_api_call_service(app):
+        from app.main.core.services.async_api_call_service import (
+            AsyncApiCallService,
+        )
 
-        return ApiCallService(rest_client=RestClientImpl())
+        return AsyncApiCallService(
+            app=app,
+            rest_client=async_rest_client,
+            route_table=route_table,
+            key_cache=key_cache,
+            quota_meter=quota_meter,
+            request_log=request_log,
+            response_cache=response_cache,
+            circuit_breaker=circuit_breaker,
+            latency_histograms=latency_histograms,
+            upstream_histograms=upstream_histograms,
+            rate_limiter=rate_limiter,
+            gateway_resolver=JoinedQueryGatewayResolver(),
+            bulkhead=bulkhead,
+            admission_scheduler=admission_scheduler,
+            concurrency_limiter=concurrency_limiter,
+            retry_budget=retry_budget,
+            load_balancer=load_balancer,
+            traffic_mirror=traffic_mirror,
+            retry_backoff=Config.GATEWAY_RETRY_BACKOFF,
+            hedge_min_samples=Config.GATEWAY_HEDGE_MIN_SAMPLES,
+            db_threads=Config.GATEWAY_ASYNC_DB_THREADS,
+            server_timing=Config.GATEWAY_SERVER_TIMING,
+        )
 
     @staticmethod
     def an_api_request_service():
         from app.main.core.services.api_request_service import ApiRequestService
 
-        return ApiRequestService()
+        return ApiRequestService(analytics_engine=analytics_engine, paginator=paginator)
+
+    @staticmethod
+    def an_analytics_service():
+        from app.main.core.services.analytics_service import AnalyticsService
+
+        return AnalyticsService(
+            analytics_engine=analytics_engine,
+            max_buckets=Config.ANALYTICS_MAX_BUCKETS,
+        )
 
     @staticmethod
     def an_api_tickets_service():
@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+# plan tiers from lowest to highest priority
+TIERS = ("free", "standard", "premium")
+
+
+def plan_tier(tier: str | None, price: int | None) -> str:
+    """Explicit plan tier, else free plans are "free" and paid ones "standard"."""
+    if tier is not None:
+        return tier
+
+    return "standard" if price else "free"
+
+
+class AdmissionScheduler:
+    def admit(self, tier: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    async def admit_async(self, tier: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    def release(self, tier: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self) -> Dict[str, Any]:
+        raise Exception("You must implement this method in a subclass.")
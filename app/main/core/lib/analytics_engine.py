@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Sequence
+
+# calendar months, the one bucket without a fixed width
+MONTH = "month"
+# plan of the queries no rollup can answer
+RAW = "raw"
+REQUEST_METRICS = ("requests", "successes", "errors", "latency", "bytes")
+REVENUE_METRICS = ("revenue", "subscriptions")
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+
+
+@dataclass(frozen=True)
+class AnalyticsQuery:
+    metric: str
+    bucket: timedelta | str
+    # [start, end), unbounded when None
+    start: datetime | None = None
+    end: datetime | None = None
+    api_id: int | None = None
+    version: str | None = None
+    supplier_id: int | None = None
+    status_class: str | None = None
+    # answer the buckets without data too, needs both ends of the range
+    fill: bool = True
+
+
+def calendar_points(
+    points: List[Dict[str, Any]], fields: Sequence[str], name: str
+) -> List[Dict[str, Any]]:
+    """Labels every point with the year, month, day or hour of its bucket."""
+    return [
+        {
+            **{field: getattr(point["bucket"], field) for field in fields},
+            name: point["value"],
+        }
+        for point in points
+    ]
+
+
+class AnalyticsEngine:
+    def plan(self, query: AnalyticsQuery) -> str:
+        raise Exception("You must implement this method in a subclass.")
+
+    def run(self, query: AnalyticsQuery) -> List[Dict[str, Any]]:
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,46 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Tuple
+
+
+class AsyncStreamedResponse:
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        chunks: AsyncIterator[bytes],
+        close: Callable[[], Awaitable[None]],
+    ):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+        self.close = close
+
+
+class AsyncRestClient:
+    async def get(self, url, headers) -> Tuple[Dict, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def get_with_headers(
+        self, url, headers
+    ) -> Tuple[Dict | None, int, Dict[str, str]]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def post(self, url, headers, data) -> Tuple[Dict, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def delete(self, url, headers) -> Tuple[Dict, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def patch(self, url, headers, data) -> Tuple[Dict, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def request(self, method, url, headers, data=None) -> Tuple[Dict | None, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def stream(self, method, url, headers, data=None) -> AsyncStreamedResponse:
+        raise Exception("You must implement this method in a subclass.")
+
+    async def close(self):
+        raise Exception("You must implement this method in a subclass.")
+
+    def is_connect_error(self, error: Exception) -> bool:
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,38 @@
+from typing import Dict, Hashable
+
+
+def api_compartment(api_id: int) -> Hashable:
+    return ("api", api_id)
+
+
+def plan_compartment(api_id: int, plan_name: str) -> Hashable:
+    return ("plan", api_id, plan_name)
+
+
+class Bulkhead:
+    def acquire(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+    async def acquire_async(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+    def release(self, compartment: Hashable):
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ) -> Dict[str, int]:
+        raise Exception("You must implement this method in a subclass.")
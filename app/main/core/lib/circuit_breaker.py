@@ -0,0 +1,18 @@
+from typing import Any, Dict
+
+
+class CircuitBreaker:
+    def allow(self, api_id: int, version: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    def record(self, api_id: int, version: str, failed: bool, latency: float):
+        raise Exception("You must implement this method in a subclass.")
+
+    def cancel(self, api_id: int, version: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    def closed(self, api_id: int, version: str) -> bool:
+        raise Exception("You must implement this method in a subclass.")
+
+    def state(self, api_id: int, version: str) -> Dict[str, Any]:
+        raise Exception("You must implement this method in a subclass.")
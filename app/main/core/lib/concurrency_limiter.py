@@ -0,0 +1,12 @@
+from typing import Any, Dict
+
+
+class ConcurrencyLimiter:
+    def acquire(self):
+        raise Exception("You must implement this method in a subclass.")
+
+    def release(self, latency: float):
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self) -> Dict[str, Any]:
+        raise Exception("You must implement this method in a subclass.")
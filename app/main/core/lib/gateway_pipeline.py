@@ -0,0 +1,129 @@
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from app.main.core.lib.key_principal_cache import KeyPrincipal, SubscriptionSnapshot
+from app.main.core.lib.route_table import Route
+
+
+class GatewayContext:
+    """
+    State of one gateway call, filled in by the stages as it travels through
+    the pipeline. `timings` holds the microseconds spent inside each stage,
+    excluding the stages it wraps, and `upstream_time` the seconds spent
+    waiting on the upstream.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        api_id: int,
+        version: str,
+        params: str,
+        api_key: str,
+        body: Any = None,
+        stream: bool = False,
+    ):
+        self.method = method
+        self.api_id = api_id
+        self.version = version
+        self.params = params
+        self.api_key = api_key
+        self.body = body
+        self.stream = stream
+        self.principal: KeyPrincipal | None = None
+        self.subscription: SubscriptionSnapshot | None = None
+        self.route: Route | None = None
+        # route of the version the call is copied to in the background
+        self.shadow_route: Route | None = None
+        self.request_url: str | None = None
+        # base url of the upstream target that answered
+        self.upstream_target: str | None = None
+        self.request_headers: Dict[str, str] = {}
+        # ask the upstream stage for the upstream response headers as well
+        self.capture_headers = False
+        self.upstream_headers: Dict[str, str] = {}
+        self.close: Callable[[], None] | None = None
+        self.response: Any = None
+        self.status: int | None = None
+        self.response_headers: Dict[str, str] = {}
+        self.request_at: datetime | None = None
+        self.started: float | None = None
+        self.upstream_time = 0.0
+        self.timings: Dict[str, float] = {}
+
+    def on_close(self, callback: Callable[[], None]):
+        """Runs `callback` once the streamed answer is closed, after `close`."""
+        close = self.close
+
+        def close_then_callback():
+            try:
+                if close is not None:
+                    close()
+            finally:
+                callback()
+
+        self.close = close_then_callback
+
+
+class StreamedBody:
+    """
+    Chunks of a streamed answer. `close` runs the context's close once, when
+    the chunks run out or when the server closes the response, which it also
+    does for answers it never iterates, such as HEAD, 204 and 304 ones.
+    """
+
+    def __init__(self, chunks: Iterable[bytes], close: Callable[[], None] | None):
+        self.chunks = chunks
+        self._close = close
+        self._closed = False
+
+    def __iter__(self):
+        try:
+            yield from self.chunks
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._close is not None:
+            self._close()
+
+
+class GatewayStage:
+    # label of the stage in timings and Server-Timing headers
+    name = "stage"
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+
+class AsyncGatewayStage:
+    # label of the stage in timings and Server-Timing headers
+    name = "stage"
+
+    async def handle(
+        self,
+        context: GatewayContext,
+        call_next: Callable[[GatewayContext], Awaitable[None]],
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+
+class GatewayPipeline:
+    def run(self, context: GatewayContext) -> GatewayContext:
+        raise Exception("You must implement this method in a subclass.")
+
+    def stage_names(self) -> List[str]:
+        raise Exception("You must implement this method in a subclass.")
+
+
+class AsyncGatewayPipeline:
+    async def run(self, context: GatewayContext) -> GatewayContext:
+        raise Exception("You must implement this method in a subclass.")
+
+    def stage_names(self) -> List[str]:
+        raise Exception("You must implement this method in a subclass.")
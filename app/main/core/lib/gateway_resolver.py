@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+
+from app.main.core.lib.key_principal_cache import KeyPrincipal
+from app.main.core.lib.route_table import Route
+
+
+@dataclass(frozen=True)
+class GatewayRecord:
+    principal: KeyPrincipal
+    # None when the api or the version does not exist
+    route: Route | None
+
+
+class GatewayResolver:
+    def resolve(self, api_key: str, api_id: int, version: str) -> GatewayRecord:
+        raise Exception("You must implement this method in a subclass.")
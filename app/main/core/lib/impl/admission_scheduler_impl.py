@@ -0,0 +1,189 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Mapping
+
+from app.main.core.lib.admission_scheduler import TIERS, AdmissionScheduler
+from app.main.core.lib.impl.loop_event import LoopEvent
+from app.main.utils.exceptions import ServiceUnavailableError
+
+QUEUED, ADMITTED, SHED = "queued", "admitted", "shed"
+
+
+class _Waiter:
+    def __init__(self, tier: str, tag: float, ready: threading.Event | LoopEvent):
+        self.tier = tier
+        self.tag = tag
+        self.state = QUEUED
+        self.ready = ready
+
+
+class _Tier:
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.waiters: Deque[_Waiter] = deque()
+        self.last_tag = 0.0
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+
+
+class WeightedFairScheduler(AdmissionScheduler):
+    """
+    Admits at most `capacity` gateway calls at once. Callers arriving while
+    it is full wait in one queue per plan tier, and freed slots go to the
+    queue heads in start-time fair queueing order, so each busy tier gets a
+    share of the slots proportional to its weight. When `max_queued` callers
+    already wait, the newest waiter of a lower tier is shed to make room, or
+    the caller itself when nobody ranks below it. Waiters give up after
+    `queue_timeout` seconds. Shed and timed out calls get a 503. Threads
+    and coroutines wait in the same queues, coroutines without holding a
+    thread.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 64,
+        max_queued: int = 128,
+        queue_timeout: float = 1.0,
+        weights: Mapping[str, float] | None = None,
+    ):
+        self.capacity = capacity
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        weights = weights or {"free": 1, "standard": 4, "premium": 16}
+        self._tiers = {tier: _Tier(weights[tier]) for tier in TIERS}
+        self._in_flight = 0
+        self._queued = 0
+        self._virtual_time = 0.0
+        self._lock = threading.Lock()
+
+    def admit(self, tier: str):
+        waiter = self.__enqueue(tier, threading.Event)
+
+        if waiter is not None:
+            waiter.ready.wait(self.queue_timeout)
+            self.__settle(waiter)
+
+    async def admit_async(self, tier: str):
+        waiter = self.__enqueue(tier, LoopEvent)
+
+        if waiter is None:
+            return
+
+        try:
+            await waiter.ready.wait(self.queue_timeout)
+        except asyncio.CancelledError:
+            self.__abandon(waiter)
+            raise
+
+        self.__settle(waiter)
+
+    def release(self, tier: str):
+        with self._lock:
+            self._tiers[tier].in_flight -= 1
+            self._in_flight -= 1
+
+            while self._in_flight < self.capacity and self._queued > 0:
+                state = min(
+                    (state for state in self._tiers.values() if state.waiters),
+                    key=lambda state: state.waiters[0].tag,
+                )
+                waiter = state.waiters.popleft()
+                self._queued -= 1
+                self._virtual_time = waiter.tag
+                waiter.state = ADMITTED
+                self.__start(state)
+                waiter.ready.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "tiers": {
+                    tier: {
+                        "weight": state.weight,
+                        "in_flight": state.in_flight,
+                        "queued": len(state.waiters),
+                        "admitted": state.admitted,
+                        "shed": state.shed,
+                        "timed_out": state.timed_out,
+                    }
+                    for tier, state in self._tiers.items()
+                },
+            }
+
+    def __enqueue(
+        self, tier: str, ready: Callable[[], threading.Event | LoopEvent]
+    ) -> _Waiter | None:
+        # None when the call is admitted right away
+        with self._lock:
+            state = self._tiers[tier]
+
+            if self._in_flight < self.capacity and self._queued == 0:
+                self.__start(state)
+                return None
+
+            if self._queued >= self.max_queued and not self.__shed_below(state):
+                state.shed += 1
+                raise ServiceUnavailableError(
+                    "Gateway is overloaded, try again later", 1
+                )
+
+            waiter = _Waiter(
+                tier,
+                max(self._virtual_time, state.last_tag) + 1 / state.weight,
+                ready(),
+            )
+            state.last_tag = waiter.tag
+            state.waiters.append(waiter)
+            self._queued += 1
+
+            return waiter
+
+    def __settle(self, waiter: _Waiter):
+        with self._lock:
+            if waiter.state == ADMITTED:
+                return
+
+            if waiter.state == QUEUED:
+                state = self._tiers[waiter.tier]
+                state.waiters.remove(waiter)
+                self._queued -= 1
+                state.timed_out += 1
+
+        raise ServiceUnavailableError("Gateway is overloaded, try again later", 1)
+
+    def __abandon(self, waiter: _Waiter):
+        # the caller went away, its place in the queue or its slot is freed
+        with self._lock:
+            if waiter.state == QUEUED:
+                self._tiers[waiter.tier].waiters.remove(waiter)
+                self._queued -= 1
+                return
+
+        if waiter.state == ADMITTED:
+            self.release(waiter.tier)
+
+    def __start(self, state: _Tier):
+        state.in_flight += 1
+        state.admitted += 1
+        self._in_flight += 1
+
+    def __shed_below(self, state: _Tier) -> bool:
+        # drop the newest waiter of the lowest tier ranking below the caller
+        for lower in self._tiers.values():
+            if lower is state:
+                return False
+            if lower.waiters and lower.weight < state.weight:
+                waiter = lower.waiters.pop()
+                self._queued -= 1
+                lower.shed += 1
+                waiter.state = SHED
+                waiter.ready.set()
+                return True
+
+        return False
@@ -0,0 +1,220 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import literal, select
+
+from app.main import db
+from app.main.core.lib.analytics_engine import (
+    MONTH,
+    RAW,
+    REVENUE_METRICS,
+    AnalyticsEngine,
+    AnalyticsQuery,
+)
+from app.main.core.lib.request_rollup import DAY, HOUR, MINUTE, RequestRollup
+from app.main.core.lib.revenue_ledger import RevenueLedger
+from app.main.core.lib.impl.request_rollup_impl import (
+    COUNTERS,
+    SqlRequestRollup,
+    bucket_of,
+    counters_of,
+)
+from app.main.core.lib.impl.revenue_ledger_impl import AMOUNTS, SqlRevenueLedger
+from app.main.model.api_model import ApiModel
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.api_subscription_model import ApiSubscription
+
+EPOCH = datetime(1970, 1, 1)
+WIDTHS = {
+    DAY: timedelta(days=1),
+    HOUR: timedelta(hours=1),
+    MINUTE: timedelta(minutes=1),
+}
+# rollup counters each metric adds up, latency divides the first by the second
+COLUMNS = {
+    "requests": ("count",),
+    "successes": ("success_count",),
+    "errors": ("error_count",),
+    "latency": ("latency_sum", "count"),
+    "bytes": ("response_bytes",),
+    "revenue": ("revenue",),
+    "subscriptions": ("subscriptions",),
+}
+# status classes the request rollups count on their own
+STATUS_COLUMNS = {"2xx": "success_count", "5xx": "error_count"}
+
+
+def month_of(at: datetime) -> datetime:
+    return at.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(at: datetime) -> datetime:
+    return at.replace(year=at.year + at.month // 12, month=at.month % 12 + 1)
+
+
+class RollupAnalyticsEngine(AnalyticsEngine):
+    """
+    Answers a metric over a [start, end) range in buckets of any width from
+    the coarsest precomputed rows able to: the day, hour or minute request
+    rollups, or the hourly revenue ledger. A rollup is only used when both
+    ends of the range and the bucket width fall on its own boundaries, and
+    the status class, if any, is one it counts. Every other query range
+    scans api_request or api_subscription and buckets the rows it reads.
+    """
+
+    def __init__(
+        self,
+        request_rollup: RequestRollup | None = None,
+        revenue_ledger: RevenueLedger | None = None,
+    ):
+        self.request_rollup = request_rollup or SqlRequestRollup()
+        self.revenue_ledger = revenue_ledger or SqlRevenueLedger()
+
+    def plan(self, query: AnalyticsQuery) -> str:
+        if query.metric in REVENUE_METRICS:
+            granularities: Sequence[str] = (HOUR,)
+        elif query.status_class is None or (
+            query.metric == "requests" and query.status_class in STATUS_COLUMNS
+        ):
+            granularities = (DAY, HOUR, MINUTE)
+        else:
+            return RAW
+
+        for granularity in granularities:
+            if self.__fits(query, granularity):
+                return granularity
+
+        return RAW
+
+    def run(self, query: AnalyticsQuery) -> List[Dict[str, Any]]:
+        if query.metric not in COLUMNS:
+            raise ValueError(f"Unknown analytics metric: {query.metric}")
+
+        plan = self.plan(query)
+        rows = self.__raw(query) if plan == RAW else self.__rolled_up(query, plan)
+        width = len(COLUMNS[query.metric])
+
+        sums: Dict[datetime, List] = {}
+        if query.fill:
+            sums = {bucket: [0] * width for bucket in self.__buckets(query)}
+
+        for at, amounts in rows:
+            bucket = sums.setdefault(self.__bucket_of(query, at), [0] * width)
+            for i, amount in enumerate(amounts):
+                bucket[i] += amount
+
+        return [
+            {"bucket": bucket, "value": self.__value(query, amounts)}
+            for bucket, amounts in sorted(sums.items())
+        ]
+
+    def __fits(self, query: AnalyticsQuery, granularity: str) -> bool:
+        width = WIDTHS[granularity]
+        if query.bucket != MONTH and query.bucket % width:
+            return False
+
+        return all(
+            at is None or bucket_of(at, granularity) == at
+            for at in (query.start, query.end)
+        )
+
+    def __rolled_up(
+        self, query: AnalyticsQuery, granularity: str
+    ) -> Iterator[Tuple[datetime, Tuple]]:
+        columns = COLUMNS[query.metric]
+
+        if query.metric in REVENUE_METRICS:
+            rows = self.revenue_ledger.series(
+                query.start, query.end, query.supplier_id, query.api_id
+            )
+        else:
+            if query.status_class is not None:
+                columns = (STATUS_COLUMNS[query.status_class],)
+            rows = self.request_rollup.series(
+                granularity,
+                query.api_id,
+                query.start,
+                query.end,
+                query.version,
+                query.supplier_id,
+            )
+
+        for row in rows:
+            yield row["bucket"], tuple(row[name] for name in columns)
+
+    def __raw(self, query: AnalyticsQuery) -> Iterator[Tuple[datetime, Tuple]]:
+        if query.metric in REVENUE_METRICS:
+            at, table = ApiSubscription.start_date, ApiSubscription
+            statement = select(at, ApiSubscription.price)
+        else:
+            at, table = ApiRequest.request_at, ApiRequest
+            statement = select(
+                at,
+                ApiRequest.http_status,
+                ApiRequest.response_time,
+                # only the bytes metric needs the logged bodies
+                (
+                    ApiRequest.response_body if query.metric == "bytes" else literal("")
+                ).label("response_body"),
+            )
+
+            if query.version is not None:
+                statement = statement.where(ApiRequest.api_version == query.version)
+
+            if query.status_class is not None:
+                lowest = int(query.status_class[0]) * 100
+                statement = statement.where(
+                    ApiRequest.http_status >= lowest,
+                    ApiRequest.http_status < lowest + 100,
+                )
+
+        if query.api_id is not None:
+            statement = statement.where(table.api_id == query.api_id)
+
+        if query.supplier_id is not None:
+            statement = statement.join(ApiModel, table.api_id == ApiModel.id).where(
+                ApiModel.supplier_id == query.supplier_id
+            )
+
+        if query.start is not None:
+            statement = statement.where(at >= query.start)
+
+        if query.end is not None:
+            statement = statement.where(at < query.end)
+
+        for row in db.session.execute(statement.order_by(at)):
+            yield row[0], self.__amounts(query, row)
+
+    def __amounts(self, query: AnalyticsQuery, row) -> Tuple:
+        if query.metric in REVENUE_METRICS:
+            counters: Iterable = (row.price or 0.0, 1)
+            names: Sequence[str] = AMOUNTS
+        else:
+            counters, names = counters_of(row._mapping), COUNTERS
+
+        counted = dict(zip(names, counters))
+        return tuple(counted[name] for name in COLUMNS[query.metric])
+
+    def __buckets(self, query: AnalyticsQuery) -> Iterator[datetime]:
+        if query.start is None or query.end is None:
+            raise ValueError("Filling analytics buckets needs both ends of the range")
+
+        bucket = self.__bucket_of(query, query.start)
+        while bucket < query.end:
+            yield bucket
+            bucket = (
+                next_month(bucket) if query.bucket == MONTH else bucket + query.bucket
+            )
+
+    def __bucket_of(self, query: AnalyticsQuery, at: datetime) -> datetime:
+        if query.bucket == MONTH:
+            return month_of(at)
+
+        anchor = query.start or EPOCH
+        return anchor + (at - anchor) // query.bucket * query.bucket
+
+    def __value(self, query: AnalyticsQuery, amounts: List):
+        if query.metric == "latency":
+            total, count = amounts
+            return total / count if count else None
+        return amounts[0]
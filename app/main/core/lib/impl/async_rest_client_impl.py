@@ -0,0 +1,200 @@
+import asyncio
+import json
+import threading
+from typing import Dict, Tuple
+
+from app.main.core.lib.async_rest_client import AsyncRestClient, AsyncStreamedResponse
+from app.main.core.lib.impl.rest_client_impl import PASS_THROUGH_HEADERS
+from app.main.core.lib.rest_client import RestClient, StreamedResponse
+
+
+def _encode(data):
+    if data is None or isinstance(data, (str, bytes)):
+        return data
+    return json.dumps(data)
+
+
+class AiohttpRestClient(AsyncRestClient):
+    """
+    Sends calls through an `aiohttp` session holding up to `limit` pooled
+    keep-alive connections, `limit_per_host` of them to any one upstream.
+    A session belongs to the event loop it was opened on, so one is opened
+    per loop the client is used from. `aiohttp` is imported once a call is
+    made, so only the asyncio gateway loads it.
+    """
+
+    def __init__(
+        self,
+        limit: int = 1000,
+        limit_per_host: int = 0,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.chunk_size = chunk_size
+        self._sessions: Dict[asyncio.AbstractEventLoop, object] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, url, headers) -> Tuple[Dict, int]:
+        body, status, _ = await self.__send("GET", url, headers)
+        return json.loads(body), status
+
+    async def get_with_headers(
+        self, url, headers
+    ) -> Tuple[Dict | None, int, Dict[str, str]]:
+        body, status, response_headers = await self.__send("GET", url, headers)
+        # a 304 Not Modified carries no body to decode
+        return json.loads(body) if body else None, status, response_headers
+
+    async def post(self, url, headers, data) -> Tuple[Dict, int]:
+        body, status, _ = await self.__send("POST", url, headers, data)
+        return json.loads(body), status
+
+    async def delete(self, url, headers) -> Tuple[Dict, int]:
+        body, status, _ = await self.__send("DELETE", url, headers)
+        return json.loads(body), status
+
+    async def patch(self, url, headers, data) -> Tuple[Dict, int]:
+        body, status, _ = await self.__send("PATCH", url, headers, data)
+        return json.loads(body), status
+
+    async def request(self, method, url, headers, data=None) -> Tuple[Dict | None, int]:
+        body, status, _ = await self.__send(method, url, headers, data)
+        # HEAD and most OPTIONS responses carry no body to decode
+        return json.loads(body) if body else None, status
+
+    async def stream(self, method, url, headers, data=None) -> AsyncStreamedResponse:
+        response = await self.__session().request(
+            method,
+            url,
+            headers=headers,
+            data=_encode(data),
+            # raw, still encoded bytes so Content-Length and Content-Encoding hold
+            auto_decompress=False,
+        )
+
+        async def close():
+            response.release()
+
+        return AsyncStreamedResponse(
+            status=response.status,
+            headers={
+                header: response.headers[header]
+                for header in PASS_THROUGH_HEADERS
+                if header in response.headers
+            },
+            chunks=response.content.iter_chunked(self.chunk_size),
+            close=close,
+        )
+
+    async def close(self):
+        with self._lock:
+            session = self._sessions.pop(asyncio.get_running_loop(), None)
+
+        if session is not None:
+            await session.close()
+
+    def is_connect_error(self, error: Exception) -> bool:
+        import aiohttp
+
+        # refused, unresolved or timed out before the request was sent
+        return isinstance(
+            error, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError)
+        )
+
+    async def __send(self, method, url, headers, data=None):
+        async with self.__session().request(
+            method, url, headers=headers, data=_encode(data)
+        ) as response:
+            body = await response.read()
+            return body, response.status, dict(response.headers)
+
+    def __session(self):
+        loop = asyncio.get_running_loop()
+        session = self._sessions.get(loop)
+
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(loop)
+
+                if session is None:
+                    import aiohttp
+
+                    session = aiohttp.ClientSession(
+                        connector=aiohttp.TCPConnector(
+                            limit=self.limit, limit_per_host=self.limit_per_host
+                        ),
+                        timeout=aiohttp.ClientTimeout(
+                            sock_connect=self.connect_timeout,
+                            sock_read=self.read_timeout,
+                        ),
+                    )
+                    self._sessions[loop] = session
+
+        return session
+
+
+class LoopThreadRestClient(RestClient):
+    """
+    Serves the blocking `RestClient` interface from an `AsyncRestClient`
+    running on an event loop of its own thread, so synchronous callers share
+    the async client's connection pool.
+    """
+
+    def __init__(self, client: AsyncRestClient):
+        self.client = client
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="rest-client-loop", daemon=True
+        )
+        self._thread.start()
+
+    def get(self, url, headers) -> Tuple[Dict, int]:
+        return self.__run(self.client.get(url, headers))
+
+    def get_with_headers(self, url, headers) -> Tuple[Dict | None, int, Dict[str, str]]:
+        return self.__run(self.client.get_with_headers(url, headers))
+
+    def post(self, url, headers, data) -> Tuple[Dict, int]:
+        return self.__run(self.client.post(url, headers, data))
+
+    def delete(self, url, headers) -> Tuple[Dict, int]:
+        return self.__run(self.client.delete(url, headers))
+
+    def patch(self, url, headers, data) -> Tuple[Dict, int]:
+        return self.__run(self.client.patch(url, headers, data))
+
+    def request(self, method, url, headers, data=None) -> Tuple[Dict | None, int]:
+        return self.__run(self.client.request(method, url, headers, data))
+
+    def stream(self, method, url, headers, data=None) -> StreamedResponse:
+        response = self.__run(self.client.stream(method, url, headers, data))
+
+        def chunks():
+            while True:
+                try:
+                    yield self.__run(anext(response.chunks))
+                except StopAsyncIteration:
+                    return
+
+        return StreamedResponse(
+            status=response.status,
+            headers=response.headers,
+            chunks=chunks(),
+            close=lambda: self.__run(response.close()),
+        )
+
+    def close(self):
+        self.__run(self.client.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def is_connect_error(self, error: Exception) -> bool:
+        return self.client.is_connect_error(error)
+
+    def __run(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
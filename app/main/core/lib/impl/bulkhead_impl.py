@@ -0,0 +1,168 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable
+
+from app.main.core.lib.bulkhead import Bulkhead
+from app.main.core.lib.impl.loop_event import LoopEvent
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+class _Waiter:
+    def __init__(self, max_concurrent: int, ready: threading.Event | LoopEvent):
+        self.max_concurrent = max_concurrent
+        self.ready = ready
+        self.acquired = False
+
+
+class _Compartment:
+    def __init__(self):
+        self.waiters: Deque[_Waiter] = deque()
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+
+class SemaphoreBulkhead(Bulkhead):
+    """
+    Bounds the upstream calls in flight per compartment (an api, or a plan
+    tier of an api). Once `max_concurrent` calls are running, up to
+    `max_queued` more wait at most `queue_timeout` seconds for a slot, and
+    anything beyond is shed with a 503 right away. Limits passed as None
+    fall back to the defaults given here. Freed slots go to the waiters in
+    arrival order, threads and coroutines alike, coroutines waiting without
+    holding a thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 20,
+        max_queued: int = 10,
+        queue_timeout: float = 0.5,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._compartments: Dict[Hashable, _Compartment] = {}
+        self._lock = threading.Lock()
+
+    def acquire(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ):
+        waiter = self.__enqueue(
+            compartment, max_concurrent, max_queued, threading.Event
+        )
+
+        if waiter is not None:
+            waiter.ready.wait(self.queue_timeout)
+            self.__settle(compartment, waiter)
+
+    async def acquire_async(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ):
+        waiter = self.__enqueue(compartment, max_concurrent, max_queued, LoopEvent)
+
+        if waiter is None:
+            return
+
+        try:
+            await waiter.ready.wait(self.queue_timeout)
+        except asyncio.CancelledError:
+            self.__abandon(compartment, waiter)
+            raise
+
+        self.__settle(compartment, waiter)
+
+    def release(self, compartment: Hashable):
+        with self._lock:
+            state = self.__compartment(compartment)
+            state.in_flight -= 1
+
+            while state.waiters and state.in_flight < state.waiters[0].max_concurrent:
+                waiter = state.waiters.popleft()
+                state.in_flight += 1
+                waiter.acquired = True
+                waiter.ready.set()
+
+    def stats(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None = None,
+        max_queued: int | None = None,
+    ) -> Dict[str, int]:
+        with self._lock:
+            state = self._compartments.get(compartment)
+            return {
+                "in_flight": state.in_flight if state else 0,
+                "queued": len(state.waiters) if state else 0,
+                "max_concurrent": max_concurrent or self.max_concurrent,
+                "max_queued": self.max_queued if max_queued is None else max_queued,
+                "rejected": state.rejected if state else 0,
+                "timed_out": state.timed_out if state else 0,
+            }
+
+    def __enqueue(
+        self,
+        compartment: Hashable,
+        max_concurrent: int | None,
+        max_queued: int | None,
+        ready: Callable[[], threading.Event | LoopEvent],
+    ) -> _Waiter | None:
+        # None when a slot was free
+        max_concurrent = max_concurrent or self.max_concurrent
+        max_queued = self.max_queued if max_queued is None else max_queued
+
+        with self._lock:
+            state = self.__compartment(compartment)
+
+            if state.in_flight < max_concurrent and not state.waiters:
+                state.in_flight += 1
+                return None
+
+            if len(state.waiters) >= max_queued:
+                state.rejected += 1
+                raise ServiceUnavailableError(
+                    "Too many concurrent calls to this API, try again later", 1
+                )
+
+            waiter = _Waiter(max_concurrent, ready())
+            state.waiters.append(waiter)
+
+            return waiter
+
+    def __settle(self, compartment: Hashable, waiter: _Waiter):
+        with self._lock:
+            if waiter.acquired:
+                return
+
+            state = self.__compartment(compartment)
+            state.waiters.remove(waiter)
+            state.timed_out += 1
+
+        raise ServiceUnavailableError(
+            "Too many concurrent calls to this API, try again later", 1
+        )
+
+    def __abandon(self, compartment: Hashable, waiter: _Waiter):
+        # the caller went away, its place in the queue or its slot is freed
+        with self._lock:
+            if not waiter.acquired:
+                self.__compartment(compartment).waiters.remove(waiter)
+                return
+
+        self.release(compartment)
+
+    def __compartment(self, compartment: Hashable) -> _Compartment:
+        state = self._compartments.get(compartment)
+
+        if state is None:
+            state = _Compartment()
+            self._compartments[compartment] = state
+
+        return state
@@ -0,0 +1,191 @@
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.logger import Logger
+from app.main.utils.exceptions import ServiceUnavailableError
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Breaker:
+    def __init__(self, window: int):
+        # one [second, calls, failures, slow calls] bucket per second of the window
+        self.buckets: List[List[int]] = [[-1, 0, 0, 0] for _ in range(window)]
+        self.status = CLOSED
+        self.opened_until = 0.0
+        self.probes = 0
+        self.probe_successes = 0
+        self.transitions: deque = deque(maxlen=20)
+
+
+class RollingWindowCircuitBreaker(CircuitBreaker):
+    """
+    One breaker per API version over a rolling window of `window` one-second
+    buckets. It opens once `min_calls` calls were seen and either failed calls
+    (errors and 5xx) or calls slower than `slow_call_seconds` reach
+    `failure_rate`, then fails fast for `open_seconds`. After that it lets
+    `half_open_probes` calls through and closes once they all succeed, a
+    probe abandoned before its answer is cancelled and lets another through.
+    Transitions are kept per breaker and written to `logger` when given.
+    """
+
+    def __init__(
+        self,
+        window: int = 30,
+        min_calls: int = 20,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        open_seconds: int = 30,
+        half_open_probes: int = 3,
+        logger: Logger | None = None,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self.logger = logger
+        self._breakers: Dict[Tuple[int, str], _Breaker] = {}
+        self._lock = threading.Lock()
+
+    def allow(self, api_id: int, version: str):
+        now = time.monotonic()
+
+        with self._lock:
+            breaker = self.__breaker(api_id, version)
+
+            if breaker.status == OPEN:
+                if now < breaker.opened_until:
+                    raise ServiceUnavailableError(
+                        "API version is temporarily unavailable",
+                        retry_after=math.ceil(breaker.opened_until - now),
+                    )
+                breaker.probes = 0
+                breaker.probe_successes = 0
+                self.__transition(api_id, version, breaker, HALF_OPEN)
+
+            if breaker.status == HALF_OPEN:
+                if breaker.probes >= self.half_open_probes:
+                    raise ServiceUnavailableError(
+                        "API version is temporarily unavailable", retry_after=1
+                    )
+                breaker.probes += 1
+
+    def record(self, api_id: int, version: str, failed: bool, latency: float):
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+
+        with self._lock:
+            breaker = self.__breaker(api_id, version)
+
+            if breaker.status == HALF_OPEN:
+                if failed or slow:
+                    self.__open(api_id, version, breaker, now)
+                    return
+
+                breaker.probe_successes += 1
+
+                if breaker.probe_successes >= self.half_open_probes:
+                    breaker.buckets = [[-1, 0, 0, 0] for _ in range(self.window)]
+                    self.__transition(api_id, version, breaker, CLOSED)
+                return
+
+            if breaker.status == OPEN:
+                return
+
+            second = int(now)
+            bucket = breaker.buckets[second % self.window]
+
+            if bucket[0] != second:
+                bucket[:] = [second, 0, 0, 0]
+
+            bucket[1] += 1
+            bucket[2] += int(failed)
+            bucket[3] += int(slow)
+
+            calls, failures, slow_calls = self.__totals(breaker, second)
+
+            if (
+                calls >= self.min_calls
+                and max(failures, slow_calls) / calls >= self.failure_rate
+            ):
+                self.__open(api_id, version, breaker, now)
+
+    def cancel(self, api_id: int, version: str):
+        with self._lock:
+            breaker = self.__breaker(api_id, version)
+
+            if breaker.status == HALF_OPEN and breaker.probes > 0:
+                breaker.probes -= 1
+
+    def closed(self, api_id: int, version: str) -> bool:
+        with self._lock:
+            return self.__breaker(api_id, version).status == CLOSED
+
+    def state(self, api_id: int, version: str) -> Dict[str, Any]:
+        now = time.monotonic()
+
+        with self._lock:
+            breaker = self.__breaker(api_id, version)
+            calls, failures, slow_calls = self.__totals(breaker, int(now))
+
+            return {
+                "version": version,
+                "status": breaker.status,
+                "calls": calls,
+                "failures": failures,
+                "slow_calls": slow_calls,
+                "retry_after": (
+                    math.ceil(breaker.opened_until - now)
+                    if breaker.status == OPEN and breaker.opened_until > now
+                    else 0
+                ),
+                "transitions": list(breaker.transitions),
+            }
+
+    def __breaker(self, api_id: int, version: str) -> _Breaker:
+        breaker = self._breakers.get((api_id, version))
+
+        if breaker is None:
+            breaker = _Breaker(self.window)
+            self._breakers[(api_id, version)] = breaker
+
+        return breaker
+
+    def __totals(self, breaker: _Breaker, second: int) -> Tuple[int, int, int]:
+        calls = failures = slow_calls = 0
+
+        for bucket in breaker.buckets:
+            if bucket[0] > second - self.window:
+                calls += bucket[1]
+                failures += bucket[2]
+                slow_calls += bucket[3]
+
+        return calls, failures, slow_calls
+
+    def __open(self, api_id: int, version: str, breaker: _Breaker, now: float):
+        breaker.opened_until = now + self.open_seconds
+        self.__transition(api_id, version, breaker, OPEN)
+
+    def __transition(self, api_id: int, version: str, breaker: _Breaker, status: str):
+        transition = {
+            "from": breaker.status,
+            "to": status,
+            "at": datetime.now().isoformat(),
+        }
+        breaker.status = status
+        breaker.transitions.append(transition)
+
+        if self.logger is not None:
+            self.logger.info(
+                "Circuit breaker transition",
+                {"api_id": api_id, "api_version": version, **transition},
+            )
@@ -0,0 +1,127 @@
+import math
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict
+
+from app.main.core.lib.concurrency_limiter import ConcurrencyLimiter
+from app.main.core.lib.logger import Logger
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+class GradientConcurrencyLimiter(ConcurrencyLimiter):
+    """
+    Caps the calls the gateway works on at once and moves the cap with the
+    latency the gateway adds on top of the upstream, in the style of a
+    gradient limit. Every `window` samples the window's average is compared
+    with a slow moving average of past windows:
+
+        gradient = clamp(tolerance * long / short, 0.5, 1)
+        target = limit * gradient + sqrt(limit)
+
+    and the limit moves a `smoothing` share of the way to the target, within
+    `min_limit` and `max_limit`. It grows while latency holds and shrinks
+    once queueing inflates it. A window that never used half the limit does
+    not grow it. Calls over the limit are rejected at once with a 503. Limit
+    changes are kept and written to `logger` when given.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 200,
+        min_limit: int = 8,
+        max_limit: int = 1000,
+        window: int = 50,
+        long_window: int = 20,
+        tolerance: float = 2.0,
+        smoothing: float = 0.2,
+        logger: Logger | None = None,
+    ):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+        self.long_window = long_window
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.logger = logger
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        self._rejected = 0
+        self._samples = 0
+        self._latency_sum = 0.0
+        self._max_in_flight = 0
+        self._short = None
+        self._long = None
+        self._changes: deque = deque(maxlen=20)
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                self._rejected += 1
+                raise ServiceUnavailableError(
+                    "Gateway is overloaded, try again later", 1
+                )
+
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def release(self, latency: float):
+        with self._lock:
+            self._in_flight -= 1
+            self._samples += 1
+            self._latency_sum += latency
+
+            if self._samples >= self.window:
+                self.__update()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": int(self._limit),
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "short_latency": None if self._short is None else self._short * 1e6,
+                "long_latency": None if self._long is None else self._long * 1e6,
+                "changes": list(self._changes),
+            }
+
+    def __update(self):
+        short = self._latency_sum / self._samples
+        app_limited = self._max_in_flight < self._limit / 2
+        self._samples = 0
+        self._latency_sum = 0.0
+        self._max_in_flight = self._in_flight
+        self._short = short
+
+        if self._long is None:
+            self._long = short
+            return
+
+        self._long += (short - self._long) / self.long_window
+
+        # the baseline drifted up during a long overload, let it recover
+        if self._long > 2 * short:
+            self._long *= 0.95
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long / max(short, 1e-9)))
+
+        if gradient == 1.0 and app_limited:
+            return
+
+        target = self._limit * gradient + math.sqrt(self._limit)
+        limit = self._limit * (1 - self.smoothing) + target * self.smoothing
+        limit = max(self.min_limit, min(self.max_limit, limit))
+
+        if int(limit) != int(self._limit):
+            change = {
+                "from": int(self._limit),
+                "to": int(limit),
+                "at": datetime.now().isoformat(),
+            }
+            self._changes.append(change)
+
+            if self.logger is not None:
+                self.logger.info("Gateway concurrency limit change", change)
+
+        self._limit = limit
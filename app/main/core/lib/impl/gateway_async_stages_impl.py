@@ -0,0 +1,404 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from app.main.core.lib.async_rest_client import AsyncRestClient
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.concurrency_limiter import ConcurrencyLimiter
+from app.main.core.lib.gateway_pipeline import AsyncGatewayStage, GatewayContext
+from app.main.core.lib.latency_histograms import LatencyHistograms
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.retry_budget import RetryBudget
+from app.main.core.lib.impl.gateway_stages_impl import (
+    IDEMPOTENT_METHODS,
+    AdmissionStage,
+    AuthStage,
+    BulkheadStage,
+    CacheStage,
+    HedgeDelays,
+    LogStage,
+    MirrorStage,
+    QuotaStage,
+    RateLimitStage,
+    RouteStage,
+    jittered_backoff,
+)
+
+# runs a blocking function, database work included, off the event loop
+Blocking = Callable[..., Awaitable[Any]]
+
+CallNext = Callable[[GatewayContext], Awaitable[None]]
+
+
+class AsyncConcurrencyLimitStage(AsyncGatewayStage):
+    """Awaiting counterpart of `ConcurrencyLimitStage`."""
+
+    name = "concurrency_limit"
+
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self.limiter = limiter
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        self.limiter.acquire()
+
+        started = time.monotonic()
+
+        try:
+            await call_next(context)
+        finally:
+            self.limiter.release(
+                max(time.monotonic() - started - context.upstream_time, 0.0)
+            )
+
+
+class AsyncAuthStage(AuthStage, AsyncGatewayStage):
+    """Awaiting counterpart of `AuthStage`, querying cold caches off the loop."""
+
+    def __init__(self, key_cache, route_table, gateway_resolver, blocking: Blocking):
+        super().__init__(key_cache, route_table, gateway_resolver)
+        self.blocking = blocking
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        if not self.caches_warm(context.api_key, context.api_id, context.version):
+            await self.blocking(
+                self.warm_caches, context.api_key, context.api_id, context.version
+            )
+
+        self.authorize(context)
+
+        await call_next(context)
+
+
+class AsyncRateLimitStage(RateLimitStage, AsyncGatewayStage):
+    """Awaiting counterpart of `RateLimitStage`."""
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        self.spend(context)
+
+        await call_next(context)
+
+
+class AsyncAdmissionStage(AdmissionStage, AsyncGatewayStage):
+    """Awaiting counterpart of `AdmissionStage`, queueing on the loop."""
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        tier = context.subscription.tier
+
+        await self.scheduler.admit_async(tier)
+
+        try:
+            await call_next(context)
+        finally:
+            self.scheduler.release(tier)
+
+
+class AsyncRouteStage(RouteStage, AsyncGatewayStage):
+    """Awaiting counterpart of `RouteStage`, compiling cold routes off the loop."""
+
+    def __init__(self, route_table, blocking: Blocking):
+        super().__init__(route_table)
+        self.blocking = blocking
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        if not self.routes_warm(context):
+            await self.blocking(self.resolve, context)
+        else:
+            self.resolve(context)
+
+        await call_next(context)
+
+
+class AsyncLogStage(LogStage, AsyncGatewayStage):
+    """
+    Awaiting counterpart of `LogStage`. The request log is written from the
+    loop with `write_nowait`, so a full `BatchedRequestLog` spills or drops
+    the record instead of blocking every call in flight.
+    """
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        self.stamp(context)
+
+        await call_next(context)
+
+        self.write(context, str(context.response))
+
+    def append(self, record: Dict[str, Any]):
+        self.request_log.write_nowait(record)
+
+
+class AsyncQuotaStage(QuotaStage, AsyncGatewayStage):
+    """Awaiting counterpart of `QuotaStage`, metering off the loop."""
+
+    def __init__(self, quota_meter, key_cache, blocking: Blocking):
+        super().__init__(quota_meter, key_cache)
+        self.blocking = blocking
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        subscription_id = context.subscription.id
+
+        remaining_requests = await self.blocking(
+            self.quota_meter.reserve, subscription_id
+        )
+
+        try:
+            await call_next(context)
+        except BaseException:
+            await self.blocking(self.quota_meter.release, subscription_id)
+            raise
+
+        self.key_cache.record_remaining_requests(subscription_id, remaining_requests)
+
+        context.response_headers["X-Quota-Remaining"] = str(remaining_requests)
+
+
+class AsyncCacheStage(CacheStage, AsyncGatewayStage):
+    """Awaiting counterpart of `CacheStage`."""
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        if not self.cacheable(context):
+            await call_next(context)
+            return
+
+        hit, cached, headers = self.lookup(context)
+
+        if hit:
+            return
+
+        await call_next(context)
+
+        self.store(context, cached, headers)
+
+
+class AsyncMirrorStage(MirrorStage, AsyncGatewayStage):
+    """Awaiting counterpart of `MirrorStage`, handing the call over never blocks."""
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        if context.shadow_route is None:
+            await call_next(context)
+            return
+
+        started = time.monotonic()
+
+        try:
+            await call_next(context)
+        except Exception:
+            self.submit(context, None, started)
+            raise
+
+        self.submit(context, context.status, started)
+
+
+class AsyncBulkheadStage(BulkheadStage, AsyncGatewayStage):
+    """Awaiting counterpart of `BulkheadStage`, queueing on the loop."""
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        held = []
+
+        try:
+            for compartment, max_concurrent, max_queued in self.compartments(context):
+                await self.bulkhead.acquire_async(
+                    compartment, max_concurrent, max_queued
+                )
+                held.append(compartment)
+
+            await call_next(context)
+        finally:
+            self.release(held)
+
+
+class AsyncUpstreamStage(AsyncGatewayStage):
+    """
+    Sends the call to the supplier through the async client, behind the
+    version's circuit breaker, to the upstream target the load balancer picks
+    for every attempt. Identical concurrent GETs share one upstream
+    request. Hedges and retries GETs and DELETEs like `UpstreamStage`, from
+    the same upstream only histograms, the attempt that loses a hedge is
+    cancelled and a cancelled half-open probe is given back to the breaker.
+    """
+
+    name = "upstream"
+
+    def __init__(
+        self,
+        rest_client: AsyncRestClient,
+        circuit_breaker: CircuitBreaker,
+        retry_budget: RetryBudget,
+        upstream_histograms: LatencyHistograms,
+        load_balancer: LoadBalancer,
+        retry_backoff: float = 0.05,
+        max_retry_backoff: float = 1.0,
+        hedge_min_samples: int = 20,
+    ):
+        self.rest_client = rest_client
+        self.circuit_breaker = circuit_breaker
+        self.retry_budget = retry_budget
+        self.load_balancer = load_balancer
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.upstream_histograms = upstream_histograms
+        self.hedge_delays = HedgeDelays(upstream_histograms, hedge_min_samples)
+        self._flights: Dict[tuple, asyncio.Future] = {}
+
+    async def handle(self, context: GatewayContext, call_next: CallNext):
+        started = time.monotonic()
+
+        try:
+            await self.__dispatch(context)
+        finally:
+            context.upstream_time += time.monotonic() - started
+
+        await call_next(context)
+
+    async def __dispatch(self, context: GatewayContext):
+        url, headers = context.request_url, context.request_headers
+
+        if context.method == "GET":
+            key = ("GET", url, tuple(sorted(headers.items())))
+
+            if context.capture_headers:
+                context.upstream_target, result = await self.__shared(
+                    key,
+                    lambda: self.__attempts(
+                        context,
+                        lambda target_url: self.rest_client.get_with_headers(
+                            target_url, headers
+                        ),
+                    ),
+                )
+                context.response, context.status, context.upstream_headers = result
+            else:
+                context.upstream_target, result = await self.__shared(
+                    key,
+                    lambda: self.__attempts(
+                        context,
+                        lambda target_url: self.rest_client.get(target_url, headers),
+                    ),
+                )
+                context.response, context.status = result
+        else:
+            context.upstream_target, result = await self.__attempts(
+                context,
+                lambda target_url: self.__send(
+                    context.method, target_url, headers, context.body
+                ),
+            )
+            context.response, context.status = result
+
+    def __send(self, method: str, url: str, headers: dict, body):
+        if method == "POST":
+            return self.rest_client.post(url, headers, body)
+        if method == "PATCH":
+            return self.rest_client.patch(url, headers, body)
+        if method == "DELETE":
+            return self.rest_client.delete(url, headers)
+        return self.rest_client.request(method, url, headers, body)
+
+    async def __shared(self, key: tuple, call):
+        flight = self._flights.get(key)
+
+        if flight is not None:
+            return await asyncio.shield(flight)
+
+        flight = asyncio.ensure_future(call())
+        self._flights[key] = flight
+
+        try:
+            return await asyncio.shield(flight)
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def __attempts(self, context: GatewayContext, call):
+        route = context.route
+
+        self.retry_budget.deposit(route.api_id, route.version, route.retry_budget_ratio)
+
+        if context.method not in IDEMPOTENT_METHODS:
+            return await self.__call(context, call)
+
+        retries = 0
+
+        while True:
+            try:
+                return await self.__hedged(context, call)
+            except Exception as error:
+                if (
+                    retries >= route.max_retries
+                    or not self.rest_client.is_connect_error(error)
+                    or not self.retry_budget.withdraw(route.api_id, route.version)
+                ):
+                    raise
+
+            retries += 1
+            await asyncio.sleep(
+                jittered_backoff(retries, self.retry_backoff, self.max_retry_backoff)
+            )
+
+    async def __hedged(self, context: GatewayContext, call):
+        route = context.route
+        delay = self.hedge_delays.delay(route)
+
+        if delay is None or not self.circuit_breaker.closed(
+            route.api_id, route.version
+        ):
+            return await self.__call(context, call)
+
+        first = asyncio.ensure_future(self.__call(context, call))
+        attempts = {first}
+
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+
+            if done or not self.retry_budget.withdraw(route.api_id, route.version):
+                return await first
+
+            attempts.add(asyncio.ensure_future(self.__call(context, call)))
+            pending = set(attempts)
+
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                for attempt in done:
+                    if attempt.exception() is None:
+                        return attempt.result()
+
+                if not pending:
+                    return first.result()
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+
+    async def __call(self, context: GatewayContext, call):
+        route = context.route
+
+        self.circuit_breaker.allow(route.api_id, route.version)
+
+        target = self.load_balancer.choose(route)
+        started = time.monotonic()
+
+        try:
+            result = await call(f"{target}/{context.params}")
+        except asyncio.CancelledError:
+            self.circuit_breaker.cancel(route.api_id, route.version)
+            self.load_balancer.release(route, target, False)
+            raise
+        except Exception:
+            self.circuit_breaker.record(
+                route.api_id, route.version, True, time.monotonic() - started
+            )
+            self.load_balancer.release(route, target, True)
+            raise
+
+        elapsed = time.monotonic() - started
+
+        self.circuit_breaker.record(
+            route.api_id, route.version, result[1] >= 500, elapsed
+        )
+        self.load_balancer.release(route, target, result[1] >= 500)
+        self.upstream_histograms.record(
+            route.api_id, route.version, int(elapsed * 1_000_000)
+        )
+
+        return target, result
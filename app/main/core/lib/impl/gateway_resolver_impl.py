@@ -0,0 +1,167 @@
+from types import MappingProxyType
+
+from sqlalchemy import and_
+
+from app.main import db
+from app.main.core.lib.admission_scheduler import plan_tier
+from app.main.core.lib.gateway_resolver import GatewayRecord, GatewayResolver
+from app.main.core.lib.key_principal_cache import KeyPrincipal, SubscriptionSnapshot
+from app.main.core.lib.route_table import Route, upstream_targets
+from app.main.model.api_header_model import ApiVersionHeader
+from app.main.model.api_key_model import ApiKey
+from app.main.model.api_model import ApiModel
+from app.main.model.api_plan_model import ApiPlan
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.model.api_version_model import ApiVersion
+from app.main.utils.exceptions import BadRequestError
+
+
+class JoinedQueryGatewayResolver(GatewayResolver):
+    """
+    Loads the key, its subscription and plan limits, the api status and
+    concurrency limits, the version status, base_url and headers with a
+    single outer joined SELECT. The header join yields one row per header.
+    """
+
+    def resolve(self, api_key: str, api_id: int, version: str) -> GatewayRecord:
+        rows = (
+            db.session.query(
+                ApiKey.status,
+                ApiSubscription.id,
+                ApiSubscription.api_id,
+                ApiSubscription.user_id,
+                ApiSubscription.status,
+                ApiSubscription.end_date,
+                ApiSubscription.max_requests,
+                ApiSubscription.plan_name,
+                ApiPlan.rate_limit_per_second,
+                ApiPlan.rate_limit_per_minute,
+                ApiPlan.max_concurrent_calls,
+                ApiPlan.tier,
+                ApiPlan.price,
+                ApiModel.status,
+                ApiModel.max_concurrent_calls,
+                ApiModel.max_queued_calls,
+                ApiVersion.base_url,
+                ApiVersion.status,
+                ApiVersion.response_cache_ttl,
+                ApiVersion.hedge_percentile,
+                ApiVersion.max_retries,
+                ApiVersion.retry_budget_ratio,
+                ApiVersion.upstream_targets,
+                ApiVersion.canary_version,
+                ApiVersion.canary_percent,
+                ApiVersion.mirror_version,
+                ApiVersion.mirror_percent,
+                ApiVersionHeader.key,
+                ApiVersionHeader.value,
+            )
+            .select_from(ApiKey)
+            .outerjoin(ApiSubscription, ApiSubscription.id == ApiKey.subscription_id)
+            .outerjoin(
+                ApiPlan,
+                and_(
+                    ApiPlan.api_id == ApiSubscription.api_id,
+                    ApiPlan.name == ApiSubscription.plan_name,
+                ),
+            )
+            .outerjoin(ApiModel, ApiModel.id == api_id)
+            .outerjoin(
+                ApiVersion,
+                and_(ApiVersion.api_id == api_id, ApiVersion.version == version),
+            )
+            .outerjoin(
+                ApiVersionHeader,
+                and_(
+                    ApiVersionHeader.api_id == api_id,
+                    ApiVersionHeader.api_version == version,
+                ),
+            )
+            .filter(ApiKey.key == api_key)
+            .all()
+        )
+
+        if not rows:
+            raise BadRequestError("Invalid API key")
+
+        (
+            key_status,
+            subscription_id,
+            subscription_api_id,
+            user_id,
+            subscription_status,
+            end_date,
+            max_requests,
+            plan_name,
+            rate_limit_per_second,
+            rate_limit_per_minute,
+            plan_max_concurrent_calls,
+            tier,
+            price,
+            api_status,
+            max_concurrent_calls,
+            max_queued_calls,
+            base_url,
+            version_status,
+            response_cache_ttl,
+            hedge_percentile,
+            max_retries,
+            retry_budget_ratio,
+            targets,
+            canary_version,
+            canary_percent,
+            mirror_version,
+            mirror_percent,
+            _,
+            _,
+        ) = rows[0]
+
+        principal = KeyPrincipal(
+            key=api_key,
+            status=key_status,
+            subscription=(
+                None
+                if subscription_id is None
+                else SubscriptionSnapshot(
+                    id=subscription_id,
+                    api_id=subscription_api_id,
+                    user_id=user_id,
+                    status=subscription_status,
+                    end_date=end_date,
+                    max_requests=max_requests,
+                    rate_limit_per_second=rate_limit_per_second,
+                    rate_limit_per_minute=rate_limit_per_minute,
+                    plan_name=plan_name,
+                    max_concurrent_calls=plan_max_concurrent_calls,
+                    tier=plan_tier(tier, price),
+                )
+            ),
+        )
+
+        route = (
+            None
+            if api_status is None or base_url is None
+            else Route(
+                api_id=api_id,
+                version=version,
+                base_url=base_url,
+                api_status=api_status,
+                version_status=version_status,
+                headers=MappingProxyType(
+                    {row[-2]: row[-1] for row in rows if row[-2] is not None}
+                ),
+                response_cache_ttl=response_cache_ttl or 0,
+                max_concurrent_calls=max_concurrent_calls,
+                max_queued_calls=max_queued_calls,
+                hedge_percentile=hedge_percentile,
+                max_retries=max_retries or 0,
+                retry_budget_ratio=retry_budget_ratio,
+                targets=upstream_targets(targets),
+                canary_version=canary_version,
+                canary_percent=canary_percent or 0,
+                mirror_version=mirror_version,
+                mirror_percent=mirror_percent or 0,
+            )
+        )
+
+        return GatewayRecord(principal=principal, route=route)
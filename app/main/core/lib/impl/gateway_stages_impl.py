@@ -0,0 +1,812 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Any, Callable, Dict, Tuple
+
+from app.main.core.lib.gateway_pipeline import GatewayContext, GatewayStage
+from app.main.core.lib.admission_scheduler import AdmissionScheduler
+from app.main.core.lib.bulkhead import Bulkhead, api_compartment, plan_compartment
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.concurrency_limiter import ConcurrencyLimiter
+from app.main.core.lib.gateway_resolver import GatewayResolver
+from app.main.core.lib.key_principal_cache import KeyPrincipalCache
+from app.main.core.lib.latency_histograms import LatencyHistograms
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.quota_meter import QuotaMeter
+from app.main.core.lib.rate_limiter import RateLimit, RateLimiter
+from app.main.core.lib.request_log import RequestLog
+from app.main.core.lib.response_cache import ResponseCache
+from app.main.core.lib.rest_client import RestClient, StreamedResponse
+from app.main.core.lib.retry_budget import RetryBudget
+from app.main.core.lib.route_table import Route, RouteTable
+from app.main.core.lib.single_flight import SingleFlight
+from app.main.core.lib.traffic_mirror import TrafficMirror
+
+from app.main.utils.exceptions import (
+    BadRequestError,
+    NotFoundError,
+    TooManyRequestsError,
+)
+
+# methods safe to send more than once, the only ones hedged or retried
+IDEMPOTENT_METHODS = ("GET", "DELETE")
+
+
+def jittered_backoff(retries: int, base: float, cap: float) -> float:
+    # full jitter, so callers failing together do not retry together
+    return random.uniform(0, min(base * 2**retries, cap))  # noqa: S311
+
+
+class ConcurrencyLimitStage(GatewayStage):
+    """
+    Takes a slot of the gateway wide adaptive concurrency limit and reports
+    the latency the gateway itself added, upstream time left out, once the
+    response is sent.
+    """
+
+    name = "concurrency_limit"
+
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self.limiter = limiter
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        self.limiter.acquire()
+
+        started = time.monotonic()
+
+        try:
+            call_next(context)
+        except Exception:
+            self.limiter.release(self.__latency(context, started))
+            raise
+
+        latency = self.__latency(context, started)
+
+        if context.stream:
+            context.on_close(lambda: self.limiter.release(latency))
+        else:
+            self.limiter.release(latency)
+
+    def __latency(self, context: GatewayContext, started: float) -> float:
+        return max(time.monotonic() - started - context.upstream_time, 0.0)
+
+
+class AuthStage(GatewayStage):
+    """Resolves the api key and checks its subscription covers the api."""
+
+    name = "auth"
+
+    def __init__(
+        self,
+        key_cache: KeyPrincipalCache,
+        route_table: RouteTable,
+        gateway_resolver: GatewayResolver,
+    ):
+        self.key_cache = key_cache
+        self.route_table = route_table
+        self.gateway_resolver = gateway_resolver
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        self.warm_caches(context.api_key, context.api_id, context.version)
+        self.authorize(context)
+
+        call_next(context)
+
+    def authorize(self, context: GatewayContext):
+        principal = self.key_cache.get_principal(context.api_key)
+
+        if principal.status != "active":
+            raise BadRequestError("API key is not active")
+
+        subscription = principal.subscription
+
+        if subscription is None or subscription.api_id != context.api_id:
+            raise BadRequestError("Invalid subscription")
+
+        if subscription.status != "active":
+            raise BadRequestError("Subscription is not active")
+
+        expired = subscription.end_date < datetime.now()
+
+        if expired:
+            raise BadRequestError("Subscription has expired")
+
+        no_remaining_requests = subscription.max_requests <= 0
+
+        if no_remaining_requests:
+            raise BadRequestError(
+                "Subscription has no requests left, Please renew subscription"
+            )
+
+        context.principal = principal
+        context.subscription = subscription
+
+    def caches_warm(self, api_key: str, api_id: int, version: str) -> bool:
+        return (
+            self.key_cache.peek(api_key) is not None
+            and self.route_table.peek(api_id, version) is not None
+        )
+
+    def warm_caches(self, api_key: str, api_id: int, version: str):
+        # one joined query instead of one per table when either cache is cold
+        if self.caches_warm(api_key, api_id, version):
+            return
+
+        generation = self.route_table.generation(api_id, version)
+        record = self.gateway_resolver.resolve(api_key, api_id, version)
+
+        self.key_cache.store(record.principal)
+
+        if record.route is not None:
+            self.route_table.store(record.route, generation)
+
+
+class RateLimitStage(GatewayStage):
+    """Spends a token from the plan's per second and per minute buckets."""
+
+    name = "rate_limit"
+
+    def __init__(self, rate_limiter: RateLimiter):
+        self.rate_limiter = rate_limiter
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        self.spend(context)
+
+        call_next(context)
+
+    def spend(self, context: GatewayContext):
+        subscription = context.subscription
+        limits = [
+            RateLimit(limit=limit, period=period)
+            for limit, period in (
+                (subscription.rate_limit_per_second, 1),
+                (subscription.rate_limit_per_minute, 60),
+            )
+            if limit
+        ]
+
+        if limits:
+            decision = self.rate_limiter.acquire(context.api_key, limits)
+
+            if not decision.allowed:
+                raise TooManyRequestsError("Rate limit exceeded", decision.headers())
+
+            context.response_headers.update(decision.headers())
+
+
+class AdmissionStage(GatewayStage):
+    """
+    Waits for the admission scheduler to let the call in according to its
+    plan tier, and gives the slot back once the response is sent.
+    """
+
+    name = "admission"
+
+    def __init__(self, scheduler: AdmissionScheduler):
+        self.scheduler = scheduler
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        tier = context.subscription.tier
+
+        self.scheduler.admit(tier)
+
+        try:
+            call_next(context)
+        except Exception:
+            self.scheduler.release(tier)
+            raise
+
+        if context.stream:
+            context.on_close(lambda: self.scheduler.release(tier))
+        else:
+            self.scheduler.release(tier)
+
+
+class RouteStage(GatewayStage):
+    """
+    Looks up the compiled route and builds the upstream url and headers.
+    The version's canary_percent of the calls are served by its canary
+    version, and mirror_percent of them are also picked to be copied to its
+    mirror version. Either falls back to the requested version while the
+    other one is missing or inactive.
+    """
+
+    name = "route"
+
+    def __init__(self, route_table: RouteTable):
+        self.route_table = route_table
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        self.resolve(context)
+
+        call_next(context)
+
+    def resolve(self, context: GatewayContext):
+        route = self.route_table.get_route(context.api_id, context.version)
+
+        if route.mirror_version is not None and self.__sampled(route.mirror_percent):
+            context.shadow_route = self.__alternate(route, route.mirror_version)
+
+        if route.canary_version is not None and self.__sampled(route.canary_percent):
+            route = self.__alternate(route, route.canary_version) or route
+            context.version = route.version
+
+        context.route = route
+        context.request_url = f"{route.base_url}/{context.params}"
+        context.request_headers = dict(route.headers)
+
+    def routes_warm(self, context: GatewayContext) -> bool:
+        route = self.route_table.peek(context.api_id, context.version)
+
+        return route is not None and all(
+            self.route_table.peek(context.api_id, version) is not None
+            for version in (route.canary_version, route.mirror_version)
+            if version is not None
+        )
+
+    def __sampled(self, percent: float) -> bool:
+        return random.uniform(0, 100) < percent  # noqa: S311
+
+    def __alternate(self, route: Route, version: str) -> Route | None:
+        try:
+            return self.route_table.get_route(route.api_id, version)
+        except (BadRequestError, NotFoundError):
+            return None
+
+
+class LogStage(GatewayStage):
+    """
+    Writes the api_request row once the inner stages answered, and feeds the
+    latency histograms. Streamed bodies are logged when the answer is
+    closed, keeping only the first `log_body_limit` bytes relayed.
+    """
+
+    name = "log"
+
+    def __init__(
+        self,
+        request_log: RequestLog,
+        latency_histograms: LatencyHistograms,
+        log_body_limit: int = 4096,
+    ):
+        self.request_log = request_log
+        self.latency_histograms = latency_histograms
+        self.log_body_limit = log_body_limit
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        self.stamp(context)
+
+        call_next(context)
+
+        if context.stream:
+            prefix = bytearray()
+            context.response = self.__relay(context.response, prefix)
+            context.on_close(
+                lambda: self.write(context, prefix.decode("utf-8", errors="replace"))
+            )
+        else:
+            self.write(context, str(context.response))
+
+    def stamp(self, context: GatewayContext):
+        context.request_at = datetime.now()
+        context.started = time.monotonic()
+
+    def __relay(self, chunks, prefix: bytearray):
+        for chunk in chunks:
+            if len(prefix) < self.log_body_limit:
+                prefix += chunk[: self.log_body_limit - len(prefix)]
+            yield chunk
+
+    def write(self, context: GatewayContext, response_body: str):
+        response_at = datetime.now()
+        response_time = int((time.monotonic() - context.started) * 1_000_000)
+        self.latency_histograms.record(context.api_id, context.version, response_time)
+
+        self.append(
+            {
+                "api_id": context.api_id,
+                "api_version": context.version,
+                "user_id": context.subscription.user_id,
+                "api_key": context.api_key,
+                "subscription_id": context.subscription.id,
+                "request_url": context.request_url,
+                "upstream_target": context.upstream_target,
+                "request_method": context.method,
+                "request_body": "" if context.body is None else str(context.body),
+                "response_body": response_body,
+                "request_at": context.request_at,
+                "response_at": response_at,
+                "response_time": response_time,
+                "http_status": context.status,
+            }
+        )
+
+    def append(self, record: Dict[str, Any]):
+        self.request_log.write(record)
+
+
+class QuotaStage(GatewayStage):
+    """Reserves one request of the subscription, handed back if the call fails."""
+
+    name = "quota"
+
+    def __init__(self, quota_meter: QuotaMeter, key_cache: KeyPrincipalCache):
+        self.quota_meter = quota_meter
+        self.key_cache = key_cache
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        subscription_id = context.subscription.id
+
+        remaining_requests = self.quota_meter.reserve(subscription_id)
+
+        try:
+            call_next(context)
+        except Exception:
+            self.quota_meter.release(subscription_id)
+            raise
+
+        self.key_cache.record_remaining_requests(subscription_id, remaining_requests)
+
+        context.response_headers["X-Quota-Remaining"] = str(remaining_requests)
+
+
+class CacheStage(GatewayStage):
+    """
+    Answers GET calls of versions with a response_cache_ttl from the response
+    cache, revalidating stale entries that carry an ETag.
+    """
+
+    name = "cache"
+
+    def __init__(self, response_cache: ResponseCache):
+        self.response_cache = response_cache
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        if not self.cacheable(context):
+            call_next(context)
+            return
+
+        hit, cached, headers = self.lookup(context)
+
+        if hit:
+            return
+
+        call_next(context)
+
+        self.store(context, cached, headers)
+
+    def cacheable(self, context: GatewayContext) -> bool:
+        return (
+            context.method == "GET"
+            and not context.stream
+            and context.route.response_cache_ttl > 0
+        )
+
+    def lookup(self, context: GatewayContext):
+        """
+        Answers the call from a fresh entry, or asks the upstream to
+        revalidate a stale one. Returns whether it answered, the entry and the
+        request headers the entry is keyed on.
+        """
+        route = context.route
+        headers = dict(context.request_headers)
+
+        cached = self.response_cache.get(
+            route.api_id, route.version, context.request_url, headers
+        )
+
+        if cached is not None and cached.is_fresh():
+            context.response, context.status = cached.body, cached.status
+            context.response_headers["X-Cache"] = "HIT"
+            return True, cached, headers
+
+        if cached is not None:
+            context.request_headers["If-None-Match"] = cached.etag
+
+        context.capture_headers = True
+
+        return False, cached, headers
+
+    def store(self, context: GatewayContext, cached, headers: dict):
+        route = context.route
+
+        if context.status == 304 and cached is not None:
+            self.response_cache.revalidate(
+                route.api_id,
+                route.version,
+                context.request_url,
+                headers,
+                context.upstream_headers,
+                route.response_cache_ttl,
+            )
+            context.response, context.status = cached.body, cached.status
+            context.response_headers["X-Cache"] = "REVALIDATED"
+            return
+
+        self.response_cache.put(
+            route.api_id,
+            route.version,
+            context.request_url,
+            headers,
+            context.response,
+            context.status,
+            context.upstream_headers,
+            route.response_cache_ttl,
+        )
+        context.response_headers["X-Cache"] = "MISS"
+
+
+class MirrorStage(GatewayStage):
+    """
+    Hands calls the route stage picked for mirroring to the traffic mirror
+    once they were answered, along with how long the served call took.
+    Streamed calls are not mirrored.
+    """
+
+    name = "mirror"
+
+    def __init__(self, traffic_mirror: TrafficMirror):
+        self.traffic_mirror = traffic_mirror
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        if context.shadow_route is None or context.stream:
+            call_next(context)
+            return
+
+        started = time.monotonic()
+
+        try:
+            call_next(context)
+        except Exception:
+            self.submit(context, None, started)
+            raise
+
+        self.submit(context, context.status, started)
+
+    def submit(self, context: GatewayContext, status: int | None, started: float):
+        self.traffic_mirror.mirror(
+            context.route,
+            context.shadow_route,
+            context.method,
+            context.params,
+            context.body,
+            status,
+            int((time.monotonic() - started) * 1_000_000),
+        )
+
+
+class BulkheadStage(GatewayStage):
+    """
+    Holds a slot of the api's bulkhead, and of its plan tier's one when the
+    plan caps concurrency, for as long as the upstream call runs, streamed
+    relays included.
+    """
+
+    name = "bulkhead"
+
+    def __init__(self, bulkhead: Bulkhead):
+        self.bulkhead = bulkhead
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        held = []
+
+        try:
+            for compartment, max_concurrent, max_queued in self.compartments(context):
+                self.bulkhead.acquire(compartment, max_concurrent, max_queued)
+                held.append(compartment)
+
+            call_next(context)
+        except Exception:
+            self.release(held)
+            raise
+
+        if context.stream:
+            context.on_close(lambda: self.release(held))
+        else:
+            self.release(held)
+
+    def compartments(self, context: GatewayContext):
+        """The compartments to hold, with their limits, plan tier first."""
+        route, subscription = context.route, context.subscription
+        compartments = []
+
+        if subscription.max_concurrent_calls:
+            compartments.append(
+                (
+                    plan_compartment(route.api_id, subscription.plan_name),
+                    subscription.max_concurrent_calls,
+                    None,
+                )
+            )
+
+        compartments.append(
+            (
+                api_compartment(route.api_id),
+                route.max_concurrent_calls,
+                route.max_queued_calls,
+            )
+        )
+
+        return compartments
+
+    def release(self, compartments):
+        for compartment in compartments:
+            self.bulkhead.release(compartment)
+
+
+class HedgeDelays:
+    """
+    Seconds an idempotent call waits for the upstream before being hedged:
+    the route's `hedge_percentile` of its upstream attempts' latency, read
+    from the histograms at most once per `refresh` seconds and only once they
+    hold `min_samples` attempts.
+    """
+
+    def __init__(
+        self,
+        upstream_histograms: LatencyHistograms,
+        min_samples: int = 20,
+        refresh: float = 1.0,
+    ):
+        self.upstream_histograms = upstream_histograms
+        self.min_samples = min_samples
+        self.refresh = refresh
+        self._delays: Dict[Tuple[int, str, float], Tuple[float | None, float]] = {}
+
+    def delay(self, route: Route) -> float | None:
+        if route.hedge_percentile is None:
+            return None
+
+        key = (route.api_id, route.version, route.hedge_percentile)
+        now = time.monotonic()
+        entry = self._delays.get(key)
+
+        if entry is not None and entry[1] > now:
+            return entry[0]
+
+        percentiles = self.upstream_histograms.percentiles(
+            route.api_id, route.version, (route.hedge_percentile,)
+        )
+        delay = (
+            percentiles[f"p{route.hedge_percentile:g}"] / 1_000_000
+            if percentiles["count"] >= self.min_samples
+            else None
+        )
+        self._delays[key] = (delay, now + self.refresh)
+
+        return delay
+
+
+class UpstreamStage(GatewayStage):
+    """
+    Sends the call to the supplier behind the version's circuit breaker, to
+    the upstream target the load balancer picks for every attempt. Identical
+    concurrent GETs share one upstream request. A GET or DELETE not
+    answered within the version's hedge delay is sent a second time on
+    `hedge_threads` and the first answer wins, one that could not connect is
+    retried after a jittered exponential backoff, both only while the
+    version's retry budget has a token left. Both attempts of a hedged call
+    need a free hedge thread, calls that find none run unhedged on their own
+    thread instead of queueing. Calls are not hedged while the breaker is
+    probing, a hedge would spend a half-open probe. The hedge delay comes from
+    `upstream_histograms`, fed with the answered attempts alone, so cache
+    hits and the gateway's own time do not shorten it.
+    """
+
+    name = "upstream"
+
+    def __init__(
+        self,
+        rest_client: RestClient,
+        single_flight: SingleFlight,
+        circuit_breaker: CircuitBreaker,
+        retry_budget: RetryBudget,
+        upstream_histograms: LatencyHistograms,
+        load_balancer: LoadBalancer,
+        retry_backoff: float = 0.05,
+        max_retry_backoff: float = 1.0,
+        hedge_min_samples: int = 20,
+        hedge_threads: int = 32,
+    ):
+        self.rest_client = rest_client
+        self.single_flight = single_flight
+        self.circuit_breaker = circuit_breaker
+        self.retry_budget = retry_budget
+        self.load_balancer = load_balancer
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.upstream_histograms = upstream_histograms
+        self.hedge_delays = HedgeDelays(upstream_histograms, hedge_min_samples)
+        self._hedges = ThreadPoolExecutor(
+            max_workers=hedge_threads, thread_name_prefix="upstream-hedge"
+        )
+        self._hedge_slots = threading.BoundedSemaphore(hedge_threads)
+
+    def handle(
+        self, context: GatewayContext, call_next: Callable[[GatewayContext], None]
+    ):
+        started = time.monotonic()
+
+        try:
+            self.__dispatch(context)
+        finally:
+            context.upstream_time += time.monotonic() - started
+
+        call_next(context)
+
+    def __dispatch(self, context: GatewayContext):
+        url, headers = context.request_url, context.request_headers
+
+        if context.stream:
+            context.upstream_target, upstream = self.__attempts(
+                context,
+                lambda target_url: self.rest_client.stream(
+                    context.method, target_url, headers, context.body
+                ),
+            )
+            context.response, context.status = upstream.chunks, upstream.status
+            context.close = upstream.close
+            context.response_headers = {
+                **upstream.headers,
+                **context.response_headers,
+            }
+        elif context.method == "GET":
+            if context.capture_headers:
+                context.upstream_target, result = self.single_flight.do(
+                    ("GET", url, tuple(sorted(headers.items()))),
+                    lambda: self.__attempts(
+                        context,
+                        lambda target_url: self.rest_client.get_with_headers(
+                            target_url, headers
+                        ),
+                    ),
+                )
+                context.response, context.status, context.upstream_headers = result
+            else:
+                context.upstream_target, result = self.single_flight.do(
+                    ("GET", url, tuple(sorted(headers.items()))),
+                    lambda: self.__attempts(
+                        context,
+                        lambda target_url: self.rest_client.get(target_url, headers),
+                    ),
+                )
+                context.response, context.status = result
+        else:
+            context.upstream_target, result = self.__attempts(
+                context,
+                lambda target_url: self.__send(
+                    context.method, target_url, headers, context.body
+                ),
+            )
+            context.response, context.status = result
+
+    def __send(self, method: str, url: str, headers: dict, body):
+        if method == "POST":
+            return self.rest_client.post(url, headers, body)
+        if method == "PATCH":
+            return self.rest_client.patch(url, headers, body)
+        if method == "DELETE":
+            return self.rest_client.delete(url, headers)
+        return self.rest_client.request(method, url, headers, body)
+
+    def __attempts(self, context: GatewayContext, call):
+        route = context.route
+
+        self.retry_budget.deposit(route.api_id, route.version, route.retry_budget_ratio)
+
+        if context.stream or context.method not in IDEMPOTENT_METHODS:
+            return self.__call(context, call)
+
+        retries = 0
+
+        while True:
+            try:
+                return self.__hedged(context, call)
+            except Exception as error:
+                if (
+                    retries >= route.max_retries
+                    or not self.rest_client.is_connect_error(error)
+                    or not self.retry_budget.withdraw(route.api_id, route.version)
+                ):
+                    raise
+
+            retries += 1
+            time.sleep(
+                jittered_backoff(retries, self.retry_backoff, self.max_retry_backoff)
+            )
+
+    def __hedged(self, context: GatewayContext, call):
+        route = context.route
+        delay = self.hedge_delays.delay(route)
+
+        if delay is None or not self.circuit_breaker.closed(
+            route.api_id, route.version
+        ):
+            return self.__call(context, call)
+
+        if not self._hedge_slots.acquire(blocking=False):
+            # every hedge thread is busy, the call runs unhedged rather than
+            # queue for one and spend its hedge delay waiting
+            return self.__call(context, call)
+
+        first = self.__submit(context, call)
+
+        if wait([first], timeout=delay).done:
+            return first.result()
+
+        if not self._hedge_slots.acquire(blocking=False):
+            return first.result()
+
+        if not self.retry_budget.withdraw(route.api_id, route.version):
+            self._hedge_slots.release()
+            return first.result()
+
+        # the slower attempt still runs to the end, its answer is dropped
+        pending = {first, self.__submit(context, call)}
+
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+
+            for attempt in done:
+                if attempt.exception() is None:
+                    return attempt.result()
+
+            if not pending:
+                return first.result()
+
+    def __submit(self, context: GatewayContext, call) -> Future:
+        # runs on a hedge thread already reserved, which it frees when done
+        attempt = self._hedges.submit(self.__call, context, call)
+        attempt.add_done_callback(lambda _: self._hedge_slots.release())
+        return attempt
+
+    def __call(self, context: GatewayContext, call):
+        route = context.route
+
+        self.circuit_breaker.allow(route.api_id, route.version)
+
+        target = self.load_balancer.choose(route)
+        started = time.monotonic()
+
+        try:
+            result = call(f"{target}/{context.params}")
+        except Exception:
+            self.circuit_breaker.record(
+                route.api_id, route.version, True, time.monotonic() - started
+            )
+            self.load_balancer.release(route, target, True)
+            raise
+
+        elapsed = time.monotonic() - started
+        status = result.status if isinstance(result, StreamedResponse) else result[1]
+
+        self.circuit_breaker.record(route.api_id, route.version, status >= 500, elapsed)
+        self.load_balancer.release(route, target, status >= 500)
+        if not context.stream:
+            self.upstream_histograms.record(
+                route.api_id, route.version, int(elapsed * 1_000_000)
+            )
+
+        return target, result
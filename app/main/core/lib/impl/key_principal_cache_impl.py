@@ -0,0 +1,126 @@
+import dataclasses
+import threading
+import time
+from typing import Dict, Set, Tuple
+
+from app.main.core.lib.admission_scheduler import plan_tier
+from app.main.core.lib.key_principal_cache import (
+    KeyPrincipal,
+    KeyPrincipalCache,
+    SubscriptionSnapshot,
+)
+from app.main.model.api_key_model import ApiKey
+from app.main.model.api_plan_model import ApiPlan
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.utils.exceptions import BadRequestError
+
+
+class InMemoryKeyPrincipalCache(KeyPrincipalCache):
+    """
+    Maps an `X-itouch-key` to the key status and a snapshot of its
+    subscription. Key and subscription changes evict entries explicitly,
+    `ttl` keeps other worker processes from trusting a snapshot for long.
+    """
+
+    def __init__(self, ttl: int = 5):
+        self.ttl = ttl
+        self._principals: Dict[str, Tuple[KeyPrincipal, float]] = {}
+        self._keys_by_subscription: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get_principal(self, key: str) -> KeyPrincipal:
+        principal = self.peek(key)
+
+        if principal is None:
+            principal = self.__load_principal(key)
+            self.store(principal)
+
+        return principal
+
+    def peek(self, key: str) -> KeyPrincipal | None:
+        entry = self._principals.get(key)
+
+        if entry is None or entry[1] < time.monotonic():
+            return None
+
+        return entry[0]
+
+    def store(self, principal: KeyPrincipal):
+        with self._lock:
+            self._principals[principal.key] = (
+                principal,
+                time.monotonic() + self.ttl,
+            )
+            if principal.subscription is not None:
+                self._keys_by_subscription.setdefault(
+                    principal.subscription.id, set()
+                ).add(principal.key)
+
+    def record_remaining_requests(self, subscription_id: int, max_requests: int):
+        with self._lock:
+            for key in self._keys_by_subscription.get(subscription_id, ()):
+                entry = self._principals.get(key)
+                if entry is None or entry[0].subscription is None:
+                    continue
+                principal, expires_at = entry
+                subscription = dataclasses.replace(
+                    principal.subscription, max_requests=max_requests
+                )
+                self._principals[key] = (
+                    dataclasses.replace(principal, subscription=subscription),
+                    expires_at,
+                )
+
+    def evict(self, key: str):
+        with self._lock:
+            self._principals.pop(key, None)
+
+    def evict_subscription(self, subscription_id: int):
+        with self._lock:
+            for key in self._keys_by_subscription.pop(subscription_id, ()):
+                self._principals.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._principals.clear()
+            self._keys_by_subscription.clear()
+
+    def __load_principal(self, key: str) -> KeyPrincipal:
+        api_key_data = ApiKey.query.filter_by(key=key).first()
+
+        if api_key_data is None:
+            raise BadRequestError("Invalid API key")
+
+        subscription = ApiSubscription.query.filter_by(
+            id=api_key_data.subscription_id
+        ).first()
+
+        plan = (
+            None
+            if subscription is None
+            else ApiPlan.query.filter_by(
+                api_id=subscription.api_id, name=subscription.plan_name
+            ).first()
+        )
+
+        return KeyPrincipal(
+            key=key,
+            status=api_key_data.status,
+            subscription=(
+                None
+                if subscription is None
+                else SubscriptionSnapshot(
+                    id=subscription.id,
+                    api_id=subscription.api_id,
+                    user_id=subscription.user_id,
+                    status=subscription.status,
+                    end_date=subscription.end_date,
+                    max_requests=subscription.max_requests,
+                    rate_limit_per_second=plan.rate_limit_per_second if plan else None,
+                    rate_limit_per_minute=plan.rate_limit_per_minute if plan else None,
+                    plan_name=subscription.plan_name,
+                    max_concurrent_calls=plan.max_concurrent_calls if plan else None,
+                    tier=plan_tier(plan.tier, plan.price) if plan else "free",
+                )
+            ),
+        )
@@ -0,0 +1,186 @@
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from app.main.core.lib.latency_histograms import LatencyHistograms
+
+# values below 2 ** SUB_BUCKET_BITS get one bucket each, every octave above
+# is split in 2 ** (SUB_BUCKET_BITS - 1) buckets, so a reported value is
+# never more than ~1.6% away from the recorded one
+SUB_BUCKET_BITS = 6
+HALF_SUB_BUCKETS = 1 << (SUB_BUCKET_BITS - 1)
+
+
+def bucket_index(value: int) -> int:
+    if value < 1 << SUB_BUCKET_BITS:
+        return max(value, 0)
+
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return HALF_SUB_BUCKETS * shift + (value >> shift)
+
+
+def bucket_value(index: int) -> int:
+    """Midpoint of the values counted in bucket `index`."""
+    if index < 1 << SUB_BUCKET_BITS:
+        return index
+
+    shift = index // HALF_SUB_BUCKETS - 1
+    low = (index - HALF_SUB_BUCKETS * shift) << shift
+    return low + ((1 << shift) - 1) // 2
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts: List[int] = []
+        self.total = 0
+        self.sum = 0
+        self.max = 0
+
+    def record(self, value: int):
+        index = bucket_index(value)
+
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+
+        self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def add(self, other: "_Histogram"):
+        if len(other.counts) > len(self.counts):
+            self.counts.extend([0] * (len(other.counts) - len(self.counts)))
+
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentiles(self, quantiles: Iterable[float]) -> Dict[str, float]:
+        if self.total == 0:
+            return {"count": 0, "mean": 0, "max": 0}
+
+        result = {"count": self.total, "mean": self.sum / self.total, "max": self.max}
+
+        for quantile in quantiles:
+            result[f"p{quantile:g}"] = self.value_at(quantile)
+
+        return result
+
+    def value_at(self, quantile: float) -> int:
+        rank = max(int(self.total * quantile / 100 + 0.5), 1)
+        seen = 0
+
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bucket_value(index), self.max)
+
+        return self.max
+
+
+class InMemoryLatencyHistograms(LatencyHistograms):
+    """
+    Log-linear (HDR style) histograms of gateway latencies in microseconds,
+    one per (api_id, version), answering percentile queries from memory.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[int, str], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, api_id: int, version: str, micros: int):
+        with self._lock:
+            histogram = self._histograms.get((api_id, version))
+
+            if histogram is None:
+                histogram = _Histogram()
+                self._histograms[(api_id, version)] = histogram
+
+            histogram.record(micros)
+
+    def percentiles(
+        self, api_id: int, version: str, quantiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, float]:
+        with self._lock:
+            histogram = self._histograms.get((api_id, version)) or _Histogram()
+
+            return histogram.percentiles(quantiles)
+
+    def reset(self, api_id: int, version: str | None = None):
+        with self._lock:
+            for key in [
+                key
+                for key in self._histograms
+                if key[0] == api_id and (version is None or key[1] == version)
+            ]:
+                del self._histograms[key]
+
+
+class _Windows:
+    def __init__(self, now: float):
+        self.started = now
+        self.current = _Histogram()
+        self.previous = _Histogram()
+
+    def rotate(self, now: float, window: float):
+        if now - self.started < window:
+            return
+
+        self.previous = (
+            self.current if now - self.started < 2 * window else _Histogram()
+        )
+        self.current = _Histogram()
+        self.started = now
+
+
+class WindowedLatencyHistograms(LatencyHistograms):
+    """
+    Histograms like `InMemoryLatencyHistograms` that forget: every
+    (api_id, version) counts its latencies in a window of `window` seconds
+    and answers from that window and the one before it, so a percentile
+    follows latency shifts within two windows.
+    """
+
+    def __init__(self, window: float = 60.0):
+        self.window = window
+        self._windows: Dict[Tuple[int, str], _Windows] = {}
+        self._lock = threading.Lock()
+
+    def record(self, api_id: int, version: str, micros: int):
+        now = time.monotonic()
+
+        with self._lock:
+            windows = self._windows.get((api_id, version))
+
+            if windows is None:
+                windows = _Windows(now)
+                self._windows[(api_id, version)] = windows
+
+            windows.rotate(now, self.window)
+            windows.current.record(micros)
+
+    def percentiles(
+        self, api_id: int, version: str, quantiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, float]:
+        histogram = _Histogram()
+
+        with self._lock:
+            windows = self._windows.get((api_id, version))
+
+            if windows is not None:
+                windows.rotate(time.monotonic(), self.window)
+                histogram.add(windows.previous)
+                histogram.add(windows.current)
+
+        return histogram.percentiles(quantiles)
+
+    def reset(self, api_id: int, version: str | None = None):
+        with self._lock:
+            for key in [
+                key
+                for key in self._windows
+                if key[0] == api_id and (version is None or key[1] == version)
+            ]:
+                del self._windows[key]
@@ -0,0 +1,149 @@
+import random
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.logger import Logger
+from app.main.core.lib.route_table import Route, UpstreamTarget
+
+
+class _Target:
+    def __init__(self):
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+
+class PowerOfTwoChoicesBalancer(LoadBalancer):
+    """
+    Picks two distinct upstream targets of a route at random, in proportion
+    to their weights, and sends the call to the one with fewer outstanding requests
+    per unit of weight. A target failing `eject_after` calls in a row, errors
+    and 5xx, is left out for `eject_seconds`, though never more than
+    `max_ejected` of a route's targets at once. Routes without targets are
+    served by their base_url. Ejections are written to `logger` when given.
+    Targets are drawn from `rng`, a seeded one makes the picks repeatable.
+    """
+
+    def __init__(
+        self,
+        eject_after: int = 5,
+        eject_seconds: float = 30,
+        max_ejected: float = 0.5,
+        logger: Logger | None = None,
+        rng: random.Random | None = None,
+    ):
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_ejected = max_ejected
+        self.logger = logger
+        self.rng = rng or random.Random()  # noqa: S311
+        self._targets: Dict[Tuple[int, str, str], _Target] = {}
+        self._lock = threading.Lock()
+
+    def choose(self, route: Route) -> str:
+        if not route.targets:
+            return route.base_url
+
+        now = time.monotonic()
+
+        with self._lock:
+            candidates = [
+                (target, self.__target(route, target.url)) for target in route.targets
+            ]
+            candidates = [
+                candidate
+                for candidate in candidates
+                if candidate[1].ejected_until <= now
+            ] or candidates
+
+            first = self.__pick(candidates)
+            second = self.__pick([other for other in candidates if other is not first])
+            target, state = min(
+                (first, second or first),
+                key=lambda candidate: (candidate[1].outstanding + 1)
+                / candidate[0].weight,
+            )
+            state.outstanding += 1
+            state.requests += 1
+
+            return target.url
+
+    def release(self, route: Route, target: str, failed: bool):
+        if not route.targets:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            state = self.__target(route, target)
+            state.outstanding = max(state.outstanding - 1, 0)
+
+            if not failed:
+                state.consecutive_failures = 0
+                return
+
+            state.failures += 1
+            state.consecutive_failures += 1
+
+            if state.consecutive_failures < self.eject_after:
+                return
+
+            ejected = sum(
+                self.__target(route, other.url).ejected_until > now
+                for other in route.targets
+            )
+
+            if state.ejected_until > now or ejected + 1 > self.max_ejected * len(
+                route.targets
+            ):
+                return
+
+            state.ejected_until = now + self.eject_seconds
+            state.consecutive_failures = 0
+
+        if self.logger is not None:
+            self.logger.info(
+                "Upstream target ejected",
+                {
+                    "api_id": route.api_id,
+                    "api_version": route.version,
+                    "target": target,
+                    "seconds": self.eject_seconds,
+                },
+            )
+
+    def stats(self, api_id: int, version: str) -> Dict[str, Dict]:
+        now = time.monotonic()
+
+        with self._lock:
+            return {
+                key[2]: {
+                    "outstanding": state.outstanding,
+                    "requests": state.requests,
+                    "failures": state.failures,
+                    "ejected": state.ejected_until > now,
+                }
+                for key, state in self._targets.items()
+                if key[:2] == (api_id, version)
+            }
+
+    def __pick(self, candidates: List[Tuple[UpstreamTarget, _Target]]):
+        if not candidates:
+            return None
+
+        return self.rng.choices(
+            candidates, weights=[target.weight for target, _ in candidates]
+        )[0]
+
+    def __target(self, route: Route, url: str) -> _Target:
+        state = self._targets.get((route.api_id, route.version, url))
+
+        if state is None:
+            state = _Target()
+            self._targets[(route.api_id, route.version, url)] = state
+
+        return state
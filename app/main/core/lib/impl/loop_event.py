@@ -0,0 +1,28 @@
+import asyncio
+
+
+class LoopEvent:
+    """
+    Awaitable counterpart of `threading.Event` for queues shared by threads
+    and coroutines: created on the loop of the coroutine that awaits it, and
+    set from any thread without blocking it.
+    """
+
+    def __init__(self):
+        self._loop = asyncio.get_running_loop()
+        self._future = self._loop.create_future()
+
+    def set(self):  # noqa: A003
+        self._loop.call_soon_threadsafe(self.__resolve)
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            return False
+
+        return True
+
+    def __resolve(self):
+        if not self._future.done():
+            self._future.set_result(None)
@@ -0,0 +1,172 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Sequence, Tuple
+
+from sqlalchemy import String, func, tuple_, type_coerce
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+from app.main import db
+from app.main.core.lib.paginator import COUNTS, EXACT, NONE, Page, Paginator
+from app.main.utils.exceptions import BadRequestError
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: Sequence[InstrumentedAttribute]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(key):
+            raise ValueError(cursor)
+        for column, value in zip(key, values):
+            # timestamps stay in their stored form, only checked
+            if column.type.python_type is datetime:
+                datetime.fromisoformat(value)
+        return [
+            (
+                value
+                if column.type.python_type is datetime
+                else column.type.python_type(value)
+            )
+            for column, value in zip(key, values)
+        ]
+    except (ValueError, TypeError):
+        raise BadRequestError("Invalid cursor")
+
+
+class KeysetPaginator(Paginator):
+    """
+    Pages a query by OFFSET when the caller sends `page`, as every list
+    endpoint always did, or by keyset when it sends `cursor`: rows come newest
+    first by `key`, an indexed (timestamp, id) pair, and the opaque cursor
+    holds the key of the last row served, so any page starts with an index
+    seek instead of skipping the pages before it. An empty cursor asks for
+    the first page.
+
+    Timestamps in the cursor are kept as the database stores them and
+    compared as such: SQLite stores server defaults as `YYYY-MM-DD HH:MM:SS`
+    text and bound datetimes with microseconds, so a parsed cursor would
+    compare against a different text than the row it came from.
+
+    `count` picks the total: `exact` runs COUNT(*), `estimate` reads the
+    planner's row estimate on PostgreSQL and elsewhere counts at most
+    `count_cap` rows, `none` skips it. Offset pages count exactly and keyset
+    pages count nothing unless told otherwise.
+    """
+
+    def __init__(self, count_cap: int = 10000):
+        self.count_cap = count_cap
+
+    def paginate(
+        self,
+        query: Query,
+        key: Sequence[InstrumentedAttribute],
+        query_params: Dict,
+    ) -> Page:
+        per_page = int(query_params.get("per_page", 10))
+        count = query_params.get("count")
+
+        if per_page < 1:
+            raise BadRequestError("per_page must be at least 1")
+
+        if count is not None and count not in COUNTS:
+            raise BadRequestError("count must be one of: {}".format(", ".join(COUNTS)))
+
+        if "cursor" not in query_params:
+            page = int(query_params.get("page", 1))
+            total, estimated = self.__total(query, count or EXACT)
+
+            return Page(
+                items=query.limit(per_page).offset((page - 1) * per_page).all(),
+                per_page=per_page,
+                page=page,
+                total=total,
+                total_is_estimate=estimated,
+                count_requested=count is not None,
+            )
+
+        cursor = query_params.get("cursor")
+        total, estimated = self.__total(query, count or NONE)
+        stored = [self.__stored(column) for column in key]
+
+        if cursor:
+            query = query.filter(tuple_(*stored) < tuple_(*decode_cursor(cursor, key)))
+
+        rows = (
+            query.order_by(*(column.desc() for column in key)).limit(per_page + 1).all()
+        )
+        items = rows[:per_page]
+
+        return Page(
+            items=items,
+            per_page=per_page,
+            total=total,
+            total_is_estimate=estimated,
+            next_cursor=(
+                encode_cursor(self.__stored_key_of(items[-1], key))
+                if len(rows) > per_page
+                else None
+            ),
+            keyset=True,
+            count_requested=count is not None,
+        )
+
+    def __total(self, query: Query, count: str) -> Tuple[int | None, bool]:
+        if count == NONE:
+            return None, False
+
+        query = query.order_by(None)
+
+        if count == EXACT:
+            return query.count(), False
+
+        bind = db.session.get_bind()
+        if bind.dialect.name == "postgresql":
+            statement = query.statement.compile(dialect=bind.dialect)
+            plan = (
+                db.session.connection()
+                .exec_driver_sql(
+                    "EXPLAIN (FORMAT JSON) " + str(statement), statement.params
+                )
+                .scalar()
+            )
+            return int(plan[0]["Plan"]["Plan Rows"]), True
+
+        counted = (
+            db.session.query(func.count())
+            .select_from(query.limit(self.count_cap).subquery())
+            .scalar()
+        )
+
+        return counted, counted >= self.count_cap
+
+    def __stored_key_of(
+        self, row: Any, key: Sequence[InstrumentedAttribute]
+    ) -> Sequence[Any]:
+        # the key ends with the row id, the rest is read back as stored
+        entities = tuple(row) if isinstance(row, Row) else (row,)
+        row_id = next(
+            getattr(entity, key[-1].key)
+            for entity in entities
+            if isinstance(entity, key[-1].class_)
+        )
+        return (
+            db.session.query(*(self.__stored(column) for column in key))
+            .filter(key[-1] == row_id)
+            .one()
+        )
+
+    def __stored(self, column: InstrumentedAttribute):
+        # reads and binds a timestamp without converting it, see the class docs
+        if column.type.python_type is datetime:
+            return type_coerce(column, String)
+        return column
@@ -0,0 +1,92 @@
+import re
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from sqlalchemy import event
+
+from app.main import db
+from app.main.core.lib.query_advisor import QueryAdvisor
+
+EXPLAINED = ("SELECT", "UPDATE", "DELETE", "WITH")
+SCANS = {
+    "sqlite": re.compile(r"^SCAN (\w+)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+class ExplainQueryAdvisor(QueryAdvisor):
+    """
+    Records the statements every named call of a workload sends and asks the
+    database how it runs each of them: EXPLAIN QUERY PLAN on SQLite, EXPLAIN
+    with sequential scans disabled on PostgreSQL, so a scan left in the plan
+    means no index fits. A statement with a WHERE clause whose plan still
+    reads a whole table is reported with the tables it scans.
+    """
+
+    def advise(
+        self, workload: Iterable[Tuple[str, Callable[[], Any]]]
+    ) -> List[Dict[str, Any]]:
+        findings, seen = [], set()
+        tables = set(db.metadata.tables)
+
+        for name, call in workload:
+            for statement, parameters in self.__recorded(call):
+                if statement in seen:
+                    continue
+                seen.add(statement)
+
+                plan = self.explain(statement, parameters)
+                findings.append(
+                    {
+                        "name": name,
+                        "statement": statement,
+                        "plan": plan,
+                        "full_scans": self.__full_scans(statement, plan, tables),
+                    }
+                )
+
+        return findings
+
+    def explain(self, statement: str, parameters: Any = None) -> List[str]:
+        connection = db.session.connection()
+        dialect = connection.dialect.name
+
+        if dialect == "sqlite":
+            rows = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters or ()
+            )
+            return [row[-1] for row in rows]
+
+        if dialect == "postgresql":
+            connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters or {})
+            return [row[0] for row in rows]
+
+        raise ValueError(f"Cannot explain statements on {dialect}")
+
+    def __recorded(self, call: Callable[[], Any]) -> List[Tuple[str, Any]]:
+        statements = []
+
+        def record(connection, cursor, statement, parameters, context, executemany):
+            if not executemany and statement.lstrip().upper().startswith(EXPLAINED):
+                statements.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            call()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        return statements
+
+    def __full_scans(self, statement: str, plan: List[str], tables) -> List[str]:
+        if " WHERE " not in " ".join(statement.split()).upper():
+            return []
+
+        scan = SCANS[db.engine.dialect.name]
+        scanned = []
+        for line in plan:
+            match = scan.search(line.strip())
+            if match and match.group(1) in tables and match.group(1) not in scanned:
+                scanned.append(match.group(1))
+
+        return scanned
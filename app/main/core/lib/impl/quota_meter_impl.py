@@ -0,0 +1,192 @@
+import threading
+import time
+from typing import Dict, List
+
+from sqlalchemy import update
+
+from app.main import db
+from app.main.core.lib.quota_meter import QuotaMeter
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.utils.exceptions import BadRequestError
+
+NO_REQUESTS_LEFT = "Subscription has no requests left, Please renew subscription"
+
+
+class ConditionalUpdateQuotaMeter(QuotaMeter):
+    """
+    Reserves one request with a single `UPDATE ... WHERE max_requests > 0
+    RETURNING max_requests`, so concurrent reservations never lose a decrement.
+    """
+
+    def reserve(self, subscription_id: int) -> int:
+        remaining = db.session.execute(
+            update(ApiSubscription)
+            .where(
+                ApiSubscription.id == subscription_id,
+                ApiSubscription.max_requests > 0,
+            )
+            .values(max_requests=ApiSubscription.max_requests - 1)
+            .returning(ApiSubscription.max_requests)
+            .execution_options(synchronize_session=False)
+        ).scalar()
+        db.session.commit()
+
+        if remaining is None:
+            raise BadRequestError(NO_REQUESTS_LEFT)
+
+        return remaining
+
+    def release(self, subscription_id: int):
+        db.session.execute(
+            update(ApiSubscription)
+            .where(ApiSubscription.id == subscription_id)
+            .values(max_requests=ApiSubscription.max_requests + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    def flush(self):
+        pass
+
+
+class StripedQuotaMeter(QuotaMeter):
+    """
+    Keeps remaining requests in memory behind `stripes` locks and writes the
+    accumulated decrements back in batches, every `flush_every` reservations
+    of a subscription or every `flush_interval` seconds. A release after its
+    reservation was written back is written back as an increment.
+    """
+
+    def __init__(self, stripes: int = 64, flush_every: int = 100, flush_interval=1.0):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # subscription_id -> [remaining, pending decrements, negative for releases]
+        self._counters: Dict[int, List[int]] = {}
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def reserve(self, subscription_id: int) -> int:
+        with self.__lock_for(subscription_id):
+            counter = self._counters.get(subscription_id)
+
+            if counter is None:
+                counter = [self.__load_remaining(subscription_id), 0]
+                self._counters[subscription_id] = counter
+
+            if counter[0] <= 0:
+                raise BadRequestError(NO_REQUESTS_LEFT)
+
+            counter[0] -= 1
+            counter[1] += 1
+            remaining = counter[0]
+            batch_full = counter[1] >= self.flush_every
+
+        if batch_full or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+        return remaining
+
+    def release(self, subscription_id: int):
+        with self.__lock_for(subscription_id):
+            counter = self._counters.get(subscription_id)
+
+            if counter is None:
+                # the reservation was flushed and its counter dropped, the
+                # request is handed back by the next flush
+                counter = [self.__load_remaining(subscription_id), 0]
+                self._counters[subscription_id] = counter
+
+            counter[0] += 1
+            counter[1] -= 1
+
+    def flush(self):
+        if not self._flush_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._last_flush = time.monotonic()
+            pending = self.__take_pending()
+
+            if not pending:
+                return
+
+            try:
+                for subscription_id, delta in pending.items():
+                    db.session.execute(
+                        update(ApiSubscription)
+                        .where(ApiSubscription.id == subscription_id)
+                        .values(max_requests=ApiSubscription.max_requests - delta)
+                        .execution_options(synchronize_session=False)
+                    )
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                self.__restore_pending(pending)
+                raise
+
+            self.__drop_settled(pending)
+        finally:
+            self._flush_lock.release()
+
+    def __lock_for(self, subscription_id: int) -> threading.Lock:
+        return self._locks[hash(subscription_id) % len(self._locks)]
+
+    def __take_pending(self) -> Dict[int, int]:
+        pending = {}
+        for subscription_id in list(self._counters):
+            with self.__lock_for(subscription_id):
+                counter = self._counters.get(subscription_id)
+                if counter is not None and counter[1] != 0:
+                    pending[subscription_id] = counter[1]
+                    counter[1] = 0
+        return pending
+
+    def __restore_pending(self, pending: Dict[int, int]):
+        for subscription_id, delta in pending.items():
+            with self.__lock_for(subscription_id):
+                counter = self._counters.get(subscription_id)
+                if counter is not None:
+                    counter[1] += delta
+
+    def __drop_settled(self, subscription_ids):
+        # settled counters are reloaded on next use, which picks up
+        # decrements written by other worker processes
+        for subscription_id in subscription_ids:
+            with self.__lock_for(subscription_id):
+                counter = self._counters.get(subscription_id)
+                if counter is not None and counter[1] == 0:
+                    del self._counters[subscription_id]
+
+    def __load_remaining(self, subscription_id: int) -> int:
+        max_requests = (
+            db.session.query(ApiSubscription.max_requests)
+            .filter(ApiSubscription.id == subscription_id)
+            .scalar()
+        )
+        return max_requests or 0
+
+
+class QuotaMeterImpl(QuotaMeter):
+    """
+    Uses the conditional UPDATE when the database can return the updated row
+    and falls back to the striped in-memory counter when it cannot (MySQL).
+    """
+
+    def __init__(self, stripes: int = 64, flush_every: int = 100, flush_interval=1.0):
+        self.conditional_meter = ConditionalUpdateQuotaMeter()
+        self.striped_meter = StripedQuotaMeter(stripes, flush_every, flush_interval)
+
+    def reserve(self, subscription_id: int) -> int:
+        return self.__meter().reserve(subscription_id)
+
+    def release(self, subscription_id: int):
+        self.__meter().release(subscription_id)
+
+    def flush(self):
+        self.striped_meter.flush()
+
+    def __meter(self) -> QuotaMeter:
+        if db.engine.dialect.update_returning:
+            return self.conditional_meter
+        return self.striped_meter
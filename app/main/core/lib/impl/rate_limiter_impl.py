@@ -0,0 +1,144 @@
+import math
+import threading
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from app.main.core.lib.rate_limiter import RateLimit, RateLimitDecision, RateLimiter
+
+
+def decide(
+    limits: Sequence[RateLimit], tokens: Sequence[float], allowed: bool
+) -> RateLimitDecision:
+    """
+    Builds the decision from the tokens each bucket held before the request,
+    reporting the bucket closest to running out.
+    """
+    remaining = [value - 1 if allowed else value for value in tokens]
+    tightest = min(range(len(limits)), key=lambda i: remaining[i] / limits[i].limit)
+    limit = limits[tightest]
+    rate = limit.limit / limit.period
+
+    retry_after = 0
+    if not allowed:
+        retry_after = max(
+            math.ceil((1 - value) / (bucket.limit / bucket.period))
+            for bucket, value in zip(limits, tokens)
+            if value < 1
+        )
+
+    return RateLimitDecision(
+        allowed=allowed,
+        limit=limit.limit,
+        remaining=max(int(remaining[tightest]), 0),
+        reset=math.ceil((limit.limit - remaining[tightest]) / rate),
+        retry_after=retry_after,
+    )
+
+
+class InMemoryRateLimiter(RateLimiter):
+    """
+    Token buckets kept in process, one per (key, period). Each bucket holds up
+    to `limit` tokens and refills at `limit / period` tokens per second; a
+    request takes one token from every bucket or from none. Buckets idle for
+    a whole period are full again and get swept every `sweep_every` calls.
+    """
+
+    def __init__(self, sweep_every: int = 10000):
+        self.sweep_every = sweep_every
+        self._buckets: Dict[Tuple[str, int], List[float]] = {}
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, limits: Sequence[RateLimit]) -> RateLimitDecision:
+        now = time.monotonic()
+
+        with self._lock:
+            buckets = []
+            tokens = []
+
+            for limit in limits:
+                bucket = self._buckets.get((key, limit.period))
+                if bucket is None:
+                    bucket = [float(limit.limit), now]
+                    self._buckets[(key, limit.period)] = bucket
+                buckets.append(bucket)
+                tokens.append(
+                    min(
+                        limit.limit,
+                        bucket[0] + (now - bucket[1]) * limit.limit / limit.period,
+                    )
+                )
+
+            allowed = all(value >= 1 for value in tokens)
+
+            for bucket, value in zip(buckets, tokens):
+                bucket[0] = value - 1 if allowed else value
+                bucket[1] = now
+
+            self._calls += 1
+            if self._calls % self.sweep_every == 0:
+                self.__sweep(now)
+
+        return decide(limits, tokens, allowed)
+
+    def __sweep(self, now: float):
+        for key in [
+            key for key, bucket in self._buckets.items() if now - bucket[1] >= key[1]
+        ]:
+            del self._buckets[key]
+
+
+# refills and takes from every bucket of a key atomically, using the redis
+# clock so workers with skewed clocks agree; writing after TIME needs the
+# effects replication redis 5 made the default
+BUCKET_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local tokens = {}
+local allowed = 1
+for i = 1, #KEYS do
+    local limit = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'updated')
+    local value = tonumber(bucket[1]) or limit
+    local updated = tonumber(bucket[2]) or now
+    value = math.min(limit, value + (now - updated) * limit / period)
+    tokens[i] = value
+    if value < 1 then
+        allowed = 0
+    end
+end
+for i = 1, #KEYS do
+    local value = tokens[i]
+    if allowed == 1 then
+        value = value - 1
+    end
+    redis.call('HSET', KEYS[i], 'tokens', value, 'updated', now)
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[2 * i]))
+    tokens[i] = tostring(tokens[i])
+end
+return {allowed, tokens}
+"""
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Same token buckets as `InMemoryRateLimiter`, stored in redis so every
+    worker process shares them, on a Redis 5 server or newer. The `redis`
+    client is imported when the limiter is built.
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(BUCKET_SCRIPT)
+
+    def acquire(self, key: str, limits: Sequence[RateLimit]) -> RateLimitDecision:
+        allowed, tokens = self._script(
+            keys=[f"{self.prefix}:{key}:{limit.period}" for limit in limits],
+            args=[value for limit in limits for value in (limit.limit, limit.period)],
+        )
+
+        return decide(limits, [float(value) for value in tokens], allowed == 1)
@@ -0,0 +1,188 @@
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from flask import Flask
+from sqlalchemy import insert
+
+from app.main import db
+from app.main.core.lib.logger import Logger
+from app.main.core.lib.request_log import RequestLog
+from app.main.core.lib.request_rollup import RequestRollup
+from app.main.core.lib.impl.request_rollup_impl import SqlRequestRollup
+from app.main.model.api_request_model import ApiRequest
+
+
+class DatabaseRequestLog(RequestLog):
+    """
+    Writes every gateway request log, and its share of the traffic rollups,
+    in its own transaction.
+    """
+
+    def __init__(self, rollup: RequestRollup | None = None):
+        self.rollup = rollup or SqlRequestRollup()
+
+    def write(self, record: Dict[str, Any]):
+        db.session.add(ApiRequest(**record))
+        self.rollup.add([record])
+        db.session.commit()
+
+    def write_nowait(self, record: Dict[str, Any]):
+        self.write(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class BatchedRequestLog(RequestLog):
+    """
+    Queues gateway request logs and bulk inserts them from a writer thread,
+    every `batch_size` records or `flush_interval` seconds, folding each
+    batch into the traffic rollups in the same transaction. `full_policy`
+    decides what `write` does when `max_queue` records are already waiting:
+    block the caller, drop the record or spill it to `spill_path`.
+    `write_nowait` is for callers that must not wait, such as an event loop,
+    and spills where `write` would block. Records that cannot be spilled
+    either are counted as lost and written to `logger` when given.
+    """
+
+    BLOCK = "block"
+    DROP = "drop"
+    SPILL = "spill"
+
+    def __init__(
+        self,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        full_policy: str = BLOCK,
+        spill_path: str = "logs/spill/api_requests.jsonl",
+        rollup: RequestRollup | None = None,
+        logger: Logger | None = None,
+    ):
+        if full_policy not in (self.BLOCK, self.DROP, self.SPILL):
+            raise ValueError(f"Unknown request log full policy: {full_policy}")
+
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.spill_path = Path(spill_path)
+        self.rollup = rollup or SqlRequestRollup()
+        self.logger = logger
+        self.dropped = 0
+        self.spilled = 0
+        self.lost = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self, app: Flask):
+        if self._thread is not None:
+            return
+
+        self._app = app
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self.__run, name="request-log-writer", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, record: Dict[str, Any]):
+        self.__enqueue(record, self.full_policy)
+
+    def write_nowait(self, record: Dict[str, Any]):
+        self.__enqueue(
+            record, self.SPILL if self.full_policy == self.BLOCK else self.full_policy
+        )
+
+    def flush(self):
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        if self._thread is None:
+            return
+
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enqueue(self, record: Dict[str, Any], full_policy: str):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            if full_policy == self.BLOCK:
+                self._queue.put(record)
+            elif full_policy == self.DROP:
+                self.dropped += 1
+            else:
+                self.__spill([record])
+
+    def __run(self):
+        with self._app.app_context():
+            while True:
+                batch = self.__next_batch()
+
+                if batch:
+                    self.__insert(batch)
+                elif self._stopping.is_set():
+                    return
+
+    def __next_batch(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            try:
+                if self._stopping.is_set():
+                    batch.append(self._queue.get_nowait())
+                else:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def __insert(self, batch: List[Dict[str, Any]]):
+        try:
+            db.session.execute(insert(ApiRequest), batch)
+            self.rollup.add(batch)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self.__spill(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def __spill(self, records: List[Dict[str, Any]]):
+        # a failed spill must not kill the writer thread or fail the caller
+        with self._spill_lock:
+            try:
+                lines = [json.dumps(record, default=str) + "\n" for record in records]
+                self.spill_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.spill_path.open("a") as spill_file:
+                    spill_file.writelines(lines)
+                self.spilled += len(records)
+                return
+            except Exception as error:
+                self.lost += len(records)
+                failure = {
+                    "records": len(records),
+                    "lost": self.lost,
+                    "spill_path": str(self.spill_path),
+                    "error": repr(error),
+                }
+
+        if self.logger is not None:
+            self.logger.error("Request logs lost", failure)
@@ -0,0 +1,199 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.main import db
+from app.main.core.lib.request_rollup import DAY, HOUR, MINUTE, RequestRollup
+from app.main.model.api_model import ApiModel
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.api_request_rollup_model import (
+    ApiRequestDayRollup,
+    ApiRequestHourRollup,
+    ApiRequestMinuteRollup,
+)
+
+ROLLUPS = {
+    MINUTE: ApiRequestMinuteRollup,
+    HOUR: ApiRequestHourRollup,
+    DAY: ApiRequestDayRollup,
+}
+TRUNCATE = {
+    MINUTE: {"second": 0, "microsecond": 0},
+    HOUR: {"minute": 0, "second": 0, "microsecond": 0},
+    DAY: {"hour": 0, "minute": 0, "second": 0, "microsecond": 0},
+}
+KEY = ("api_id", "api_version", "bucket")
+COUNTERS = ("count", "success_count", "error_count", "latency_sum", "response_bytes")
+# dialects able to add to an existing bucket in the insert itself
+UPSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def bucket_of(at: datetime, granularity: str) -> datetime:
+    return at.replace(**TRUNCATE[granularity])
+
+
+def counters_of(record: Dict[str, Any]) -> Tuple[int, ...]:
+    status = record["http_status"]
+    return (
+        1,
+        int(200 <= status < 300),
+        int(status >= 500),
+        record["response_time"],
+        len(record["response_body"].encode("utf-8")),
+    )
+
+
+def add_to_counters(
+    model, keys: Sequence[str], counters: Sequence[str], rows: Dict[Tuple, List]
+):
+    """
+    Adds every row's counters to the ones already stored under its key,
+    inserting the keys not seen yet, within the caller's transaction.
+    """
+    values = [
+        {**dict(zip(keys, key)), **dict(zip(counters, amounts))}
+        for key, amounts in sorted(rows.items())
+    ]
+    upsert = UPSERTS.get(db.session.get_bind().dialect.name)
+
+    if upsert is not None:
+        statement = upsert(model).values(values)
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=keys,
+                set_={
+                    name: model.__table__.c[name] + statement.excluded[name]
+                    for name in counters
+                },
+            )
+        )
+        return
+
+    for row in values:
+        updated = db.session.execute(
+            update(model)
+            .where(*(getattr(model, name) == row[name] for name in keys))
+            .values({name: getattr(model, name) + row[name] for name in counters})
+            .execution_options(synchronize_session=False)
+        )
+        if updated.rowcount == 0:
+            db.session.execute(insert(model), [row])
+
+
+class SqlRequestRollup(RequestRollup):
+    """
+    Keeps per minute, hour and day counters of every version's logged calls.
+    `add` folds a batch of api_request records into them within the caller's
+    transaction, one upsert per granularity, so the rollups commit or roll
+    back together with the rows they count. `backfill` rebuilds them from
+    the api_request history in chunks of `backfill_chunk` rows.
+    """
+
+    def __init__(self, backfill_chunk: int = 5000):
+        self.backfill_chunk = backfill_chunk
+
+    def add(self, records: Iterable[Dict[str, Any]]):
+        buckets: Dict[str, Dict[Tuple, List[int]]] = {
+            granularity: {} for granularity in ROLLUPS
+        }
+
+        for record in records:
+            counters = counters_of(record)
+            for granularity, rows in buckets.items():
+                key = (
+                    record["api_id"],
+                    record["api_version"],
+                    bucket_of(record["request_at"], granularity),
+                )
+                row = rows.setdefault(key, [0] * len(COUNTERS))
+                for i, value in enumerate(counters):
+                    row[i] += value
+
+        for granularity, rows in buckets.items():
+            if rows:
+                add_to_counters(ROLLUPS[granularity], KEY, COUNTERS, rows)
+
+    def backfill(self, since: datetime | None = None) -> int:
+        start = None if since is None else bucket_of(since, DAY)
+
+        for model in ROLLUPS.values():
+            statement = delete(model)
+            if start is not None:
+                statement = statement.where(model.bucket >= start)
+            db.session.execute(statement)
+
+        query = select(
+            ApiRequest.api_id,
+            ApiRequest.api_version,
+            ApiRequest.request_at,
+            ApiRequest.http_status,
+            ApiRequest.response_time,
+            ApiRequest.response_body,
+        )
+        if start is not None:
+            query = query.where(ApiRequest.request_at >= start)
+
+        folded = 0
+        rows = db.session.execute(
+            query.execution_options(yield_per=self.backfill_chunk)
+        )
+        for chunk in rows.partitions():
+            self.add(row._mapping for row in chunk)
+            folded += len(chunk)
+
+        db.session.commit()
+
+        return folded
+
+    def series(
+        self,
+        granularity: str,
+        api_id: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        version: str | None = None,
+        supplier_id: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        model = ROLLUPS[granularity]
+        query = db.session.query(
+            model.bucket, *(func.sum(getattr(model, name)) for name in COUNTERS)
+        )
+
+        if api_id is not None:
+            query = query.filter(model.api_id == api_id)
+
+        if version is not None:
+            query = query.filter(model.api_version == version)
+
+        if supplier_id is not None:
+            query = query.join(ApiModel, model.api_id == ApiModel.id).filter(
+                ApiModel.supplier_id == supplier_id
+            )
+
+        if start is not None:
+            query = query.filter(model.bucket >= bucket_of(start, granularity))
+
+        if end is not None:
+            query = query.filter(model.bucket < end)
+
+        return [
+            {"bucket": bucket, **dict(zip(COUNTERS, counters))}
+            for bucket, *counters in query.group_by(model.bucket)
+            .order_by(model.bucket)
+            .all()
+        ]
+
+    def totals(self, api_id: int, version: str | None = None) -> Dict[str, int]:
+        query = db.session.query(
+            *(
+                func.coalesce(func.sum(getattr(ApiRequestDayRollup, name)), 0)
+                for name in COUNTERS
+            )
+        ).filter(ApiRequestDayRollup.api_id == api_id)
+
+        if version is not None:
+            query = query.filter(ApiRequestDayRollup.api_version == version)
+
+        return dict(zip(COUNTERS, query.one()))
@@ -0,0 +1,220 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Tuple
+
+from app.main.core.lib.response_cache import CachedResponse, ResponseCache
+
+CacheKey = Tuple[int, str, str, Tuple[Tuple[str, str], ...]]
+
+
+def freshness_lifetime(
+    response_headers: Mapping[str, str], default_ttl: int
+) -> int | None:
+    """
+    Seconds a response may be served without asking the upstream again, read
+    from Cache-Control and Expires like a shared cache would. `default_ttl`
+    applies when the upstream says nothing, None means the response must not
+    be stored.
+    """
+    headers = {key.lower(): value for key, value in response_headers.items()}
+    directives = {}
+    for directive in headers.get("cache-control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives or "private" in directives:
+        return None
+
+    if "no-cache" in directives:
+        return 0
+
+    for name in ("s-maxage", "max-age"):
+        if name in directives:
+            try:
+                return max(int(directives[name]), 0)
+            except ValueError:
+                return 0
+
+    if "expires" in headers:
+        try:
+            expires = parsedate_to_datetime(headers["expires"])
+        except (TypeError, ValueError):
+            return 0
+        if expires.tzinfo is None:
+            expires = expires.replace(tzinfo=timezone.utc)
+        return max(int((expires - datetime.now(timezone.utc)).total_seconds()), 0)
+
+    return default_ttl
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    LRU cache of upstream GET responses bounded by `max_entries` and by the
+    approximate JSON size of the cached bodies (`max_bytes`). Hit, miss,
+    revalidation and eviction counters are kept per API version.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[CacheKey, CachedResponse] = OrderedDict()
+        self._bytes = 0
+        self._stats: Dict[Tuple[int, str], Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self, api_id: int, version: str, url: str, headers: Mapping[str, str]
+    ) -> CachedResponse | None:
+        key = self.__key(api_id, version, url, headers)
+
+        with self._lock:
+            stats = self.__stats_for(api_id, version)
+            entry = self._entries.get(key)
+
+            if entry is None:
+                stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(key)
+
+            if entry.is_fresh():
+                stats["hits"] += 1
+                return entry
+
+            stats["misses"] += 1
+
+            if entry.etag is None:
+                self.__remove(key)
+                return None
+
+            return entry
+
+    def put(
+        self,
+        api_id: int,
+        version: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Any,
+        status: int,
+        response_headers: Mapping[str, str],
+        default_ttl: int,
+    ):
+        key = self.__key(api_id, version, url, headers)
+        lifetime = freshness_lifetime(response_headers, default_ttl)
+        etag = {k.lower(): v for k, v in response_headers.items()}.get("etag")
+
+        if status != 200 or lifetime is None or (lifetime == 0 and etag is None):
+            with self._lock:
+                self.__remove(key)
+            return
+
+        size = len(json.dumps(body, default=str))
+
+        if size > self.max_bytes:
+            return
+
+        entry = CachedResponse(
+            body=body,
+            status=status,
+            etag=etag,
+            expires_at=time.monotonic() + lifetime,
+            size=size,
+        )
+
+        with self._lock:
+            self.__remove(key)
+            self._entries[key] = entry
+            self._bytes += size
+            self.__stats_for(api_id, version)["stores"] += 1
+            self.__evict()
+
+    def revalidate(
+        self,
+        api_id: int,
+        version: str,
+        url: str,
+        headers: Mapping[str, str],
+        response_headers: Mapping[str, str],
+        default_ttl: int,
+    ) -> CachedResponse | None:
+        key = self.__key(api_id, version, url, headers)
+        lifetime = freshness_lifetime(response_headers, default_ttl)
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            if lifetime is None:
+                self.__remove(key)
+                return entry
+
+            entry = CachedResponse(
+                body=entry.body,
+                status=entry.status,
+                etag=entry.etag,
+                expires_at=time.monotonic() + lifetime,
+                size=entry.size,
+            )
+            self._entries[key] = entry
+            self.__stats_for(api_id, version)["revalidations"] += 1
+
+            return entry
+
+    def stats(self, api_id: int, version: str) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.__stats_for(api_id, version))
+            stats["entries"] = sum(
+                1 for key in self._entries if key[0] == api_id and key[1] == version
+            )
+            return stats
+
+    def invalidate(self, api_id: int, version: str | None = None):
+        with self._lock:
+            for key in [
+                key
+                for key in self._entries
+                if key[0] == api_id and (version is None or key[1] == version)
+            ]:
+                self.__remove(key)
+
+    def __key(
+        self, api_id: int, version: str, url: str, headers: Mapping[str, str]
+    ) -> CacheKey:
+        return (api_id, version, url, tuple(sorted(headers.items())))
+
+    def __stats_for(self, api_id: int, version: str) -> Dict[str, int]:
+        stats = self._stats.get((api_id, version))
+
+        if stats is None:
+            stats = {
+                "hits": 0,
+                "misses": 0,
+                "revalidations": 0,
+                "stores": 0,
+                "evictions": 0,
+            }
+            self._stats[(api_id, version)] = stats
+
+        return stats
+
+    def __remove(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def __evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.__stats_for(key[0], key[1])["evictions"] += 1
@@ -1,27 +1,103 @@
 import requests
 import json
+from urllib3.exceptions import NewConnectionError
 from typing import Dict, Tuple
-from app.main.core.lib.rest_client import RestClient
+from requests.adapters import HTTPAdapter
+from app.main.core.lib.rest_client import RestClient, StreamedResponse
+
+# upstream headers that still describe the body once it is relayed byte for byte
+PASS_THROUGH_HEADERS = ("Content-Type", "Content-Length", "Content-Encoding")
 
 
 class RestClientImpl(RestClient):
+    """
+    Sends every call through one `requests.Session`, which keeps up to
+    `pool_maxsize` keep-alive connections for each of `pool_connections`
+    upstream hosts. A single instance is meant to live for the whole process.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = 100,
+        pool_maxsize: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10,
+        chunk_size: int = 64 * 1024,
+    ):
+        self.timeout = (connect_timeout, read_timeout)
+        self.chunk_size = chunk_size
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def get(self, url, headers) -> Tuple[Dict, int]:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
         return response.json(), response.status_code
 
+    def get_with_headers(self, url, headers) -> Tuple[Dict | None, int, Dict[str, str]]:
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        # a 304 Not Modified carries no body to decode
+        body = response.json() if response.content else None
+        return body, response.status_code, dict(response.headers)
+
     def post(self, url, headers, data) -> Tuple[Dict, int]:
         if not isinstance(data, str):
             data = json.dumps(data)
-        response = requests.post(url, headers=headers, data=data, timeout=10)
+        response = self.session.post(
+            url, headers=headers, data=data, timeout=self.timeout
+        )
 
         return response.json(), response.status_code
 
     def delete(self, url, headers) -> Tuple[Dict, int]:
-        response = requests.delete(url, headers=headers, timeout=10)
+        response = self.session.delete(url, headers=headers, timeout=self.timeout)
         return response.json(), response.status_code
 
     def patch(self, url, headers, data) -> Tuple[Dict, int]:
         if not isinstance(data, str):
             data = json.dumps(data)
-        response = requests.patch(url, headers=headers, data=data, timeout=10)
+        response = self.session.patch(
+            url, headers=headers, data=data, timeout=self.timeout
+        )
         return response.json(), response.status_code
+
+    def request(self, method, url, headers, data=None) -> Tuple[Dict | None, int]:
+        if data is not None and not isinstance(data, (str, bytes)):
+            data = json.dumps(data)
+        response = self.session.request(
+            method, url, headers=headers, data=data, timeout=self.timeout
+        )
+        # HEAD and most OPTIONS responses carry no body to decode
+        body = response.json() if response.content else None
+        return body, response.status_code
+
+    def stream(self, method, url, headers, data=None) -> StreamedResponse:
+        if data is not None and not isinstance(data, (str, bytes)):
+            data = json.dumps(data)
+        response = self.session.request(
+            method, url, headers=headers, data=data, timeout=self.timeout, stream=True
+        )
+
+        return StreamedResponse(
+            status=response.status_code,
+            headers={
+                header: response.headers[header]
+                for header in PASS_THROUGH_HEADERS
+                if header in response.headers
+            },
+            # raw, still encoded bytes so Content-Length and Content-Encoding hold
+            chunks=response.raw.stream(self.chunk_size, decode_content=False),
+            close=response.close,
+        )
+
+    def is_connect_error(self, error: Exception) -> bool:
+        # refused, unresolved or timed out before the request was sent
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(error, requests.exceptions.ConnectionError):
+            return False
+        reason = getattr(error.args[0] if error.args else None, "reason", None)
+        return isinstance(reason, NewConnectionError)
@@ -0,0 +1,85 @@
+import threading
+import time
+from typing import Dict, Tuple
+
+from app.main.core.lib.retry_budget import RetryBudget
+
+
+class _Budget:
+    def __init__(self, balance: float):
+        self.balance = balance
+        self.refilled_at = time.monotonic()
+        self.deposits = 0
+        self.withdrawals = 0
+        self.rejected = 0
+
+
+class InMemoryRetryBudget(RetryBudget):
+    """
+    One token balance per API version. Every upstream call deposits the
+    version's ratio, a retry or a hedge withdraws a whole token, so extra
+    attempts stay a bounded share of the traffic however many calls fail.
+    A reserve of `reserve_per_second` tokens lets quiet versions retry too,
+    and the balance never grows past `max_balance`, which bounds the burst of
+    extra attempts at the start of an outage.
+    """
+
+    def __init__(self, reserve_per_second: float = 1.0, max_balance: float = 10.0):
+        self.reserve_per_second = reserve_per_second
+        self.max_balance = max_balance
+        self._budgets: Dict[Tuple[int, str], _Budget] = {}
+        self._lock = threading.Lock()
+
+    def deposit(self, api_id: int, version: str, ratio: float):
+        with self._lock:
+            budget = self.__refilled(api_id, version)
+            budget.balance = min(budget.balance + ratio, self.max_balance)
+            budget.deposits += 1
+
+    def withdraw(self, api_id: int, version: str) -> bool:
+        with self._lock:
+            budget = self.__refilled(api_id, version)
+
+            if budget.balance < 1:
+                budget.rejected += 1
+                return False
+
+            budget.balance -= 1
+            budget.withdrawals += 1
+            return True
+
+    def stats(self, api_id: int, version: str) -> Dict[str, float]:
+        with self._lock:
+            budget = self.__refilled(api_id, version)
+
+            return {
+                "balance": budget.balance,
+                "deposits": budget.deposits,
+                "withdrawals": budget.withdrawals,
+                "rejected": budget.rejected,
+            }
+
+    def reset(self, api_id: int, version: str | None = None):
+        with self._lock:
+            for key in [
+                key
+                for key in self._budgets
+                if key[0] == api_id and (version is None or key[1] == version)
+            ]:
+                del self._budgets[key]
+
+    def __refilled(self, api_id: int, version: str) -> _Budget:
+        budget = self._budgets.get((api_id, version))
+
+        if budget is None:
+            budget = _Budget(min(self.reserve_per_second, self.max_balance))
+            self._budgets[(api_id, version)] = budget
+            return budget
+
+        now = time.monotonic()
+        budget.balance = min(
+            budget.balance + (now - budget.refilled_at) * self.reserve_per_second,
+            self.max_balance,
+        )
+        budget.refilled_at = now
+        return budget
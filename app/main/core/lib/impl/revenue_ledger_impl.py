@@ -0,0 +1,153 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import delete, func, select
+
+from app.main import db
+from app.main.core.lib.request_rollup import HOUR
+from app.main.core.lib.revenue_ledger import RevenueLedger
+from app.main.core.lib.impl.request_rollup_impl import add_to_counters, bucket_of
+from app.main.model.api_model import ApiModel
+from app.main.model.api_revenue_ledger_model import ApiRevenueLedger
+from app.main.model.api_subscription_model import ApiSubscription
+
+KEY = ("supplier_id", "api_id", "bucket")
+AMOUNTS = ("revenue", "subscriptions")
+
+
+class SqlRevenueLedger(RevenueLedger):
+    """
+    Books the price of every paid subscription under its supplier, API and
+    hour within the caller's transaction, so revenue reports range scan the
+    hourly rows instead of grouping api_subscription. `rebuild` and `check`
+    read api_subscription in chunks of `rebuild_chunk` rows.
+    """
+
+    def __init__(self, rebuild_chunk: int = 5000):
+        self.rebuild_chunk = rebuild_chunk
+
+    def record(self, supplier_id: int, api_id: int, paid_at: datetime, amount: float):
+        add_to_counters(
+            ApiRevenueLedger,
+            KEY,
+            AMOUNTS,
+            {(supplier_id, api_id, bucket_of(paid_at, HOUR)): [amount or 0.0, 1]},
+        )
+
+    def rebuild(self, since: datetime | None = None) -> int:
+        start = None if since is None else bucket_of(since, HOUR)
+
+        statement = delete(ApiRevenueLedger)
+        if start is not None:
+            statement = statement.where(ApiRevenueLedger.bucket >= start)
+        db.session.execute(statement)
+
+        booked = 0
+        for chunk in self.__subscriptions(start).partitions():
+            add_to_counters(ApiRevenueLedger, KEY, AMOUNTS, self.__fold(chunk))
+            booked += len(chunk)
+
+        db.session.commit()
+
+        return booked
+
+    def series(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        supplier_id: int | None = None,
+        api_id: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        query = db.session.query(
+            ApiRevenueLedger.bucket,
+            *(func.sum(getattr(ApiRevenueLedger, name)) for name in AMOUNTS),
+        )
+
+        if supplier_id is not None:
+            query = query.filter(ApiRevenueLedger.supplier_id == supplier_id)
+
+        if api_id is not None:
+            query = query.filter(ApiRevenueLedger.api_id == api_id)
+
+        if start is not None:
+            query = query.filter(ApiRevenueLedger.bucket >= bucket_of(start, HOUR))
+
+        if end is not None:
+            query = query.filter(ApiRevenueLedger.bucket < end)
+
+        return [
+            {"bucket": bucket, **dict(zip(AMOUNTS, amounts))}
+            for bucket, *amounts in query.group_by(ApiRevenueLedger.bucket)
+            .order_by(ApiRevenueLedger.bucket)
+            .all()
+        ]
+
+    def total(self, supplier_id: int | None = None) -> float:
+        query = db.session.query(func.coalesce(func.sum(ApiRevenueLedger.revenue), 0))
+
+        if supplier_id is not None:
+            query = query.filter(ApiRevenueLedger.supplier_id == supplier_id)
+
+        return query.scalar()
+
+    def check(self, since: datetime | None = None) -> List[Dict[str, Any]]:
+        start = None if since is None else bucket_of(since, HOUR)
+
+        expected: Dict[Tuple, List] = {}
+        for chunk in self.__subscriptions(start).partitions():
+            for key, (revenue, subscriptions) in self.__fold(chunk).items():
+                amounts = expected.setdefault(key, [0.0, 0])
+                amounts[0] += revenue
+                amounts[1] += subscriptions
+
+        query = db.session.query(ApiRevenueLedger)
+        if start is not None:
+            query = query.filter(ApiRevenueLedger.bucket >= start)
+        booked = {
+            (row.supplier_id, row.api_id, row.bucket): [row.revenue, row.subscriptions]
+            for row in query.all()
+        }
+
+        mismatches = []
+        for key in sorted(expected.keys() | booked.keys()):
+            revenue, subscriptions = expected.get(key, [0.0, 0])
+            booked_revenue, booked_subscriptions = booked.get(key, [0.0, 0])
+
+            if booked_subscriptions != subscriptions or not math.isclose(
+                booked_revenue, revenue, abs_tol=1e-6
+            ):
+                mismatches.append(
+                    {
+                        **dict(zip(KEY, key)),
+                        "ledger_revenue": booked_revenue,
+                        "ledger_subscriptions": booked_subscriptions,
+                        "subscription_revenue": revenue,
+                        "subscriptions": subscriptions,
+                    }
+                )
+
+        return mismatches
+
+    def __subscriptions(self, start: datetime | None):
+        query = select(
+            ApiModel.supplier_id,
+            ApiSubscription.api_id,
+            ApiSubscription.start_date,
+            ApiSubscription.price,
+        ).join(ApiModel, ApiSubscription.api_id == ApiModel.id)
+
+        if start is not None:
+            query = query.where(ApiSubscription.start_date >= start)
+
+        return db.session.execute(query.execution_options(yield_per=self.rebuild_chunk))
+
+    def __fold(self, rows: Iterable) -> Dict[Tuple, List]:
+        booked: Dict[Tuple, List] = {}
+        for supplier_id, api_id, start_date, price in rows:
+            amounts = booked.setdefault(
+                (supplier_id, api_id, bucket_of(start_date, HOUR)), [0.0, 0]
+            )
+            amounts[0] += price or 0.0
+            amounts[1] += 1
+        return booked
@@ -0,0 +1,138 @@
+import threading
+import time
+from types import MappingProxyType
+from typing import Dict, Tuple
+
+from app.main.core.lib.route_table import Route, RouteTable, upstream_targets
+from app.main.model.api_model import ApiModel
+from app.main.model.api_version_model import ApiVersion
+from app.main.model.api_header_model import ApiVersionHeader
+from app.main.utils.exceptions import NotFoundError, BadRequestError
+
+
+class InMemoryRouteTable(RouteTable):
+    """
+    Process wide table of compiled gateway routes keyed by (api_id, version).
+    Entries are dropped explicitly by the services that change the underlying
+    rows, `ttl` only bounds staleness across worker processes.
+
+    Routes are compiled outside the lock, so a route read before an
+    invalidation could be stored after it. A route stored with the
+    `generation` taken before reading it is dropped if its entry was
+    invalidated in the meantime.
+    """
+
+    def __init__(self, ttl: int = 30):
+        self.ttl = ttl
+        self._routes: Dict[Tuple[int, str], Tuple[Route, float]] = {}
+        self._lock = threading.Lock()
+        # invalidations are numbered, each key remembers the last one it saw
+        self._invalidations = 0
+        self._invalidated: Dict[Tuple[int, str], int] = {}
+        self._api_invalidated: Dict[int, int] = {}
+        self._cleared = 0
+
+    def get_route(self, api_id: int, version: str) -> Route:
+        route = self.peek(api_id, version)
+
+        if route is None:
+            generation = self.generation(api_id, version)
+            route = self.__compile_route(api_id, version)
+            self.store(route, generation)
+
+        if route.api_status != "active":
+            raise BadRequestError("API is not active")
+
+        if route.version_status != "active":
+            raise BadRequestError("API version is not active")
+
+        return route
+
+    def peek(self, api_id: int, version: str) -> Route | None:
+        entry = self._routes.get((api_id, version))
+
+        if entry is None or entry[1] < time.monotonic():
+            return None
+
+        return entry[0]
+
+    def generation(self, api_id: int, version: str) -> int:
+        with self._lock:
+            return self.__generation(api_id, version)
+
+    def store(self, route: Route, generation: int | None = None):
+        with self._lock:
+            if generation is not None and generation != self.__generation(
+                route.api_id, route.version
+            ):
+                return
+
+            self._routes[(route.api_id, route.version)] = (
+                route,
+                time.monotonic() + self.ttl,
+            )
+
+    def invalidate(self, api_id: int, version: str | None = None):
+        with self._lock:
+            self._invalidations += 1
+
+            if version is not None:
+                self._invalidated[(api_id, version)] = self._invalidations
+                self._routes.pop((api_id, version), None)
+                return
+
+            self._api_invalidated[api_id] = self._invalidations
+            for key in [key for key in self._routes if key[0] == api_id]:
+                del self._routes[key]
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._cleared = self._invalidations
+            self._routes.clear()
+
+    def __generation(self, api_id: int, version: str) -> int:
+        return max(
+            self._cleared,
+            self._api_invalidated.get(api_id, 0),
+            self._invalidated.get((api_id, version), 0),
+        )
+
+    def __compile_route(self, api_id: int, version: str) -> Route:
+        api_data = ApiModel.query.filter_by(id=api_id).first()
+
+        if api_data is None:
+            raise NotFoundError("API not found")
+
+        version_data = ApiVersion.query.filter_by(
+            api_id=api_id, version=version
+        ).first()
+
+        if version_data is None:
+            if api_data.status != "active":
+                raise BadRequestError("API is not active")
+            raise NotFoundError("API version not found")
+
+        headers = ApiVersionHeader.query.filter_by(
+            api_id=api_id, api_version=version
+        ).all()
+
+        return Route(
+            api_id=api_id,
+            version=version,
+            base_url=version_data.base_url,
+            api_status=api_data.status,
+            version_status=version_data.status,
+            headers=MappingProxyType({header.key: header.value for header in headers}),
+            response_cache_ttl=version_data.response_cache_ttl or 0,
+            max_concurrent_calls=api_data.max_concurrent_calls,
+            max_queued_calls=api_data.max_queued_calls,
+            hedge_percentile=version_data.hedge_percentile,
+            max_retries=version_data.max_retries or 0,
+            retry_budget_ratio=version_data.retry_budget_ratio,
+            targets=upstream_targets(version_data.upstream_targets),
+            canary_version=version_data.canary_version,
+            canary_percent=version_data.canary_percent or 0,
+            mirror_version=version_data.mirror_version,
+            mirror_percent=version_data.mirror_percent or 0,
+        )
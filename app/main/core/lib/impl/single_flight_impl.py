@@ -0,0 +1,52 @@
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from app.main.core.lib.single_flight import SingleFlight
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class InMemorySingleFlight(SingleFlight):
+    """
+    Runs at most one `call` per key at a time. Callers arriving while a call
+    for their key is in flight wait for it and receive its result or its
+    exception instead of starting their own.
+    """
+
+    def __init__(self):
+        self.shared = 0
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = call()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+        return flight.result
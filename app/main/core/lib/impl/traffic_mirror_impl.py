@@ -0,0 +1,155 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from app.main.core.lib.impl.latency_histograms_impl import InMemoryLatencyHistograms
+from app.main.core.lib.rest_client import RestClient
+from app.main.core.lib.route_table import Route
+from app.main.core.lib.traffic_mirror import TrafficMirror
+
+
+class _Comparison:
+    def __init__(self, shadow_version: str):
+        self.shadow_version = shadow_version
+        self.mirrored = 0
+        self.dropped = 0
+        self.primary_errors = 0
+        self.shadow_errors = 0
+        self.status_mismatches = 0
+
+
+class ThreadPoolTrafficMirror(TrafficMirror):
+    """
+    Replays served calls against a shadow version on `threads` background
+    threads. At most `max_pending` replays wait at once and further ones are
+    dropped, so mirroring never holds up the served call. Shadow answers are
+    thrown away, only their latency and status are kept next to those of the
+    served calls, one comparison per (api_id, version).
+    """
+
+    def __init__(
+        self, rest_client: RestClient, threads: int = 4, max_pending: int = 1000
+    ):
+        self.rest_client = rest_client
+        self.max_pending = max_pending
+        self.primary_latencies = InMemoryLatencyHistograms()
+        self.shadow_latencies = InMemoryLatencyHistograms()
+        self._comparisons: Dict[Tuple[int, str], _Comparison] = {}
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="traffic-mirror"
+        )
+
+    def mirror(
+        self,
+        primary: Route,
+        shadow: Route,
+        method: str,
+        params: str,
+        body: Any,
+        status: int | None,
+        micros: int,
+    ):
+        with self._idle:
+            comparison = self.__comparison(primary.api_id, primary.version, shadow)
+
+            if self._pending >= self.max_pending:
+                comparison.dropped += 1
+                return
+
+            self._pending += 1
+
+        self._executor.submit(
+            self.__replay,
+            comparison,
+            primary,
+            shadow,
+            method,
+            params,
+            body,
+            status,
+            micros,
+        )
+
+    def stats(self, api_id: int, version: str) -> Dict[str, Any]:
+        with self._idle:
+            comparison = self._comparisons.get((api_id, version))
+
+            if comparison is None:
+                return {
+                    "shadow_version": None,
+                    "mirrored": 0,
+                    "dropped": 0,
+                    "status_mismatches": 0,
+                    "primary": {"count": 0, "mean": 0, "max": 0, "errors": 0},
+                    "shadow": {"count": 0, "mean": 0, "max": 0, "errors": 0},
+                }
+
+            return {
+                "shadow_version": comparison.shadow_version,
+                "mirrored": comparison.mirrored,
+                "dropped": comparison.dropped,
+                "status_mismatches": comparison.status_mismatches,
+                "primary": {
+                    **self.primary_latencies.percentiles(api_id, version),
+                    "errors": comparison.primary_errors,
+                },
+                "shadow": {
+                    **self.shadow_latencies.percentiles(api_id, version),
+                    "errors": comparison.shadow_errors,
+                },
+            }
+
+    def flush(self):
+        with self._idle:
+            self._idle.wait_for(lambda: self._pending == 0)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __replay(
+        self,
+        comparison: _Comparison,
+        primary: Route,
+        shadow: Route,
+        method: str,
+        params: str,
+        body: Any,
+        status: int | None,
+        micros: int,
+    ):
+        started = time.monotonic()
+
+        try:
+            shadow_status = self.rest_client.request(
+                method, f"{shadow.base_url}/{params}", dict(shadow.headers), body
+            )[1]
+        except Exception:
+            shadow_status = None
+
+        shadow_micros = int((time.monotonic() - started) * 1_000_000)
+
+        self.primary_latencies.record(primary.api_id, primary.version, micros)
+        self.shadow_latencies.record(primary.api_id, primary.version, shadow_micros)
+
+        with self._idle:
+            comparison.mirrored += 1
+            comparison.primary_errors += status is None or status >= 500
+            comparison.shadow_errors += shadow_status is None or shadow_status >= 500
+            comparison.status_mismatches += status != shadow_status
+            self._pending -= 1
+            self._idle.notify_all()
+
+    def __comparison(self, api_id: int, version: str, shadow: Route) -> _Comparison:
+        comparison = self._comparisons.get((api_id, version))
+
+        # a new shadow version starts a new comparison
+        if comparison is None or comparison.shadow_version != shadow.version:
+            comparison = _Comparison(shadow.version)
+            self._comparisons[(api_id, version)] = comparison
+            self.primary_latencies.reset(api_id, version)
+            self.shadow_latencies.reset(api_id, version)
+
+        return comparison
@@ -0,0 +1,47 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class SubscriptionSnapshot:
+    id: int
+    api_id: int
+    user_id: int
+    status: str
+    end_date: datetime
+    max_requests: int
+    rate_limit_per_second: int | None = None
+    rate_limit_per_minute: int | None = None
+    plan_name: str | None = None
+    max_concurrent_calls: int | None = None
+    tier: str = "free"
+
+
+@dataclass(frozen=True)
+class KeyPrincipal:
+    key: str
+    status: str
+    subscription: SubscriptionSnapshot | None
+
+
+class KeyPrincipalCache:
+    def get_principal(self, key: str) -> KeyPrincipal:
+        raise Exception("You must implement this method in a subclass.")
+
+    def peek(self, key: str) -> KeyPrincipal | None:
+        raise Exception("You must implement this method in a subclass.")
+
+    def store(self, principal: KeyPrincipal):
+        raise Exception("You must implement this method in a subclass.")
+
+    def record_remaining_requests(self, subscription_id: int, max_requests: int):
+        raise Exception("You must implement this method in a subclass.")
+
+    def evict(self, key: str):
+        raise Exception("You must implement this method in a subclass.")
+
+    def evict_subscription(self, subscription_id: int):
+        raise Exception("You must implement this method in a subclass.")
+
+    def clear(self):
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,14 @@
+from typing import Dict, Iterable
+
+
+class LatencyHistograms:
+    def record(self, api_id: int, version: str, micros: int):
+        raise Exception("You must implement this method in a subclass.")
+
+    def percentiles(
+        self, api_id: int, version: str, quantiles: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, float]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def reset(self, api_id: int, version: str | None = None):
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,14 @@
+from typing import Dict
+
+from app.main.core.lib.route_table import Route
+
+
+class LoadBalancer:
+    def choose(self, route: Route) -> str:
+        raise Exception("You must implement this method in a subclass.")
+
+    def release(self, route: Route, target: str, failed: bool):
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self, api_id: int, version: str) -> Dict[str, Dict]:
+        raise Exception("You must implement this method in a subclass.")
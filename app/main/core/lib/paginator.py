@@ -0,0 +1,58 @@
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy.orm import InstrumentedAttribute, Query
+
+# how a page reports the rows matching the filters
+EXACT = "exact"
+ESTIMATE = "estimate"
+NONE = "none"
+COUNTS = (EXACT, ESTIMATE, NONE)
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    per_page: int
+    # offset pages only
+    page: int | None = None
+    # None when the caller asked for no total
+    total: int | None = None
+    total_is_estimate: bool = False
+    # keyset pages only, None on the last page
+    next_cursor: str | None = None
+    keyset: bool = False
+    # whether the caller chose how the total is counted
+    count_requested: bool = False
+
+
+def pagination_of(page: Page, pages: str = "pages") -> Dict[str, Any]:
+    """The pagination block of a list response, `pages` names the page count."""
+    if page.keyset:
+        return {
+            "per_page": page.per_page,
+            "next_cursor": page.next_cursor,
+            "total": page.total,
+            "total_is_estimate": page.total_is_estimate,
+        }
+
+    pagination = {
+        "total": page.total,
+        "page": page.page,
+        "per_page": page.per_page,
+        pages: None if page.total is None else math.ceil(page.total / page.per_page),
+    }
+    if page.count_requested:
+        pagination["total_is_estimate"] = page.total_is_estimate
+    return pagination
+
+
+class Paginator:
+    def paginate(
+        self,
+        query: Query,
+        key: Sequence[InstrumentedAttribute],
+        query_params: Dict,
+    ) -> Page:
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,11 @@
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+class QueryAdvisor:
+    def advise(
+        self, workload: Iterable[Tuple[str, Callable[[], Any]]]
+    ) -> List[Dict[str, Any]]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def explain(self, statement: str, parameters: Any = None) -> List[str]:
+        raise Exception("You must implement this method in a subclass.")
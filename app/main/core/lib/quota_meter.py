@@ -0,0 +1,9 @@
+class QuotaMeter:
+    def reserve(self, subscription_id: int) -> int:
+        raise Exception("You must implement this method in a subclass.")
+
+    def release(self, subscription_id: int):
+        raise Exception("You must implement this method in a subclass.")
+
+    def flush(self):
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,15 @@
+from typing import Any, Dict
+
+
+class RequestLog:
+    def write(self, record: Dict[str, Any]):
+        raise Exception("You must implement this method in a subclass.")
+
+    def write_nowait(self, record: Dict[str, Any]):
+        raise Exception("You must implement this method in a subclass.")
+
+    def flush(self):
+        raise Exception("You must implement this method in a subclass.")
+
+    def close(self):
+        raise Exception("You must implement this method in a subclass.")
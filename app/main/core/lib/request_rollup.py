@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List
+
+MINUTE = "minute"
+HOUR = "hour"
+DAY = "day"
+
+
+class RequestRollup:
+    def add(self, records: Iterable[Dict[str, Any]]):
+        raise Exception("You must implement this method in a subclass.")
+
+    def backfill(self, since: datetime | None = None) -> int:
+        raise Exception("You must implement this method in a subclass.")
+
+    def series(
+        self,
+        granularity: str,
+        api_id: int | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        version: str | None = None,
+        supplier_id: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def totals(self, api_id: int, version: str | None = None) -> Dict[str, int]:
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,52 @@
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: Any
+    status: int
+    etag: str | None
+    expires_at: float
+    size: int
+
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.monotonic()
+
+
+class ResponseCache:
+    def get(
+        self, api_id: int, version: str, url: str, headers: Mapping[str, str]
+    ) -> CachedResponse | None:
+        raise Exception("You must implement this method in a subclass.")
+
+    def put(
+        self,
+        api_id: int,
+        version: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: Any,
+        status: int,
+        response_headers: Mapping[str, str],
+        default_ttl: int,
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+    def revalidate(
+        self,
+        api_id: int,
+        version: str,
+        url: str,
+        headers: Mapping[str, str],
+        response_headers: Mapping[str, str],
+        default_ttl: int,
+    ) -> CachedResponse | None:
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self, api_id: int, version: str) -> Dict[str, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def invalidate(self, api_id: int, version: str | None = None):
+        raise Exception("You must implement this method in a subclass.")
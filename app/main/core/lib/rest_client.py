@@ -1,10 +1,27 @@
-from typing import Dict, Tuple
+from typing import Callable, Dict, Iterator, Tuple
+
+
+class StreamedResponse:
+    def __init__(
+        self,
+        status: int,
+        headers: Dict[str, str],
+        chunks: Iterator[bytes],
+        close: Callable[[], None],
+    ):
+        self.status = status
+        self.headers = headers
+        self.chunks = chunks
+        self.close = close
 
 
 class RestClient:
     def get(self, url, headers) -> Tuple[Dict, int]:
         raise Exception("You must implement this method in a subclass.")
 
+    def get_with_headers(self, url, headers) -> Tuple[Dict | None, int, Dict[str, str]]:
+        raise Exception("You must implement this method in a subclass.")
+
     def post(self, url, headers, data) -> Tuple[Dict, int]:
         raise Exception("You must implement this method in a subclass.")
 
@@ -13,3 +30,12 @@ class RestClient:
 
     def patch(self, url, headers, data) -> Tuple[Dict, int]:
         raise Exception("You must implement this method in a subclass.")
+
+    def request(self, method, url, headers, data=None) -> Tuple[Dict | None, int]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def stream(self, method, url, headers, data=None) -> StreamedResponse:
+        raise Exception("You must implement this method in a subclass.")
+
+    def is_connect_error(self, error: Exception) -> bool:
+        raise Exception("You must implement this method in a subclass.")
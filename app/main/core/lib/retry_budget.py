@@ -0,0 +1,15 @@
+from typing import Dict
+
+
+class RetryBudget:
+    def deposit(self, api_id: int, version: str, ratio: float):
+        raise Exception("You must implement this method in a subclass.")
+
+    def withdraw(self, api_id: int, version: str) -> bool:
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self, api_id: int, version: str) -> Dict[str, float]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def reset(self, api_id: int, version: str | None = None):
+        raise Exception("You must implement this method in a subclass.")
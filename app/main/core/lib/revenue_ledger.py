@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+class RevenueLedger:
+    def record(self, supplier_id: int, api_id: int, paid_at: datetime, amount: float):
+        raise Exception("You must implement this method in a subclass.")
+
+    def rebuild(self, since: datetime | None = None) -> int:
+        raise Exception("You must implement this method in a subclass.")
+
+    def series(
+        self,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        supplier_id: int | None = None,
+        api_id: int | None = None,
+    ) -> List[Dict[str, Any]]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def total(self, supplier_id: int | None = None) -> float:
+        raise Exception("You must implement this method in a subclass.")
+
+    def check(self, since: datetime | None = None) -> List[Dict[str, Any]]:
+        raise Exception("You must implement this method in a subclass.")
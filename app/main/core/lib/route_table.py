@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping, Tuple
+
+
+@dataclass(frozen=True)
+class UpstreamTarget:
+    url: str
+    weight: int = 1
+
+
+def upstream_targets(targets: Iterable[Any] | None) -> Tuple[UpstreamTarget, ...]:
+    return tuple(
+        UpstreamTarget(url=target["url"], weight=target.get("weight", 1))
+        for target in targets or ()
+    )
+
+
+@dataclass(frozen=True)
+class Route:
+    api_id: int
+    version: str
+    base_url: str
+    api_status: str
+    version_status: str
+    headers: Mapping[str, str]
+    response_cache_ttl: int = 0
+    max_concurrent_calls: int | None = None
+    max_queued_calls: int | None = None
+    hedge_percentile: float | None = None
+    max_retries: int = 0
+    retry_budget_ratio: float = 0.1
+    # backends sharing the calls, base_url alone serves them when empty
+    targets: Tuple[UpstreamTarget, ...] = ()
+    canary_version: str | None = None
+    canary_percent: float = 0
+    mirror_version: str | None = None
+    mirror_percent: float = 0
+
+
+class RouteTable:
+    def get_route(self, api_id: int, version: str) -> Route:
+        raise Exception("You must implement this method in a subclass.")
+
+    def peek(self, api_id: int, version: str) -> Route | None:
+        raise Exception("You must implement this method in a subclass.")
+
+    def generation(self, api_id: int, version: str) -> int:
+        raise Exception("You must implement this method in a subclass.")
+
+    def store(self, route: Route, generation: int | None = None):
+        raise Exception("You must implement this method in a subclass.")
+
+    def invalidate(self, api_id: int, version: str | None = None):
+        raise Exception("You must implement this method in a subclass.")
+
+    def clear(self):
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,6 @@
+from typing import Any, Callable, Hashable
+
+
+class SingleFlight:
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        raise Exception("You must implement this method in a subclass.")
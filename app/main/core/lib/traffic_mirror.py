@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+from app.main.core.lib.route_table import Route
+
+
+class TrafficMirror:
+    def mirror(
+        self,
+        primary: Route,
+        shadow: Route,
+        method: str,
+        params: str,
+        body: Any,
+        status: int | None,
+        micros: int,
+    ):
+        raise Exception("You must implement this method in a subclass.")
+
+    def stats(self, api_id: int, version: str) -> Dict[str, Any]:
+        raise Exception("You must implement this method in a subclass.")
+
+    def flush(self):
+        raise Exception("You must implement this method in a subclass.")
+
+    def close(self):
+        raise Exception("You must implement this method in a subclass.")
@@ -0,0 +1,118 @@
+import re
+from datetime import datetime, timedelta
+from typing import Dict
+
+from app.main.core.lib.analytics_engine import (
+    MONTH,
+    REQUEST_METRICS,
+    REVENUE_METRICS,
+    STATUS_CLASSES,
+    AnalyticsEngine,
+    AnalyticsQuery,
+)
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.utils.exceptions import BadRequestError
+from app.main.utils.roles import Role
+
+BUCKET = re.compile(r"^([1-9][0-9]*)(s|m|h|d)$")
+UNITS = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days"}
+
+
+class AnalyticsService:
+    def __init__(
+        self,
+        analytics_engine: AnalyticsEngine | None = None,
+        max_buckets: int = 10000,
+    ):
+        self.analytics_engine = analytics_engine or RollupAnalyticsEngine()
+        self.max_buckets = max_buckets
+
+    def get_analytics(self, query_params: Dict, user_id: int, role: str):
+        metric = query_params.get("metric")
+        if metric not in REQUEST_METRICS + REVENUE_METRICS:
+            raise BadRequestError(
+                "metric must be one of: {}".format(
+                    ", ".join(REQUEST_METRICS + REVENUE_METRICS)
+                )
+            )
+
+        start = self.__datetime(query_params, "from")
+        end = self.__datetime(query_params, "to")
+        if start >= end:
+            raise BadRequestError("from must be before to")
+
+        bucket = self.__bucket(query_params.get("bucket", "1h"))
+        buckets = (end - start).days / 28 if bucket == MONTH else (end - start) / bucket
+        if buckets > self.max_buckets:
+            raise BadRequestError(
+                "The range holds more than {} buckets".format(self.max_buckets)
+            )
+
+        version = query_params.get("version")
+        status_class = query_params.get("status_class")
+        if status_class is not None and status_class not in STATUS_CLASSES:
+            raise BadRequestError(
+                "status_class must be one of: {}".format(", ".join(STATUS_CLASSES))
+            )
+
+        if metric in REVENUE_METRICS and (version or status_class):
+            raise BadRequestError(
+                "Revenue metrics can not be filtered by version or status class"
+            )
+
+        query = AnalyticsQuery(
+            metric=metric,
+            bucket=bucket,
+            start=start,
+            end=end,
+            api_id=self.__integer(query_params, "api_id"),
+            version=version,
+            supplier_id=(
+                user_id
+                if role == Role.SUPPLIER
+                else self.__integer(query_params, "supplier_id")
+            ),
+            status_class=status_class,
+        )
+
+        return {
+            "metric": metric,
+            "granularity": self.analytics_engine.plan(query),
+            "points": [
+                {"bucket": point["bucket"].isoformat(), "value": point["value"]}
+                for point in self.analytics_engine.run(query)
+            ],
+        }
+
+    def __datetime(self, query_params: Dict, name: str) -> datetime:
+        try:
+            value = datetime.fromisoformat(query_params[name])
+        except (KeyError, ValueError):
+            raise BadRequestError("{} must be an ISO 8601 date and time".format(name))
+
+        # calls are logged in naive local time, an offset is converted to it
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+
+        return value
+
+    def __integer(self, query_params: Dict, name: str) -> int | None:
+        if query_params.get(name) is None:
+            return None
+
+        try:
+            return int(query_params[name])
+        except ValueError:
+            raise BadRequestError("{} must be an integer".format(name))
+
+    def __bucket(self, bucket: str):
+        if bucket == MONTH:
+            return MONTH
+
+        match = BUCKET.match(bucket)
+        if match is None:
+            raise BadRequestError(
+                "bucket must be a width such as 10s, 15m, 1h or 1d, or month"
+            )
+
+        return timedelta(**{UNITS[match.group(2)]: int(match.group(1))})
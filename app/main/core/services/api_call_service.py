@@ -1,295 +1,196 @@
-from datetime import datetime
-
 from app.main.core.lib.rest_client import RestClient
-
-from app.main.model.api_model import ApiModel
-from app.main.model.api_version_model import ApiVersion
-from app.main.model.api_header_model import ApiVersionHeader
-from app.main.utils.exceptions import NotFoundError, BadRequestError
-from app.main.model.api_key_model import ApiKey
-from app.main.model.api_subscription_model import ApiSubscription
-from app.main.model.api_request_model import ApiRequest
-
-from app.main import db
+from app.main.core.lib.route_table import RouteTable
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.key_principal_cache import KeyPrincipalCache
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.quota_meter import QuotaMeter
+from app.main.core.lib.impl.quota_meter_impl import QuotaMeterImpl
+from app.main.core.lib.request_log import RequestLog
+from app.main.core.lib.impl.request_log_impl import DatabaseRequestLog
+from app.main.core.lib.response_cache import ResponseCache
+from app.main.core.lib.impl.response_cache_impl import InMemoryResponseCache
+from app.main.core.lib.single_flight import SingleFlight
+from app.main.core.lib.impl.single_flight_impl import InMemorySingleFlight
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.impl.circuit_breaker_impl import RollingWindowCircuitBreaker
+from app.main.core.lib.latency_histograms import LatencyHistograms
+from app.main.core.lib.impl.latency_histograms_impl import (
+    InMemoryLatencyHistograms,
+    WindowedLatencyHistograms,
+)
+from app.main.core.lib.rate_limiter import RateLimiter
+from app.main.core.lib.impl.rate_limiter_impl import InMemoryRateLimiter
+from app.main.core.lib.gateway_resolver import GatewayResolver
+from app.main.core.lib.impl.gateway_resolver_impl import JoinedQueryGatewayResolver
+from app.main.core.lib.admission_scheduler import AdmissionScheduler
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.bulkhead import Bulkhead
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.concurrency_limiter import ConcurrencyLimiter
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.core.lib.retry_budget import RetryBudget
+from app.main.core.lib.impl.retry_budget_impl import InMemoryRetryBudget
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.impl.load_balancer_impl import PowerOfTwoChoicesBalancer
+from app.main.core.lib.traffic_mirror import TrafficMirror
+from app.main.core.lib.impl.traffic_mirror_impl import ThreadPoolTrafficMirror
+from app.main.core.lib.gateway_pipeline import GatewayContext, StreamedBody
+from app.main.core.lib.impl.gateway_pipeline_impl import MiddlewareGatewayPipeline
+from app.main.core.lib.impl.gateway_stages_impl import (
+    AdmissionStage,
+    AuthStage,
+    BulkheadStage,
+    CacheStage,
+    ConcurrencyLimitStage,
+    LogStage,
+    MirrorStage,
+    QuotaStage,
+    RateLimitStage,
+    RouteStage,
+    UpstreamStage,
+)
 
 
 class ApiCallService:
-    def __init__(self, rest_client: RestClient):
+    def __init__(
+        self,
+        rest_client: RestClient,
+        route_table: RouteTable | None = None,
+        key_cache: KeyPrincipalCache | None = None,
+        quota_meter: QuotaMeter | None = None,
+        request_log: RequestLog | None = None,
+        response_cache: ResponseCache | None = None,
+        single_flight: SingleFlight | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        latency_histograms: LatencyHistograms | None = None,
+        upstream_histograms: LatencyHistograms | None = None,
+        rate_limiter: RateLimiter | None = None,
+        gateway_resolver: GatewayResolver | None = None,
+        bulkhead: Bulkhead | None = None,
+        admission_scheduler: AdmissionScheduler | None = None,
+        concurrency_limiter: ConcurrencyLimiter | None = None,
+        retry_budget: RetryBudget | None = None,
+        load_balancer: LoadBalancer | None = None,
+        traffic_mirror: TrafficMirror | None = None,
+        retry_backoff: float = 0.05,
+        hedge_min_samples: int = 20,
+        hedge_threads: int = 32,
+        log_body_limit: int = 4096,
+        server_timing: bool = False,
+    ):
         self.rest_client = rest_client
+        self.route_table = route_table or InMemoryRouteTable()
+        self.key_cache = key_cache or InMemoryKeyPrincipalCache()
+        self.quota_meter = quota_meter or QuotaMeterImpl()
+        self.request_log = request_log or DatabaseRequestLog()
+        self.response_cache = response_cache or InMemoryResponseCache()
+        self.single_flight = single_flight or InMemorySingleFlight()
+        self.circuit_breaker = circuit_breaker or RollingWindowCircuitBreaker()
+        self.latency_histograms = latency_histograms or InMemoryLatencyHistograms()
+        # upstream attempts only, the hedge delays are read from them
+        self.upstream_histograms = upstream_histograms or WindowedLatencyHistograms()
+        self.rate_limiter = rate_limiter or InMemoryRateLimiter()
+        self.gateway_resolver = gateway_resolver or JoinedQueryGatewayResolver()
+        self.bulkhead = bulkhead or SemaphoreBulkhead()
+        self.admission_scheduler = admission_scheduler or WeightedFairScheduler()
+        self.concurrency_limiter = concurrency_limiter or GradientConcurrencyLimiter()
+        self.retry_budget = retry_budget or InMemoryRetryBudget()
+        self.load_balancer = load_balancer or PowerOfTwoChoicesBalancer()
+        self.traffic_mirror = traffic_mirror or ThreadPoolTrafficMirror(rest_client)
+        self.log_body_limit = log_body_limit
+        # adds a Server-Timing header with the time spent in every stage
+        self.server_timing = server_timing
+        # every HTTP method goes through the same stages, outermost first
+        self.pipeline = MiddlewareGatewayPipeline(
+            [
+                ConcurrencyLimitStage(self.concurrency_limiter),
+                AuthStage(self.key_cache, self.route_table, self.gateway_resolver),
+                RateLimitStage(self.rate_limiter),
+                AdmissionStage(self.admission_scheduler),
+                RouteStage(self.route_table),
+                LogStage(self.request_log, self.latency_histograms, log_body_limit),
+                QuotaStage(self.quota_meter, self.key_cache),
+                CacheStage(self.response_cache),
+                MirrorStage(self.traffic_mirror),
+                BulkheadStage(self.bulkhead),
+                UpstreamStage(
+                    self.rest_client,
+                    self.single_flight,
+                    self.circuit_breaker,
+                    self.retry_budget,
+                    self.upstream_histograms,
+                    self.load_balancer,
+                    retry_backoff=retry_backoff,
+                    hedge_min_samples=hedge_min_samples,
+                    hedge_threads=hedge_threads,
+                ),
+            ]
+        )
 
-    def call_get(self, api_id: int, version: str, params: str, api_key: str):
-        subscription_id = self.verify_api_key(api_key)
-
-        subscription = self.verify_subscription(subscription_id, api_id)
-
-        base_url = self.__get_api_version_base_url(api_id, version)
-
-        headers = self.__get_api_version_headers(api_id, version)
-
-        request_url = f"{base_url}/{params}"
-
-        request_at = datetime.now()
-
-        response, status = self.rest_client.get(request_url, headers)
-
-        response_at = datetime.now()
-
-        response_time = (response_at - request_at).seconds
-
-        request_method = "GET"
-
-        user_id = subscription.user_id
-
-        request_body = ""
+    def call(
+        self,
+        method: str,
+        api_id: int,
+        version: str,
+        params: str,
+        api_key: str,
+        body=None,
+        stream: bool = False,
+    ):
+        context = self.pipeline.run(
+            GatewayContext(
+                method=method.upper(),
+                api_id=api_id,
+                version=version,
+                params=params,
+                api_key=api_key,
+                body=body,
+                stream=stream,
+            )
+        )
 
-        response_body = str(response)
+        if self.server_timing:
+            context.response_headers["Server-Timing"] = ", ".join(
+                f"{name};dur={context.timings[name] / 1000:.3f}"
+                for name in self.pipeline.stage_names()
+                if name in context.timings
+            )
 
-        new_request = ApiRequest(
-            api_id=api_id,
-            api_version=version,
-            user_id=user_id,
-            api_key=api_key,
-            subscription_id=subscription_id,
-            request_url=request_url,
-            request_method=request_method,
-            request_body=request_body,
-            response_body=response_body,
-            request_at=request_at,
-            response_at=response_at,
-            response_time=response_time,
-            http_status=status,
-        )
+        if stream:
+            return (
+                StreamedBody(context.response, context.close),
+                context.status,
+                context.response_headers,
+            )
 
-        db.session.add(new_request)
-        db.session.commit()
+        return context.response, context.status, context.response_headers
 
-        self.decrement_subscription_requests(subscription_id)
+    def get_concurrency_limit(self):
+        return self.concurrency_limiter.stats()
 
-        return response, status
+    def call_get(self, api_id: int, version: str, params: str, api_key: str):
+        return self.call("GET", api_id, version, params, api_key)
 
     def call_post(
         self, api_id: int, version: str, params: str, api_key: str, body: str
     ):
-        subscription_id = self.verify_api_key(api_key)
-
-        subscription = self.verify_subscription(subscription_id, api_id)
-
-        base_url = self.__get_api_version_base_url(api_id, version)
-
-        headers = self.__get_api_version_headers(api_id, version)
-
-        request_url = f"{base_url}/{params}"
-
-        request_at = datetime.now()
-
-        response, status = self.rest_client.post(request_url, headers, body)
-
-        response_at = datetime.now()
-
-        response_time = (response_at - request_at).seconds
-
-        request_method = "POST"
-
-        user_id = subscription.user_id
-
-        request_body = str(body)
-
-        response_body = str(response)
-
-        new_request = ApiRequest(
-            api_id=api_id,
-            api_version=version,
-            user_id=user_id,
-            api_key=api_key,
-            subscription_id=subscription_id,
-            request_url=request_url,
-            request_method=request_method,
-            request_body=request_body,
-            response_body=response_body,
-            request_at=request_at,
-            response_at=response_at,
-            response_time=response_time,
-            http_status=status,
-        )
-
-        db.session.add(new_request)
-        db.session.commit()
-
-        self.decrement_subscription_requests(subscription_id)
-
-        return response, status
+        return self.call("POST", api_id, version, params, api_key, body)
 
     def call_patch(
         self, api_id: int, version: str, params: str, api_key: str, body: str
     ):
-        subscription_id = self.verify_api_key(api_key)
-
-        subscription = self.verify_subscription(subscription_id, api_id)
-
-        base_url = self.__get_api_version_base_url(api_id, version)
-
-        headers = self.__get_api_version_headers(api_id, version)
-
-        request_url = f"{base_url}/{params}"
-
-        request_at = datetime.now()
-
-        response, status = self.rest_client.patch(request_url, headers, body)
-
-        response_at = datetime.now()
-
-        response_time = (response_at - request_at).seconds
-
-        request_method = "PATCH"
-
-        user_id = subscription.user_id
-
-        request_body = str(body)
-
-        response_body = str(response)
-
-        new_request = ApiRequest(
-            api_id=api_id,
-            user_id=user_id,
-            api_key=api_key,
-            subscription_id=subscription_id,
-            api_version=version,
-            request_url=request_url,
-            request_method=request_method,
-            request_body=request_body,
-            response_body=response_body,
-            request_at=request_at,
-            response_at=response_at,
-            response_time=response_time,
-            http_status=status,
-        )
-
-        db.session.add(new_request)
-        db.session.commit()
-
-        self.decrement_subscription_requests(subscription_id)
-
-        return response, status
+        return self.call("PATCH", api_id, version, params, api_key, body)
 
     def call_delete(self, api_id: int, version: str, params: str, api_key: str):
-        subscription_id = self.verify_api_key(api_key)
-
-        subscription = self.verify_subscription(subscription_id, api_id)
-
-        base_url = self.__get_api_version_base_url(api_id, version)
-
-        headers = self.__get_api_version_headers(api_id, version)
-
-        request_url = f"{base_url}/{params}"
-
-        request_at = datetime.now()
-
-        response, status = self.rest_client.delete(request_url, headers)
-
-        response_at = datetime.now()
-
-        response_time = (response_at - request_at).seconds
-
-        request_method = "DELETE"
-
-        user_id = subscription.user_id
-
-        request_body = ""
-
-        response_body = str(response)
-
-        new_request = ApiRequest(
-            api_id=api_id,
-            user_id=user_id,
-            api_key=api_key,
-            api_version=version,
-            subscription_id=subscription_id,
-            request_url=request_url,
-            request_method=request_method,
-            request_body=request_body,
-            response_body=response_body,
-            request_at=request_at,
-            response_at=response_at,
-            response_time=response_time,
-            http_status=status,
-        )
-
-        db.session.add(new_request)
-        db.session.commit()
-
-        self.decrement_subscription_requests(subscription_id)
-
-        return response, status
-
-    def verify_api_key(self, api_key: str):
-        api_key_data = ApiKey.query.filter_by(key=api_key).first()
-
-        if api_key_data is None:
-            raise BadRequestError("Invalid API key")
-
-        if api_key_data.status != "active":
-            raise BadRequestError("API key is not active")
-
-        return api_key_data.subscription_id
-
-    def verify_subscription(self, subscription_id: int, api_id: int):
-        subscription = ApiSubscription.query.filter_by(
-            id=subscription_id, api_id=api_id
-        ).first()
-
-        if subscription is None:
-            raise BadRequestError("Invalid subscription")
-
-        if subscription.status != "active":
-            raise BadRequestError("Subscription is not active")
-
-        expired = subscription.end_date < datetime.now()
-
-        if expired:
-            raise BadRequestError("Subscription has expired")
-
-        no_remaining_requests = subscription.max_requests <= 0
-
-        if no_remaining_requests:
-            raise BadRequestError(
-                "Subscription has no requests left, Please renew subscription"
-            )
-
-        return subscription
-
-    def __get_api_version_base_url(self, api_id: int, version: str):
-        api_data = ApiModel.query.filter_by(id=api_id).first()
-
-        if api_data is None:
-            raise NotFoundError("API not found")
-
-        if api_data.status != "active":
-            raise BadRequestError("API is not active")
-
-        version_data = ApiVersion.query.filter_by(
-            api_id=api_id, version=version
-        ).first()
-
-        if version_data is None:
-            raise NotFoundError("API version not found")
-
-        if version_data.status != "active":
-            raise BadRequestError("API version is not active")
-
-        return version_data.base_url
-
-    def __get_api_version_headers(self, api_id: int, version: str):
-        headers = ApiVersionHeader.query.filter_by(
-            api_id=api_id, api_version=version
-        ).all()
-
-        headers_dict = {header.key: header.value for header in headers}
-
-        return headers_dict
-
-    def decrement_subscription_requests(self, subscription_id: int):
-        subscription = ApiSubscription.query.filter_by(id=subscription_id).first()
-
-        subscription.max_requests -= 1
-
-        db.session.commit()
+        return self.call("DELETE", api_id, version, params, api_key)
+
+    def call_stream(
+        self,
+        method: str,
+        api_id: int,
+        version: str,
+        params: str,
+        api_key: str,
+        body=None,
+    ):
+        return self.call(method, api_id, version, params, api_key, body, stream=True)
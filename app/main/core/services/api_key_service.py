@@ -4,11 +4,14 @@ from app.main.model.api_subscription_model import ApiSubscription
 from app.main.model.api_key_model import ApiKey
 from app.main.utils.exceptions import BadRequestError
 from app.main.utils.exceptions import NotFoundError
+from app.main.core.lib.key_principal_cache import KeyPrincipalCache
 
 from app.main import db
 
 
 class ApiKeyService:
+    def __init__(self, key_cache: KeyPrincipalCache | None = None):
+        self.key_cache = key_cache
 
     def create_api_key(self, subscription_id: int, user_id: int):
         subscription = ApiSubscription.query.filter_by(
@@ -81,6 +84,9 @@ class ApiKeyService:
         api_key.status = "inactive"
         db.session.commit()
 
+        if self.key_cache is not None:
+            self.key_cache.evict(key)
+
     def activate_api_key(self, user_id: str, key: str):
         api_key = ApiKey.query.filter_by(key=key).first()
 
@@ -99,3 +105,6 @@ class ApiKeyService:
 
         api_key.status = "active"
         db.session.commit()
+
+        if self.key_cache is not None:
+            self.key_cache.evict(key)
@@ -1,18 +1,31 @@
-import math
-from typing import Dict
+from datetime import timedelta
+from typing import Dict, List, Tuple
 from app.main.model.api_model import ApiModel
 from app.main.model.api_request_model import ApiRequest
 from app.main.model.user_model import User
 from app.main import db
 from app.main.utils.exceptions import NotFoundError, BadRequestError
-from sqlalchemy import extract, func
+from app.main.core.lib.analytics_engine import (
+    MONTH,
+    AnalyticsEngine,
+    AnalyticsQuery,
+    calendar_points,
+)
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.core.lib.paginator import Paginator, pagination_of
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator
 
 
 class ApiRequestService:
+    def __init__(
+        self,
+        analytics_engine: AnalyticsEngine | None = None,
+        paginator: Paginator | None = None,
+    ):
+        self.analytics_engine = analytics_engine or RollupAnalyticsEngine()
+        self.paginator = paginator or KeysetPaginator()
 
     def get_api_requests(self, query_params: Dict, user_id: str, api_id: int):
-        page = int(query_params.get("page", 1))
-        per_page = int(query_params.get("per_page", 10))
         http_status = query_params.get("http_status", None)
         api_version = query_params.get("version")
         start_date = query_params.get("start_date")
@@ -50,21 +63,12 @@ class ApiRequestService:
         if end_date is not None:
             query = query.filter(ApiRequest.response_at <= end_date)
 
-        total = query.count()
-
-        pagination = {
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": math.ceil(total / per_page),
-        }
-
-        query = query.limit(per_page).offset((page - 1) * per_page)
-
-        requests = query.all()
+        page = self.paginator.paginate(
+            query, (ApiRequest.request_at, ApiRequest.id), query_params
+        )
 
         result = []
-        for request, api, user in requests:
+        for request, api, user in page.items:
             request_dict = {
                 "id": request.id,
                 "api_id": api.id,
@@ -89,90 +93,28 @@ class ApiRequestService:
             }
             result.append(request_dict)
 
-        return result, pagination
+        return result, pagination_of(page)
 
     def get_total_transactions_by_month(self):
-        # Query to calculate total transactions by month
-        total_transactions = (
-            db.session.query(
-                extract("year", ApiRequest.request_at).label("year"),
-                extract("month", ApiRequest.request_at).label("month"),
-                func.count(ApiRequest.id).label("total_transactions"),
-            )
-            .group_by(
-                extract("year", ApiRequest.request_at),
-                extract("month", ApiRequest.request_at),
-            )
-            .order_by("year", "month")
-            .all()
-        )
-        response_data = [
-            {"year": year, "month": month, "total_transactions": transactions}
-            for year, month, transactions in total_transactions
-        ]
-
-        return {"data": response_data}
+        return {"data": self.__transactions(MONTH, ("year", "month"))}
 
     def get_total_transactions_by_day(self):
-        # Query to calculate total transactions by day
-        total_transactions = (
-            db.session.query(
-                extract("year", ApiRequest.request_at).label("year"),
-                extract("month", ApiRequest.request_at).label("month"),
-                extract("day", ApiRequest.request_at).label("day"),
-                func.count(ApiRequest.id).label("total_transactions"),
-            )
-            .group_by(
-                extract("year", ApiRequest.request_at),
-                extract("month", ApiRequest.request_at),
-                extract("day", ApiRequest.request_at),
-            )
-            .order_by("year", "month", "day")
-            .all()
-        )
-        response_data = [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "total_transactions": transactions,
-            }
-            for year, month, day, transactions in total_transactions
-        ]
-
-        return {"data": response_data}
+        return {
+            "data": self.__transactions(timedelta(days=1), ("year", "month", "day"))
+        }
 
     def get_total_transactions_by_hour(self):
-        # Query to calculate total transactions by hour
-        total_transactions = (
-            db.session.query(
-                extract("year", ApiRequest.request_at).label("year"),
-                extract("month", ApiRequest.request_at).label("month"),
-                extract("day", ApiRequest.request_at).label("day"),
-                extract("hour", ApiRequest.request_at).label("hour"),
-                func.count(ApiRequest.id).label("total_transactions"),
+        return {
+            "data": self.__transactions(
+                timedelta(hours=1), ("year", "month", "day", "hour")
             )
-            .group_by(
-                extract("year", ApiRequest.request_at),
-                extract("month", ApiRequest.request_at),
-                extract("day", ApiRequest.request_at),
-                extract("hour", ApiRequest.request_at),
-            )
-            .order_by("year", "month", "day", "hour")
-            .all()
-        )
-        response_data = [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "hour": hour,
-                "total_transactions": transactions,
-            }
-            for year, month, day, hour, transactions in total_transactions
-        ]
+        }
 
-        return {"data": response_data}
+    def __transactions(self, bucket, fields: Tuple[str, ...]) -> List[Dict]:
+        points = self.analytics_engine.run(
+            AnalyticsQuery(metric="requests", bucket=bucket, fill=False)
+        )
+        return calendar_points(points, fields, "total_transactions")
 
     # def get_total_transactions(self):
     #     # Query to calculate total transactions
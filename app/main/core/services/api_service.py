@@ -1,7 +1,7 @@
-import math
 from typing import Dict
 from app.main.model.api_category_model import ApiCategory
 from app.main.model.api_model import ApiModel
+from app.main.model.api_version_model import ApiVersion
 from app.main.model.api_version_endpoint_model import ApiVersionEndpoint
 from app.main.model.api_request_model import ApiRequest
 from app.main.model.api_subscription_model import ApiSubscription
@@ -11,6 +11,16 @@ from app.main import db
 from app.main.utils.exceptions import NotFoundError, BadRequestError
 from app.main.core.lib.media_manager import MediaManager
 from app.main.core.lib.chargily_api import ChargilyApi
+from app.main.core.lib.route_table import RouteTable
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.admission_scheduler import TIERS
+from app.main.core.lib.bulkhead import Bulkhead, api_compartment, plan_compartment
+from app.main.core.lib.request_rollup import RequestRollup
+from app.main.core.lib.impl.request_rollup_impl import SqlRequestRollup
+from app.main.core.lib.revenue_ledger import RevenueLedger
+from app.main.core.lib.impl.revenue_ledger_impl import SqlRevenueLedger
+from app.main.core.lib.paginator import Paginator, pagination_of
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator
 from app.main.utils.roles import Role
 from sqlalchemy import func
 from datetime import datetime, timedelta
@@ -18,9 +28,25 @@ from datetime import datetime, timedelta
 
 class ApiService:
 
-    def __init__(self, media_manager: MediaManager, chargily_api: ChargilyApi):
+    def __init__(
+        self,
+        media_manager: MediaManager,
+        chargily_api: ChargilyApi,
+        route_table: RouteTable | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        bulkhead: Bulkhead | None = None,
+        request_rollup: RequestRollup | None = None,
+        revenue_ledger: RevenueLedger | None = None,
+        paginator: Paginator | None = None,
+    ):
         self.media_manager = media_manager
         self.chargily_api = chargily_api
+        self.route_table = route_table
+        self.circuit_breaker = circuit_breaker
+        self.bulkhead = bulkhead
+        self.request_rollup = request_rollup or SqlRequestRollup()
+        self.revenue_ledger = revenue_ledger or SqlRevenueLedger()
+        self.paginator = paginator or KeysetPaginator()
 
     def create_api(self, data: Dict, user_id: str):
         if (
@@ -62,6 +88,10 @@ class ApiService:
                 description=plan.get("description", None),
                 max_requests=plan.get("max_requests", None),
                 duration=plan.get("duration", None),
+                rate_limit_per_second=plan.get("rate_limit_per_second", None),
+                rate_limit_per_minute=plan.get("rate_limit_per_minute", None),
+                max_concurrent_calls=plan.get("max_concurrent_calls", None),
+                tier=plan.get("tier", None),
                 api_id=new_api.id,
             )
             db.session.add(new_plan)
@@ -92,11 +122,21 @@ class ApiService:
                 raise BadRequestError("Max requests cannot be negative")
             if plan.get("duration") < 0:
                 raise BadRequestError("Duration cannot be negative")
+            for rate_limit in ("rate_limit_per_second", "rate_limit_per_minute"):
+                if plan.get(rate_limit) is not None and plan.get(rate_limit) <= 0:
+                    raise BadRequestError("Rate limits must be positive")
+            if (
+                plan.get("max_concurrent_calls") is not None
+                and plan.get("max_concurrent_calls") <= 0
+            ):
+                raise BadRequestError("Max concurrent calls must be positive")
+            if plan.get("tier") is not None and plan.get("tier") not in TIERS:
+                raise BadRequestError(
+                    "Plan tier must be one of: {}".format(", ".join(TIERS))
+                )
             names.append(plan.get("name"))
 
     def get_apis(self, query_params: Dict):
-        page = int(query_params.get("page", 1))
-        per_page = int(query_params.get("per_page", 10))
         status = query_params.get("status", None)
         category_ids = query_params.get("categoryIds", None)
         supplier_id = query_params.get("supplierId", None)
@@ -121,21 +161,12 @@ class ApiService:
         if search is not None:
             query = query.filter(ApiModel.name.ilike("%{}%".format(search)))
 
-        total = query.count()
-
-        pagination = {
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "pages": math.ceil(total / per_page),
-        }
-
-        query = query.limit(per_page).offset((page - 1) * per_page)
-
-        apis = query.all()
+        page = self.paginator.paginate(
+            query, (ApiModel.created_at, ApiModel.id), query_params
+        )
 
         result = []
-        for api, user, category in apis:
+        for api, user, category in page.items:
             api_dict = {
                 "id": api.id,
                 "name": api.name,
@@ -160,7 +191,7 @@ class ApiService:
             }
             result.append(api_dict)
 
-        return result, pagination
+        return result, pagination_of(page)
 
     def update_api(self, api_id, supplier_id, data):
         api = ApiModel.query.filter_by(id=api_id).first()
@@ -188,8 +219,21 @@ class ApiService:
         if data.get("description", None) is not None:
             api.description = data.get("description", None)
 
+        if data.get("max_concurrent_calls", None) is not None:
+            if data.get("max_concurrent_calls") <= 0:
+                raise BadRequestError("Max concurrent calls must be positive")
+            api.max_concurrent_calls = data.get("max_concurrent_calls")
+
+        if data.get("max_queued_calls", None) is not None:
+            if data.get("max_queued_calls") < 0:
+                raise BadRequestError("Max queued calls cannot be negative")
+            api.max_queued_calls = data.get("max_queued_calls")
+
         db.session.commit()
 
+        if self.route_table is not None:
+            self.route_table.invalidate(api_id)
+
     def get_api_by_id(self, api_id):
         query = (
             db.session.query(ApiModel, User, ApiCategory)
@@ -258,6 +302,9 @@ class ApiService:
 
         db.session.commit()
 
+        if self.route_table is not None:
+            self.route_table.invalidate(api_id)
+
     def deactivate_api(self, api_id: int, user_id: int, role: str):
         api = ApiModel.query.filter_by(id=api_id).first()
         if api is None:
@@ -270,6 +317,9 @@ class ApiService:
 
         db.session.commit()
 
+        if self.route_table is not None:
+            self.route_table.invalidate(api_id)
+
     def get_apis_count(self, supplier_id):
 
         num_apis = (
@@ -302,13 +352,7 @@ class ApiService:
 
     def get_active_subscriptions_count(self, supplier_id):
 
-        total_revenue = (
-            db.session.query(func.sum(ApiSubscription.price))
-            .join(ApiModel, ApiSubscription.api_id == ApiModel.id)
-            .filter(ApiModel.supplier_id == supplier_id)
-            .scalar()
-            or 0
-        )
+        total_revenue = self.revenue_ledger.total(supplier_id)
 
         return {
             "total_revenue": total_revenue,
@@ -355,13 +399,9 @@ class ApiService:
 
     def get_api_service_level(self, api_id):
 
-        query = db.session.query(ApiRequest.id).filter(
-            ApiRequest.api_id == api_id,
-        )
-        total_requests = query.count()
-        successful_requests = query.filter(
-            ApiRequest.http_status >= 200, ApiRequest.http_status < 300
-        ).count()
+        totals = self.request_rollup.totals(api_id)
+        total_requests = totals["count"]
+        successful_requests = totals["success_count"]
 
         if total_requests > 0:
             service_level = (successful_requests / total_requests) * 100
@@ -372,6 +412,59 @@ class ApiService:
             "service_level": service_level,
         }
 
+    def get_api_circuit_breakers(self, api_id: int, supplier_id: int):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        if api.supplier_id != supplier_id:
+            raise BadRequestError("You are not the owner of the API")
+
+        if self.circuit_breaker is None:
+            return []
+
+        versions = ApiVersion.query.filter_by(api_id=api_id).all()
+
+        return [
+            self.circuit_breaker.state(api_id, version.version) for version in versions
+        ]
+
+    def get_api_bulkheads(self, api_id: int, supplier_id: int):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        if api.supplier_id != supplier_id:
+            raise BadRequestError("You are not the owner of the API")
+
+        if self.bulkhead is None:
+            return []
+
+        plans = ApiPlan.query.filter(
+            ApiPlan.api_id == api_id, ApiPlan.max_concurrent_calls.isnot(None)
+        ).all()
+
+        return [
+            {
+                "scope": "api",
+                "plan_name": None,
+                **self.bulkhead.stats(
+                    api_compartment(api_id),
+                    api.max_concurrent_calls,
+                    api.max_queued_calls,
+                ),
+            }
+        ] + [
+            {
+                "scope": "plan",
+                "plan_name": plan.name,
+                **self.bulkhead.stats(
+                    plan_compartment(api_id, plan.name), plan.max_concurrent_calls
+                ),
+            }
+            for plan in plans
+        ]
+
     def get_api_popularity(self, api_id):
         current_date = datetime.now()
 
@@ -1,16 +1,26 @@
 from datetime import datetime, timedelta
-import math
 
-from typing import Dict
+from typing import Dict, List, Tuple
 
 from flask import Request
-from sqlalchemy import func, extract
+from sqlalchemy import func
 
 from app.main import db
 
 from app.main.utils.roles import Role
 
 from app.main.core.lib.chargily_api import ChargilyApi
+from app.main.core.lib.revenue_ledger import RevenueLedger
+from app.main.core.lib.impl.revenue_ledger_impl import SqlRevenueLedger
+from app.main.core.lib.analytics_engine import (
+    MONTH,
+    AnalyticsEngine,
+    AnalyticsQuery,
+    calendar_points,
+)
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.core.lib.paginator import Paginator, pagination_of
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator
 from app.main.model.api_model import ApiModel
 from app.main.model.api_plan_model import ApiPlan
 from app.main.model.user_model import User
@@ -19,8 +29,19 @@ from app.main.utils.exceptions import NotFoundError, BadRequestError
 
 
 class ApiSubscriptionService:
-    def __init__(self, chargily_api: ChargilyApi):
+    def __init__(
+        self,
+        chargily_api: ChargilyApi,
+        revenue_ledger: RevenueLedger | None = None,
+        analytics_engine: AnalyticsEngine | None = None,
+        paginator: Paginator | None = None,
+    ):
         self.chargily_api = chargily_api
+        self.revenue_ledger = revenue_ledger or SqlRevenueLedger()
+        self.analytics_engine = analytics_engine or RollupAnalyticsEngine(
+            revenue_ledger=self.revenue_ledger
+        )
+        self.paginator = paginator or KeysetPaginator()
 
     def create_charigly_checkout(
         self, api_id: str, plan_name: str, user_id: str, redirect_url: str
@@ -100,11 +121,12 @@ class ApiSubscriptionService:
             )
 
             db.session.add(subscription)
+            self.revenue_ledger.record(
+                api.supplier_id, api.id, subscription.start_date, amount
+            )
             db.session.commit()
 
     def get_subscriptions(self, query_params: Dict, role: str):
-        page = int(query_params.get("page", 1))
-        per_page = int(query_params.get("per_page", 10))
         api_id = query_params.get("api_id")
         plan_name = query_params.get("plan_name")
         user_id = query_params.get("user_id")
@@ -148,10 +170,9 @@ class ApiSubscriptionService:
                 raise BadRequestError("Supplier ID is required for supplier role")
             query = query.filter(ApiModel.supplier_id == supplier_id)
 
-        query = query.limit(per_page).offset((page - 1) * per_page)
-
-        total = query.count()
-        total_pages = math.ceil(total / per_page)
+        page = self.paginator.paginate(
+            query, (ApiSubscription.start_date, ApiSubscription.id), query_params
+        )
 
         return [
             {
@@ -176,13 +197,8 @@ class ApiSubscriptionService:
                 "expired": item.ApiSubscription.end_date < datetime.now(),
                 "price": item.ApiSubscription.price,
             }
-            for item in query.all()
-        ], {
-            "page": page,
-            "per_page": per_page,
-            "total": total,
-            "total_pages": total_pages,
-        }
+            for item in page.items
+        ], pagination_of(page, pages="total_pages")
 
     def get_subscription(self, subscription_id: str, user_id: str, role: str):
         query = (
@@ -260,70 +276,21 @@ class ApiSubscriptionService:
         current_date = datetime.now()
         year = int(query_params.get("year", current_date.year))
         start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
+        end_date = datetime(year + 1, 1, 1)
 
-        # Query to calculate total subscription revenue by month
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-            )
-            .order_by("year", "month")
-            .all()
-        )
-        return [
-            {
-                "year": year,
-                "month": month,
-                "total_revenues": revenues,
-            }
-            for year, month, revenues in total_revenue
-        ]
+        return self.__revenues(start_date, end_date, MONTH, ("year", "month"))
 
     def get_total_subscription_revenue_by_day(self, query_params: Dict):
         current_date = datetime.now()
         year = int(query_params.get("year", current_date.year))
         month = int(query_params.get("month", current_date.month))
         start_date = datetime(year, month, 1)
-        # Calculate the first day of the next month
-        next_month = month % 12 + 1
-        next_year = year + (month // 12)
-        end_date = datetime(next_year, next_month, 1) - timedelta(days=1)
-        # Query to calculate total subscription revenue by day
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                extract("day", ApiSubscription.start_date).label("day"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-                extract("day", ApiSubscription.start_date),
-            )
-            .order_by("year", "month", "day")
-            .all()
-        )
+        # The first day of the next month
+        end_date = datetime(year + (month // 12), month % 12 + 1, 1)
 
-        return [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "total_revenues": revenues,
-            }
-            for year, month, day, revenues in total_revenue
-        ]
+        return self.__revenues(
+            start_date, end_date, timedelta(days=1), ("year", "month", "day")
+        )
 
     def get_total_subscription_revenue_by_hour(self, query_params: Dict):
         current_date = datetime.now()
@@ -331,154 +298,76 @@ class ApiSubscriptionService:
         month = int(query_params.get("month", current_date.month))
         day = int(query_params.get("day", current_date.day))
         start_date = datetime(year, month, day)
-        end_date = start_date.replace(hour=23, minute=59, second=59)
-        # Query to calculate total subscription revenue by hour
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                extract("day", ApiSubscription.start_date).label("day"),
-                extract("hour", ApiSubscription.start_date).label("hour"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-                extract("day", ApiSubscription.start_date),
-                extract("hour", ApiSubscription.start_date),
-            )
-            .order_by("year", "month", "day", "hour")
-            .all()
-        )
+        end_date = start_date + timedelta(days=1)
 
-        return [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "hour": hour,
-                "total_revenues": revenues,
-            }
-            for year, month, day, hour, revenues in total_revenue
-        ]
+        return self.__revenues(
+            start_date,
+            end_date,
+            timedelta(hours=1),
+            ("year", "month", "day", "hour"),
+        )
 
     def get_total_subscription_revenue(self):
-        # Query to calculate total subscription revenue
-        total_revenue = db.session.query(func.sum(ApiSubscription.price)).scalar() or 0
-        return {"total_revenue": total_revenue}
+        return {"total_revenue": self.revenue_ledger.total()}
 
     def get_total_supplier_revenue_by_month(self, supplier_id, query_params: Dict):
         current_date = datetime.now()
         year = int(query_params.get("year", current_date.year))
         start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
+        end_date = datetime(year + 1, 1, 1)
 
-        # Query to calculate total subscription revenue by month
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .join(ApiModel, ApiSubscription.api_id == ApiModel.id)
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .filter(ApiModel.supplier_id == supplier_id)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-            )
-            .order_by("year", "month")
-            .all()
+        return self.__revenues(
+            start_date, end_date, MONTH, ("year", "month"), supplier_id
         )
-        return [
-            {
-                "year": year,
-                "month": month,
-                "total_revenues": revenues,
-            }
-            for year, month, revenues in total_revenue
-        ]
 
     def get_total_supplier_revenue_by_day(self, supplier_id, query_params: Dict):
         current_date = datetime.now()
         year = int(query_params.get("year", current_date.year))
         month = int(query_params.get("month", current_date.month))
         start_date = datetime(year, month, 1)
-        # Calculate the first day of the next month
-        next_month = month % 12 + 1
-        next_year = year + (month // 12)
-        end_date = datetime(next_year, next_month, 1) - timedelta(days=1)
-        # Query to calculate total subscription revenue by day
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                extract("day", ApiSubscription.start_date).label("day"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .join(ApiModel, ApiSubscription.api_id == ApiModel.id)
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .filter(ApiModel.supplier_id == supplier_id)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-                extract("day", ApiSubscription.start_date),
-            )
-            .order_by("year", "month", "day")
-            .all()
+        # The first day of the next month
+        end_date = datetime(year + (month // 12), month % 12 + 1, 1)
+
+        return self.__revenues(
+            start_date,
+            end_date,
+            timedelta(days=1),
+            ("year", "month", "day"),
+            supplier_id,
         )
 
-        return [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "total_revenues": revenues,
-            }
-            for year, month, day, revenues in total_revenue
-        ]
-
     def get_total_supplier_revenue_by_hour(self, supplier_id, query_params: Dict):
         current_date = datetime.now()
         year = int(query_params.get("year", current_date.year))
         month = int(query_params.get("month", current_date.month))
         day = int(query_params.get("day", current_date.day))
         start_date = datetime(year, month, day)
-        end_date = start_date.replace(hour=23, minute=59, second=59)
-        # Query to calculate total subscription revenue by hour
-        total_revenue = (
-            db.session.query(
-                extract("year", ApiSubscription.start_date).label("year"),
-                extract("month", ApiSubscription.start_date).label("month"),
-                extract("day", ApiSubscription.start_date).label("day"),
-                extract("hour", ApiSubscription.start_date).label("hour"),
-                func.sum(ApiSubscription.price).label("total_revenue"),
-            )
-            .join(ApiModel, ApiSubscription.api_id == ApiModel.id)
-            .filter(ApiSubscription.start_date >= start_date)
-            .filter(ApiSubscription.start_date <= end_date)
-            .filter(ApiModel.supplier_id == supplier_id)
-            .group_by(
-                extract("year", ApiSubscription.start_date),
-                extract("month", ApiSubscription.start_date),
-                extract("day", ApiSubscription.start_date),
-                extract("hour", ApiSubscription.start_date),
-            )
-            .order_by("year", "month", "day", "hour")
-            .all()
+        end_date = start_date + timedelta(days=1)
+
+        return self.__revenues(
+            start_date,
+            end_date,
+            timedelta(hours=1),
+            ("year", "month", "day", "hour"),
+            supplier_id,
         )
 
-        return [
-            {
-                "year": year,
-                "month": month,
-                "day": day,
-                "hour": hour,
-                "total_revenues": revenues,
-            }
-            for year, month, day, hour, revenues in total_revenue
-        ]
+    def __revenues(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        bucket,
+        fields: Tuple[str, ...],
+        supplier_id: int | None = None,
+    ) -> List[Dict]:
+        points = self.analytics_engine.run(
+            AnalyticsQuery(
+                metric="revenue",
+                bucket=bucket,
+                start=start_date,
+                end=end_date,
+                supplier_id=supplier_id,
+                fill=False,
+            )
+        )
+        return calendar_points(points, fields, "total_revenues")
@@ -7,10 +7,29 @@ from app.main import db
 from app.main.utils.exceptions import NotFoundError, BadRequestError
 from typing import Dict
 from app.main.utils.roles import Role
+from app.main.core.lib.route_table import RouteTable, upstream_targets
+from app.main.core.lib.response_cache import ResponseCache
+from app.main.core.lib.latency_histograms import LatencyHistograms
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.traffic_mirror import TrafficMirror
 from sqlalchemy import func
 
 
 class ApiVersionService:
+    def __init__(
+        self,
+        route_table: RouteTable | None = None,
+        response_cache: ResponseCache | None = None,
+        latency_histograms: LatencyHistograms | None = None,
+        load_balancer: LoadBalancer | None = None,
+        traffic_mirror: TrafficMirror | None = None,
+    ):
+        self.route_table = route_table
+        self.response_cache = response_cache
+        self.latency_histograms = latency_histograms
+        self.load_balancer = load_balancer
+        self.traffic_mirror = traffic_mirror
+
     def create_api_version(self, api_id: int, supplier_id: int, data: dict):
         api = ApiModel.query.filter_by(id=api_id, supplier_id=supplier_id).first()
         if api is None:
@@ -21,11 +40,29 @@ class ApiVersionService:
         ).first():
             raise BadRequestError("API version already exists")
 
+        hedge_percentile = data.get("hedge_percentile")
+
+        if hedge_percentile is not None and not 0 < hedge_percentile < 100:
+            raise BadRequestError("hedge_percentile must be between 0 and 100")
+
+        targets = data.get("upstream_targets") or None
+
+        for target in targets or []:
+            if not target.get("url") or target.get("weight", 1) < 1:
+                raise BadRequestError(
+                    "upstream targets need a url and a weight of 1 or more"
+                )
+
         api_version = ApiVersion(
             api_id=api_id,
             version=data.get("version"),
             base_url=data.get("base_url"),
             status="active",
+            response_cache_ttl=data.get("response_cache_ttl", 0),
+            hedge_percentile=hedge_percentile,
+            max_retries=data.get("max_retries", 0),
+            retry_budget_ratio=data.get("retry_budget_ratio", 0.1),
+            upstream_targets=targets,
         )
 
         db.session.add(api_version)
@@ -60,6 +97,8 @@ class ApiVersionService:
 
         db.session.commit()
 
+        self.__invalidate_route(api_id, api_version.version)
+
     def get_api_versions(self, api_id: int, query_params: Dict):
         status = query_params.get("status")
 
@@ -219,6 +258,8 @@ class ApiVersionService:
         api_version.status = "active"
         db.session.commit()
 
+        self.__invalidate_route(api_id, version)
+
     def deactivate_version(
         self, api_id: int, version: str, supplier_id: int, role: str
     ):
@@ -240,3 +281,169 @@ class ApiVersionService:
 
         api_version.status = "disabled"
         db.session.commit()
+
+        self.__invalidate_route(api_id, version)
+
+    def update_routing(
+        self, api_id: int, version: str, supplier_id: int, role: str, data: dict
+    ):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        api_version = ApiVersion.query.filter_by(api_id=api_id, version=version).first()
+
+        if api_version is None:
+            raise NotFoundError(
+                "No API version found with id: {} and version: {}".format(
+                    api_id, version
+                )
+            )
+
+        if role == Role.SUPPLIER and api.supplier_id != supplier_id:
+            raise BadRequestError("You are not authorized to update this version")
+
+        for mode in ("canary", "mirror"):
+            other = data.get(f"{mode}_version")
+            percent = data.get(f"{mode}_percent", 0)
+
+            if not 0 <= percent <= 100:
+                raise BadRequestError(f"{mode}_percent must be between 0 and 100")
+
+            if other is not None and (
+                other == version
+                or ApiVersion.query.filter_by(api_id=api_id, version=other).first()
+                is None
+            ):
+                raise BadRequestError(
+                    f"{mode}_version must be another version of this API"
+                )
+
+            setattr(api_version, f"{mode}_version", other)
+            setattr(api_version, f"{mode}_percent", percent if other else 0)
+
+        db.session.commit()
+
+        self.__invalidate_route(api_id, version)
+
+    def get_response_cache_stats(
+        self, api_id: int, version: str, supplier_id: int, role: str
+    ):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        api_version = ApiVersion.query.filter_by(api_id=api_id, version=version).first()
+
+        if api_version is None:
+            raise NotFoundError(
+                "No API version found with id: {} and version: {}".format(
+                    api_id, version
+                )
+            )
+
+        if role == Role.SUPPLIER and api.supplier_id != supplier_id:
+            raise BadRequestError("You are not authorized to view this version")
+
+        stats = (
+            self.response_cache.stats(api_id, version)
+            if self.response_cache is not None
+            else {}
+        )
+
+        return {
+            "response_cache_ttl": api_version.response_cache_ttl,
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "revalidations": stats.get("revalidations", 0),
+            "stores": stats.get("stores", 0),
+            "evictions": stats.get("evictions", 0),
+            "entries": stats.get("entries", 0),
+        }
+
+    def get_latency_percentiles(
+        self, api_id: int, version: str, supplier_id: int, role: str
+    ):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        if ApiVersion.query.filter_by(api_id=api_id, version=version).first() is None:
+            raise NotFoundError(
+                "No API version found with id: {} and version: {}".format(
+                    api_id, version
+                )
+            )
+
+        if role == Role.SUPPLIER and api.supplier_id != supplier_id:
+            raise BadRequestError("You are not authorized to view this version")
+
+        if self.latency_histograms is None:
+            return {"count": 0, "mean": 0, "max": 0}
+
+        return self.latency_histograms.percentiles(api_id, version)
+
+    def get_upstream_targets(
+        self, api_id: int, version: str, supplier_id: int, role: str
+    ):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        api_version = ApiVersion.query.filter_by(api_id=api_id, version=version).first()
+
+        if api_version is None:
+            raise NotFoundError(
+                "No API version found with id: {} and version: {}".format(
+                    api_id, version
+                )
+            )
+
+        if role == Role.SUPPLIER and api.supplier_id != supplier_id:
+            raise BadRequestError("You are not authorized to view this version")
+
+        stats = (
+            self.load_balancer.stats(api_id, version)
+            if self.load_balancer is not None
+            else {}
+        )
+
+        return [
+            {
+                "url": target.url,
+                "weight": target.weight,
+                "outstanding": stats.get(target.url, {}).get("outstanding", 0),
+                "requests": stats.get(target.url, {}).get("requests", 0),
+                "failures": stats.get(target.url, {}).get("failures", 0),
+                "ejected": stats.get(target.url, {}).get("ejected", False),
+            }
+            for target in upstream_targets(api_version.upstream_targets)
+        ]
+
+    def get_mirror_comparison(
+        self, api_id: int, version: str, supplier_id: int, role: str
+    ):
+        api = ApiModel.query.filter_by(id=api_id).first()
+        if api is None:
+            raise NotFoundError("No API found with id: {}".format(api_id))
+
+        if ApiVersion.query.filter_by(api_id=api_id, version=version).first() is None:
+            raise NotFoundError(
+                "No API version found with id: {} and version: {}".format(
+                    api_id, version
+                )
+            )
+
+        if role == Role.SUPPLIER and api.supplier_id != supplier_id:
+            raise BadRequestError("You are not authorized to view this version")
+
+        if self.traffic_mirror is None:
+            return {"shadow_version": None, "mirrored": 0}
+
+        return self.traffic_mirror.stats(api_id, version)
+
+    def __invalidate_route(self, api_id: int, version: str):
+        if self.route_table is not None:
+            self.route_table.invalidate(api_id, version)
+        if self.response_cache is not None:
+            self.response_cache.invalidate(api_id, version)
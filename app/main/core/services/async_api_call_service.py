@@ -0,0 +1,193 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from flask import Flask
+
+from app.main.core.lib.async_rest_client import AsyncRestClient
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.route_table import RouteTable
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.key_principal_cache import KeyPrincipalCache
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.quota_meter import QuotaMeter
+from app.main.core.lib.impl.quota_meter_impl import QuotaMeterImpl
+from app.main.core.lib.request_log import RequestLog
+from app.main.core.lib.impl.request_log_impl import BatchedRequestLog
+from app.main.core.lib.response_cache import ResponseCache
+from app.main.core.lib.impl.response_cache_impl import InMemoryResponseCache
+from app.main.core.lib.circuit_breaker import CircuitBreaker
+from app.main.core.lib.impl.circuit_breaker_impl import RollingWindowCircuitBreaker
+from app.main.core.lib.latency_histograms import LatencyHistograms
+from app.main.core.lib.impl.latency_histograms_impl import (
+    InMemoryLatencyHistograms,
+    WindowedLatencyHistograms,
+)
+from app.main.core.lib.rate_limiter import RateLimiter
+from app.main.core.lib.impl.rate_limiter_impl import InMemoryRateLimiter
+from app.main.core.lib.gateway_resolver import GatewayResolver
+from app.main.core.lib.impl.gateway_resolver_impl import JoinedQueryGatewayResolver
+from app.main.core.lib.admission_scheduler import AdmissionScheduler
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.bulkhead import Bulkhead
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.concurrency_limiter import ConcurrencyLimiter
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.core.lib.retry_budget import RetryBudget
+from app.main.core.lib.impl.retry_budget_impl import InMemoryRetryBudget
+from app.main.core.lib.load_balancer import LoadBalancer
+from app.main.core.lib.impl.load_balancer_impl import PowerOfTwoChoicesBalancer
+from app.main.core.lib.traffic_mirror import TrafficMirror
+from app.main.core.lib.impl.traffic_mirror_impl import ThreadPoolTrafficMirror
+from app.main.core.lib.gateway_pipeline import GatewayContext
+from app.main.core.lib.impl.gateway_pipeline_impl import (
+    AsyncMiddlewareGatewayPipeline,
+)
+from app.main.core.lib.impl.gateway_async_stages_impl import (
+    AsyncAdmissionStage,
+    AsyncAuthStage,
+    AsyncBulkheadStage,
+    AsyncCacheStage,
+    AsyncConcurrencyLimitStage,
+    AsyncLogStage,
+    AsyncMirrorStage,
+    AsyncQuotaStage,
+    AsyncRateLimitStage,
+    AsyncRouteStage,
+    AsyncUpstreamStage,
+)
+
+
+class AsyncApiCallService:
+    """
+    Proxies gateway calls on an event loop through the same stages as
+    `ApiCallService`, so an upstream call in flight holds no thread. Database
+    work, the auth lookups of cold caches and the quota meter, runs on
+    `db_threads` worker threads inside an app context of `app`.
+    """
+
+    def __init__(
+        self,
+        app: Flask,
+        rest_client: AsyncRestClient,
+        route_table: RouteTable | None = None,
+        key_cache: KeyPrincipalCache | None = None,
+        quota_meter: QuotaMeter | None = None,
+        request_log: RequestLog | None = None,
+        response_cache: ResponseCache | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        latency_histograms: LatencyHistograms | None = None,
+        upstream_histograms: LatencyHistograms | None = None,
+        rate_limiter: RateLimiter | None = None,
+        gateway_resolver: GatewayResolver | None = None,
+        bulkhead: Bulkhead | None = None,
+        admission_scheduler: AdmissionScheduler | None = None,
+        concurrency_limiter: ConcurrencyLimiter | None = None,
+        retry_budget: RetryBudget | None = None,
+        load_balancer: LoadBalancer | None = None,
+        traffic_mirror: TrafficMirror | None = None,
+        retry_backoff: float = 0.05,
+        hedge_min_samples: int = 20,
+        db_threads: int = 16,
+        server_timing: bool = False,
+    ):
+        self.app = app
+        self.rest_client = rest_client
+        self.route_table = route_table or InMemoryRouteTable()
+        self.key_cache = key_cache or InMemoryKeyPrincipalCache()
+        self.quota_meter = quota_meter or QuotaMeterImpl()
+        if request_log is None:
+            request_log = BatchedRequestLog(full_policy=BatchedRequestLog.SPILL)
+            request_log.start(app)
+        self.request_log = request_log
+        self.response_cache = response_cache or InMemoryResponseCache()
+        self.circuit_breaker = circuit_breaker or RollingWindowCircuitBreaker()
+        self.latency_histograms = latency_histograms or InMemoryLatencyHistograms()
+        # upstream attempts only, the hedge delays are read from them
+        self.upstream_histograms = upstream_histograms or WindowedLatencyHistograms()
+        self.rate_limiter = rate_limiter or InMemoryRateLimiter()
+        self.gateway_resolver = gateway_resolver or JoinedQueryGatewayResolver()
+        self.bulkhead = bulkhead or SemaphoreBulkhead()
+        self.admission_scheduler = admission_scheduler or WeightedFairScheduler()
+        self.concurrency_limiter = concurrency_limiter or GradientConcurrencyLimiter()
+        self.retry_budget = retry_budget or InMemoryRetryBudget()
+        self.load_balancer = load_balancer or PowerOfTwoChoicesBalancer()
+        # shadow calls are sent from the mirror's own threads, with a blocking client
+        self.traffic_mirror = traffic_mirror or ThreadPoolTrafficMirror(
+            RestClientImpl()
+        )
+        # adds a Server-Timing header with the time spent in every stage
+        self.server_timing = server_timing
+        self.executor = ThreadPoolExecutor(
+            max_workers=db_threads, thread_name_prefix="gateway-db"
+        )
+        self.pipeline = AsyncMiddlewareGatewayPipeline(
+            [
+                AsyncConcurrencyLimitStage(self.concurrency_limiter),
+                AsyncAuthStage(
+                    self.key_cache,
+                    self.route_table,
+                    self.gateway_resolver,
+                    self.run_blocking,
+                ),
+                AsyncRateLimitStage(self.rate_limiter),
+                AsyncAdmissionStage(self.admission_scheduler),
+                AsyncRouteStage(self.route_table, self.run_blocking),
+                AsyncLogStage(self.request_log, self.latency_histograms),
+                AsyncQuotaStage(self.quota_meter, self.key_cache, self.run_blocking),
+                AsyncCacheStage(self.response_cache),
+                AsyncMirrorStage(self.traffic_mirror),
+                AsyncBulkheadStage(self.bulkhead),
+                AsyncUpstreamStage(
+                    self.rest_client,
+                    self.circuit_breaker,
+                    self.retry_budget,
+                    self.upstream_histograms,
+                    self.load_balancer,
+                    retry_backoff=retry_backoff,
+                    hedge_min_samples=hedge_min_samples,
+                ),
+            ]
+        )
+
+    async def call(
+        self,
+        method: str,
+        api_id: int,
+        version: str,
+        params: str,
+        api_key: str,
+        body=None,
+    ):
+        context = await self.pipeline.run(
+            GatewayContext(
+                method=method.upper(),
+                api_id=api_id,
+                version=version,
+                params=params,
+                api_key=api_key,
+                body=body,
+            )
+        )
+
+        if self.server_timing:
+            context.response_headers["Server-Timing"] = ", ".join(
+                f"{name};dur={context.timings[name] / 1000:.3f}"
+                for name in self.pipeline.stage_names()
+                if name in context.timings
+            )
+
+        return context.response, context.status, context.response_headers
+
+    async def run_blocking(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, partial(self.__in_app_context, function, *args)
+        )
+
+    async def close(self):
+        await self.rest_client.close()
+        self.executor.shutdown(wait=False)
+
+    def __in_app_context(self, function, *args):
+        with self.app.app_context():
+            return function(*args)
@@ -1,6 +1,8 @@
 from app.main.model.user_model import User
 from app.main.utils.exceptions import NotFoundError, BadRequestError
 from app.main.core.lib.media_manager import MediaManager
+from app.main.core.lib.paginator import Paginator, pagination_of
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator
 from app.main import db
 from app.main.utils.validators import is_email_valid
 from app.main.utils.roles import Role
@@ -10,8 +12,9 @@ from sqlalchemy import func
 
 class UserService:
 
-    def __init__(self, media_manager: MediaManager):
+    def __init__(self, media_manager: MediaManager, paginator: Paginator | None = None):
         self.media_manager = media_manager
+        self.paginator = paginator or KeysetPaginator()
 
     def get_user_by_id(self, user_id: int):
         user = User.query.filter_by(id=user_id).first()
@@ -36,8 +39,6 @@ class UserService:
         }
 
     def get_users(self, query_params: Dict):
-        page = int(query_params.get("page", 1))
-        per_page = int(query_params.get("per_page", 10))
         status = query_params.get("status", None)
         roles = query_params.get("roles", None)
 
@@ -50,7 +51,7 @@ class UserService:
             roles = roles.split(",")
             query = query.filter(User.role.in_(roles))
 
-        users = query.paginate(page=page, per_page=per_page, error_out=False)
+        page = self.paginator.paginate(query, (User.created_at, User.id), query_params)
 
         return (
             [
@@ -67,14 +68,9 @@ class UserService:
                     "phone_number": user.phone_number,
                     "bio": user.bio,
                 }
-                for user in users.items
+                for user in page.items
             ],
-            {
-                "page": users.page,
-                "per_page": users.per_page,
-                "pages": users.pages,
-                "total": users.total,
-            },
+            pagination_of(page),
         )
 
     def activate_user(self, user_id: int):
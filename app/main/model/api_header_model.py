@@ -3,6 +3,9 @@ from app.main import db
 
 class ApiVersionHeader(db.Model):  # type: ignore
     __tablename__ = "api_version_header"
+    __table_args__ = (
+        db.Index("ix_api_version_header_api_id_api_version", "api_id", "api_version"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api_version.api_id"))
@@ -4,6 +4,7 @@ from app.main import db
 class ApiKey(db.Model):  # type: ignore
 
     __tablename__ = "api_key"
+    __table_args__ = (db.Index("ix_api_key_subscription_id", "subscription_id"),)
 
     key = db.Column(db.String, primary_key=True)
     subscription_id = db.Column(db.Integer, db.ForeignKey("api_subscription.id"))
@@ -4,6 +4,10 @@ from app.main import db
 class ApiModel(db.Model):  # type: ignore
 
     __tablename__ = "api"
+    __table_args__ = (
+        db.Index("ix_api_supplier_id_created_at_id", "supplier_id", "created_at", "id"),
+        db.Index("ix_api_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(255), nullable=False)
@@ -18,6 +22,9 @@ class ApiModel(db.Model):  # type: ignore
     )
     status = db.Column(db.String(255), nullable=False, default="active")
     chargily_product_id = db.Column(db.String(255), nullable=True)
+    # upstream calls in flight / waiting for a slot, null means the gateway default
+    max_concurrent_calls = db.Column(db.Integer, nullable=True)
+    max_queued_calls = db.Column(db.Integer, nullable=True)
 
     def __repr__(self):
         return "<Api '{}'>".format(self.name)
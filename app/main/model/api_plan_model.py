@@ -12,6 +12,13 @@ class ApiPlan(db.Model):  # type: ignore
     max_requests = db.Column(db.Integer)
     duration = db.Column(db.Integer)
     chargily_price_id = db.Column(db.String(255), nullable=True)
+    # requests one api key may send per second / minute, null means unlimited
+    rate_limit_per_second = db.Column(db.Integer, nullable=True)
+    rate_limit_per_minute = db.Column(db.Integer, nullable=True)
+    # upstream calls in flight for all subscribers of the plan, null means no cap
+    max_concurrent_calls = db.Column(db.Integer, nullable=True)
+    # admission priority: free, standard or premium, null derives it from the price
+    tier = db.Column(db.String(32), nullable=True)
 
     def __repr__(self):
         return "<ApiPlan '{}'>".format(self.name)
@@ -4,6 +4,17 @@ from app.main import db
 class ApiRequest(db.Model):  # type: ignore
 
     __tablename__ = "api_request"
+    __table_args__ = (
+        db.Index("ix_api_request_api_id_request_at_id", "api_id", "request_at", "id"),
+        db.Index(
+            "ix_api_request_api_id_api_version_request_at",
+            "api_id",
+            "api_version",
+            "request_at",
+        ),
+        db.Index("ix_api_request_api_id_http_status", "api_id", "http_status"),
+        db.Index("ix_api_request_request_at", "request_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api_version.api_id"))
@@ -15,12 +26,15 @@ class ApiRequest(db.Model):  # type: ignore
     api_key = db.Column(db.String, db.ForeignKey("api_key.key"))
     subscription_id = db.Column(db.Integer, db.ForeignKey("api_subscription.id"))
     request_url = db.Column(db.String, nullable=False)
+    # backend of the version's upstream targets that answered the call
+    upstream_target = db.Column(db.String, nullable=True)
     request_method = db.Column(db.String, nullable=False)
     request_body = db.Column(db.String, nullable=False)
     response_body = db.Column(db.String, nullable=False)
     request_at = db.Column(db.DateTime, nullable=False)
     response_at = db.Column(db.DateTime, nullable=False)
-    response_time = db.Column(db.Integer, nullable=False)
+    # microseconds measured on a monotonic clock
+    response_time = db.Column(db.BigInteger, nullable=False)
     http_status = db.Column(db.Integer, nullable=False)
 
     def __repr__(self):
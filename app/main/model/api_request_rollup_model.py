@@ -0,0 +1,39 @@
+from app.main import db
+
+
+class ApiRequestRollupColumns:
+    """Counters of the api_request rows logged in one bucket of a version."""
+
+    api_id = db.Column(db.Integer, primary_key=True)
+    api_version = db.Column(db.String, primary_key=True)
+    # request_at truncated to the table's granularity
+    bucket = db.Column(db.DateTime, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    # 2xx answers
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    # 5xx answers and calls that got no upstream answer
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    # microseconds, as in api_request.response_time
+    latency_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    # size of the logged response bodies
+    response_bytes = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<{} '{} {} {}'>".format(
+            type(self).__name__, self.api_id, self.api_version, self.bucket
+        )
+
+
+class ApiRequestMinuteRollup(ApiRequestRollupColumns, db.Model):  # type: ignore
+    __tablename__ = "api_request_rollup_minute"
+    __table_args__ = (db.Index("ix_api_request_rollup_minute_bucket", "bucket"),)
+
+
+class ApiRequestHourRollup(ApiRequestRollupColumns, db.Model):  # type: ignore
+    __tablename__ = "api_request_rollup_hour"
+    __table_args__ = (db.Index("ix_api_request_rollup_hour_bucket", "bucket"),)
+
+
+class ApiRequestDayRollup(ApiRequestRollupColumns, db.Model):  # type: ignore
+    __tablename__ = "api_request_rollup_day"
+    __table_args__ = (db.Index("ix_api_request_rollup_day_bucket", "bucket"),)
@@ -0,0 +1,23 @@
+from app.main import db
+
+
+class ApiRevenueLedger(db.Model):  # type: ignore
+    """Revenue of the subscriptions paid for an API in one hour."""
+
+    __tablename__ = "api_revenue_ledger"
+    __table_args__ = (
+        db.Index("ix_api_revenue_ledger_bucket", "bucket"),
+        db.Index("ix_api_revenue_ledger_supplier_id_bucket", "supplier_id", "bucket"),
+    )
+
+    supplier_id = db.Column(db.Integer, primary_key=True)
+    api_id = db.Column(db.Integer, primary_key=True)
+    # api_subscription.start_date truncated to the hour
+    bucket = db.Column(db.DateTime, primary_key=True)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+    subscriptions = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return "<ApiRevenueLedger '{} {} {}'>".format(
+            self.supplier_id, self.api_id, self.bucket
+        )
@@ -4,6 +4,18 @@ from app.main import db
 class ApiSubscription(db.Model):  # type: ignore
 
     __tablename__ = "api_subscription"
+    __table_args__ = (
+        db.Index(
+            "ix_api_subscription_api_id_start_date_id", "api_id", "start_date", "id"
+        ),
+        db.Index(
+            "ix_api_subscription_api_id_status_end_date", "api_id", "status", "end_date"
+        ),
+        db.Index(
+            "ix_api_subscription_user_id_start_date_id", "user_id", "start_date", "id"
+        ),
+        db.Index("ix_api_subscription_start_date_id", "start_date", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api.id"))
@@ -3,6 +3,7 @@ from app.main import db
 
 class ApiTicket(db.Model):  # type: ignore
     __tablename__ = "api_ticket"
+    __table_args__ = (db.Index("ix_api_ticket_api_id", "api_id"),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api.id"))
@@ -4,6 +4,9 @@ from app.main import db
 class ApiVersionEndpoint(db.Model):  # type: ignore
 
     __tablename__ = "api_version_endpoint"
+    __table_args__ = (
+        db.Index("ix_api_version_endpoint_api_id_version", "api_id", "version"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api_version.api_id"))
@@ -3,6 +3,8 @@ from app.main import db
 
 class ApiVersion(db.Model):  # type: ignore
     __tablename__ = "api_version"
+    # the primary key starts with version, listing the versions of an api needs this
+    __table_args__ = (db.Index("ix_api_version_api_id_status", "api_id", "status"),)
 
     version = db.Column(db.String, primary_key=True)
     api_id = db.Column(db.Integer, db.ForeignKey("api.id"), primary_key=True)
@@ -11,8 +13,27 @@ class ApiVersion(db.Model):  # type: ignore
         db.DateTime(), server_default=db.func.now(), server_onupdate=db.func.now()
     )
     base_url = db.Column(db.String(255), nullable=False)
+    # [{"url": ..., "weight": ...}] backends sharing the calls instead of base_url
+    upstream_targets = db.Column(db.JSON, nullable=True)
     # status can be pending, active, suspended, or deleted
     status = db.Column(db.String(255), nullable=False)
+    # seconds GET responses may be served from the gateway cache, 0 disables it
+    response_cache_ttl = db.Column(db.Integer, nullable=False, server_default="0")
+    # percentile of the version's latency after which an idle GET or DELETE is
+    # sent a second time, null disables hedging
+    hedge_percentile = db.Column(db.Float, nullable=True)
+    # retries of a GET or DELETE whose upstream connection failed
+    max_retries = db.Column(db.Integer, nullable=False, server_default="0")
+    # retries and hedges allowed per upstream call, on top of a small reserve
+    retry_budget_ratio = db.Column(db.Float, nullable=False, server_default="0.1")
+
+    # percent of the calls served by canary_version of the same api instead
+    canary_version = db.Column(db.String, nullable=True)
+    canary_percent = db.Column(db.Float, nullable=False, server_default="0")
+    # percent of the calls copied to mirror_version in the background, its
+    # answers are only compared with the served ones
+    mirror_version = db.Column(db.String, nullable=True)
+    mirror_percent = db.Column(db.Float, nullable=False, server_default="0")
 
     def __repr__(self):
         return "<ApiVersion '{}'>".format(self.version)
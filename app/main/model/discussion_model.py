@@ -3,6 +3,7 @@ from app.main import db
 
 class Discussion(db.Model):  # type: ignore
     __tablename__ = "discussion"
+    __table_args__ = (db.Index("ix_discussion_api_id", "api_id"),)
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String, nullable=False)
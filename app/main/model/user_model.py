@@ -12,6 +12,10 @@ from app.main.utils.roles import Role
 class User(db.Model):  # type: ignore
 
     __tablename__ = "user"
+    __table_args__ = (
+        db.Index("ix_user_role", "role"),
+        db.Index("ix_user_created_at_id", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     firstname = db.Column(db.String(60))
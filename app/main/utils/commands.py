@@ -0,0 +1,126 @@
+import click
+from flask import Flask
+
+
+def register_commands(app: Flask):
+    @app.cli.group()
+    def rollups():
+        """Traffic rollups of the api_request log."""
+
+    @rollups.command()
+    @click.option(
+        "--since",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        default=None,
+        help="Rebuild from this day on instead of the whole history.",
+    )
+    def backfill(since):
+        """Rebuild the minute, hour and day rollups from api_request."""
+        from app.main.core import request_rollup
+
+        folded = request_rollup.backfill(since)
+        click.echo(f"Folded {folded} api_request rows into the rollups")
+
+    @app.cli.group()
+    def revenue():
+        """Revenue ledger of the paid subscriptions."""
+
+    @revenue.command()
+    @click.option(
+        "--since",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        default=None,
+        help="Rebuild from this day on instead of the whole history.",
+    )
+    def rebuild(since):
+        """Rebuild the revenue ledger from api_subscription."""
+        from app.main.core import revenue_ledger
+
+        booked = revenue_ledger.rebuild(since)
+        click.echo(f"Booked {booked} subscriptions into the revenue ledger")
+
+    @revenue.command()
+    @click.option(
+        "--since",
+        type=click.DateTime(formats=["%Y-%m-%d"]),
+        default=None,
+        help="Only compare the hours from this day on.",
+    )
+    def check(since):
+        """Compare the revenue ledger with api_subscription, hour by hour."""
+        from app.main.core import revenue_ledger
+
+        mismatches = revenue_ledger.check(since)
+        for mismatch in mismatches:
+            click.echo(
+                "supplier {supplier_id} api {api_id} at {bucket}: ledger has "
+                "{ledger_revenue} for {ledger_subscriptions} subscriptions, "
+                "api_subscription has {subscription_revenue} for "
+                "{subscriptions}".format(**mismatch)
+            )
+
+        if mismatches:
+            raise click.ClickException(
+                f"{len(mismatches)} ledger hours differ from api_subscription"
+            )
+        click.echo("The revenue ledger matches api_subscription")
+
+    @app.cli.group()
+    def indexes():
+        """Index coverage of the service queries."""
+
+    @indexes.command()
+    @click.option(
+        "--database-uri",
+        default="sqlite://",
+        help="Scratch database whose tables are created, seeded and dropped.",
+    )
+    @click.option(
+        "--rows",
+        default=1000,
+        help="Subscriptions and logged calls to seed.",
+    )
+    @click.option("--verbose", is_flag=True, help="Print the plan of every statement.")
+    def advise(database_uri, rows, verbose):
+        """EXPLAIN the service queries on a seeded database, flag full scans."""
+        from app.main import db
+        from app.main.core.lib.impl.query_advisor_impl import ExplainQueryAdvisor
+        from app.main.utils.query_workload import seed_database, service_queries
+
+        scratch = Flask(__name__)
+        scratch.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+        db.init_app(scratch)
+
+        with scratch.app_context():
+            db.create_all()
+            try:
+                findings = ExplainQueryAdvisor().advise(
+                    service_queries(seed_database(rows))
+                )
+            finally:
+                db.session.rollback()
+                db.drop_all()
+
+        flagged = [finding for finding in findings if finding["full_scans"]]
+        for finding in findings:
+            if not (finding["full_scans"] or verbose):
+                continue
+            click.echo(
+                "{}: {}".format(
+                    finding["name"],
+                    (
+                        "full scan of " + ", ".join(finding["full_scans"])
+                        if finding["full_scans"]
+                        else "indexed"
+                    ),
+                )
+            )
+            click.echo("  " + " ".join(finding["statement"].split()))
+            for line in finding["plan"]:
+                click.echo("    " + line)
+
+        if flagged:
+            raise click.ClickException(
+                f"{len(flagged)} of {len(findings)} statements scan a whole table"
+            )
+        click.echo(f"None of the {len(findings)} statements scans a whole table")
@@ -1,22 +1,61 @@
 from flask_restx import Api
 from http import HTTPStatus
-from .exceptions import NotFoundError, BadRequestError
+from .exceptions import (
+    NotFoundError,
+    BadRequestError,
+    ServiceUnavailableError,
+    TooManyRequestsError,
+)
+
+
+def error_response(error: Exception):
+    """The body, status and headers an error is answered with."""
+    if isinstance(error, NotFoundError):
+        return {"message": error.message}, HTTPStatus.NOT_FOUND, {}
+
+    if isinstance(error, BadRequestError):
+        return {"message": error.message}, HTTPStatus.BAD_REQUEST, {}
+
+    if isinstance(error, ServiceUnavailableError):
+        return (
+            {"message": error.message},
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            {"Retry-After": str(error.retry_after)},
+        )
+
+    if isinstance(error, TooManyRequestsError):
+        return (
+            {"message": error.message},
+            HTTPStatus.TOO_MANY_REQUESTS,
+            error.headers,
+        )
+
+    print(error)
+
+    return (
+        {"message": "Internal server error"},
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        {},
+    )
 
 
 def register_error_handlers(api: Api):
     @api.errorhandler(NotFoundError)
     def handle_not_found_exception(error: NotFoundError):
-        return {"message": error.message}, HTTPStatus.NOT_FOUND
+        return error_response(error)
 
     @api.errorhandler(BadRequestError)
     def handle_bad_request_exception(error: BadRequestError):
-        return {"message": error.message}, HTTPStatus.BAD_REQUEST
+        return error_response(error)
+
+    @api.errorhandler(ServiceUnavailableError)
+    def handle_service_unavailable_exception(error: ServiceUnavailableError):
+        return error_response(error)
+
+    @api.errorhandler(TooManyRequestsError)
+    def handle_too_many_requests_exception(error: TooManyRequestsError):
+        return error_response(error)
 
     @api.errorhandler(Exception)
     def handle_generic_exception(error):
-        print(error)
-
-        return (
-            {"message": "Internal server error"},
-            HTTPStatus.INTERNAL_SERVER_ERROR,
-        )
+        return error_response(error)
@@ -1,3 +1,6 @@
+from typing import Dict
+
+
 class NotFoundError(Exception):
     def __init__(self, message: str) -> None:
         self._message = message
@@ -16,3 +19,25 @@ class BadRequestError(Exception):
     @property
     def message(self) -> str:
         return self._message if self._message else "Bad request"
+
+
+class ServiceUnavailableError(Exception):
+    def __init__(self, message: str, retry_after: int) -> None:
+        self._message = message
+        self.retry_after = retry_after
+        super().__init__(message, retry_after)
+
+    @property
+    def message(self) -> str:
+        return self._message if self._message else "Service unavailable"
+
+
+class TooManyRequestsError(Exception):
+    def __init__(self, message: str, headers: Dict[str, str]) -> None:
+        self._message = message
+        self.headers = headers
+        super().__init__(message, headers)
+
+    @property
+    def message(self) -> str:
+        return self._message if self._message else "Too many requests"
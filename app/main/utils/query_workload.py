@@ -0,0 +1,329 @@
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.main import db
+from app.main.core.lib.analytics_engine import AnalyticsQuery
+from app.main.model.api_category_model import ApiCategory
+from app.main.model.api_header_model import ApiVersionHeader
+from app.main.model.api_key_model import ApiKey
+from app.main.model.api_model import ApiModel
+from app.main.model.api_plan_model import ApiPlan
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.model.api_ticket_model import ApiTicket
+from app.main.model.api_version_endpoint_model import ApiVersionEndpoint
+from app.main.model.api_version_model import ApiVersion
+from app.main.model.discussion_answer_model import DiscussionAnswer
+from app.main.model.discussion_model import Discussion
+from app.main.model.user_model import User
+from app.main.utils.roles import Role
+
+VERSIONS = ("v1", "v2")
+STATUSES = (200, 201, 404, 500)
+
+
+def seed_database(rows: int = 1000) -> Dict[str, Any]:
+    """
+    Adds a supplier with two APIs of two versions each, a subscriber, and
+    `rows` subscriptions and `rows` logged calls spread over the last 60
+    days. Returns the ids the workload reads.
+    """
+    now = datetime.now().replace(microsecond=0)
+    supplier = User("Seed", "Supplier", "supplier@advisor.seed", "seed", Role.SUPPLIER)
+    subscriber = User("Seed", "User", "user@advisor.seed", "seed", Role.USER)
+    db.session.add_all([supplier, subscriber])
+    db.session.flush()
+
+    category = ApiCategory(name="Seed", description="Seed", created_by=supplier.id)
+    db.session.add(category)
+    db.session.flush()
+
+    apis = [
+        ApiModel(
+            name=f"Seed {index}",
+            description="Seed",
+            category_id=category.id,
+            supplier_id=supplier.id,
+        )
+        for index in range(2)
+    ]
+    db.session.add_all(apis)
+    db.session.flush()
+
+    for api in apis:
+        db.session.add(ApiPlan(api_id=api.id, name="basic", description="Seed"))
+        for version in VERSIONS:
+            db.session.add(
+                ApiVersion(
+                    api_id=api.id,
+                    version=version,
+                    base_url="http://localhost",
+                    status="active",
+                )
+            )
+            db.session.add(
+                ApiVersionHeader(
+                    api_id=api.id, api_version=version, key="X-Seed", value="seed"
+                )
+            )
+            db.session.add(
+                ApiVersionEndpoint(
+                    api_id=api.id,
+                    version=version,
+                    endpoint="/seed",
+                    method="GET",
+                    description="Seed",
+                    request_body="{}",
+                    response_body="{}",
+                )
+            )
+        discussion = Discussion(
+            title="Seed", question="Seed", user_id=subscriber.id, api_id=api.id
+        )
+        db.session.add(discussion)
+        db.session.flush()
+        db.session.add(
+            DiscussionAnswer(
+                discussion_id=discussion.id, user_id=supplier.id, answer="Seed"
+            )
+        )
+        db.session.add(
+            ApiTicket(
+                api_id=api.id,
+                user_id=subscriber.id,
+                subject="Seed",
+                description="Seed",
+                created_at=now,
+                updated_at=now,
+            )
+        )
+
+    subscriptions = []
+    for index in range(rows):
+        start_date = now - timedelta(minutes=index * 60 * 24 * 60 // rows)
+        subscriptions.append(
+            ApiSubscription(
+                api_id=apis[index % 2].id,
+                user_id=subscriber.id,
+                plan_name="basic",
+                start_date=start_date,
+                end_date=start_date + timedelta(days=30),
+                max_requests=100,
+                status="active",
+                price=10.0,
+            )
+        )
+    db.session.add_all(subscriptions)
+    db.session.flush()
+
+    db.session.add_all(
+        ApiKey(key=f"seed-{subscription.id}", subscription_id=subscription.id)
+        for subscription in subscriptions
+    )
+
+    for index in range(rows):
+        request_at = now - timedelta(minutes=index * 60 * 24 * 60 // rows)
+        subscription = subscriptions[index]
+        db.session.add(
+            ApiRequest(
+                api_id=subscription.api_id,
+                api_version=VERSIONS[index % 2],
+                user_id=subscriber.id,
+                api_key=f"seed-{subscription.id}",
+                subscription_id=subscription.id,
+                request_url="/seed",
+                request_method="GET",
+                request_body="",
+                response_body="{}",
+                request_at=request_at,
+                response_at=request_at + timedelta(milliseconds=20),
+                response_time=20_000,
+                http_status=STATUSES[index % len(STATUSES)],
+            )
+        )
+
+    db.session.commit()
+
+    return {
+        "supplier_id": supplier.id,
+        "user_id": subscriber.id,
+        "api_id": apis[0].id,
+        "subscription_id": subscriptions[0].id,
+        "api_key": f"seed-{subscriptions[0].id}",
+        "discussion_id": discussion.id,
+        "since": now - timedelta(days=7),
+        "now": now,
+    }
+
+
+def second_page(list_page: Callable[[Dict], Tuple[Any, Dict]]):
+    """Follows the cursor of a one row first page of a list endpoint."""
+    _, pagination = list_page({"cursor": "", "per_page": 1})
+    return list_page({"cursor": pagination["next_cursor"], "per_page": 1})
+
+
+def service_queries(seeded: Dict[str, Any]) -> List[Tuple[str, Callable[[], Any]]]:
+    """The read paths of the services and the gateway, named after their caller."""
+    from app.main.core import ServicesInitializer, analytics_engine, revenue_ledger
+    from app.main.core import request_rollup
+    from app.main.core.lib.impl.gateway_resolver_impl import JoinedQueryGatewayResolver
+    from app.main.core.lib.impl.key_principal_cache_impl import (
+        InMemoryKeyPrincipalCache,
+    )
+    from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+
+    api_service = ServicesInitializer.an_api_service()
+    version_service = ServicesInitializer.an_api_version_service()
+    subscription_service = ServicesInitializer.an_api_subscription_service()
+    key_service = ServicesInitializer.an_api_key_service()
+    discussion_service = ServicesInitializer.a_discussion_service()
+    tickets_service = ServicesInitializer.an_api_tickets_service()
+    request_service = ServicesInitializer.an_api_request_service()
+    user_service = ServicesInitializer.a_user_service()
+
+    api_id, supplier_id = seeded["api_id"], seeded["supplier_id"]
+    since, now = seeded["since"], seeded["now"]
+    month = {"year": now.year, "month": now.month}
+
+    return [
+        (
+            "gateway resolve",
+            lambda: JoinedQueryGatewayResolver().resolve(
+                seeded["api_key"], api_id, "v1"
+            ),
+        ),
+        ("route table", lambda: InMemoryRouteTable().get_route(api_id, "v1")),
+        (
+            "key principal cache",
+            lambda: InMemoryKeyPrincipalCache().get_principal(seeded["api_key"]),
+        ),
+        ("get_api_by_id", lambda: api_service.get_api_by_id(api_id)),
+        ("get_apis", lambda: api_service.get_apis({"supplierId": supplier_id})),
+        ("get_apis_count", lambda: api_service.get_apis_count(supplier_id)),
+        ("get_users_count", lambda: api_service.get_users_count(supplier_id)),
+        (
+            "get_active_subscriptions_count",
+            lambda: api_service.get_active_subscriptions_count(supplier_id),
+        ),
+        (
+            "get_api_monthly_subscribers",
+            lambda: api_service.get_api_monthly_subscribers(month, api_id),
+        ),
+        ("get_endpoints_count", lambda: api_service.get_endpoints_count(api_id)),
+        ("get_api_service_level", lambda: api_service.get_api_service_level(api_id)),
+        ("get_api_popularity", lambda: api_service.get_api_popularity(api_id)),
+        (
+            "get_api_monthly_revenue",
+            lambda: api_service.get_api_monthly_revenue(month, api_id),
+        ),
+        (
+            "get_api_average_successfully_response_time",
+            lambda: api_service.get_api_average_successfully_response_time(api_id),
+        ),
+        ("get_api_versions", lambda: version_service.get_api_versions(api_id, {})),
+        ("get_api_version", lambda: version_service.get_api_version(api_id, "v1")),
+        (
+            "get_full_api_version",
+            lambda: version_service.get_full_api_version(
+                api_id, "v1", supplier_id, Role.SUPPLIER
+            ),
+        ),
+        (
+            "get_api_requests",
+            lambda: request_service.get_api_requests(
+                {"start_date": since, "end_date": now}, supplier_id, api_id
+            ),
+        ),
+        (
+            "get_api_requests by status",
+            lambda: request_service.get_api_requests(
+                {"http_status": 500}, supplier_id, api_id
+            ),
+        ),
+        (
+            "get_api_requests by version",
+            lambda: request_service.get_api_requests(
+                {"version": "v2", "start_date": since}, supplier_id, api_id
+            ),
+        ),
+        (
+            "get_subscriptions of an api",
+            lambda: subscription_service.get_subscriptions(
+                {"api_id": api_id, "plan_name": "basic"}, Role.ADMIN
+            ),
+        ),
+        (
+            "get_subscriptions of a user",
+            lambda: subscription_service.get_subscriptions(
+                {"user_id": seeded["user_id"]}, Role.USER
+            ),
+        ),
+        (
+            "get_subscriptions of a supplier",
+            lambda: subscription_service.get_subscriptions(
+                {"supplier_id": supplier_id, "start_date": since}, Role.SUPPLIER
+            ),
+        ),
+        (
+            "get_subscriptions_per_day",
+            lambda: subscription_service.get_subscriptions_per_day(
+                api_id, Role.SUPPLIER, supplier_id
+            ),
+        ),
+        (
+            "get_api_keys",
+            lambda: key_service.get_api_keys(
+                seeded["subscription_id"], seeded["user_id"]
+            ),
+        ),
+        ("get_all_by_api_id", lambda: discussion_service.get_all_by_api_id(api_id)),
+        ("get_by_id", lambda: discussion_service.get_by_id(seeded["discussion_id"])),
+        ("get_tickets", lambda: tickets_service.get_tickets(api_id)),
+        (
+            "get_api_requests by cursor",
+            lambda: second_page(
+                lambda params: request_service.get_api_requests(
+                    params, supplier_id, api_id
+                )
+            ),
+        ),
+        (
+            "get_apis by cursor",
+            lambda: second_page(
+                lambda params: api_service.get_apis(
+                    {**params, "supplierId": supplier_id}
+                )
+            ),
+        ),
+        (
+            "get_subscriptions by cursor",
+            lambda: second_page(
+                lambda params: subscription_service.get_subscriptions(
+                    {**params, "user_id": seeded["user_id"]}, Role.USER
+                )
+            ),
+        ),
+        ("get_users by cursor", lambda: second_page(user_service.get_users)),
+        (
+            "raw request analytics",
+            lambda: analytics_engine.run(
+                AnalyticsQuery(
+                    "requests",
+                    timedelta(seconds=10),
+                    since,
+                    now,
+                    api_id=api_id,
+                    version="v1",
+                    fill=False,
+                )
+            ),
+        ),
+        (
+            "raw revenue analytics",
+            lambda: analytics_engine.run(
+                AnalyticsQuery("revenue", timedelta(minutes=10), since, now, fill=False)
+            ),
+        ),
+        ("revenue ledger check", lambda: revenue_ledger.check(since)),
+        ("request rollup backfill", lambda: request_rollup.backfill(since)),
+    ]
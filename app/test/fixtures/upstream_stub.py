@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    # room for the connection bursts of the load tests
+    request_queue_size = 1024
+
+
+class UpstreamStub:
+    """
+    Local keep-alive HTTP server standing in for a supplier's base_url.
+    Every request is recorded as (method, path, client port, headers).
+    """
+
+    def __init__(self, body=None, status=200, content_type="application/json"):
+        self.body = json.dumps(body or {"data": "stub"}).encode("utf-8")
+        self.status = status
+        self.content_type = content_type
+        self.response_headers = {}
+        self.delay = 0.0
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = _Server(("127.0.0.1", 0), self.__handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                with stub._lock:
+                    stub.requests.append(
+                        (self.command, self.path, self.client_address[1], self.headers)
+                    )
+                if stub.delay:
+                    time.sleep(stub.delay)
+                self.send_response(stub.status)
+                self.send_header("Content-Type", stub.content_type)
+                self.send_header("Content-Length", str(len(stub.body)))
+                for key, value in stub.response_headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if self.command == "HEAD":
+                    return
+                try:
+                    self.wfile.write(stub.body)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        for method in ("GET", "HEAD", "OPTIONS", "POST", "PUT", "PATCH", "DELETE"):
+            setattr(Handler, f"do_{method}", Handler.handle_request)
+
+        return Handler
@@ -0,0 +1,168 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.main.core.lib.admission_scheduler import plan_tier
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+def start_waiter(scheduler, tier, admitted, errors):
+    def waiter():
+        try:
+            scheduler.admit(tier)
+            admitted.append(tier)
+        except ServiceUnavailableError as error:
+            errors.append((tier, error))
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    return thread
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 2
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_plan_tier_falls_back_to_the_price():
+    assert plan_tier("premium", 0) == "premium"
+    assert plan_tier(None, 0) == "free"
+    assert plan_tier(None, None) == "free"
+    assert plan_tier(None, 500) == "standard"
+
+
+def test_calls_within_capacity_are_admitted_at_once():
+    scheduler = WeightedFairScheduler(capacity=2)
+
+    scheduler.admit("free")
+    scheduler.admit("premium")
+
+    stats = scheduler.stats()
+    assert (stats["in_flight"], stats["queued"]) == (2, 0)
+    assert stats["tiers"]["free"]["admitted"] == 1
+
+
+def test_freed_slots_go_to_higher_tiers_first():
+    scheduler = WeightedFairScheduler(capacity=1, queue_timeout=5)
+    admitted, errors = [], []
+    scheduler.admit("standard")
+    threads = [start_waiter(scheduler, "free", admitted, errors) for _ in range(3)]
+    wait_until(lambda: scheduler.stats()["queued"] == 3)
+    threads += [start_waiter(scheduler, "premium", admitted, errors) for _ in range(3)]
+    wait_until(lambda: scheduler.stats()["queued"] == 6)
+
+    holder = "standard"
+    for count in range(1, 7):
+        scheduler.release(holder)
+        wait_until(lambda count=count: len(admitted) == count)
+        holder = admitted[-1]
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert admitted == ["premium"] * 3 + ["free"] * 3
+
+
+def test_busy_tiers_share_slots_by_weight():
+    scheduler = WeightedFairScheduler(
+        capacity=1, queue_timeout=5, weights={"free": 1, "standard": 2, "premium": 4}
+    )
+    admitted, errors = [], []
+    scheduler.admit("free")
+    threads = []
+    for tier in ("free", "standard", "premium"):
+        threads += [start_waiter(scheduler, tier, admitted, errors) for _ in range(4)]
+        wait_until(lambda queued=len(threads): scheduler.stats()["queued"] == queued)
+
+    holder = "free"
+    for count in range(1, 8):
+        scheduler.release(holder)
+        wait_until(lambda count=count: len(admitted) == count)
+        holder = admitted[-1]
+
+    assert admitted.count("premium") == 4
+    assert admitted.count("standard") == 2
+    assert admitted.count("free") == 1
+    for _ in range(5):
+        scheduler.release(holder)
+    for thread in threads:
+        thread.join()
+
+
+def test_overload_sheds_the_lower_tier_waiter():
+    scheduler = WeightedFairScheduler(capacity=1, max_queued=1, queue_timeout=5)
+    admitted, errors = [], []
+    scheduler.admit("standard")
+    free = start_waiter(scheduler, "free", admitted, errors)
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    premium = start_waiter(scheduler, "premium", admitted, errors)
+    free.join()
+    scheduler.release("standard")
+    premium.join()
+
+    assert admitted == ["premium"]
+    assert [tier for tier, _ in errors] == ["free"]
+    assert scheduler.stats()["tiers"]["free"]["shed"] == 1
+
+
+def test_overload_rejects_the_caller_when_nobody_ranks_below():
+    scheduler = WeightedFairScheduler(capacity=1, max_queued=1, queue_timeout=5)
+    admitted, errors = [], []
+    scheduler.admit("standard")
+    premium = start_waiter(scheduler, "premium", admitted, errors)
+    wait_until(lambda: scheduler.stats()["queued"] == 1)
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        scheduler.admit("free")
+    scheduler.release("standard")
+    premium.join()
+
+    assert error.value.retry_after == 1
+    assert admitted == ["premium"]
+    assert scheduler.stats()["tiers"]["free"]["shed"] == 1
+
+
+def test_waiter_gives_up_after_the_queue_timeout():
+    scheduler = WeightedFairScheduler(capacity=1, queue_timeout=0.05)
+    scheduler.admit("premium")
+
+    with pytest.raises(ServiceUnavailableError):
+        scheduler.admit("premium")
+
+    stats = scheduler.stats()
+    assert (stats["queued"], stats["tiers"]["premium"]["timed_out"]) == (0, 1)
+
+
+def test_coroutines_queue_on_the_loop_with_threads_and_free_their_place_when_cancelled():
+    scheduler = WeightedFairScheduler(capacity=1, max_queued=1000, queue_timeout=5)
+    scheduler.admit("standard")
+    threads = threading.active_count()
+
+    async def main():
+        waiters = [asyncio.ensure_future(scheduler.admit_async("free")) for _ in range(500)]
+        await asyncio.sleep(0.01)
+        queued = scheduler.stats()["queued"]
+        waiters[0].cancel()
+        await asyncio.sleep(0.01)
+        after_cancel = scheduler.stats()["queued"]
+        # a release from another thread wakes the next coroutine in line
+        threading.Thread(target=scheduler.release, args=("standard",)).start()
+        await waiters[1]
+        for waiter in waiters[2:]:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        return queued, after_cancel
+
+    queued, after_cancel = asyncio.run(main())
+
+    assert (queued, after_cancel) == (500, 499)
+    assert threading.active_count() <= threads + 1
+    stats = scheduler.stats()
+    assert (stats["in_flight"], stats["queued"]) == (1, 0)
+    assert stats["tiers"]["free"]["in_flight"] == 1
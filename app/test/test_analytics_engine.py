@@ -0,0 +1,118 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.main.core.lib.analytics_engine import MONTH, AnalyticsQuery
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.core.lib.impl.request_log_impl import DatabaseRequestLog
+from app.main.core.services.analytics_service import AnalyticsService
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.api_request_rollup_model import ApiRequestDayRollup, ApiRequestHourRollup, ApiRequestMinuteRollup
+from app.main.utils.exceptions import BadRequestError
+from app.main.utils.roles import Role
+from app.test.test_request_rollup import a_logged_call
+
+START = datetime(2024, 7, 1, 12, 0)
+
+
+@pytest.fixture
+def logged_calls(test_db):
+    request_log = DatabaseRequestLog()
+    for seconds, status, micros in ((5, 200, 1_000), (15, 500, 3_000), (25, 404, 2_000), (75, 200, 6_000)):
+        request_log.write(a_logged_call(951, START + timedelta(seconds=seconds), status, micros))
+
+    yield RollupAnalyticsEngine(request_log.rollup)
+
+    for model in (ApiRequest, ApiRequestMinuteRollup, ApiRequestHourRollup, ApiRequestDayRollup):
+        model.query.filter_by(api_id=951).delete()
+    test_db.session.commit()
+
+
+@pytest.mark.parametrize(
+    "bucket, start, status_class, plan",
+    [
+        (timedelta(days=1), START.replace(hour=0), None, "day"),
+        (MONTH, START.replace(hour=0), None, "day"),
+        (timedelta(hours=2), START, None, "hour"),
+        (timedelta(minutes=15), START, "5xx", "minute"),
+        (timedelta(minutes=15), START, "4xx", "raw"),
+        (timedelta(seconds=10), START, None, "raw"),
+        (timedelta(minutes=15), START + timedelta(seconds=30), None, "raw"),
+    ],
+)
+def test_the_coarsest_rollup_answering_the_query_is_planned(bucket, start, status_class, plan):
+    query = AnalyticsQuery("requests", bucket, start, start + timedelta(days=2), status_class=status_class)
+
+    assert RollupAnalyticsEngine().plan(query) == plan
+
+
+def test_revenue_is_planned_on_the_hourly_ledger_only():
+    engine = RollupAnalyticsEngine()
+
+    assert engine.plan(AnalyticsQuery("revenue", timedelta(days=1), START, START + timedelta(days=1))) == "hour"
+    assert engine.plan(AnalyticsQuery("revenue", timedelta(minutes=30), START, START + timedelta(days=1))) == "raw"
+
+
+def test_raw_and_rolled_up_answers_agree_and_empty_buckets_are_filled(logged_calls):
+    engine = logged_calls
+    end = START + timedelta(minutes=3)
+
+    by_seconds = engine.run(AnalyticsQuery("requests", timedelta(seconds=30), START, end, api_id=951))
+    by_minute = engine.run(AnalyticsQuery("requests", timedelta(minutes=1), START, end, api_id=951))
+    errors = engine.run(AnalyticsQuery("requests", timedelta(minutes=1), START, end, api_id=951, status_class="5xx"))
+    latency = engine.run(AnalyticsQuery("latency", timedelta(minutes=1), START, end, api_id=951))
+
+    assert [point["value"] for point in by_seconds] == [3, 0, 1, 0, 0, 0]
+    assert by_minute == [
+        {"bucket": START, "value": 3},
+        {"bucket": START + timedelta(minutes=1), "value": 1},
+        {"bucket": START + timedelta(minutes=2), "value": 0},
+    ]
+    assert [point["value"] for point in errors] == [1, 0, 0]
+    assert [point["value"] for point in latency] == [2_000, 6_000, None]
+
+
+def test_analytics_service_validates_the_query(logged_calls):
+    service = AnalyticsService(logged_calls, max_buckets=100)
+    query_params = {"metric": "errors", "from": "2024-07-01T12:00:00", "to": "2024-07-01T12:02:00", "bucket": "1m"}
+
+    assert service.get_analytics({**query_params, "api_id": "951"}, 1, Role.ADMIN) == {
+        "metric": "errors",
+        "granularity": "minute",
+        "points": [{"bucket": "2024-07-01T12:00:00", "value": 1}, {"bucket": "2024-07-01T12:01:00", "value": 0}],
+    }
+    assert service.get_analytics({**query_params, "api_id": "951"}, 1, Role.SUPPLIER)["points"][0]["value"] == 0
+
+    for invalid, message in (
+        ({"metric": "clicks"}, "metric must be one of"),
+        ({"to": "yesterday"}, "to must be an ISO 8601 date and time"),
+        ({"bucket": "2w"}, "bucket must be a width"),
+        ({"bucket": "1s"}, "The range holds more than 100 buckets"),
+        ({"metric": "revenue", "version": "1.0.0"}, "Revenue metrics can not be filtered"),
+    ):
+        with pytest.raises(BadRequestError, match=message):
+            service.get_analytics({**query_params, **invalid}, 1, Role.ADMIN)
+
+
+def test_analytics_service_reads_offsets_as_local_time(logged_calls):
+    service = AnalyticsService(logged_calls)
+    query_params = {"metric": "requests", "bucket": "1m", "api_id": "951"}
+    start, end = START, START + timedelta(minutes=2)
+
+    naive = service.get_analytics({**query_params, "from": start.isoformat(), "to": end.isoformat()}, 1, Role.ADMIN)
+    local = service.get_analytics(
+        {**query_params, "from": start.astimezone().isoformat(), "to": end.astimezone().isoformat()}, 1, Role.ADMIN
+    )
+    utc = service.get_analytics(
+        {
+            **query_params,
+            "from": start.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "to": end.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        },
+        1,
+        Role.ADMIN,
+    )
+
+    assert [point["value"] for point in naive["points"]] == [3, 1]
+    assert local == naive
+    assert utc == naive
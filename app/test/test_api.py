@@ -13,6 +13,8 @@ from faker import Faker
 from app.main.utils.roles import Role
 from app.main.core.services.api_service import ApiService
 from app.main.core.lib.impl.media_manager_impl import MediaManagerImpl
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.bulkhead import api_compartment
 from app.main.utils.exceptions import BadRequestError
 
 
@@ -517,6 +519,28 @@ def test_update_api_valid(api_service, mock_data):
     assert api1.category_id == data["category_id"]
 
 
+def test_update_api_concurrency_limits_show_in_bulkheads(mock_data):
+    supplier1, api1 = mock_data[0], mock_data[5]
+    bulkhead = SemaphoreBulkhead(max_concurrent=20, max_queued=10)
+    api_service = ApiService(media_manager=Mock(), chargily_api=Mock(), bulkhead=bulkhead)
+
+    api_service.update_api(api1.id, supplier1.id, {"max_concurrent_calls": 4, "max_queued_calls": 2})
+    bulkhead.acquire(api_compartment(api1.id), 4, 2)
+
+    assert api_service.get_api_bulkheads(api1.id, supplier1.id)[0] == {
+        "scope": "api",
+        "plan_name": None,
+        "in_flight": 1,
+        "queued": 0,
+        "max_concurrent": 4,
+        "max_queued": 2,
+        "rejected": 0,
+        "timed_out": 0,
+    }
+    with pytest.raises(BadRequestError, match="Max concurrent calls must be positive"):
+        api_service.update_api(api1.id, supplier1.id, {"max_concurrent_calls": 0})
+
+
 def test_update_api_not_found(api_service, mock_data):
     supplier1 = mock_data[0]
     data = {"name": "Updated API"}
@@ -1,7 +1,33 @@
+import asyncio
+import json
+import random
+from collections import Counter
+import threading
+import time
 import pytest
 from unittest.mock import Mock
 from datetime import datetime, timedelta
+from app.main.core import ServicesInitializer
 from app.main.core.services.api_call_service import ApiCallService
+from app.main.core.services.async_api_call_service import AsyncApiCallService
+from app.main.controller.async_gateway_controller import AsyncGatewayApp
+from app.main.core.lib.impl.async_rest_client_impl import AiohttpRestClient
+from app.main.core.lib.impl.request_log_impl import BatchedRequestLog
+from app.main.core.services.api_key_service import ApiKeyService
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.rest_client import StreamedResponse
+from app.main.core.lib.impl.circuit_breaker_impl import RollingWindowCircuitBreaker
+from app.main.core.lib.impl.quota_meter_impl import ConditionalUpdateQuotaMeter
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.core.lib.impl.retry_budget_impl import InMemoryRetryBudget
+from app.main.core.lib.impl.load_balancer_impl import PowerOfTwoChoicesBalancer
+from app.main.core.lib.bulkhead import api_compartment, plan_compartment
+from app.main.model.api_header_model import ApiVersionHeader
+from sqlalchemy import event
+from app.test.fixtures.upstream_stub import UpstreamStub
 from app.main.model.api_model import ApiModel
 
 # from app.main.model.api_version_model import ApiVersion
@@ -13,10 +39,11 @@ from app.main.model.api_key_model import ApiKey
 from app.main.utils.roles import Role
 from app.main.model.api_version_model import ApiVersion
 from app.main.model.api_request_model import ApiRequest
-from app.main.utils.exceptions import BadRequestError
+from app.main.utils.exceptions import BadRequestError, ServiceUnavailableError, TooManyRequestsError
 
 # , NotFoundError
 from faker import Faker
+from requests.exceptions import ConnectTimeout
 
 
 fake = Faker()
@@ -117,12 +144,13 @@ def test_call_get_valid(api_call_service, mock_data):
         mock_data[6],
     )
 
-    response, status = api_call_service.call_get(
+    response, status, headers = api_call_service.call_get(
         api.id, api_version.version, "test_params", api_key.key
     )
 
     assert status == 200
     assert response == {"data": "mock_response"}
+    assert headers == {"X-Quota-Remaining": "999"}
     new_request = ApiRequest.query.filter_by(api_id=api.id).first()
     assert new_request is not None
 
@@ -227,3 +255,909 @@ def test_call_get_no_requests_left(test_db, api_call_service, mock_data):
         api_call_service.call_get(
             api.id, api_version.version, "test_params", api_key.key
         )
+
+
+def test_call_get_deactivated_api_key_is_evicted(mock_data):
+    supplier, api, api_version, api_key = (
+        mock_data[0],
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    key_cache = InMemoryKeyPrincipalCache(ttl=60)
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    api_call_service = ApiCallService(rest_client=mock_rest_client, key_cache=key_cache)
+
+    api_call_service.call_get(api.id, api_version.version, "test_params", api_key.key)
+    ApiKeyService(key_cache=key_cache).deactivate_api_key(supplier.id, api_key.key)
+
+    with pytest.raises(BadRequestError, match="API key is not active"):
+        api_call_service.call_get(
+            api.id, api_version.version, "test_params", api_key.key
+        )
+
+
+def test_call_stream_relays_raw_upstream_body(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(content_type="text/csv").start()
+    upstream.body = b"id,name\n" * 2000
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    api_call_service = ApiCallService(
+        rest_client=RestClientImpl(chunk_size=1024), log_body_limit=16
+    )
+
+    try:
+        chunks, status, headers = api_call_service.call_stream(
+            "GET", api.id, api_version.version, "export", api_key.key
+        )
+        body = b"".join(chunks)
+    finally:
+        upstream.stop()
+
+    assert status == 200
+    assert body == upstream.body
+    assert headers["Content-Type"] == "text/csv"
+    assert headers["Content-Length"] == str(len(upstream.body))
+    assert headers["X-Quota-Remaining"] == "999"
+    logged = ApiRequest.query.filter_by(request_url=f"{upstream.url}/export").first()
+    assert logged.response_body == "id,name\nid,name\n"
+
+
+def test_streamed_answer_closed_unread_gives_slots_back_and_is_logged(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream_close = Mock()
+    mock_rest_client = Mock()
+    mock_rest_client.stream.return_value = StreamedResponse(204, {}, iter([]), upstream_close)
+    scheduler = WeightedFairScheduler(capacity=1)
+    bulkhead = SemaphoreBulkhead()
+    api_call_service = ApiCallService(
+        rest_client=mock_rest_client, admission_scheduler=scheduler, bulkhead=bulkhead
+    )
+
+    # werkzeug never iterates the body of a HEAD or 204 answer, it only closes it
+    chunks, status, _ = api_call_service.call_stream("HEAD", api.id, api_version.version, "unread", api_key.key)
+    chunks.close()
+    chunks.close()
+
+    assert status == 204
+    upstream_close.assert_called_once()
+    assert scheduler.stats()["in_flight"] == 0
+    assert bulkhead.stats(api_compartment(api.id))["in_flight"] == 0
+    assert ApiRequest.query.filter(ApiRequest.request_url.like("%/unread")).count() == 1
+
+
+def test_streamed_answer_closed_unread_gives_the_concurrency_slot_back(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    mock_rest_client = Mock()
+    mock_rest_client.stream.return_value = StreamedResponse(304, {}, iter([]), Mock())
+    limiter = GradientConcurrencyLimiter(initial_limit=1, min_limit=1)
+    api_call_service = ApiCallService(rest_client=mock_rest_client, concurrency_limiter=limiter)
+
+    for _ in range(3):
+        chunks, status, _ = api_call_service.call_stream("GET", api.id, api_version.version, "unread", api_key.key)
+        chunks.close()
+
+    assert status == 304
+    stats = api_call_service.get_concurrency_limit()
+    assert (stats["in_flight"], stats["rejected"]) == (0, 0)
+
+
+def test_call_get_serves_cached_response_and_still_meters(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.response_cache_ttl = 60
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get_with_headers.return_value = ({"data": "cached"}, 200, {})
+    api_call_service = ApiCallService(rest_client=mock_rest_client)
+
+    first = api_call_service.call_get(api.id, api_version.version, "items", api_key.key)
+    second = api_call_service.call_get(api.id, api_version.version, "items", api_key.key)
+
+    assert mock_rest_client.get_with_headers.call_count == 1
+    assert first == ({"data": "cached"}, 200, {"X-Cache": "MISS", "X-Quota-Remaining": "999"})
+    assert second == ({"data": "cached"}, 200, {"X-Cache": "HIT", "X-Quota-Remaining": "998"})
+    logged = ApiRequest.query.filter_by(request_url="https://example.com/api/v1/items").all()
+    assert len(logged) == 2
+    assert api_call_service.response_cache.stats(api.id, api_version.version)["hits"] == 1
+
+
+def test_hedge_delays_are_fed_by_upstream_attempts_only(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    ttl, api_version.response_cache_ttl = api_version.response_cache_ttl, 60
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get_with_headers.return_value = ({"data": "cached"}, 200, {})
+    api_call_service = ApiCallService(rest_client=mock_rest_client)
+
+    try:
+        for _ in range(5):
+            api_call_service.call_get(api.id, api_version.version, "hedge-fed", api_key.key)
+    finally:
+        api_version.response_cache_ttl = ttl
+        test_db.session.commit()
+
+    assert api_call_service.latency_histograms.percentiles(api.id, api_version.version)["count"] == 5
+    assert api_call_service.upstream_histograms.percentiles(api.id, api_version.version)["count"] == 1
+
+
+def test_call_get_revalidates_stale_response_with_etag(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(body={"data": "tagged"}).start()
+    upstream.response_headers = {"ETag": '"v1"', "Cache-Control": "no-cache"}
+    api_version.base_url = upstream.url
+    api_version.response_cache_ttl = 60
+    test_db.session.commit()
+    api_call_service = ApiCallService(rest_client=RestClientImpl())
+
+    try:
+        api_call_service.call_get(api.id, api_version.version, "tagged", api_key.key)
+        upstream.status = 304
+        upstream.body = b""
+        response, status, headers = api_call_service.call_get(
+            api.id, api_version.version, "tagged", api_key.key
+        )
+    finally:
+        upstream.stop()
+
+    assert upstream.requests[1][3]["If-None-Match"] == '"v1"'
+    assert status == 200
+    assert response == {"data": "tagged"}
+    assert headers["X-Cache"] == "REVALIDATED"
+
+
+def test_concurrent_identical_calls_share_one_upstream_request(app, test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(body={"data": "popular"}).start()
+    upstream.delay = 0.3
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    api_call_service = ApiCallService(rest_client=RestClientImpl())
+    statuses = []
+
+    def consumer():
+        with app.app_context():
+            _, status, _ = api_call_service.call_get(api.id, api_version.version, "popular", api_key.key)
+            statuses.append(status)
+
+    consumers = [threading.Thread(target=consumer) for _ in range(4)]
+    try:
+        for thread in consumers:
+            thread.start()
+        for thread in consumers:
+            thread.join()
+    finally:
+        upstream.stop()
+
+    assert statuses == [200] * 4
+    assert len(upstream.requests) == 1
+    logged = ApiRequest.query.filter_by(request_url=f"{upstream.url}/popular").all()
+    assert len(logged) == 4
+    test_db.session.expire_all()
+    assert ApiSubscription.query.filter_by(id=mock_data[5].id).first().max_requests == 996
+
+
+def test_call_get_fails_fast_once_upstream_breaker_opens(test_db, mock_data):
+    api, api_version, api_key, subscription = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+        mock_data[5],
+    )
+    mock_rest_client = Mock()
+    mock_rest_client.get.side_effect = ConnectionError("upstream down")
+    api_call_service = ApiCallService(
+        rest_client=mock_rest_client,
+        circuit_breaker=RollingWindowCircuitBreaker(min_calls=2, open_seconds=30),
+    )
+    test_db.session.expire_all()
+    max_requests = ApiSubscription.query.filter_by(id=subscription.id).first().max_requests
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            api_call_service.call_get(api.id, api_version.version, "down", api_key.key)
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        api_call_service.call_get(api.id, api_version.version, "down", api_key.key)
+
+    assert error.value.retry_after == 30
+    assert mock_rest_client.get.call_count == 2
+    test_db.session.expire_all()
+    assert ApiSubscription.query.filter_by(id=subscription.id).first().max_requests == max_requests
+
+
+def test_call_get_records_sub_second_latency_in_microseconds(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub().start()
+    upstream.delay = 0.05
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    api_call_service = ApiCallService(rest_client=RestClientImpl())
+
+    try:
+        api_call_service.call_get(api.id, api_version.version, "slow", api_key.key)
+    finally:
+        upstream.stop()
+
+    logged = ApiRequest.query.filter_by(request_url=f"{upstream.url}/slow").first()
+    assert 50_000 <= logged.response_time < 1_000_000
+    latency = api_call_service.latency_histograms.percentiles(api.id, api_version.version)
+    assert latency["count"] == 1
+    assert abs(latency["p50"] - logged.response_time) <= logged.response_time * 0.02
+
+
+def test_call_get_rejects_over_rate_limit_before_upstream(test_db, mock_data):
+    api, plan, api_version, subscription, api_key = (
+        mock_data[2],
+        mock_data[3],
+        mock_data[4],
+        mock_data[5],
+        mock_data[6],
+    )
+    plan.rate_limit_per_second = 2
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    api_call_service = ApiCallService(rest_client=mock_rest_client)
+
+    try:
+        _, _, headers = api_call_service.call_get(api.id, api_version.version, "limited", api_key.key)
+        api_call_service.call_get(api.id, api_version.version, "limited", api_key.key)
+        test_db.session.expire_all()
+        max_requests = ApiSubscription.query.filter_by(id=subscription.id).first().max_requests
+
+        with pytest.raises(TooManyRequestsError) as error:
+            api_call_service.call_get(api.id, api_version.version, "limited", api_key.key)
+    finally:
+        plan.rate_limit_per_second = None
+        test_db.session.commit()
+
+    assert headers["X-RateLimit-Limit"] == "2"
+    assert headers["X-RateLimit-Remaining"] == "1"
+    assert error.value.headers["Retry-After"] == "1"
+    assert error.value.headers["X-RateLimit-Remaining"] == "0"
+    assert mock_rest_client.get.call_count == 2
+    test_db.session.expire_all()
+    assert ApiSubscription.query.filter_by(id=subscription.id).first().max_requests == max_requests
+
+
+def test_proxied_call_costs_one_read_and_one_write(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    header = ApiVersionHeader(api_id=api.id, api_version=api_version.version, key="Authorization", value="secret")
+    test_db.session.add(header)
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    # production request logs are written off the hot path by BatchedRequestLog
+    api_call_service = ApiCallService(
+        rest_client=mock_rest_client,
+        quota_meter=ConditionalUpdateQuotaMeter(),
+        request_log=Mock(),
+    )
+    api_id, version, key = api.id, api_version.version, api_key.key
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split()[0].upper())
+
+    event.listen(test_db.engine, "before_cursor_execute", count)
+    try:
+        response, status, _ = api_call_service.call_get(api_id, version, "counted", key)
+    finally:
+        event.remove(test_db.engine, "before_cursor_execute", count)
+        test_db.session.delete(header)
+        test_db.session.commit()
+
+    assert status == 200
+    assert mock_rest_client.get.call_args[0][1] == {"Authorization": "secret"}
+    assert statements.count("SELECT") <= 1
+    assert len(statements) - statements.count("SELECT") <= 1
+
+
+def test_put_and_head_go_through_the_same_stages(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(body={"data": "replaced"}).start()
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    api_call_service = ApiCallService(rest_client=RestClientImpl(), server_timing=True)
+
+    try:
+        put = api_call_service.call("PUT", api.id, api_version.version, "items/1", api_key.key, {"name": "new"})
+        head = api_call_service.call("HEAD", api.id, api_version.version, "items/1", api_key.key)
+    finally:
+        upstream.stop()
+
+    assert [request[0] for request in upstream.requests] == ["PUT", "HEAD"]
+    assert put[:2] == ({"data": "replaced"}, 200)
+    assert head[:2] == (None, 200)
+    assert head[2]["X-Quota-Remaining"] == "998"
+    stages = [timing.split(";")[0] for timing in head[2]["Server-Timing"].split(", ")]
+    assert stages == [
+        "concurrency_limit", "auth", "rate_limit", "admission", "route", "log", "quota", "cache", "mirror", "bulkhead",
+        "upstream"
+    ]
+    logged = ApiRequest.query.filter_by(request_url=f"{upstream.url}/items/1").all()
+    assert sorted((row.request_method, row.request_body) for row in logged) == [
+        ("HEAD", ""),
+        ("PUT", "{'name': 'new'}"),
+    ]
+
+
+def test_call_is_shed_when_the_plan_tier_bulkhead_is_full(test_db, mock_data):
+    api, plan, api_version, api_key = (
+        mock_data[2],
+        mock_data[3],
+        mock_data[4],
+        mock_data[6],
+    )
+    plan.max_concurrent_calls = 1
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    bulkhead = SemaphoreBulkhead(max_queued=0)
+    api_call_service = ApiCallService(rest_client=mock_rest_client, bulkhead=bulkhead)
+    # another subscriber of the same plan is still waiting on the upstream
+    bulkhead.acquire(plan_compartment(api.id, plan.name), 1)
+
+    try:
+        with pytest.raises(ServiceUnavailableError):
+            api_call_service.call_get(api.id, api_version.version, "busy", api_key.key)
+        bulkhead.release(plan_compartment(api.id, plan.name))
+        _, status, headers = api_call_service.call_get(api.id, api_version.version, "busy", api_key.key)
+    finally:
+        plan.max_concurrent_calls = None
+        test_db.session.commit()
+
+    assert status == 200
+    assert headers["X-Quota-Remaining"] == "999"
+    assert mock_rest_client.get.call_count == 1
+    assert bulkhead.stats(plan_compartment(api.id, plan.name))["rejected"] == 1
+    assert bulkhead.stats(plan_compartment(api.id, plan.name))["in_flight"] == 0
+    assert bulkhead.stats(api_compartment(api.id))["in_flight"] == 0
+
+
+def test_call_is_admitted_under_the_plan_tier(test_db, mock_data):
+    api, plan, api_version, api_key = (
+        mock_data[2],
+        mock_data[3],
+        mock_data[4],
+        mock_data[6],
+    )
+    plan.tier = "premium"
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    scheduler = WeightedFairScheduler(capacity=1)
+    api_call_service = ApiCallService(rest_client=mock_rest_client, admission_scheduler=scheduler)
+
+    try:
+        _, status, _ = api_call_service.call_get(api.id, api_version.version, "ranked", api_key.key)
+    finally:
+        plan.tier = None
+        test_db.session.commit()
+
+    assert status == 200
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["tiers"]["premium"]["admitted"] == 1
+
+
+def test_call_is_rejected_before_auth_once_the_concurrency_limit_is_reached(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    limiter = GradientConcurrencyLimiter(initial_limit=1, min_limit=1)
+    api_call_service = ApiCallService(rest_client=mock_rest_client, concurrency_limiter=limiter)
+    limiter.acquire()
+
+    with pytest.raises(ServiceUnavailableError):
+        api_call_service.call_get(api.id, api_version.version, "limited", "not-even-checked")
+    limiter.release(0.001)
+    _, status, _ = api_call_service.call_get(api.id, api_version.version, "limited", api_key.key)
+
+    assert status == 200
+    assert mock_rest_client.get.call_count == 1
+    stats = api_call_service.get_concurrency_limit()
+    assert (stats["in_flight"], stats["rejected"]) == (0, 1)
+
+
+def test_calls_are_balanced_over_upstream_targets_and_the_target_logged(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    healthy = UpstreamStub(body={"data": "healthy"}).start()
+    failing = UpstreamStub(body={"data": "failing"}, status=500).start()
+    api_version.upstream_targets = [{"url": healthy.url, "weight": 1}, {"url": failing.url, "weight": 1}]
+    test_db.session.commit()
+    balancer = PowerOfTwoChoicesBalancer(eject_after=3, rng=random.Random(7))  # noqa: S311
+    api_call_service = ApiCallService(rest_client=RestClientImpl(), load_balancer=balancer)
+
+    try:
+        statuses = [
+            api_call_service.call_get(api.id, api_version.version, f"balanced/{n}", api_key.key)[1] for n in range(20)
+        ]
+    finally:
+        healthy.stop()
+        failing.stop()
+
+    # the failing target answers until it failed eject_after calls in a row, then is left out
+    failed = [n for n, status in enumerate(statuses) if status == 500]
+    assert len(failed) == len(failing.requests) == 3
+    assert set(statuses[failed[-1] + 1:]) == {200}
+    assert len(healthy.requests) == 17
+    logged = ApiRequest.query.filter(ApiRequest.request_url.like(f"{api_version.base_url}/balanced/%")).all()
+    assert len(logged) == 20
+    assert Counter(row.upstream_target for row in logged) == {healthy.url: 17, failing.url: 3}
+    assert balancer.stats(api.id, api_version.version)[failing.url]["ejected"] is True
+
+
+def test_canary_share_of_a_version_is_served_and_logged_by_the_canary(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    canary = ApiVersion(api_id=api.id, version="3.1.0", base_url="https://canary.example.com/api", status="active")
+    test_db.session.add(canary)
+    api_version.canary_version, api_version.canary_percent = canary.version, 100
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "canary"}, 200)
+    api_call_service = ApiCallService(rest_client=mock_rest_client)
+
+    try:
+        response, status, _ = api_call_service.call_get(api.id, api_version.version, "canary/1", api_key.key)
+        logged = ApiRequest.query.filter(ApiRequest.request_url.like("%/canary/1")).one()
+    finally:
+        api_version.canary_version, api_version.canary_percent = None, 0
+        test_db.session.delete(canary)
+        test_db.session.commit()
+
+    assert (response, status) == ({"data": "canary"}, 200)
+    assert mock_rest_client.get.call_args.args[0] == "https://canary.example.com/api/canary/1"
+    assert logged.api_version == "3.1.0"
+
+
+def test_mirrored_call_is_answered_by_the_primary_and_copied_to_the_shadow(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    primary = UpstreamStub(body={"data": "primary"}).start()
+    shadow = UpstreamStub(body={"data": "shadow"}, status=503).start()
+    shadow_version = ApiVersion(api_id=api.id, version="4.0.0", base_url=shadow.url, status="active")
+    test_db.session.add(shadow_version)
+    api_version.base_url = primary.url
+    api_version.mirror_version, api_version.mirror_percent = shadow_version.version, 100
+    test_db.session.commit()
+    api_call_service = ApiCallService(rest_client=RestClientImpl())
+
+    try:
+        first = api_call_service.call_get(api.id, api_version.version, "mirrored", api_key.key)
+        second = api_call_service.call_post(api.id, api_version.version, "mirrored", api_key.key, {"n": 1})
+        api_call_service.traffic_mirror.flush()
+    finally:
+        primary.stop()
+        shadow.stop()
+        api_version.base_url = "https://example.com/api/v1"
+        api_version.mirror_version, api_version.mirror_percent = None, 0
+        test_db.session.delete(shadow_version)
+        test_db.session.commit()
+
+    assert first == ({"data": "primary"}, 200, {"X-Quota-Remaining": "999"})
+    assert second == ({"data": "primary"}, 200, {"X-Quota-Remaining": "998"})
+    assert [(method, path) for method, path, _, _ in shadow.requests] == [("GET", "/mirrored"), ("POST", "/mirrored")]
+    assert ApiRequest.query.filter_by(api_version="4.0.0").count() == 0
+    stats = api_call_service.traffic_mirror.stats(api.id, api_version.version)
+    assert (stats["shadow_version"], stats["mirrored"], stats["status_mismatches"]) == ("4.0.0", 2, 2)
+    assert (stats["primary"]["errors"], stats["shadow"]["errors"]) == (0, 2)
+
+
+def slow_first_call(seconds, answer):
+    calls = []
+
+    def call(*args):
+        calls.append(args)
+        if len(calls) == 1:
+            time.sleep(seconds)
+        return answer
+
+    return call, calls
+
+
+def test_idempotent_call_is_hedged_after_the_version_latency_percentile(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.hedge_percentile = 90
+    test_db.session.commit()
+    get, calls = slow_first_call(1.0, ({"data": "hedged"}, 200))
+    mock_rest_client = Mock()
+    mock_rest_client.get.side_effect = get
+    api_call_service = ApiCallService(rest_client=mock_rest_client)
+    for _ in range(20):
+        api_call_service.upstream_histograms.record(api.id, api_version.version, 20_000)
+
+    started = time.monotonic()
+    response, status, _ = api_call_service.call_get(api.id, api_version.version, "slow", api_key.key)
+
+    assert (response, status) == ({"data": "hedged"}, 200)
+    assert time.monotonic() - started < 0.5
+    assert len(calls) == 2
+    assert api_call_service.retry_budget.stats(api.id, api_version.version)["withdrawals"] == 1
+
+
+def test_call_runs_unhedged_on_its_own_thread_when_no_hedge_thread_is_free(app, test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.hedge_percentile = 90
+    test_db.session.commit()
+    get, calls = slow_first_call(1.0, ({"data": "answered"}, 200))
+    mock_rest_client = Mock()
+    mock_rest_client.get.side_effect = get
+    api_call_service = ApiCallService(rest_client=mock_rest_client, hedge_threads=1)
+    for _ in range(20):
+        api_call_service.upstream_histograms.record(api.id, api_version.version, 20_000)
+
+    def slow_consumer():
+        with app.app_context():
+            api_call_service.call_get(api.id, api_version.version, "slow", api_key.key)
+
+    consumer = threading.Thread(target=slow_consumer)
+    consumer.start()
+    try:
+        while not calls:
+            time.sleep(0.01)
+        started = time.monotonic()
+        response, status, _ = api_call_service.call_get(api.id, api_version.version, "fast", api_key.key)
+        elapsed = time.monotonic() - started
+    finally:
+        consumer.join()
+
+    # the slow call holds the only hedge thread: it is not hedged and the fast one does not queue behind it
+    assert (response, status) == ({"data": "answered"}, 200)
+    assert elapsed < 0.5
+    assert len(calls) == 2
+
+
+def test_call_is_not_hedged_once_the_retry_budget_is_spent(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.hedge_percentile = 90
+    test_db.session.commit()
+    get, calls = slow_first_call(0.2, ({"data": "waited"}, 200))
+    mock_rest_client = Mock()
+    mock_rest_client.get.side_effect = get
+    api_call_service = ApiCallService(
+        rest_client=mock_rest_client, retry_budget=InMemoryRetryBudget(reserve_per_second=0)
+    )
+    for _ in range(20):
+        api_call_service.upstream_histograms.record(api.id, api_version.version, 20_000)
+
+    response, status, _ = api_call_service.call_get(api.id, api_version.version, "slow", api_key.key)
+
+    assert (response, status) == ({"data": "waited"}, 200)
+    assert len(calls) == 1
+    assert api_call_service.retry_budget.stats(api.id, api_version.version)["rejected"] == 1
+
+
+def test_connect_errors_are_retried_for_idempotent_calls_only(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.max_retries = 2
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.is_connect_error = RestClientImpl().is_connect_error
+    mock_rest_client.delete.side_effect = [ConnectTimeout("connect"), ({"data": "deleted"}, 200)]
+    mock_rest_client.post.side_effect = ConnectTimeout("connect")
+    api_call_service = ApiCallService(rest_client=mock_rest_client, retry_backoff=0.001)
+
+    response, status, _ = api_call_service.call_delete(api.id, api_version.version, "items/1", api_key.key)
+    with pytest.raises(ConnectTimeout):
+        api_call_service.call_post(api.id, api_version.version, "items", api_key.key, {"name": "new"})
+
+    assert (response, status) == ({"data": "deleted"}, 200)
+    assert mock_rest_client.delete.call_count == 2
+    assert mock_rest_client.post.call_count == 1
+
+
+def test_connect_error_retries_stop_at_max_retries(test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.max_retries = 2
+    test_db.session.commit()
+    mock_rest_client = Mock()
+    mock_rest_client.is_connect_error = RestClientImpl().is_connect_error
+    mock_rest_client.get.side_effect = ConnectTimeout("connect")
+    api_call_service = ApiCallService(
+        rest_client=mock_rest_client,
+        retry_budget=InMemoryRetryBudget(reserve_per_second=10),
+        retry_backoff=0.001,
+    )
+
+    with pytest.raises(ConnectTimeout):
+        api_call_service.call_get(api.id, api_version.version, "down", api_key.key)
+
+    assert mock_rest_client.get.call_count == 3
+
+
+async def asgi_request(asgi_app, method, path, headers=(), body=b""):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in headers],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 12345),
+    }
+    await asgi_app(scope, receive, send)
+    start, chunks = messages[0], messages[1:]
+    return start["status"], dict(start["headers"]), b"".join(chunk.get("body", b"") for chunk in chunks)
+
+
+def test_async_call_goes_through_the_same_stages(app, test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(body={"data": "async"}).start()
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    request_log = BatchedRequestLog(flush_interval=0.05)
+    request_log.start(app)
+    service = AsyncApiCallService(
+        app=app, rest_client=AiohttpRestClient(), request_log=request_log, server_timing=True
+    )
+
+    async def calls():
+        try:
+            return await asyncio.gather(
+                service.call("GET", api.id, api_version.version, "items", api_key.key),
+                service.call("POST", api.id, api_version.version, "items", api_key.key, {"name": "new"}),
+                service.call("HEAD", api.id, api_version.version, "items", api_key.key),
+            )
+        finally:
+            await service.close()
+
+    try:
+        get, post, head = asyncio.run(calls())
+        request_log.flush()
+    finally:
+        request_log.close()
+        upstream.stop()
+
+    assert get[:2] == post[:2] == ({"data": "async"}, 200)
+    assert head[:2] == (None, 200)
+    assert sorted(request[0] for request in upstream.requests) == ["GET", "HEAD", "POST"]
+    assert sorted(int(call[2]["X-Quota-Remaining"]) for call in (get, post, head)) == [997, 998, 999]
+    stages = [timing.split(";")[0] for timing in get[2]["Server-Timing"].split(", ")]
+    assert stages == [
+        "concurrency_limit", "auth", "rate_limit", "admission", "route", "log", "quota", "cache", "mirror", "bulkhead",
+        "upstream"
+    ]
+    logged = ApiRequest.query.filter_by(request_url=f"{upstream.url}/items").all()
+    assert sorted(row.request_method for row in logged) == ["GET", "HEAD", "POST"]
+    assert service.bulkhead.stats(api_compartment(api.id))["in_flight"] == 0
+    assert service.concurrency_limiter.stats()["in_flight"] == 0
+
+
+def test_async_gateway_app_answers_calls_and_hands_the_rest_to_flask(app, test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    upstream = UpstreamStub(body={"data": "asgi"}).start()
+    api_version.base_url = upstream.url
+    test_db.session.commit()
+    request_log = BatchedRequestLog()
+    request_log.start(app)
+    service = AsyncApiCallService(app=app, rest_client=AiohttpRestClient(), request_log=request_log)
+    asgi_app = AsyncGatewayApp(app, service, Mock())
+    path = f"/apis/call/{api.id}/{api_version.version}/items/1"
+
+    async def requests():
+        try:
+            return (
+                await asgi_request(asgi_app, "PUT", path, [("X-itouch-key", api_key.key)], b'{"name": "new"}'),
+                await asgi_request(asgi_app, "GET", path, [("X-itouch-key", "unknown")]),
+                await asgi_request(asgi_app, "GET", f"/apis/{api.id}/nothing-here"),
+            )
+        finally:
+            await service.close()
+
+    try:
+        called, refused, handed_over = asyncio.run(requests())
+    finally:
+        request_log.close()
+        upstream.stop()
+
+    assert (called[0], json.loads(called[2])) == (200, {"data": "asgi"})
+    assert called[1][b"x-quota-remaining"] == b"999"
+    assert upstream.requests[0][:2] == ("PUT", "/items/1")
+    assert (refused[0], json.loads(refused[2])) == (400, {"message": "Invalid API key"})
+    assert handed_over[0] == 404
+
+
+class SlowFirstAsyncRestClient:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.calls = 0
+        self.cancelled = 0
+
+    async def get(self, url, headers):
+        self.calls += 1
+        try:
+            if self.calls == 1:
+                await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"data": "hedged"}, 200
+
+    async def delete(self, url, headers):
+        return await self.get(url, headers)
+
+    async def close(self):
+        pass
+
+
+def test_async_call_is_hedged_and_the_slower_attempt_cancelled(app, test_db, mock_data):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.hedge_percentile = 90
+    test_db.session.commit()
+    rest_client = SlowFirstAsyncRestClient(1.0)
+    request_log = BatchedRequestLog()
+    request_log.start(app)
+    service = AsyncApiCallService(app=app, rest_client=rest_client, request_log=request_log)
+    for _ in range(20):
+        service.upstream_histograms.record(api.id, api_version.version, 20_000)
+
+    async def call():
+        try:
+            started = time.monotonic()
+            result = await service.call("GET", api.id, api_version.version, "slow", api_key.key)
+            return result, time.monotonic() - started
+        finally:
+            await service.close()
+
+    try:
+        (response, status, _), elapsed = asyncio.run(call())
+    finally:
+        request_log.close()
+
+    assert (response, status) == ({"data": "hedged"}, 200)
+    assert elapsed < 0.5
+    assert (rest_client.calls, rest_client.cancelled) == (2, 1)
+
+
+def test_async_call_is_not_hedged_against_a_half_open_breaker_and_a_cancelled_probe_is_given_back(
+    app, test_db, mock_data
+):
+    api, api_version, api_key = (
+        mock_data[2],
+        mock_data[4],
+        mock_data[6],
+    )
+    api_version.hedge_percentile = 90
+    test_db.session.commit()
+    rest_client = SlowFirstAsyncRestClient(1.0)
+    request_log = BatchedRequestLog()
+    request_log.start(app)
+    breaker = RollingWindowCircuitBreaker(min_calls=1, open_seconds=1, half_open_probes=1)
+    service = AsyncApiCallService(app=app, rest_client=rest_client, request_log=request_log, circuit_breaker=breaker)
+    for _ in range(20):
+        service.upstream_histograms.record(api.id, api_version.version, 20_000)
+    breaker.record(api.id, api_version.version, True, 0.01)
+    time.sleep(1.05)
+
+    async def calls():
+        try:
+            # a DELETE is hedged like a GET but not shared, so cancelling the call cancels the probe
+            probe = asyncio.ensure_future(service.call("DELETE", api.id, api_version.version, "slow", api_key.key))
+            await asyncio.sleep(0.2)
+            hedged = rest_client.calls
+            probe.cancel()
+            await asyncio.gather(probe, return_exceptions=True)
+            result = await service.call("DELETE", api.id, api_version.version, "slow", api_key.key)
+            return hedged, result
+        finally:
+            await service.close()
+
+    try:
+        hedged, (response, status, _) = asyncio.run(calls())
+    finally:
+        request_log.close()
+
+    assert hedged == 1
+    assert (response, status) == ({"data": "hedged"}, 200)
+    assert (rest_client.calls, rest_client.cancelled) == (2, 1)
+    assert breaker.state(api.id, api_version.version)["status"] == "closed"
+
+
+def test_gateway_calls_share_one_call_service_and_its_hedge_threads():
+    service = ServicesInitializer.an_api_call_service()
+
+    assert ServicesInitializer.an_api_call_service() is service
+    assert service.pipeline is ServicesInitializer.an_api_call_service().pipeline
@@ -441,3 +441,29 @@ def test_get_subscription_user_not_allowed(
         api_subscription_service.get_subscription(
             subscription.id, "another_user_id", role=Role.USER
         )
+
+
+def test_handle_chargily_webhook_books_the_paid_checkout(mock_data, api_subscription_service):
+    supplier, api, plan = (
+        mock_data[0],
+        mock_data[2],
+        mock_data[3],
+    )
+    request = Mock()
+    request.json = {
+        "type": "checkout.paid",
+        "data": {
+            "metadata": {
+                "api_id": api.id,
+                "plan_name": plan.name,
+                "user_id": supplier.id,
+            },
+            "amount": 25,
+        },
+    }
+    revenue_ledger = api_subscription_service.revenue_ledger
+    booked = revenue_ledger.total(supplier.id)
+
+    api_subscription_service.handle_chargily_webhook(request)
+
+    assert revenue_ledger.total(supplier.id) == booked + 25
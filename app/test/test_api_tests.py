@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import Mock
 from app.main.core.services.api_tests_service import ApiTestsService
+from app.main.core.services.api_version_service import ApiVersionService
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
 from app.main.model.api_model import ApiModel
 
 # from app.main.model.api_version_model import ApiVersion
@@ -151,3 +153,59 @@ def test_delete_success(mock_data, api_tests_service):
         api.id, api_version.version, "users/1"
     )
     assert status == 204
+
+
+def test_route_is_cached(mock_data, test_db):
+    api, api_version = (mock_data[2], mock_data[3])
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    service = ApiTestsService(
+        rest_client=mock_rest_client, route_table=InMemoryRouteTable()
+    )
+
+    service.test_get(api.id, api_version.version, "users")
+    api_version.base_url = "https://changed.example.com"
+    test_db.session.commit()
+    service.test_get(api.id, api_version.version, "users")
+
+    mock_rest_client.get.assert_called_with(
+        "https://example.com/api/v1/users",
+        {"Authorization": "Bearer token", "Content-Type": "application/json"},
+    )
+
+
+def test_route_invalidated_on_version_deactivation(mock_data):
+    supplier, api, api_version = (mock_data[0], mock_data[2], mock_data[3])
+    route_table = InMemoryRouteTable()
+    mock_rest_client = Mock()
+    mock_rest_client.get.return_value = ({"data": "mock_response"}, 200)
+    service = ApiTestsService(rest_client=mock_rest_client, route_table=route_table)
+
+    service.test_get(api.id, api_version.version, "users")
+    ApiVersionService(route_table=route_table).deactivate_version(
+        api.id, api_version.version, supplier.id, supplier.role
+    )
+
+    with pytest.raises(BadRequestError, match="API version is not active"):
+        service.test_get(api.id, api_version.version, "users")
+
+
+def test_route_compiled_across_an_invalidation_is_not_stored(mock_data):
+    api, api_version = (mock_data[2], mock_data[3])
+    route_table = InMemoryRouteTable()
+    route = route_table.get_route(api.id, api_version.version)
+
+    for invalidate in (
+        lambda: route_table.invalidate(api.id, api_version.version),
+        lambda: route_table.invalidate(api.id),
+        route_table.clear,
+    ):
+        # read before the invalidation, stored after it
+        generation = route_table.generation(api.id, api_version.version)
+        invalidate()
+        route_table.store(route, generation)
+
+        assert route_table.peek(api.id, api_version.version) is None
+
+    route_table.store(route, route_table.generation(api.id, api_version.version))
+    assert route_table.peek(api.id, api_version.version) is route
@@ -209,6 +209,68 @@ def test_create_api_version_already_exists(test_db, mock_data):
         api_version_service.create_api_version(api.id, supplier.id, data)
 
 
+def test_create_api_version_with_hedging_and_retries(mock_data):
+    supplier, api = (
+        mock_data[0],
+        mock_data[2],
+    )
+    data = {
+        "version": "1.1.0",
+        "base_url": "https://example.com/api/v1",
+        "hedge_percentile": 95,
+        "max_retries": 2,
+    }
+
+    api_version_service.create_api_version(api.id, supplier.id, data)
+
+    version = ApiVersion.query.filter_by(api_id=api.id, version=data["version"]).first()
+    assert (version.hedge_percentile, version.max_retries, version.retry_budget_ratio) == (95, 2, 0.1)
+
+
+def test_create_api_version_invalid_hedge_percentile(mock_data):
+    supplier, api = (
+        mock_data[0],
+        mock_data[2],
+    )
+    data = {"version": "1.2.0", "base_url": "https://example.com/api/v1", "hedge_percentile": 100}
+
+    with pytest.raises(BadRequestError, match=r"hedge_percentile must be between 0 and 100"):
+        api_version_service.create_api_version(api.id, supplier.id, data)
+
+
+def test_create_api_version_with_upstream_targets(mock_data):
+    supplier, api = (
+        mock_data[0],
+        mock_data[2],
+    )
+    targets = [{"url": "https://a.example.com/api/v1", "weight": 3}, {"url": "https://b.example.com/api/v1"}]
+    data = {"version": "1.3.0", "base_url": "https://example.com/api/v1", "upstream_targets": targets}
+
+    api_version_service.create_api_version(api.id, supplier.id, data)
+
+    assert api_version_service.get_upstream_targets(api.id, "1.3.0", supplier.id, Role.SUPPLIER) == [
+        {"url": "https://a.example.com/api/v1", "weight": 3, "outstanding": 0, "requests": 0, "failures": 0,
+         "ejected": False},
+        {"url": "https://b.example.com/api/v1", "weight": 1, "outstanding": 0, "requests": 0, "failures": 0,
+         "ejected": False},
+    ]
+
+
+def test_create_api_version_invalid_upstream_target(mock_data):
+    supplier, api = (
+        mock_data[0],
+        mock_data[2],
+    )
+    data = {
+        "version": "1.4.0",
+        "base_url": "https://example.com/api/v1",
+        "upstream_targets": [{"url": "https://a.example.com/api/v1", "weight": 0}],
+    }
+
+    with pytest.raises(BadRequestError, match=r"upstream targets need a url and a weight of 1 or more"):
+        api_version_service.create_api_version(api.id, supplier.id, data)
+
+
 def test_get_api_version(test_db, mock_data):
     api, versions, endpoints = (mock_data[2], mock_data[3], mock_data[4])
     api_version = versions[0]
@@ -455,3 +517,57 @@ def test_deactivate_version_not_authorized(test_db, mock_data):
         api_version_service.deactivate_version(
             api.id, api_version.version, another_user.id, another_user.role
         )
+
+
+def test_update_routing_valid(test_db, mock_data):
+    supplier, api, versions = (
+        mock_data[0],
+        mock_data[2],
+        mock_data[3],
+    )
+    api_version = versions[0]
+    data = {"canary_version": "4.0.0", "canary_percent": 5, "mirror_version": "4.0.0", "mirror_percent": 100}
+
+    api_version_service.update_routing(api.id, api_version.version, supplier.id, supplier.role, data)
+
+    test_db.session.refresh(api_version)
+    assert (api_version.canary_version, api_version.canary_percent) == ("4.0.0", 5)
+    assert (api_version.mirror_version, api_version.mirror_percent) == ("4.0.0", 100)
+
+    api_version_service.update_routing(api.id, api_version.version, supplier.id, supplier.role, {"mirror_percent": 50})
+
+    test_db.session.refresh(api_version)
+    assert (api_version.canary_version, api_version.canary_percent) == (None, 0)
+    assert (api_version.mirror_version, api_version.mirror_percent) == (None, 0)
+
+
+def test_update_routing_invalid(mock_data):
+    supplier, api, versions = (
+        mock_data[0],
+        mock_data[2],
+        mock_data[3],
+    )
+    api_version = versions[0]
+
+    with pytest.raises(BadRequestError, match=r"canary_percent must be between 0 and 100"):
+        api_version_service.update_routing(
+            api.id, api_version.version, supplier.id, supplier.role, {"canary_version": "4.0.0", "canary_percent": 101}
+        )
+
+    with pytest.raises(BadRequestError, match=r"mirror_version must be another version of this API"):
+        api_version_service.update_routing(
+            api.id, api_version.version, supplier.id, supplier.role, {"mirror_version": api_version.version}
+        )
+
+
+def test_update_routing_not_authorized(mock_data):
+    api, versions, another_user = (
+        mock_data[2],
+        mock_data[3],
+        mock_data[6],
+    )
+
+    with pytest.raises(BadRequestError, match=r"You are not authorized to update this version"):
+        api_version_service.update_routing(
+            api.id, versions[0].version, another_user.id, another_user.role, {"canary_percent": 0}
+        )
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.main.core.lib.bulkhead import api_compartment, plan_compartment
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+def test_calls_up_to_the_limit_run_at_once():
+    bulkhead = SemaphoreBulkhead(max_concurrent=2, max_queued=0)
+
+    bulkhead.acquire(api_compartment(1))
+    bulkhead.acquire(api_compartment(1))
+
+    assert bulkhead.stats(api_compartment(1))["in_flight"] == 2
+
+
+def test_excess_call_is_shed_when_the_queue_is_full():
+    bulkhead = SemaphoreBulkhead(max_concurrent=1, max_queued=0)
+    bulkhead.acquire(api_compartment(1))
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        bulkhead.acquire(api_compartment(1))
+
+    assert error.value.retry_after == 1
+    assert bulkhead.stats(api_compartment(1))["rejected"] == 1
+
+
+def test_queued_call_gives_up_after_the_timeout():
+    bulkhead = SemaphoreBulkhead(max_concurrent=1, max_queued=1, queue_timeout=0.05)
+    bulkhead.acquire(api_compartment(1))
+
+    started = time.monotonic()
+    with pytest.raises(ServiceUnavailableError):
+        bulkhead.acquire(api_compartment(1))
+
+    assert time.monotonic() - started >= 0.05
+    stats = bulkhead.stats(api_compartment(1))
+    assert (stats["in_flight"], stats["queued"], stats["timed_out"]) == (1, 0, 1)
+
+
+def test_queued_call_takes_the_released_slot():
+    bulkhead = SemaphoreBulkhead(max_concurrent=1, max_queued=1, queue_timeout=2)
+    bulkhead.acquire(api_compartment(1))
+    acquired = threading.Event()
+
+    def waiter():
+        bulkhead.acquire(api_compartment(1))
+        acquired.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    while bulkhead.stats(api_compartment(1))["queued"] == 0:
+        time.sleep(0.01)
+    bulkhead.release(api_compartment(1))
+    thread.join()
+
+    assert acquired.is_set()
+    assert bulkhead.stats(api_compartment(1))["in_flight"] == 1
+
+
+def test_coroutine_waiters_take_released_slots_in_arrival_order_or_time_out():
+    bulkhead = SemaphoreBulkhead(max_concurrent=1, max_queued=2, queue_timeout=0.2)
+    bulkhead.acquire(api_compartment(1))
+    acquired = []
+
+    async def waiter(name):
+        await bulkhead.acquire_async(api_compartment(1))
+        acquired.append(name)
+
+    async def main():
+        first = asyncio.ensure_future(waiter("first"))
+        second = asyncio.ensure_future(waiter("second"))
+        await asyncio.sleep(0.01)
+        bulkhead.release(api_compartment(1))
+        await first
+        return await asyncio.gather(second, return_exceptions=True)
+
+    (timed_out,) = asyncio.run(main())
+
+    assert acquired == ["first"]
+    assert isinstance(timed_out, ServiceUnavailableError)
+    stats = bulkhead.stats(api_compartment(1))
+    assert (stats["in_flight"], stats["queued"], stats["timed_out"]) == (1, 0, 1)
+
+
+def test_compartments_and_per_call_limits_are_independent():
+    bulkhead = SemaphoreBulkhead(max_concurrent=1, max_queued=0)
+    bulkhead.acquire(api_compartment(1))
+
+    bulkhead.acquire(api_compartment(2))
+    bulkhead.acquire(plan_compartment(1, "Pro"), 2)
+    bulkhead.acquire(plan_compartment(1, "Pro"), 2)
+
+    stats = bulkhead.stats(plan_compartment(1, "Pro"), 2)
+    assert (stats["in_flight"], stats["max_concurrent"]) == (2, 2)
+    assert bulkhead.stats(api_compartment(3)) == {
+        "in_flight": 0,
+        "queued": 0,
+        "max_concurrent": 1,
+        "max_queued": 0,
+        "rejected": 0,
+        "timed_out": 0,
+    }
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from app.main.core.lib.impl.circuit_breaker_impl import RollingWindowCircuitBreaker
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+def test_breaker_opens_on_error_rate_and_fails_fast():
+    breaker = RollingWindowCircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=30)
+
+    for failed in (False, True, False, True):
+        breaker.allow(1, "1.0")
+        breaker.record(1, "1.0", failed, 0.01)
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        breaker.allow(1, "1.0")
+
+    assert error.value.retry_after == 30
+    state = breaker.state(1, "1.0")
+    assert state["status"] == "open"
+    assert [(t["from"], t["to"]) for t in state["transitions"]] == [("closed", "open")]
+    breaker.allow(1, "2.0")
+
+
+def test_breaker_stays_closed_below_min_calls():
+    breaker = RollingWindowCircuitBreaker(min_calls=10)
+
+    for _ in range(5):
+        breaker.record(1, "1.0", True, 0.01)
+
+    breaker.allow(1, "1.0")
+    assert breaker.state(1, "1.0")["status"] == "closed"
+
+
+def test_slow_calls_open_the_breaker():
+    breaker = RollingWindowCircuitBreaker(min_calls=2, slow_call_seconds=1)
+
+    breaker.record(1, "1.0", False, 2.5)
+    breaker.record(1, "1.0", False, 3.0)
+
+    assert breaker.state(1, "1.0")["status"] == "open"
+
+
+def test_half_open_probes_close_the_breaker():
+    breaker = RollingWindowCircuitBreaker(min_calls=1, open_seconds=1, half_open_probes=2)
+    breaker.record(1, "1.0", True, 0.01)
+    time.sleep(1.05)
+
+    breaker.allow(1, "1.0")
+    breaker.allow(1, "1.0")
+    with pytest.raises(ServiceUnavailableError):
+        breaker.allow(1, "1.0")
+    breaker.record(1, "1.0", False, 0.01)
+    breaker.record(1, "1.0", False, 0.01)
+
+    state = breaker.state(1, "1.0")
+    assert state["status"] == "closed"
+    assert state["calls"] == 0
+    assert [t["to"] for t in state["transitions"]] == ["open", "half_open", "closed"]
+
+
+def test_failed_probe_reopens_the_breaker():
+    breaker = RollingWindowCircuitBreaker(min_calls=1, open_seconds=1)
+    breaker.record(1, "1.0", True, 0.01)
+    time.sleep(1.05)
+
+    breaker.allow(1, "1.0")
+    breaker.record(1, "1.0", True, 0.01)
+
+    assert breaker.state(1, "1.0")["status"] == "open"
+    with pytest.raises(ServiceUnavailableError):
+        breaker.allow(1, "1.0")
+
+
+def test_cancelled_probe_is_given_back():
+    breaker = RollingWindowCircuitBreaker(min_calls=1, open_seconds=1, half_open_probes=1)
+    breaker.record(1, "1.0", True, 0.01)
+    time.sleep(1.05)
+
+    breaker.allow(1, "1.0")
+    assert breaker.closed(1, "1.0") is False
+    breaker.cancel(1, "1.0")
+    breaker.allow(1, "1.0")
+    breaker.record(1, "1.0", False, 0.01)
+
+    assert breaker.closed(1, "1.0") is True
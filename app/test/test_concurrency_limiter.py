@@ -0,0 +1,72 @@
+import pytest
+
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.utils.exceptions import ServiceUnavailableError
+
+
+def run_window(limiter, concurrency, latency):
+    for _ in range(concurrency):
+        limiter.acquire()
+    for _ in range(concurrency):
+        limiter.release(latency)
+
+
+def test_calls_over_the_limit_are_rejected_at_once():
+    limiter = GradientConcurrencyLimiter(initial_limit=2)
+    limiter.acquire()
+    limiter.acquire()
+
+    with pytest.raises(ServiceUnavailableError) as error:
+        limiter.acquire()
+
+    assert error.value.retry_after == 1
+    stats = limiter.stats()
+    assert (stats["limit"], stats["in_flight"], stats["rejected"]) == (2, 2, 1)
+
+
+def test_limit_grows_while_latency_holds_under_load():
+    limiter = GradientConcurrencyLimiter(initial_limit=10, window=10)
+
+    for _ in range(6):
+        run_window(limiter, limiter.stats()["limit"], 0.002)
+
+    stats = limiter.stats()
+    assert stats["limit"] > 10
+    assert all(change["to"] > change["from"] for change in stats["changes"])
+
+
+def test_limit_shrinks_once_queueing_inflates_latency():
+    limiter = GradientConcurrencyLimiter(initial_limit=20, window=5)
+    run_window(limiter, 5, 0.002)
+
+    for _ in range(5):
+        run_window(limiter, 5, 0.05)
+
+    stats = limiter.stats()
+    assert stats["limit"] < 20
+    assert stats["changes"][-1]["to"] < stats["changes"][-1]["from"]
+    assert stats["short_latency"] == pytest.approx(50000)
+
+
+def test_limit_does_not_grow_while_mostly_idle():
+    limiter = GradientConcurrencyLimiter(initial_limit=10, window=2)
+
+    for _ in range(10):
+        run_window(limiter, 2, 0.002)
+
+    assert limiter.stats()["limit"] == 10
+    assert limiter.stats()["changes"] == []
+
+
+def test_limit_stays_within_its_bounds():
+    limiter = GradientConcurrencyLimiter(initial_limit=10, min_limit=9, max_limit=12, window=5)
+    run_window(limiter, 5, 0.001)
+    for _ in range(6):
+        run_window(limiter, 5, 1.0)
+
+    assert limiter.stats()["limit"] == 9
+
+    for _ in range(300):
+        run_window(limiter, limiter.stats()["limit"], 0.001)
+
+    assert limiter.stats()["limit"] == 12
@@ -0,0 +1,76 @@
+import time
+import pytest
+from app.main.core.lib.gateway_pipeline import GatewayContext, GatewayStage
+from app.main.core.lib.impl.gateway_pipeline_impl import MiddlewareGatewayPipeline
+
+
+class RecordingStage(GatewayStage):
+    def __init__(self, name, calls, sleep=0.0, answer=False, error=None):
+        self.name = name
+        self.calls = calls
+        self.sleep = sleep
+        self.answer = answer
+        self.error = error
+
+    def handle(self, context, call_next):
+        self.calls.append(f"{self.name}:in")
+        time.sleep(self.sleep)
+        if self.error is not None:
+            raise self.error
+        if not self.answer:
+            call_next(context)
+        self.calls.append(f"{self.name}:out")
+
+
+def new_context():
+    return GatewayContext(method="GET", api_id=1, version="1.0.0", params="items", api_key="key")
+
+
+def test_stages_wrap_each_other_in_order():
+    calls = []
+    pipeline = MiddlewareGatewayPipeline(
+        [RecordingStage("auth", calls), RecordingStage("quota", calls), RecordingStage("upstream", calls)]
+    )
+
+    pipeline.run(new_context())
+
+    assert calls == ["auth:in", "quota:in", "upstream:in", "upstream:out", "quota:out", "auth:out"]
+    assert pipeline.stage_names() == ["auth", "quota", "upstream"]
+
+
+def test_stage_can_answer_without_running_the_rest():
+    calls = []
+    pipeline = MiddlewareGatewayPipeline(
+        [RecordingStage("cache", calls, answer=True), RecordingStage("upstream", calls)]
+    )
+
+    context = pipeline.run(new_context())
+
+    assert calls == ["cache:in", "cache:out"]
+    assert list(context.timings) == ["cache"]
+
+
+def test_timings_exclude_the_wrapped_stages():
+    pipeline = MiddlewareGatewayPipeline(
+        [RecordingStage("outer", [], sleep=0.01), RecordingStage("inner", [], sleep=0.05)]
+    )
+
+    context = pipeline.run(new_context())
+
+    assert 10_000 <= context.timings["outer"] < 40_000
+    assert context.timings["inner"] >= 50_000
+
+
+def test_errors_propagate_through_the_outer_stages_with_their_timings():
+    calls = []
+    pipeline = MiddlewareGatewayPipeline(
+        [RecordingStage("outer", calls), RecordingStage("inner", calls, sleep=0.05, error=ValueError("boom"))]
+    )
+    context = new_context()
+
+    with pytest.raises(ValueError):
+        pipeline.run(context)
+
+    assert calls == ["outer:in", "inner:in"]
+    assert context.timings["inner"] >= 50_000
+    assert context.timings["outer"] < 40_000
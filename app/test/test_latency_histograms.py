@@ -0,0 +1,58 @@
+import time
+
+from app.main.core.lib.impl.latency_histograms_impl import (
+    InMemoryLatencyHistograms,
+    WindowedLatencyHistograms,
+    bucket_index,
+    bucket_value,
+)
+
+
+def test_bucket_value_stays_within_relative_error():
+    for micros in (0, 1, 63, 64, 1000, 45_000, 1_234_567, 3_600_000_000):
+        assert abs(bucket_value(bucket_index(micros)) - micros) <= max(micros * 0.016, 1)
+
+
+def test_percentiles_match_exact_values():
+    histograms = InMemoryLatencyHistograms()
+    latencies = [1_000 + (i * 7919) % 499_000 for i in range(10_000)]
+    for micros in latencies:
+        histograms.record(1, "1.0", micros)
+
+    percentiles = histograms.percentiles(1, "1.0")
+
+    latencies.sort()
+    assert percentiles["count"] == 10_000
+    assert percentiles["max"] == latencies[-1]
+    for quantile in (50, 90, 99):
+        exact = latencies[int(len(latencies) * quantile / 100) - 1]
+        assert abs(percentiles[f"p{quantile}"] - exact) <= exact * 0.02
+
+
+def test_histograms_are_kept_per_version():
+    histograms = InMemoryLatencyHistograms()
+    histograms.record(1, "1.0", 100)
+    histograms.record(1, "2.0", 900_000)
+
+    assert histograms.percentiles(1, "1.0")["p99"] == 100
+    assert histograms.percentiles(1, "3.0") == {"count": 0, "mean": 0, "max": 0}
+
+    histograms.reset(1)
+
+    assert histograms.percentiles(1, "2.0")["count"] == 0
+
+
+def test_windowed_histograms_forget_latencies_two_windows_old():
+    histograms = WindowedLatencyHistograms(window=0.05)
+    histograms.record(1, "1.0", 900_000)
+    time.sleep(0.06)
+    histograms.record(1, "1.0", 100)
+
+    # the previous window still counts
+    assert histograms.percentiles(1, "1.0")["max"] == 900_000
+
+    time.sleep(0.06)
+    histograms.record(1, "1.0", 200)
+
+    assert histograms.percentiles(1, "1.0")["count"] == 2
+    assert histograms.percentiles(1, "1.0")["max"] == 200
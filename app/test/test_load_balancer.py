@@ -0,0 +1,72 @@
+from collections import Counter
+from types import MappingProxyType
+
+from app.main.core.lib.impl.load_balancer_impl import PowerOfTwoChoicesBalancer
+from app.main.core.lib.route_table import Route, UpstreamTarget
+
+
+def route_with(*targets):
+    return Route(
+        api_id=1,
+        version="1.0",
+        base_url="http://base",
+        api_status="active",
+        version_status="active",
+        headers=MappingProxyType({}),
+        targets=tuple(targets),
+    )
+
+
+def test_route_without_targets_is_served_by_its_base_url():
+    balancer = PowerOfTwoChoicesBalancer()
+    route = route_with()
+
+    assert balancer.choose(route) == "http://base"
+    balancer.release(route, "http://base", True)
+    assert balancer.stats(1, "1.0") == {}
+
+
+def test_calls_go_to_the_target_with_fewer_outstanding_requests():
+    balancer = PowerOfTwoChoicesBalancer()
+    route = route_with(UpstreamTarget("http://a"), UpstreamTarget("http://b"))
+
+    held = [balancer.choose(route) for _ in range(10)]
+
+    assert Counter(held) == {"http://a": 5, "http://b": 5}
+    for target in held:
+        balancer.release(route, target, False)
+    assert all(stats["outstanding"] == 0 for stats in balancer.stats(1, "1.0").values())
+
+
+def test_calls_are_shared_in_proportion_to_weights():
+    balancer = PowerOfTwoChoicesBalancer()
+    route = route_with(UpstreamTarget("http://a", 3), UpstreamTarget("http://b", 1))
+
+    held = [balancer.choose(route) for _ in range(40)]
+
+    assert abs(Counter(held)["http://a"] - 30) <= 1
+
+
+def test_failing_target_is_ejected_until_it_may_come_back():
+    balancer = PowerOfTwoChoicesBalancer(eject_after=3, eject_seconds=30)
+    route = route_with(UpstreamTarget("http://a"), UpstreamTarget("http://b"))
+
+    for _ in range(3):
+        balancer.choose(route)
+        balancer.release(route, "http://a", True)
+
+    assert {balancer.choose(route) for _ in range(20)} == {"http://b"}
+    stats = balancer.stats(1, "1.0")
+    assert (stats["http://a"]["ejected"], stats["http://a"]["failures"]) == (True, 3)
+
+
+def test_no_more_than_max_ejected_targets_are_left_out():
+    balancer = PowerOfTwoChoicesBalancer(eject_after=1, max_ejected=0.5)
+    route = route_with(UpstreamTarget("http://a"), UpstreamTarget("http://b"))
+
+    for target in ("http://a", "http://b"):
+        balancer.choose(route)
+        balancer.release(route, target, True)
+
+    stats = balancer.stats(1, "1.0")
+    assert [stats[target]["ejected"] for target in ("http://a", "http://b")] == [True, False]
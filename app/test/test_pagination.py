@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+from unittest.mock import Mock
+
+import pytest
+
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator, encode_cursor
+from app.main.core.services.api_request_service import ApiRequestService
+from app.main.core.services.api_service import ApiService
+from app.main.core.services.user_service import UserService
+from app.main.model.api_category_model import ApiCategory
+from app.main.model.api_model import ApiModel
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.user_model import User
+from app.main.utils.exceptions import BadRequestError
+from app.main.utils.roles import Role
+
+SUPPLIER_ID = 1
+
+
+@pytest.fixture
+def logged_calls(test_db):
+    api = ApiModel(name="Paged API", description="Paged API", category_id=1, supplier_id=SUPPLIER_ID)
+    test_db.session.add(api)
+    test_db.session.commit()
+    started_at = datetime(2024, 5, 1, 12)
+    # pairs of calls share a timestamp so the id has to break the ties
+    calls = [
+        ApiRequest(api_id=api.id, api_version="v1", user_id=1, request_url="/paged", request_method="GET",
+                   request_body="", response_body="{}", request_at=started_at + timedelta(seconds=index // 2),
+                   response_at=started_at + timedelta(seconds=index // 2), response_time=1_000, http_status=200)
+        for index in range(7)
+    ]
+    test_db.session.add_all(calls)
+    test_db.session.commit()
+
+    yield api, calls
+
+    for row in calls + [api]:
+        test_db.session.delete(row)
+    test_db.session.commit()
+
+
+def test_cursor_pages_walk_every_call_once_newest_first(logged_calls):
+    api, calls = logged_calls
+    service = ApiRequestService(paginator=KeysetPaginator())
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        data, pagination = service.get_api_requests({"cursor": cursor, "per_page": 3}, SUPPLIER_ID, api.id)
+        assert pagination["total"] is None and pagination["per_page"] == 3
+        seen.append([row["id"] for row in data])
+        cursor = pagination["next_cursor"]
+
+    newest_first = sorted(calls, key=lambda call: (call.request_at, call.id), reverse=True)
+    assert seen == [[call.id for call in newest_first[start:start + 3]] for start in (0, 3, 6)]
+
+
+@pytest.fixture
+def supplier_apis(test_db):
+    # created_at comes from the server default, so the rows share a second
+    supplier = User("Paged", "Supplier", "supplier@pagination.test", "paged", Role.SUPPLIER)
+    test_db.session.add(supplier)
+    test_db.session.commit()
+    category = ApiCategory(name="Paged", description="Paged", created_by=supplier.id)
+    test_db.session.add(category)
+    test_db.session.commit()
+    apis = [
+        ApiModel(name=f"Paged {index}", description="Paged", category_id=category.id, supplier_id=supplier.id)
+        for index in range(5)
+    ]
+    test_db.session.add_all(apis)
+    test_db.session.commit()
+
+    yield supplier, apis
+
+    for row in apis + [category, supplier]:
+        test_db.session.delete(row)
+    test_db.session.commit()
+
+
+def walk(list_page):
+    seen, cursor = [], ""
+    while cursor is not None:
+        assert len(seen) < 10, "the cursor does not advance: {}".format(seen)
+        data, pagination = list_page({"cursor": cursor, "per_page": 2})
+        seen.append([row["id"] for row in data])
+        cursor = pagination["next_cursor"]
+    return seen
+
+
+def test_cursor_pages_walk_server_stamped_users_and_apis_once(supplier_apis):
+    supplier, apis = supplier_apis
+
+    users = walk(UserService(Mock(), paginator=KeysetPaginator()).get_users)
+    newest_first = sorted(User.query.all(), key=lambda user: (user.created_at, user.id), reverse=True)
+    assert sum(users, []) == [user.id for user in newest_first]
+    assert all(len(ids) == 2 for ids in users[:-1])
+
+    api_service = ApiService(Mock(), Mock(), paginator=KeysetPaginator())
+    pages = walk(lambda query_params: api_service.get_apis({**query_params, "supplierId": supplier.id}))
+    assert pages == [[apis[4].id, apis[3].id], [apis[2].id, apis[1].id], [apis[0].id]]
+
+
+def test_totals_are_exact_estimated_or_skipped_on_request(logged_calls):
+    api, _ = logged_calls
+    service = ApiRequestService(paginator=KeysetPaginator(count_cap=5))
+
+    _, pagination = service.get_api_requests({"page": 2, "per_page": 3}, SUPPLIER_ID, api.id)
+    assert pagination == {"total": 7, "page": 2, "per_page": 3, "pages": 3}
+
+    _, pagination = service.get_api_requests({"cursor": "", "count": "exact"}, SUPPLIER_ID, api.id)
+    assert (pagination["total"], pagination["total_is_estimate"]) == (7, False)
+
+    # SQLite has no row estimate, the count stops at the cap
+    _, pagination = service.get_api_requests({"cursor": "", "count": "estimate"}, SUPPLIER_ID, api.id)
+    assert (pagination["total"], pagination["total_is_estimate"]) == (5, True)
+
+    _, pagination = service.get_api_requests({"page": 1, "count": "none"}, SUPPLIER_ID, api.id)
+    assert pagination == {"total": None, "page": 1, "per_page": 10, "pages": None, "total_is_estimate": False}
+
+
+def test_malformed_cursor_and_count_are_rejected(logged_calls):
+    api, _ = logged_calls
+    service = ApiRequestService(paginator=KeysetPaginator())
+
+    for query_params in (
+        {"cursor": "not a cursor"},
+        {"cursor": encode_cursor(["yesterday", 1])},
+        {"cursor": encode_cursor([datetime(2024, 5, 1).isoformat()])},
+        {"cursor": "", "count": "roughly"},
+        {"cursor": "", "per_page": 0},
+    ):
+        with pytest.raises(BadRequestError):
+            service.get_api_requests(query_params, SUPPLIER_ID, api.id)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from app.main.core.lib.impl.query_advisor_impl import ExplainQueryAdvisor
+from app.main.model.api_request_model import ApiRequest
+from app.main.utils.query_workload import seed_database, service_queries
+
+
+def test_advisor_flags_filtered_statements_scanning_a_whole_table(test_db):
+    findings = ExplainQueryAdvisor().advise(
+        [
+            ("by url", lambda: ApiRequest.query.filter_by(request_url="/missing").all()),
+            ("by api", lambda: ApiRequest.query.filter(
+                ApiRequest.api_id == 1, ApiRequest.request_at >= datetime(2023, 1, 1)).all()),
+            ("same statement", lambda: ApiRequest.query.filter(
+                ApiRequest.api_id == 2, ApiRequest.request_at >= datetime(2024, 1, 1)).all()),
+            ("everything", lambda: ApiRequest.query.all()),
+        ]
+    )
+
+    assert [(finding["name"], finding["full_scans"]) for finding in findings] == [
+        ("by url", ["api_request"]),
+        ("by api", []),
+        ("everything", []),
+    ]
+    assert any("ix_api_request_api_id_request_at" in line for line in findings[1]["plan"])
+
+
+def test_service_queries_of_a_seeded_database_use_an_index(test_db):
+    findings = ExplainQueryAdvisor().advise(service_queries(seed_database(rows=50)))
+
+    assert len({finding["name"] for finding in findings}) > 20
+    assert [
+        (finding["name"], finding["full_scans"]) for finding in findings if finding["full_scans"]
+    ] == []
@@ -0,0 +1,100 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.main.core.lib.impl.quota_meter_impl import (
+    ConditionalUpdateQuotaMeter,
+    StripedQuotaMeter,
+)
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.utils.exceptions import BadRequestError
+
+
+@pytest.fixture
+def subscription(test_db):
+    subscription = ApiSubscription(
+        api_id=1,
+        plan_name="Basic Plan",
+        user_id=1,
+        start_date=datetime.now(),
+        end_date=datetime.now() + timedelta(days=1),
+        max_requests=150,
+        status="active",
+    )
+    test_db.session.add(subscription)
+    test_db.session.commit()
+
+    yield subscription
+
+    test_db.session.delete(subscription)
+    test_db.session.commit()
+
+
+def reserve_concurrently(app, quota_meter, subscription_id, threads, calls):
+    rejected = []
+
+    def worker():
+        with app.app_context():
+            for _ in range(calls):
+                try:
+                    quota_meter.reserve(subscription_id)
+                except BadRequestError:
+                    rejected.append(1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return len(rejected)
+
+
+def remaining_requests(test_db, subscription_id):
+    test_db.session.expire_all()
+    return ApiSubscription.query.filter_by(id=subscription_id).first().max_requests
+
+
+def test_conditional_update_never_oversells(app, test_db, subscription):
+    rejected = reserve_concurrently(
+        app, ConditionalUpdateQuotaMeter(), subscription.id, threads=8, calls=25
+    )
+
+    assert rejected == 50
+    assert remaining_requests(test_db, subscription.id) == 0
+
+
+def test_striped_counter_flushes_exact_count(app, test_db, subscription):
+    quota_meter = StripedQuotaMeter(stripes=4, flush_every=16, flush_interval=60)
+
+    rejected = reserve_concurrently(
+        app, quota_meter, subscription.id, threads=8, calls=15
+    )
+    quota_meter.flush()
+
+    assert rejected == 0
+    assert remaining_requests(test_db, subscription.id) == 30
+
+
+def test_striped_counter_release_returns_quota(test_db, subscription):
+    quota_meter = StripedQuotaMeter(flush_every=100, flush_interval=60)
+
+    assert quota_meter.reserve(subscription.id) == 149
+    quota_meter.release(subscription.id)
+    quota_meter.flush()
+
+    assert remaining_requests(test_db, subscription.id) == 150
+
+
+def test_striped_counter_release_after_flush_returns_quota(test_db, subscription):
+    quota_meter = StripedQuotaMeter(flush_every=100, flush_interval=60)
+
+    assert quota_meter.reserve(subscription.id) == 149
+    quota_meter.flush()
+    assert remaining_requests(test_db, subscription.id) == 149
+    quota_meter.release(subscription.id)
+    quota_meter.flush()
+
+    assert remaining_requests(test_db, subscription.id) == 150
+    assert quota_meter.reserve(subscription.id) == 149
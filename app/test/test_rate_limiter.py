@@ -0,0 +1,67 @@
+import time
+
+from app.main.core.lib.impl.rate_limiter_impl import InMemoryRateLimiter
+from app.main.core.lib.rate_limiter import RateLimit
+
+
+def test_bucket_allows_burst_up_to_limit():
+    rate_limiter = InMemoryRateLimiter()
+    limits = [RateLimit(limit=3, period=1)]
+
+    decisions = [rate_limiter.acquire("key", limits) for _ in range(4)]
+
+    assert [decision.allowed for decision in decisions] == [True, True, True, False]
+    assert [decision.remaining for decision in decisions[:3]] == [2, 1, 0]
+    assert decisions[3].retry_after == 1
+    assert decisions[3].headers() == {
+        "X-RateLimit-Limit": "3",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": "1",
+        "Retry-After": "1",
+    }
+
+
+def test_bucket_refills_over_time():
+    rate_limiter = InMemoryRateLimiter()
+    limits = [RateLimit(limit=10, period=1)]
+
+    for _ in range(10):
+        rate_limiter.acquire("key", limits)
+    assert not rate_limiter.acquire("key", limits).allowed
+
+    time.sleep(0.25)
+
+    assert rate_limiter.acquire("key", limits).allowed
+
+
+def test_rejected_request_takes_no_token_from_other_buckets():
+    rate_limiter = InMemoryRateLimiter()
+    limits = [RateLimit(limit=1, period=1), RateLimit(limit=5, period=60)]
+
+    assert rate_limiter.acquire("key", limits).allowed
+    rejected = rate_limiter.acquire("key", limits)
+
+    assert not rejected.allowed
+    assert rejected.limit == 1
+    time.sleep(1.05)
+    assert rate_limiter.acquire("key", limits).allowed
+    assert rate_limiter.acquire("key", [RateLimit(limit=5, period=60)]).remaining == 2
+
+
+def test_keys_have_separate_buckets():
+    rate_limiter = InMemoryRateLimiter()
+    limits = [RateLimit(limit=1, period=60)]
+
+    assert rate_limiter.acquire("first", limits).allowed
+    assert rate_limiter.acquire("second", limits).allowed
+    assert not rate_limiter.acquire("first", limits).allowed
+
+
+def test_idle_buckets_are_swept():
+    rate_limiter = InMemoryRateLimiter(sweep_every=2)
+    rate_limiter.acquire("idle", [RateLimit(limit=1, period=1)])
+    time.sleep(1.05)
+
+    rate_limiter.acquire("busy", [RateLimit(limit=1, period=1)])
+
+    assert not any(key[0] == "idle" for key in rate_limiter._buckets)
@@ -0,0 +1,107 @@
+import json
+from datetime import datetime
+from unittest.mock import Mock
+
+from app.main.core.lib.impl.request_log_impl import BatchedRequestLog
+from app.main.model.api_request_model import ApiRequest
+
+
+def a_request_record(request_url: str):
+    now = datetime.now()
+    return {
+        "api_id": 1,
+        "api_version": "1.0.0",
+        "user_id": 1,
+        "api_key": "key",
+        "subscription_id": 1,
+        "request_url": request_url,
+        "request_method": "GET",
+        "request_body": "",
+        "response_body": "{}",
+        "request_at": now,
+        "response_at": now,
+        "response_time": 0,
+        "http_status": 200,
+    }
+
+
+def test_batched_log_writes_queued_records_on_close(app, test_db):
+    request_log = BatchedRequestLog(batch_size=4, flush_interval=60)
+
+    for i in range(10):
+        request_log.write(a_request_record(f"https://batched.example.com/{i}"))
+    request_log.start(app)
+    request_log.close()
+
+    logged = ApiRequest.query.filter(
+        ApiRequest.request_url.like("https://batched.example.com/%")
+    ).all()
+    assert len(logged) == 10
+
+    for request in logged:
+        test_db.session.delete(request)
+    test_db.session.commit()
+
+
+def test_batched_log_drops_when_full():
+    request_log = BatchedRequestLog(max_queue=2, full_policy=BatchedRequestLog.DROP)
+
+    for i in range(5):
+        request_log.write(a_request_record(f"https://dropped.example.com/{i}"))
+
+    assert request_log.dropped == 3
+
+
+def test_batched_log_spills_when_full(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    request_log = BatchedRequestLog(
+        max_queue=1, full_policy=BatchedRequestLog.SPILL, spill_path=str(spill_path)
+    )
+
+    for i in range(3):
+        request_log.write(a_request_record(f"https://spilled.example.com/{i}"))
+
+    spilled = [json.loads(line) for line in spill_path.read_text().splitlines()]
+    assert request_log.spilled == 2
+    assert [record["request_url"] for record in spilled] == [
+        "https://spilled.example.com/1",
+        "https://spilled.example.com/2",
+    ]
+
+
+def test_batched_log_written_without_waiting_spills_instead_of_blocking(tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    request_log = BatchedRequestLog(
+        max_queue=1, full_policy=BatchedRequestLog.BLOCK, spill_path=str(spill_path)
+    )
+
+    for i in range(3):
+        request_log.write_nowait(a_request_record(f"https://unblocked.example.com/{i}"))
+
+    assert request_log.spilled == 2
+    assert len(spill_path.read_text().splitlines()) == 2
+
+
+def test_batched_log_writer_survives_a_failed_spill(app, test_db, tmp_path):
+    # the spill directory would have to be created under a file
+    (tmp_path / "taken").write_text("")
+    logger = Mock()
+    request_log = BatchedRequestLog(
+        batch_size=1,
+        spill_path=str(tmp_path / "taken" / "spill.jsonl"),
+        logger=logger,
+    )
+
+    request_log.write({**a_request_record("https://lost.example.com/"), "http_status": None})
+    request_log.write(a_request_record("https://kept.example.com/"))
+    request_log.start(app)
+    request_log.close()
+
+    assert (request_log.lost, request_log.spilled) == (1, 0)
+    assert logger.error.call_args[0][1]["lost"] == 1
+    kept = ApiRequest.query.filter_by(request_url="https://kept.example.com/").all()
+    assert len(kept) == 1
+
+    for request in kept:
+        test_db.session.delete(request)
+    test_db.session.commit()
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from app.main.core.lib.impl.analytics_engine_impl import RollupAnalyticsEngine
+from app.main.core.lib.impl.request_log_impl import DatabaseRequestLog
+from app.main.core.lib.impl.request_rollup_impl import SqlRequestRollup
+from app.main.core.lib.request_rollup import DAY, HOUR, MINUTE
+from app.main.core.services.api_request_service import ApiRequestService
+from app.main.core.services.api_service import ApiService
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.api_request_rollup_model import ApiRequestMinuteRollup
+
+
+def a_logged_call(api_id, request_at, http_status=200, response_time=1_000, response_body="{}"):
+    return {
+        "api_id": api_id,
+        "api_version": "1.0.0",
+        "user_id": 1,
+        "api_key": "key",
+        "subscription_id": 1,
+        "request_url": f"https://rollup.example.com/{api_id}",
+        "request_method": "GET",
+        "request_body": "",
+        "response_body": response_body,
+        "request_at": request_at,
+        "response_at": request_at,
+        "response_time": response_time,
+        "http_status": http_status,
+    }
+
+
+def test_calls_are_folded_into_minute_hour_and_day_buckets(test_db):
+    rollup = SqlRequestRollup()
+    rollup.add(
+        [
+            a_logged_call(901, datetime(2024, 3, 1, 10, 15, 5), 200, 1_000, "ok"),
+            a_logged_call(901, datetime(2024, 3, 1, 10, 15, 50), 503, 3_000, "down"),
+            a_logged_call(901, datetime(2024, 3, 1, 11, 0, 0), 404, 2_000),
+        ]
+    )
+    rollup.add([a_logged_call(901, datetime(2024, 3, 1, 10, 15, 30), 201, 4_000)])
+    test_db.session.commit()
+
+    assert [(row["bucket"], row["count"]) for row in rollup.series(MINUTE, api_id=901)] == [
+        (datetime(2024, 3, 1, 10, 15), 3),
+        (datetime(2024, 3, 1, 11, 0), 1),
+    ]
+    assert [(row["bucket"], row["count"]) for row in rollup.series(HOUR, api_id=901)] == [
+        (datetime(2024, 3, 1, 10), 3),
+        (datetime(2024, 3, 1, 11), 1),
+    ]
+    assert rollup.series(DAY, api_id=901) == [
+        {
+            "bucket": datetime(2024, 3, 1),
+            "count": 4,
+            "success_count": 2,
+            "error_count": 1,
+            "latency_sum": 10_000,
+            "response_bytes": 10,
+        }
+    ]
+    assert rollup.totals(901)["count"] == 4
+    assert rollup.totals(901, "2.0.0")["count"] == 0
+
+
+def test_backfill_rebuilds_the_rollups_from_the_request_log(test_db):
+    rollup = SqlRequestRollup(backfill_chunk=2)
+    request_log = DatabaseRequestLog(rollup)
+    for day in (1, 2, 2, 3, 3, 3):
+        request_log.write(a_logged_call(902, datetime(2024, 4, day, 9, 30)))
+    live = rollup.series(MINUTE, api_id=902)
+
+    ApiRequestMinuteRollup.query.filter_by(api_id=902).delete()
+    test_db.session.commit()
+    folded = rollup.backfill(since=datetime(2024, 4, 2, 12, 0))
+
+    assert folded == 5
+    assert rollup.series(MINUTE, api_id=902) == live[1:]
+    assert [row["count"] for row in rollup.series(DAY, api_id=902)] == [1, 2, 3]
+
+    rollup.backfill()
+
+    assert rollup.series(MINUTE, api_id=902) == live
+
+
+def test_transactions_and_service_level_are_read_from_the_rollups(test_db):
+    rollup = SqlRequestRollup()
+    request_log = DatabaseRequestLog(rollup)
+    for at, status in (
+        (datetime(2024, 5, 31, 23, 59), 200),
+        (datetime(2024, 6, 1, 0, 1), 200),
+        (datetime(2024, 6, 1, 0, 2), 500),
+        (datetime(2024, 6, 1, 1, 0), 200),
+    ):
+        request_log.write(a_logged_call(903, at, status))
+    ApiRequest.query.filter_by(api_id=903).delete()
+    test_db.session.commit()
+
+    api_request_service = ApiRequestService(analytics_engine=RollupAnalyticsEngine(rollup))
+    by_month = api_request_service.get_total_transactions_by_month()["data"]
+    by_day = api_request_service.get_total_transactions_by_day()["data"]
+    by_hour = api_request_service.get_total_transactions_by_hour()["data"]
+    service_level = ApiService(None, None, request_rollup=rollup).get_api_service_level(903)
+
+    assert {"year": 2024, "month": 6, "total_transactions": 3} in by_month
+    assert {"year": 2024, "month": 6, "day": 1, "total_transactions": 3} in by_day
+    assert {"year": 2024, "month": 6, "day": 1, "hour": 0, "total_transactions": 2} in by_hour
+    assert service_level == {"service_level": 75.0}
@@ -0,0 +1,101 @@
+import time
+
+from app.main.core.lib.impl.response_cache_impl import (
+    InMemoryResponseCache,
+    freshness_lifetime,
+)
+
+URL = "https://example.com/api/v1/items"
+HEADERS = {"Authorization": "Bearer secret"}
+
+
+def test_freshness_lifetime_follows_cache_control():
+    assert freshness_lifetime({}, 30) == 30
+    assert freshness_lifetime({"Cache-Control": "max-age=10"}, 30) == 10
+    assert freshness_lifetime({"cache-control": "max-age=10, s-maxage=20"}, 30) == 20
+    assert freshness_lifetime({"Cache-Control": "no-cache"}, 30) == 0
+    assert freshness_lifetime({"Cache-Control": "no-store"}, 30) is None
+    assert freshness_lifetime({"Cache-Control": "private, max-age=60"}, 30) is None
+    assert freshness_lifetime({"Expires": "Thu, 01 Jan 1970 00:00:00 GMT"}, 30) == 0
+
+
+def test_fresh_entry_is_a_hit():
+    cache = InMemoryResponseCache()
+    cache.put(1, "1.0", URL, HEADERS, {"data": "item"}, 200, {}, 60)
+
+    entry = cache.get(1, "1.0", URL, HEADERS)
+
+    assert entry.is_fresh()
+    assert entry.body == {"data": "item"}
+    assert cache.get(1, "1.0", URL, {"Authorization": "Bearer other"}) is None
+    stats = cache.stats(1, "1.0")
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_uncacheable_responses_are_not_stored():
+    cache = InMemoryResponseCache()
+    cache.put(1, "1.0", URL, HEADERS, {"error": "boom"}, 500, {}, 60)
+    cache.put(1, "1.0", URL + "/2", HEADERS, {}, 200, {"Cache-Control": "no-store"}, 60)
+
+    assert cache.get(1, "1.0", URL, HEADERS) is None
+    assert cache.get(1, "1.0", URL + "/2", HEADERS) is None
+    assert cache.stats(1, "1.0")["entries"] == 0
+
+
+def test_stale_entry_with_etag_is_revalidated():
+    cache = InMemoryResponseCache()
+    cache.put(1, "1.0", URL, HEADERS, {"data": "item"}, 200, {"ETag": '"v1"', "Cache-Control": "no-cache"}, 60)
+
+    stale = cache.get(1, "1.0", URL, HEADERS)
+
+    assert stale.etag == '"v1"'
+    assert not stale.is_fresh()
+
+    fresh = cache.revalidate(1, "1.0", URL, HEADERS, {"Cache-Control": "max-age=60"}, 60)
+
+    assert fresh.is_fresh()
+    assert cache.get(1, "1.0", URL, HEADERS).body == {"data": "item"}
+    assert cache.stats(1, "1.0")["revalidations"] == 1
+
+
+def test_stale_entry_without_etag_is_dropped():
+    cache = InMemoryResponseCache()
+    cache.put(1, "1.0", URL, HEADERS, {"data": "item"}, 200, {"Cache-Control": "max-age=1"}, 60)
+    time.sleep(1.05)
+
+    assert cache.get(1, "1.0", URL, HEADERS) is None
+    assert cache.stats(1, "1.0")["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = InMemoryResponseCache(max_entries=2)
+    cache.put(1, "1.0", URL + "/1", HEADERS, {"id": 1}, 200, {}, 60)
+    cache.put(1, "1.0", URL + "/2", HEADERS, {"id": 2}, 200, {}, 60)
+    cache.get(1, "1.0", URL + "/1", HEADERS)
+    cache.put(1, "1.0", URL + "/3", HEADERS, {"id": 3}, 200, {}, 60)
+
+    assert cache.get(1, "1.0", URL + "/2", HEADERS) is None
+    assert cache.get(1, "1.0", URL + "/1", HEADERS) is not None
+    assert cache.stats(1, "1.0")["evictions"] == 1
+
+
+def test_byte_bound_evicts_entries():
+    cache = InMemoryResponseCache(max_bytes=40)
+    cache.put(1, "1.0", URL + "/1", HEADERS, {"data": "x" * 20}, 200, {}, 60)
+    cache.put(1, "1.0", URL + "/2", HEADERS, {"data": "y" * 20}, 200, {}, 60)
+
+    assert cache.get(1, "1.0", URL + "/1", HEADERS) is None
+    assert cache.get(1, "1.0", URL + "/2", HEADERS) is not None
+
+
+def test_invalidate_drops_version_entries():
+    cache = InMemoryResponseCache()
+    cache.put(1, "1.0", URL, HEADERS, {"id": 1}, 200, {}, 60)
+    cache.put(1, "2.0", URL, HEADERS, {"id": 2}, 200, {}, 60)
+
+    cache.invalidate(1, "1.0")
+
+    assert cache.stats(1, "1.0")["entries"] == 0
+    assert cache.stats(1, "2.0")["entries"] == 1
@@ -0,0 +1,74 @@
+import socket
+
+import pytest
+import requests
+
+from app.main.core.lib.impl.async_rest_client_impl import AiohttpRestClient, LoopThreadRestClient
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.test.fixtures.upstream_stub import UpstreamStub
+
+
+@pytest.fixture
+def upstream():
+    stub = UpstreamStub(body={"data": "pooled"}).start()
+    yield stub
+    stub.stop()
+
+
+def test_rest_client_reuses_connections(upstream):
+    rest_client = RestClientImpl(pool_maxsize=1)
+
+    for _ in range(3):
+        response, status = rest_client.get(f"{upstream.url}/users", {})
+        assert status == 200
+        assert response == {"data": "pooled"}
+
+    client_ports = {client_port for _, _, client_port, _ in upstream.requests}
+    assert len(upstream.requests) == 3
+    assert len(client_ports) == 1
+
+
+def test_rest_client_applies_read_timeout(upstream):
+    upstream.delay = 0.5
+    rest_client = RestClientImpl(read_timeout=0.1)
+
+    with pytest.raises(requests.exceptions.Timeout):
+        rest_client.get(f"{upstream.url}/slow", {})
+
+
+def test_rest_clients_tell_connect_errors_from_read_timeouts(upstream):
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        refused_url = "http://127.0.0.1:{}/users".format(closed.getsockname()[1])
+    upstream.delay = 0.5
+
+    for rest_client in (RestClientImpl(read_timeout=0.1), LoopThreadRestClient(AiohttpRestClient(read_timeout=0.1))):
+        errors = []
+        for url in (refused_url, f"{upstream.url}/slow"):
+            try:
+                rest_client.get(url, {})
+            except Exception as error:
+                errors.append(error)
+        if isinstance(rest_client, LoopThreadRestClient):
+            rest_client.close()
+
+        assert [rest_client.is_connect_error(error) for error in errors] == [True, False]
+
+
+def test_async_rest_client_reuses_connections_and_serves_blocking_callers(upstream):
+    async_client = AiohttpRestClient(limit=1)
+    rest_client = LoopThreadRestClient(async_client)
+
+    try:
+        for _ in range(3):
+            assert rest_client.get(f"{upstream.url}/users", {}) == ({"data": "pooled"}, 200)
+        streamed = rest_client.stream("GET", f"{upstream.url}/users", {})
+        body = b"".join(streamed.chunks)
+        streamed.close()
+    finally:
+        rest_client.close()
+
+    assert (streamed.status, body) == (200, b'{"data": "pooled"}')
+    client_ports = {client_port for _, _, client_port, _ in upstream.requests}
+    assert len(upstream.requests) == 4
+    assert len(client_ports) == 1
@@ -0,0 +1,45 @@
+import time
+
+from app.main.core.lib.impl.retry_budget_impl import InMemoryRetryBudget
+
+
+def test_retries_are_a_bounded_share_of_calls():
+    budget = InMemoryRetryBudget(reserve_per_second=0, max_balance=100)
+
+    for _ in range(40):
+        budget.deposit(1, "1.0", 0.25)
+
+    withdrawn = sum(budget.withdraw(1, "1.0") for _ in range(20))
+
+    assert withdrawn == 10
+    stats = budget.stats(1, "1.0")
+    assert (stats["deposits"], stats["withdrawals"], stats["rejected"]) == (40, 10, 10)
+
+
+def test_balance_is_capped_to_bound_the_burst_of_an_outage():
+    budget = InMemoryRetryBudget(reserve_per_second=0, max_balance=3)
+
+    for _ in range(1000):
+        budget.deposit(1, "1.0", 0.5)
+
+    assert sum(budget.withdraw(1, "1.0") for _ in range(10)) == 3
+
+
+def test_quiet_versions_retry_from_the_reserve():
+    budget = InMemoryRetryBudget(reserve_per_second=10, max_balance=10)
+
+    assert sum(budget.withdraw(1, "1.0") for _ in range(20)) == 10
+    assert budget.withdraw(1, "1.0") is False
+    time.sleep(0.15)
+    assert budget.withdraw(1, "1.0") is True
+
+
+def test_budgets_are_kept_per_version_and_reset():
+    budget = InMemoryRetryBudget(reserve_per_second=0)
+    budget.deposit(1, "1.0", 1)
+    budget.deposit(1, "2.0", 1)
+
+    budget.reset(1, "1.0")
+
+    assert budget.withdraw(1, "1.0") is False
+    assert budget.withdraw(1, "2.0") is True
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.main.core.lib.impl.revenue_ledger_impl import SqlRevenueLedger
+from app.main.core.services.api_subscription_service import ApiSubscriptionService
+from app.main.model.api_model import ApiModel
+from app.main.model.api_revenue_ledger_model import ApiRevenueLedger
+from app.main.model.api_subscription_model import ApiSubscription
+
+
+@pytest.fixture
+def paid_subscriptions(test_db):
+    apis = [
+        ApiModel(name=f"Ledger API {supplier_id}", description="Ledger API", category_id=1, supplier_id=supplier_id)
+        for supplier_id in (801, 802)
+    ]
+    test_db.session.add_all(apis)
+    test_db.session.commit()
+    subscriptions = [
+        ApiSubscription(api_id=api.id, plan_name="Basic", user_id=1, start_date=start_date,
+                        end_date=start_date + timedelta(days=30), status="active", price=price)
+        for api, start_date, price in (
+            (apis[0], datetime(2023, 1, 31, 23, 10), 10),
+            (apis[0], datetime(2023, 2, 1, 9, 5), 20),
+            (apis[0], datetime(2023, 2, 1, 9, 55), 5),
+            (apis[1], datetime(2023, 2, 1, 10, 0), 100),
+        )
+    ]
+    test_db.session.add_all(subscriptions)
+    test_db.session.commit()
+    ledger = SqlRevenueLedger(rebuild_chunk=3)
+    ledger.rebuild(since=datetime(2023, 1, 1))
+
+    yield apis, subscriptions, ledger
+
+    for row in subscriptions + apis:
+        test_db.session.delete(row)
+    test_db.session.commit()
+    ledger.rebuild(since=datetime(2023, 1, 1))
+
+
+def test_revenue_reports_add_up_the_hourly_ledger(paid_subscriptions):
+    apis, _, ledger = paid_subscriptions
+    service = ApiSubscriptionService(chargily_api=None, revenue_ledger=ledger)
+
+    assert service.get_total_subscription_revenue_by_month({"year": 2023}) == [
+        {"year": 2023, "month": 1, "total_revenues": 10},
+        {"year": 2023, "month": 2, "total_revenues": 125},
+    ]
+    assert service.get_total_supplier_revenue_by_day(801, {"year": 2023, "month": 1}) == [
+        {"year": 2023, "month": 1, "day": 31, "total_revenues": 10},
+    ]
+    assert service.get_total_subscription_revenue_by_hour({"year": 2023, "month": 2, "day": 1}) == [
+        {"year": 2023, "month": 2, "day": 1, "hour": 9, "total_revenues": 25},
+        {"year": 2023, "month": 2, "day": 1, "hour": 10, "total_revenues": 100},
+    ]
+    assert ledger.total(802) == 100
+
+
+def test_check_reports_the_hours_the_ledger_got_wrong(test_db, paid_subscriptions):
+    apis, subscriptions, ledger = paid_subscriptions
+    assert ledger.check(since=datetime(2023, 1, 1)) == []
+
+    subscriptions[1].price = 30
+    ApiRevenueLedger.query.filter_by(supplier_id=802).delete()
+    test_db.session.commit()
+
+    assert ledger.check(since=datetime(2023, 1, 1)) == [
+        {
+            "supplier_id": 801,
+            "api_id": apis[0].id,
+            "bucket": datetime(2023, 2, 1, 9),
+            "ledger_revenue": 25,
+            "ledger_subscriptions": 2,
+            "subscription_revenue": 35,
+            "subscriptions": 2,
+        },
+        {
+            "supplier_id": 802,
+            "api_id": apis[1].id,
+            "bucket": datetime(2023, 2, 1, 10),
+            "ledger_revenue": 0.0,
+            "ledger_subscriptions": 0,
+            "subscription_revenue": 100,
+            "subscriptions": 1,
+        },
+    ]
+
+    ledger.rebuild(since=datetime(2023, 2, 1))
+
+    assert ledger.check() == []
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from app.main.core.lib.impl.single_flight_impl import InMemorySingleFlight
+
+
+def run_concurrently(single_flight, key, call, threads):
+    results = []
+    errors = []
+
+    def worker():
+        try:
+            results.append(single_flight.do(key, call))
+        except Exception as error:
+            errors.append(error)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    return results, errors
+
+
+def test_concurrent_calls_share_one_flight():
+    single_flight = InMemorySingleFlight()
+    calls = []
+
+    def call():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"data": "shared"}, 200
+
+    results, errors = run_concurrently(single_flight, "key", call, threads=8)
+
+    assert len(calls) == 1
+    assert errors == []
+    assert results == [({"data": "shared"}, 200)] * 8
+    assert single_flight.shared == 7
+
+
+def test_error_is_raised_to_every_waiter():
+    single_flight = InMemorySingleFlight()
+
+    def call():
+        time.sleep(0.2)
+        raise ConnectionError("upstream down")
+
+    results, errors = run_concurrently(single_flight, "key", call, threads=4)
+
+    assert results == []
+    assert len(errors) == 4
+    assert all(isinstance(error, ConnectionError) for error in errors)
+
+
+def test_sequential_calls_are_not_shared():
+    single_flight = InMemorySingleFlight()
+    calls = []
+
+    single_flight.do("key", lambda: calls.append(1))
+    single_flight.do("key", lambda: calls.append(1))
+
+    assert len(calls) == 2
+    assert single_flight.shared == 0
+
+
+def test_different_keys_do_not_wait_on_each_other():
+    single_flight = InMemorySingleFlight()
+
+    with pytest.raises(ValueError):
+        single_flight.do("a", lambda: single_flight.do("b", lambda: int("x")))
+
+    assert single_flight.do("a", lambda: 1) == 1
@@ -0,0 +1,69 @@
+import threading
+from types import MappingProxyType
+
+import pytest
+
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.impl.traffic_mirror_impl import ThreadPoolTrafficMirror
+from app.main.core.lib.route_table import Route
+from app.test.fixtures.upstream_stub import UpstreamStub
+
+
+def route_for(version, base_url, headers=None):
+    return Route(
+        api_id=1,
+        version=version,
+        base_url=base_url,
+        api_status="active",
+        version_status="active",
+        headers=MappingProxyType(headers or {}),
+    )
+
+
+@pytest.fixture
+def shadow():
+    stub = UpstreamStub(body={"data": "shadow"}, status=500).start()
+    yield stub
+    stub.stop()
+
+
+def test_mirrored_calls_are_compared_with_the_served_ones(shadow):
+    mirror = ThreadPoolTrafficMirror(RestClientImpl())
+    primary = route_for("1.0", "http://primary.invalid")
+    shadow_route = route_for("2.0", shadow.url, {"X-Shadow-Secret": "s3cret"})
+
+    for status in (200, 200, 500):
+        mirror.mirror(primary, shadow_route, "POST", "items", {"name": "new"}, status, 10_000)
+    mirror.flush()
+    mirror.close()
+
+    assert [(method, path) for method, path, _, _ in shadow.requests] == [("POST", "/items")] * 3
+    assert shadow.requests[0][3]["X-Shadow-Secret"] == "s3cret"
+    stats = mirror.stats(1, "1.0")
+    assert (stats["shadow_version"], stats["mirrored"], stats["dropped"], stats["status_mismatches"]) == (
+        "2.0", 3, 0, 2
+    )
+    assert (stats["primary"]["count"], stats["primary"]["errors"], stats["primary"]["p50"]) == (3, 1, 10_000)
+    assert (stats["shadow"]["count"], stats["shadow"]["errors"]) == (3, 3)
+
+
+def test_copies_over_max_pending_are_dropped_instead_of_waiting(shadow):
+    release = threading.Event()
+
+    class BlockedRestClient(RestClientImpl):
+        def request(self, method, url, headers, data=None):
+            release.wait()
+            return super().request(method, url, headers, data)
+
+    mirror = ThreadPoolTrafficMirror(BlockedRestClient(), threads=1, max_pending=2)
+    primary, shadow_route = route_for("1.0", "http://primary.invalid"), route_for("2.0", shadow.url)
+
+    for _ in range(5):
+        mirror.mirror(primary, shadow_route, "GET", "items", None, 200, 1_000)
+    release.set()
+    mirror.flush()
+    mirror.close()
+
+    stats = mirror.stats(1, "1.0")
+    assert (stats["mirrored"], stats["dropped"]) == (2, 3)
+    assert len(shadow.requests) == 2
@@ -0,0 +1,193 @@
+"""
+Runs the same burst of calls to a slow local stub upstream through the
+blocking gateway, with a fixed pool of worker threads standing in for the
+WSGI server, and through the asyncio gateway, then prints throughput, tail
+latency and the most upstream calls held in flight at once.
+
+    python -m benchmarks.async_gateway_benchmark --calls 4000 --threads 64 --concurrency 2000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.impl.async_rest_client_impl import AiohttpRestClient
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.impl.concurrency_limiter_impl import GradientConcurrencyLimiter
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.key_principal_cache import KeyPrincipal, SubscriptionSnapshot
+from app.main.core.lib.route_table import Route
+from app.main.core.services.api_call_service import ApiCallService
+from app.main.core.services.async_api_call_service import AsyncApiCallService
+from app.test.fixtures.upstream_stub import UpstreamStub
+from benchmarks.gateway_pipeline_benchmark import (
+    API_KEY,
+    CountingQuotaMeter,
+    DiscardingRequestLog,
+)
+from benchmarks.priority_load_test import percentile
+
+UNBOUNDED = 10**6
+
+
+def components(upstream_url):
+    key_cache = InMemoryKeyPrincipalCache(ttl=3600)
+    route_table = InMemoryRouteTable(ttl=3600)
+    key_cache.store(
+        KeyPrincipal(
+            key=API_KEY,
+            status="active",
+            subscription=SubscriptionSnapshot(
+                id=1,
+                api_id=1,
+                user_id=1,
+                status="active",
+                end_date=datetime.now() + timedelta(days=1),
+                max_requests=10**9,
+            ),
+        )
+    )
+    route_table.store(
+        Route(
+            api_id=1,
+            version="1.0.0",
+            base_url=upstream_url,
+            api_status="active",
+            version_status="active",
+            headers={},
+        )
+    )
+    # leave concurrency to the execution model under test
+    return {
+        "route_table": route_table,
+        "key_cache": key_cache,
+        "quota_meter": CountingQuotaMeter(10**9),
+        "request_log": DiscardingRequestLog(),
+        "bulkhead": SemaphoreBulkhead(max_concurrent=UNBOUNDED),
+        "admission_scheduler": WeightedFairScheduler(capacity=UNBOUNDED),
+        "concurrency_limiter": GradientConcurrencyLimiter(
+            initial_limit=UNBOUNDED, max_limit=UNBOUNDED
+        ),
+    }
+
+
+class InFlight:
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def leave(self):
+        with self._lock:
+            self.current -= 1
+
+
+def run_sync(upstream_url, calls, threads):
+    service = ApiCallService(
+        rest_client=RestClientImpl(pool_maxsize=threads), **components(upstream_url)
+    )
+    in_flight = InFlight()
+
+    def call(number):
+        started = time.perf_counter()
+        in_flight.enter()
+        try:
+            service.call_get(1, "1.0.0", f"items/{number}", API_KEY)
+        finally:
+            in_flight.leave()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = list(pool.map(call, range(calls)))
+    return time.perf_counter() - started, latencies, in_flight.peak
+
+
+def run_async(upstream_url, calls, concurrency):
+    service = AsyncApiCallService(
+        app=Flask(__name__),
+        rest_client=AiohttpRestClient(limit=concurrency),
+        **components(upstream_url),
+    )
+    in_flight = InFlight()
+
+    async def burst():
+        slots = asyncio.Semaphore(concurrency)
+
+        async def call(number):
+            async with slots:
+                started = time.perf_counter()
+                in_flight.enter()
+                try:
+                    await service.call("GET", 1, "1.0.0", f"items/{number}", API_KEY)
+                finally:
+                    in_flight.leave()
+                return (time.perf_counter() - started) * 1000
+
+        try:
+            return await asyncio.gather(*(call(number) for number in range(calls)))
+        finally:
+            await service.close()
+
+    started = time.perf_counter()
+    latencies = asyncio.run(burst())
+    return time.perf_counter() - started, latencies, in_flight.peak
+
+
+def serve_upstream(delay, urls, stop):
+    # a process of its own, so the stub does not compete for the gateway's GIL
+    upstream = UpstreamStub().start()
+    upstream.delay = delay
+    urls.send(upstream.url)
+    stop.wait()
+    upstream.stop()
+
+
+def report(name, elapsed, latencies, peak):
+    print(
+        f"{name:<6} calls={len(latencies):<6} {len(latencies) / elapsed:8.1f} calls/s "
+        f"p50={percentile(latencies, 50):7.1f}ms "
+        f"p99={percentile(latencies, 99):7.1f}ms in flight={peak}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=4000)
+    parser.add_argument("--threads", type=int, default=64, help="blocking workers")
+    parser.add_argument("--concurrency", type=int, default=2000, help="async calls")
+    parser.add_argument("--upstream-delay", type=float, default=0.2)
+    args = parser.parse_args()
+
+    urls, upstream_urls = multiprocessing.Pipe()
+    stop = multiprocessing.Event()
+    upstream = multiprocessing.Process(
+        target=serve_upstream, args=(args.upstream_delay, upstream_urls, stop)
+    )
+    upstream.start()
+
+    try:
+        url = urls.recv()
+        report("sync", *run_sync(url, args.calls, args.threads))
+        report("async", *run_async(url, args.calls, args.concurrency))
+    finally:
+        stop.set()
+        upstream.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Measures what the staged gateway pipeline costs per call compared with the
+straight-line call_get that ApiCallService used before, with the upstream,
+quota meter and request log replaced by in-memory stand-ins so only the
+gateway's own work is timed. The pipeline is timed on one shared service,
+as the controller gets it from ServicesInitializer, and on a service
+rebuilt for every call, as the controller used to do. Also prints where
+the pipeline's time goes.
+
+The overhead is not negligible. On the machine this was written on, the
+straight-line GET took about 21 us, the pipeline GET about 48 us (+27 us,
+roughly 2.3x) and the rebuilt service about 68 us. Most of the difference
+is work the straight-line path never did: the concurrency limit,
+admission, bulkheads, load balancing and latency bookkeeping. It stays
+small next to upstream round trips measured in milliseconds.
+
+    python -m benchmarks.gateway_pipeline_benchmark --calls 5000 --repeats 20
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from app.main.core.lib.gateway_pipeline import GatewayContext
+from app.main.core.lib.impl.gateway_stages_impl import AuthStage
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.key_principal_cache import KeyPrincipal, SubscriptionSnapshot
+from app.main.core.lib.quota_meter import QuotaMeter
+from app.main.core.lib.request_log import RequestLog
+from app.main.core.lib.rest_client import RestClient
+from app.main.core.lib.route_table import Route
+from app.main.core.services.api_call_service import ApiCallService
+from app.main.utils.exceptions import BadRequestError
+
+API_KEY = "benchmark-key"
+
+
+class EchoRestClient(RestClient):
+    def get(self, url, headers):
+        return {"data": "benchmark"}, 200
+
+    def post(self, url, headers, data):
+        return {"data": "benchmark"}, 201
+
+    def is_connect_error(self, error):
+        return False
+
+
+class CountingQuotaMeter(QuotaMeter):
+    def __init__(self, quota: int):
+        self.remaining = quota
+
+    def reserve(self, subscription_id: int) -> int:
+        self.remaining -= 1
+        return self.remaining
+
+    def release(self, subscription_id: int):
+        self.remaining += 1
+
+    def flush(self):
+        pass
+
+
+class DiscardingRequestLog(RequestLog):
+    def write(self, record):
+        pass
+
+    def write_nowait(self, record):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def new_service(calls: int) -> ApiCallService:
+    key_cache = InMemoryKeyPrincipalCache(ttl=3600)
+    route_table = InMemoryRouteTable(ttl=3600)
+    key_cache.store(
+        KeyPrincipal(
+            key=API_KEY,
+            status="active",
+            subscription=SubscriptionSnapshot(
+                id=1,
+                api_id=1,
+                user_id=1,
+                status="active",
+                end_date=datetime.now() + timedelta(days=1),
+                max_requests=calls * 10,
+            ),
+        )
+    )
+    route_table.store(
+        Route(
+            api_id=1,
+            version="1.0.0",
+            base_url="http://upstream.invalid",
+            api_status="active",
+            version_status="active",
+            headers={"Authorization": "benchmark"},
+        )
+    )
+    return ApiCallService(
+        rest_client=EchoRestClient(),
+        route_table=route_table,
+        key_cache=key_cache,
+        quota_meter=CountingQuotaMeter(calls * 10),
+        request_log=DiscardingRequestLog(),
+    )
+
+
+def rebuilt_service(service: ApiCallService) -> ApiCallService:
+    # what the controller did on every call before the service was shared:
+    # a new service, pipeline and hedge pool around the process wide parts
+    return ApiCallService(
+        rest_client=service.rest_client,
+        route_table=service.route_table,
+        key_cache=service.key_cache,
+        quota_meter=service.quota_meter,
+        request_log=service.request_log,
+        response_cache=service.response_cache,
+        single_flight=service.single_flight,
+        circuit_breaker=service.circuit_breaker,
+        latency_histograms=service.latency_histograms,
+        upstream_histograms=service.upstream_histograms,
+        rate_limiter=service.rate_limiter,
+        gateway_resolver=service.gateway_resolver,
+        bulkhead=service.bulkhead,
+        admission_scheduler=service.admission_scheduler,
+        concurrency_limiter=service.concurrency_limiter,
+        retry_budget=service.retry_budget,
+        load_balancer=service.load_balancer,
+        traffic_mirror=service.traffic_mirror,
+    )
+
+
+def straight_line_get(service: ApiCallService, api_id, version, params, api_key):
+    # the body call_get had before the pipeline, minus the response cache branch
+    auth = next(
+        stage for stage in service.pipeline.stages if isinstance(stage, AuthStage)
+    )
+    auth.warm_caches(api_key, api_id, version)
+    principal = service.key_cache.get_principal(api_key)
+    if principal.status != "active":
+        raise BadRequestError("API key is not active")
+    subscription = principal.subscription
+    if subscription is None or subscription.api_id != api_id:
+        raise BadRequestError("Invalid subscription")
+    if subscription.status != "active":
+        raise BadRequestError("Subscription is not active")
+    if subscription.end_date < datetime.now():
+        raise BadRequestError("Subscription has expired")
+    if subscription.max_requests <= 0:
+        raise BadRequestError("Subscription has no requests left")
+    route = service.route_table.get_route(api_id, version)
+    headers = dict(route.headers)
+    request_url = f"{route.base_url}/{params}"
+    request_at = datetime.now()
+    started = time.monotonic()
+    remaining_requests = service.quota_meter.reserve(subscription.id)
+    try:
+        service.circuit_breaker.allow(api_id, version)
+        upstream_started = time.monotonic()
+        response, status = service.single_flight.do(
+            ("GET", request_url, tuple(sorted(headers.items()))),
+            lambda: service.rest_client.get(request_url, headers),
+        )
+        service.circuit_breaker.record(
+            api_id, version, status >= 500, time.monotonic() - upstream_started
+        )
+    except Exception:
+        service.quota_meter.release(subscription.id)
+        raise
+    response_time = int((time.monotonic() - started) * 1_000_000)
+    service.latency_histograms.record(api_id, version, response_time)
+    service.request_log.write(
+        {
+            "api_id": api_id,
+            "api_version": version,
+            "user_id": subscription.user_id,
+            "api_key": api_key,
+            "subscription_id": subscription.id,
+            "request_url": request_url,
+            "request_method": "GET",
+            "request_body": "",
+            "response_body": str(response),
+            "request_at": request_at,
+            "response_at": datetime.now(),
+            "response_time": response_time,
+            "http_status": status,
+        }
+    )
+    service.key_cache.record_remaining_requests(subscription.id, remaining_requests)
+    return response, status, {"X-Quota-Remaining": str(remaining_requests)}
+
+
+def measure(cases, calls, repeats):
+    # cases take turns so machine noise hits all of them alike, best run wins
+    best = dict.fromkeys(cases, float("inf"))
+    for _ in range(repeats):
+        for name, call in cases.items():
+            started = time.perf_counter()
+            for _ in range(calls):
+                call()
+            best[name] = min(best[name], time.perf_counter() - started)
+
+    micros = {}
+    for name, elapsed in best.items():
+        micros[name] = elapsed / calls * 1_000_000
+        print(f"{name:<32} {micros[name]:8.2f} us/call {calls / elapsed:10.0f} calls/s")
+    return micros
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    service = new_service(args.calls * args.repeats)
+
+    micros = measure(
+        {
+            "straight-line GET": lambda: straight_line_get(
+                service, 1, "1.0.0", "items", API_KEY
+            ),
+            # the controller asks ServicesInitializer for the shared service
+            "pipeline GET": lambda: service.call_get(1, "1.0.0", "items", API_KEY),
+            "rebuilt per call GET": lambda: rebuilt_service(service).call_get(
+                1, "1.0.0", "items", API_KEY
+            ),
+            "pipeline POST": lambda: service.call_post(
+                1, "1.0.0", "items", API_KEY, {"name": "x"}
+            ),
+        },
+        args.calls,
+        args.repeats,
+    )
+    for name in ("pipeline GET", "rebuilt per call GET"):
+        overhead = micros[name] - micros["straight-line GET"]
+        share = overhead / micros["straight-line GET"] * 100
+        print(f"{name + ' overhead':<32} {overhead:8.2f} us/call {share:+6.0f}%")
+
+    totals = dict.fromkeys(service.pipeline.stage_names(), 0.0)
+    for _ in range(args.calls):
+        context = service.pipeline.run(
+            GatewayContext("GET", 1, "1.0.0", "items", API_KEY)
+        )
+        for name, micros in context.timings.items():
+            totals[name] += micros
+    for name, micros in totals.items():
+        print(f"  {name:<18} {micros / args.calls:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Times how long a supplier waits for one page deep in a large request log,
+page 1000 by default: OFFSET pagination with the COUNT(*) every list
+endpoint ran, the same page without the count, and keyset pagination
+following the cursor a client walking the pages would hold.
+
+    python -m benchmarks.pagination_benchmark --rows 200000 --page 1000 --per-page 20
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from functools import partial
+from datetime import datetime, timedelta
+
+from flask import Flask
+from sqlalchemy import String, insert, type_coerce
+
+from app.main import db
+from app.main.core.lib.impl.paginator_impl import KeysetPaginator, encode_cursor
+from app.main.core.services.api_request_service import ApiRequestService
+from app.main.model.api_category_model import ApiCategory
+from app.main.model.api_model import ApiModel
+from app.main.model.api_request_model import ApiRequest
+from app.main.model.user_model import User
+from app.main.utils.roles import Role
+
+CHUNK = 10000
+
+
+def seed(rows):
+    supplier = User(
+        "Bench", "Supplier", "supplier@pagination.bench", "bench", Role.SUPPLIER
+    )
+    db.session.add(supplier)
+    db.session.flush()
+    category = ApiCategory(name="Bench", description="Bench", created_by=supplier.id)
+    db.session.add(category)
+    db.session.flush()
+    api = ApiModel(
+        name="Bench",
+        description="Bench",
+        category_id=category.id,
+        supplier_id=supplier.id,
+    )
+    db.session.add(api)
+    db.session.flush()
+
+    started_at = datetime(2024, 1, 1)
+    for start in range(0, rows, CHUNK):
+        db.session.execute(
+            insert(ApiRequest),
+            [
+                {
+                    "api_id": api.id,
+                    "api_version": "v1",
+                    "user_id": supplier.id,
+                    "request_url": "/bench",
+                    "request_method": "GET",
+                    "request_body": "",
+                    "response_body": "{}",
+                    "request_at": started_at + timedelta(seconds=index),
+                    "response_at": started_at + timedelta(seconds=index),
+                    "response_time": 1_000,
+                    "http_status": 200,
+                }
+                for index in range(start, min(rows, start + CHUNK))
+            ],
+        )
+    db.session.commit()
+
+    return supplier.id, api.id
+
+
+def cursor_before(api_id, page, per_page):
+    # the cursor the previous page handed out, found without timing it,
+    # holding the timestamp as stored like the paginator's cursors do
+    if page == 1:
+        return ""
+    last = (
+        db.session.query(type_coerce(ApiRequest.request_at, String), ApiRequest.id)
+        .filter(ApiRequest.api_id == api_id)
+        .order_by(ApiRequest.request_at.desc(), ApiRequest.id.desc())
+        .offset((page - 1) * per_page - 1)
+        .first()
+    )
+    return encode_cursor(last)
+
+
+def timed(call, repeats):
+    samples = []
+    for _ in range(repeats):
+        started_at = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started_at)
+    return statistics.median(samples) * 1000
+
+
+def run(database_uri, args):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = database_uri
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        try:
+            supplier_id, api_id = seed(args.rows)
+            service = ApiRequestService(paginator=KeysetPaginator())
+            cursor = cursor_before(api_id, args.page, args.per_page)
+
+            modes = [
+                ("offset + COUNT(*)", {"page": args.page}),
+                ("offset, no total", {"page": args.page, "count": "none"}),
+                ("keyset", {"cursor": cursor}),
+                ("keyset + estimate", {"cursor": cursor, "count": "estimate"}),
+            ]
+            for name, query_params in modes:
+                latency = timed(
+                    partial(
+                        service.get_api_requests,
+                        {**query_params, "per_page": args.per_page},
+                        supplier_id,
+                        api_id,
+                    ),
+                    args.repeats,
+                )
+                print(
+                    f"{name:<20} page {args.page:<6} {latency:10.2f} ms "
+                    f"median of {args.repeats}"
+                )
+        finally:
+            db.session.rollback()
+            db.drop_all()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--per-page", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument(
+        "--database-uri",
+        default=None,
+        help="Scratch database, a temporary SQLite file by default",
+    )
+    args = parser.parse_args()
+
+    if args.database_uri is not None:
+        run(args.database_uri, args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        run(f"sqlite:///{os.path.join(directory, 'pagination.db')}", args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Saturates the gateway with free, standard and premium subscribers calling a
+slow local stub upstream, then prints tail latency and shed calls per plan
+tier. The same load runs once with every tier weighted alike and once with
+the tier weights of the admission scheduler.
+
+    python -m benchmarks.priority_load_test --clients 12 --capacity 4
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.main.core.lib.admission_scheduler import TIERS
+from app.main.core.lib.impl.admission_scheduler_impl import WeightedFairScheduler
+from app.main.core.lib.impl.bulkhead_impl import SemaphoreBulkhead
+from app.main.core.lib.impl.key_principal_cache_impl import InMemoryKeyPrincipalCache
+from app.main.core.lib.impl.rest_client_impl import RestClientImpl
+from app.main.core.lib.impl.route_table_impl import InMemoryRouteTable
+from app.main.core.lib.key_principal_cache import KeyPrincipal, SubscriptionSnapshot
+from app.main.core.lib.route_table import Route
+from app.main.core.services.api_call_service import ApiCallService
+from app.main.utils.exceptions import ServiceUnavailableError
+from app.test.fixtures.upstream_stub import UpstreamStub
+from benchmarks.gateway_pipeline_benchmark import (
+    CountingQuotaMeter,
+    DiscardingRequestLog,
+)
+
+
+def new_service(upstream_url, scheduler):
+    key_cache = InMemoryKeyPrincipalCache(ttl=3600)
+    route_table = InMemoryRouteTable(ttl=3600)
+    for subscription_id, tier in enumerate(TIERS, start=1):
+        key_cache.store(
+            KeyPrincipal(
+                key=tier,
+                status="active",
+                subscription=SubscriptionSnapshot(
+                    id=subscription_id,
+                    api_id=1,
+                    user_id=subscription_id,
+                    status="active",
+                    end_date=datetime.now() + timedelta(days=1),
+                    max_requests=10**9,
+                    tier=tier,
+                ),
+            )
+        )
+    route_table.store(
+        Route(
+            api_id=1,
+            version="1.0.0",
+            base_url=upstream_url,
+            api_status="active",
+            version_status="active",
+            headers={},
+        )
+    )
+    return ApiCallService(
+        rest_client=RestClientImpl(pool_maxsize=64),
+        route_table=route_table,
+        key_cache=key_cache,
+        quota_meter=CountingQuotaMeter(10**9),
+        request_log=DiscardingRequestLog(),
+        # leave admission to the scheduler under test
+        bulkhead=SemaphoreBulkhead(max_concurrent=10**6),
+        admission_scheduler=scheduler,
+    )
+
+
+def percentile(latencies, quantile):
+    if not latencies:
+        return float("nan")
+    ordered = sorted(latencies)
+    return ordered[min(int(len(ordered) * quantile / 100), len(ordered) - 1)]
+
+
+def run(name, upstream, scheduler, clients, duration, retry_delay):
+    service = new_service(upstream.url, scheduler)
+    latencies = {tier: [] for tier in TIERS}
+    shed = dict.fromkeys(TIERS, 0)
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client(tier):
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                service.call_get(1, "1.0.0", "work", tier)
+            except ServiceUnavailableError:
+                with lock:
+                    shed[tier] += 1
+                # shed clients back off instead of spinning on the GIL
+                time.sleep(retry_delay)
+                continue
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies[tier].append(elapsed)
+
+    threads = [
+        threading.Thread(target=client, args=(tier,))
+        for tier in TIERS
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    print(name)
+    for tier in reversed(TIERS):
+        served = latencies[tier]
+        print(
+            f"  {tier:<9} served={len(served):<6} shed={shed[tier]:<6} "
+            f"p50={percentile(served, 50):7.1f}ms "
+            f"p95={percentile(served, 95):7.1f}ms "
+            f"p99={percentile(served, 99):7.1f}ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=12, help="clients per tier")
+    parser.add_argument("--capacity", type=int, default=4)
+    parser.add_argument("--max-queued", type=int, default=16)
+    parser.add_argument("--queue-timeout", type=float, default=1.0)
+    parser.add_argument("--upstream-delay", type=float, default=0.02)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--retry-delay", type=float, default=0.1)
+    args = parser.parse_args()
+
+    upstream = UpstreamStub().start()
+    upstream.delay = args.upstream_delay
+
+    try:
+        for name, weights in (
+            ("equal weights", {"free": 1, "standard": 1, "premium": 1}),
+            ("tier weights", {"free": 1, "standard": 4, "premium": 16}),
+        ):
+            run(
+                name,
+                upstream,
+                WeightedFairScheduler(
+                    capacity=args.capacity,
+                    max_queued=args.max_queued,
+                    queue_timeout=args.queue_timeout,
+                    weights=weights,
+                ),
+                args.clients,
+                args.duration,
+                args.retry_delay,
+            )
+    finally:
+        upstream.stop()
+
+
+if __name__ == "__main__":
+    main()
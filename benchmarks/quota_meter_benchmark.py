@@ -0,0 +1,124 @@
+"""
+Hammers one subscription from many threads and checks that every reservation
+is accounted for, comparing the old read-modify-write decrement with the
+conditional UPDATE and striped quota meters.
+
+    python -m benchmarks.quota_meter_benchmark --threads 16 --calls 200
+"""
+
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.main import create_app, db
+from app.main.core.lib.impl.quota_meter_impl import (
+    ConditionalUpdateQuotaMeter,
+    StripedQuotaMeter,
+)
+from app.main.model.api_subscription_model import ApiSubscription
+from app.main.utils.exceptions import BadRequestError
+
+
+def read_modify_write(subscription_id: int):
+    # the decrement ApiCallService used before the quota meter
+    subscription = ApiSubscription.query.filter_by(id=subscription_id).first()
+    subscription.max_requests -= 1
+    db.session.commit()
+
+
+def run(app, name, reserve, flush, threads, calls, quota):
+    with app.app_context():
+        subscription = ApiSubscription(
+            api_id=1,
+            plan_name="benchmark",
+            user_id=1,
+            start_date=datetime.now(),
+            end_date=datetime.now() + timedelta(days=1),
+            max_requests=quota,
+            status="active",
+        )
+        db.session.add(subscription)
+        db.session.commit()
+        subscription_id = subscription.id
+
+    accepted = []
+
+    def worker():
+        with app.app_context():
+            for _ in range(calls):
+                try:
+                    reserve(subscription_id)
+                    accepted.append(1)
+                except BadRequestError:
+                    pass
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    started_at = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    with app.app_context():
+        flush()
+    elapsed = time.perf_counter() - started_at
+
+    with app.app_context():
+        subscription = ApiSubscription.query.filter_by(id=subscription_id).first()
+        remaining = subscription.max_requests
+        db.session.delete(subscription)
+        db.session.commit()
+
+    expected = quota - len(accepted)
+    print(
+        f"{name:<20} accepted={len(accepted):<6} remaining={remaining:<6} "
+        f"expected={expected:<6} lost={remaining - expected:<6} "
+        f"{len(accepted) / elapsed:10.0f} reservations/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    quota = args.threads * args.calls
+
+    app = create_app("test")
+    with app.app_context():
+        db.create_all()
+
+    conditional_meter = ConditionalUpdateQuotaMeter()
+    striped_meter = StripedQuotaMeter()
+
+    run(
+        app,
+        "read-modify-write",
+        read_modify_write,
+        lambda: None,
+        args.threads,
+        args.calls,
+        quota,
+    )
+    run(
+        app,
+        "conditional update",
+        conditional_meter.reserve,
+        conditional_meter.flush,
+        args.threads,
+        args.calls,
+        quota,
+    )
+    run(
+        app,
+        "striped counter",
+        striped_meter.reserve,
+        striped_meter.flush,
+        args.threads,
+        args.calls,
+        quota,
+    )
+
+
+if __name__ == "__main__":
+    main()